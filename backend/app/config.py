@@ -12,6 +12,30 @@ class Settings(BaseSettings):
     
     # Base de datos
     database_url: str = "sqlite:///./data/piar.db"
+    # Aplicar migraciones pendientes al arrancar (en despliegue se ejecutan antes)
+    auto_migrate: bool = True
+    
+    # SQLite (perfil de producción, se aplica a cada conexión)
+    sqlite_wal: bool = True
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 65536  # 64MB
+    sqlite_mmap_size: int = 268435456  # 256MB
+    
+    # Cola de escritura (un único escritor con commits agrupados)
+    write_queue_max_batch: int = 64
+    write_queue_max_delay_ms: float = 0.0
+    
+    # Perfil SQL por petición (Server-Timing y log); una misma sentencia
+    # repetida estas veces en una petición se avisa como posible N+1
+    sql_n_plus_one_threshold: int = 5
+    # Consultas que tardan al menos esto se registran con su plan
+    # (GET /api/admin/consultas-lentas)
+    sql_slow_query_ms: float = 100.0
+    
+    # Métricas Prometheus en /api/metrics; con token, el scraper debe enviar
+    # "Authorization: Bearer <token>"
+    metrics_token: str = ""
     
     # Seguridad
     secret_key: str = "tu-clave-secreta-aqui"
@@ -33,8 +57,22 @@ class Settings(BaseSettings):
     smtp_sender_name: str = "PiarAPP"
     smtp_use_tls: bool = True
     
-    # Frontend
+    # Bandeja de salida de emails (app/services/email_outbox.py): mensajes por
+    # lote, conexiones SMTP simultáneas (reutilizadas entre mensajes),
+    # reintentos con espera exponencial, cada cuánto se revisan los vencidos y
+    # días que se guardan los ya enviados (0 = para siempre)
+    email_outbox_batch_size: int = 50
+    email_smtp_connections: int = 2
+    email_smtp_max_messages_per_connection: int = 100
+    email_smtp_timeout_seconds: float = 30.0
+    email_max_attempts: int = 6
+    email_retry_base_seconds: float = 30.0
+    email_outbox_poll_seconds: float = 10.0
+    email_outbox_retention_days: float = 30.0
+    
+    # Frontend (la de SystemConfig, si la hay, se cachea para los emails)
     frontend_url: str = "http://localhost:5173"
+    frontend_url_cache_ttl_seconds: float = 60.0
     
     # OpenClaw
     openclaw_api_key: str = ""
@@ -43,6 +81,12 @@ class Settings(BaseSettings):
     openclaw_username: str = ""
     openclaw_password: str = ""
     openclaw_login_url: str = "https://api.openclaw.example/v1/auth/login"
+    # Conexiones WebSocket persistentes con el gateway que comparten todas las
+    # peticiones (handshake una vez por conexión), pings de keepalive y
+    # tiempo máximo para abrir una
+    openclaw_ws_connections: int = 1
+    openclaw_ping_interval_seconds: float = 20.0
+    openclaw_connect_timeout_seconds: float = 10.0
     
     # OpenClaw Bot User (for initial setup)
     openclaw_botuser_id: str = ""
@@ -66,9 +110,29 @@ class Settings(BaseSettings):
     # Rutas
     upload_folder: str = "./uploads"
     max_upload_size: int = 5242880  # 5MB
+    max_foto_upload_size: int = 15728640  # 15MB: fotos de móvil sin reducir (se normalizan al subir)
+    blob_stream_chunk_size: int = 65536  # 64KB por trozo al subir y descargar archivos
+    
+    # Almacén de archivos (fotos de carnet, documentación)
+    blob_store_backend: str = "local"
+    blob_store_path: str = "./data/blobs"
+    blob_gc_grace_seconds: int = 3600  # margen antes de borrar archivos sin referencias
+    # Cache-Control de las descargas (siempre con ETag/Last-Modified para revalidar)
+    cache_control_fotos: str = "private, max-age=300"
+    cache_control_documentos: str = "private, no-cache"
+    # Fotos de carnet: lado mayor del original guardado y procesos de Pillow
+    foto_max_lado: int = 2048
+    image_workers: int = 2
     
     # Autenticación
     two_factor_enabled: bool = False
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: float = 60.0
+    membership_cache_size: int = 10000
+    membership_cache_ttl_seconds: float = 60.0
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 32
+    password_hash_retry_after_seconds: int = 2
     
     # Invitaciones
     invitation_token_expiry_days: int = 30
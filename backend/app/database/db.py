@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from app.config import settings
 
@@ -8,9 +9,51 @@ engine = create_engine(
     connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
 )
 
+
+def _configurar_sqlite(dbapi_connection, connection_record):
+    """Aplica los PRAGMA del perfil de producción a cada conexión SQLite nueva"""
+    cursor = dbapi_connection.cursor()
+    if settings.sqlite_wal:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    # cache_size negativo se interpreta en KiB en lugar de páginas
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _configurar_sqlite)
+
 # Crear session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    """Traduce la URL de BD al driver asíncrono equivalente (aiosqlite/asyncpg)"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:") or url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+
+# Engine asíncrono para rutas async def (no bloquea el event loop)
+async_engine = create_async_engine(_async_database_url(settings.database_url))
+
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _configurar_sqlite)
+
+# Session factory asíncrona. expire_on_commit=False evita lazy-loads
+# implícitos (no permitidos en AsyncSession) tras cada commit.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base para modelos
 Base = declarative_base()
 
@@ -24,35 +67,8 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Inicializar base de datos con datos por defecto"""
-    if engine.dialect.name != "sqlite":
-        return
-
-    with engine.begin() as connection:
-        result = connection.execute(text("PRAGMA table_info(clubes)"))
-        existing = {row[1] for row in result}
-
-        columnas = [
-            ("logo_url", "TEXT"),
-            ("color_primario", "VARCHAR(7) DEFAULT '#FF6B35'"),
-            ("color_secundario", "VARCHAR(7) DEFAULT '#004E89'"),
-            ("color_acento", "VARCHAR(7) DEFAULT '#F77F00'"),
-            ("favicon_url", "TEXT"),
-            ("pais", "VARCHAR(100)"),
-            ("region", "VARCHAR(100)"),
-            ("latitud", "FLOAT"),
-            ("longitud", "FLOAT"),
-            ("email_contacto", "VARCHAR(255)"),
-            ("telefono", "VARCHAR(20)"),
-            ("sitio_web", "VARCHAR(255)"),
-            ("redes_sociales", "TEXT"),
-            ("zona_horaria", "VARCHAR(50) DEFAULT 'Europe/Madrid'"),
-            ("idioma_por_defecto", "VARCHAR(10) DEFAULT 'es'"),
-            ("estado", "VARCHAR(20) DEFAULT 'inactivo'"),
-            ("settings", "TEXT"),
-        ]
-
-        for nombre, tipo in columnas:
-            if nombre not in existing:
-                connection.execute(text(f"ALTER TABLE clubes ADD COLUMN {nombre} {tipo}"))
+async def get_async_db():
+    """Dependency para obtener sesión asíncrona de BD en rutas async"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
@@ -0,0 +1,232 @@
+"""
+Runner de migraciones versionadas del esquema.
+
+Las migraciones viven en backend/migrations/ y se aplican en orden según su
+prefijo numérico (0001_..., 0002_...). Pueden ser:
+
+- .sql: sentencias separadas por ';' (se admiten triggers con BEGIN ... END;)
+- .py: módulo con una función upgrade(connection)
+
+Cada versión aplicada queda registrada en la tabla schema_migrations. El
+runner está pensado para ejecutarse una vez en el despliegue:
+
+    python -m app.database.migrations           # aplicar pendientes
+    python -m app.database.migrations status    # ver estado
+
+Todo el proceso corre en una única transacción bajo un lock de BD, así que
+varios procesos arrancando a la vez no compiten: el segundo espera y, cuando
+obtiene el lock, ya no encuentra nada pendiente.
+"""
+import importlib.util
+import logging
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import settings
+from app.database.db import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# Mientras un proceso migra, los demás esperan hasta este límite por el lock
+LOCK_TIMEOUT_MS = 10 * 60 * 1000
+# Clave arbitraria para pg_advisory_xact_lock
+PG_LOCK_ID = 72710001
+
+_PATRON_ARCHIVO = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+
+# Versión del esquema ya comprobada en este proceso (evita consultar en cada uso)
+_version_cacheada: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Migracion:
+    """Archivo de migración descubierto en disco"""
+    version: str
+    nombre: str
+    ruta: Path
+
+
+def descubrir_migraciones(directorio: Path = MIGRATIONS_DIR) -> List[Migracion]:
+    """Lista las migraciones del directorio ordenadas por versión"""
+    migraciones = []
+    for ruta in sorted(Path(directorio).iterdir()):
+        coincidencia = _PATRON_ARCHIVO.match(ruta.name)
+        if coincidencia:
+            migraciones.append(Migracion(coincidencia.group(1), coincidencia.group(2), ruta))
+
+    versiones = [m.version for m in migraciones]
+    duplicadas = {v for v in versiones if versiones.count(v) > 1}
+    if duplicadas:
+        raise ValueError(f"Versiones de migración duplicadas: {sorted(duplicadas)}")
+    return migraciones
+
+
+def ultima_version(directorio: Path = MIGRATIONS_DIR) -> Optional[str]:
+    """Versión más reciente disponible en disco"""
+    migraciones = descubrir_migraciones(directorio)
+    return migraciones[-1].version if migraciones else None
+
+
+def dividir_sql(script: str) -> List[str]:
+    """Divide un script SQL en sentencias completas (respeta bloques de triggers)"""
+    sentencias = []
+    actual = ""
+    for linea in script.splitlines(keepends=True):
+        actual += linea
+        if sqlite3.complete_statement(actual):
+            sentencias.append(actual.strip())
+            actual = ""
+
+    resto = "\n".join(
+        linea for linea in actual.splitlines() if not linea.strip().startswith("--")
+    ).strip()
+    if resto:
+        sentencias.append(resto)
+    return sentencias
+
+
+def _bloquear(conn: Connection) -> None:
+    """Toma el lock de migraciones dentro de la transacción actual"""
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql(f"PRAGMA busy_timeout={LOCK_TIMEOUT_MS}")
+        # BEGIN IMMEDIATE reserva el único escritor de SQLite hasta el commit
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    elif conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": PG_LOCK_ID})
+
+
+def _crear_tabla_versiones(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version VARCHAR(20) PRIMARY KEY, "
+        "nombre VARCHAR(255) NOT NULL, "
+        "aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+
+
+def _versiones_aplicadas(conn: Connection) -> set:
+    return {fila[0] for fila in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def _ejecutar(conn: Connection, migracion: Migracion) -> None:
+    if migracion.ruta.suffix == ".sql":
+        for sentencia in dividir_sql(migracion.ruta.read_text(encoding="utf-8")):
+            conn.exec_driver_sql(sentencia)
+        return
+
+    spec = importlib.util.spec_from_file_location(f"migracion_{migracion.version}", migracion.ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    modulo.upgrade(conn)
+
+
+def aplicar_migraciones(engine: Engine = None, directorio: Path = MIGRATIONS_DIR) -> List[str]:
+    """Aplica las migraciones pendientes bajo lock y devuelve las versiones aplicadas"""
+    global _version_cacheada
+
+    engine = engine or default_engine
+    migraciones = descubrir_migraciones(directorio)
+    aplicadas_ahora = []
+
+    with engine.connect() as conn:
+        try:
+            _bloquear(conn)
+            _crear_tabla_versiones(conn)
+            aplicadas = _versiones_aplicadas(conn)
+
+            for migracion in migraciones:
+                if migracion.version in aplicadas:
+                    continue
+                logger.info(f"Aplicando migración {migracion.version}_{migracion.nombre}")
+                _ejecutar(conn, migracion)
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, nombre) VALUES (:version, :nombre)"),
+                    {"version": migracion.version, "nombre": migracion.nombre}
+                )
+                aplicadas_ahora.append(migracion.version)
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if conn.dialect.name == "sqlite":
+                conn.exec_driver_sql(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+
+    if engine is default_engine:
+        _version_cacheada = migraciones[-1].version if migraciones else None
+    return aplicadas_ahora
+
+
+def version_actual(engine: Engine = None, refrescar: bool = False) -> Optional[str]:
+    """Versión de esquema aplicada en la BD (cacheada por proceso para el engine por defecto)"""
+    global _version_cacheada
+
+    engine = engine or default_engine
+    if engine is default_engine and _version_cacheada is not None and not refrescar:
+        return _version_cacheada
+
+    with engine.connect() as conn:
+        try:
+            version = conn.execute(text("SELECT MAX(version) FROM schema_migrations")).scalar()
+        except Exception:
+            # La tabla no existe todavía: BD sin migrar
+            version = None
+
+    if engine is default_engine:
+        _version_cacheada = version
+    return version
+
+
+def verificar_esquema(engine: Engine = None) -> None:
+    """Comprobación de arranque: migra (si auto_migrate) o falla si el esquema está atrasado"""
+    esperada = ultima_version()
+    if version_actual(engine) == esperada:
+        return
+
+    if settings.auto_migrate:
+        aplicadas = aplicar_migraciones(engine)
+        if aplicadas:
+            logger.info(f"Migraciones aplicadas al arrancar: {', '.join(aplicadas)}")
+        return
+
+    raise RuntimeError(
+        f"El esquema de BD está en la versión {version_actual(engine, refrescar=True)} "
+        f"y se esperaba {esperada}. Ejecuta: python -m app.database.migrations"
+    )
+
+
+def main(argv: List[str]) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    comando = argv[0] if argv else "upgrade"
+
+    if comando == "upgrade":
+        aplicadas = aplicar_migraciones()
+        print(f"Migraciones aplicadas: {', '.join(aplicadas) if aplicadas else 'ninguna (esquema al día)'}")
+        return 0
+
+    if comando == "status":
+        with default_engine.connect() as conn:
+            _crear_tabla_versiones(conn)
+            aplicadas = _versiones_aplicadas(conn)
+            conn.commit()
+        for migracion in descubrir_migraciones():
+            marca = "x" if migracion.version in aplicadas else " "
+            print(f"[{marca}] {migracion.version}_{migracion.nombre}")
+        return 0
+
+    print(f"Comando desconocido: {comando}. Usa 'upgrade' o 'status'.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,137 @@
+"""Cola de escritura con un único escritor y commits agrupados"""
+import asyncio
+import contextvars
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database.db import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Operación de escritura: recibe la sesión del escritor y NO hace commit
+WriteJob = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteQueue:
+    """Serializa las escrituras de la aplicación a través de un único escritor.
+
+    SQLite solo admite un escritor simultáneo, así que varias peticiones
+    escribiendo a la vez acaban en "database is locked". La cola ejecuta las
+    operaciones de una en una en el event loop y agrupa las que llegan juntas
+    en una misma transacción con un solo commit (group commit).
+
+    Si una operación del lote falla, se deshace el lote y cada operación se
+    reejecuta en su propia transacción, de modo que el error solo le llega a
+    quien la envió. Por eso las operaciones deben limitarse a leer y escribir
+    en la BD (sin efectos externos como enviar emails).
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        max_batch: Optional[int] = None,
+        max_delay_ms: Optional[float] = None
+    ):
+        self._session_factory = session_factory
+        self.max_batch = max_batch or settings.write_queue_max_batch
+        delay = settings.write_queue_max_delay_ms if max_delay_ms is None else max_delay_ms
+        self.max_delay = delay / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def pendientes(self) -> int:
+        """Operaciones encoladas que el escritor aún no ha tomado"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, job: WriteJob) -> Any:
+        """Encola una operación de escritura y espera a que su lote se confirme"""
+        self._asegurar_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((job, future))
+        return await future
+
+    async def close(self):
+        """Espera a que se vacíe la cola y detiene el escritor"""
+        if self._worker is None or self._worker.done():
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def _asegurar_worker(self):
+        # El escritor se arranca en el loop actual (uvicorn, tests...) la primera vez
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # Contexto vacío: el escritor no hereda las variables de contexto
+            # de la petición que lo arrancó (p.ej. su registro de consultas)
+            self._worker = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def _run(self):
+        while True:
+            lote = [await self._queue.get()]
+            self._drenar(lote)
+            if self.max_delay and len(lote) < self.max_batch:
+                await asyncio.sleep(self.max_delay)
+                self._drenar(lote)
+            try:
+                await self._procesar_lote(lote)
+            except Exception:
+                logger.exception("Error inesperado en la cola de escritura")
+            finally:
+                for _ in lote:
+                    self._queue.task_done()
+
+    def _drenar(self, lote: List[Tuple[WriteJob, asyncio.Future]]):
+        while len(lote) < self.max_batch and not self._queue.empty():
+            lote.append(self._queue.get_nowait())
+
+    async def _procesar_lote(self, lote: List[Tuple[WriteJob, asyncio.Future]]):
+        # Las peticiones canceladas mientras esperaban no se ejecutan
+        pendientes = [(job, future) for job, future in lote if not future.done()]
+        if not pendientes:
+            return
+
+        if len(pendientes) > 1:
+            try:
+                async with self._session_factory() as db:
+                    resultados = [await job(db) for job, _ in pendientes]
+                    await db.commit()
+            except Exception as e:
+                logger.warning(
+                    f"Lote de escritura fallido ({e!r}); reintentando {len(pendientes)} operaciones por separado"
+                )
+            else:
+                for (_, future), resultado in zip(pendientes, resultados):
+                    if not future.done():
+                        future.set_result(resultado)
+                return
+
+        for job, future in pendientes:
+            await self._procesar_una(job, future)
+
+    async def _procesar_una(self, job: WriteJob, future: asyncio.Future):
+        try:
+            async with self._session_factory() as db:
+                resultado = await job(db)
+                await db.commit()
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(resultado)
+
+
+# Instancia global usada por las rutas
+write_queue = WriteQueue()
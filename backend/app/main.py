@@ -1,4 +1,6 @@
-from fastapi import FastAPI
+import secrets
+
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
@@ -6,7 +8,16 @@ import os
 import logging
 
 from app.config import settings
-from app.database.db import engine, Base, init_db
+from app.database.db import async_engine, engine
+from app.database.migrations import verificar_esquema
+from app.database.write_queue import write_queue
+from app.services.email_outbox import enviador_emails
+from app.services.openclaw_service import openclaw_service
+from app.utils.password_hashing import PasswordPoolSaturado, password_pool
+from app.utils.imagenes import imagen_pool
+from app.middleware.consultas import ConsultasMiddleware, instrumentar
+from app.middleware.metricas import MetricasMiddleware, registrar_pools
+from app.utils.metricas import CONTENT_TYPE, IndicadorCalculado, registro
 
 # Configure logging
 logging.basicConfig(
@@ -18,13 +29,7 @@ logger = logging.getLogger(__name__)
 from app.routes import admin
 
 # Importar modelos para que SQLAlchemy los registre
-from app.models import usuario, club, socio, miembro_club, evento, noticia, votacion, invitacion, token_google, asistencia, comentario, instalacion, documentacion_reglamentaria, system_config, producto
-
-# Crear tablas en la base de datos
-Base.metadata.create_all(bind=engine)
-
-# Inicializar datos necesarios
-init_db()
+from app.models import usuario, club, socio, miembro_club, evento, noticia, votacion, invitacion, token_google, asistencia, comentario, instalacion, documentacion_reglamentaria, system_config, producto, blob, email_outbox
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -41,8 +46,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor de la página siguiente de los listados (app/utils/paginacion.py)
+    expose_headers=["X-Next-Cursor", "Link", "Server-Timing"],
 )
 
+# Consultas SQL por petición: Server-Timing, log y aviso de N+1
+instrumentar(engine, async_engine.sync_engine)
+app.add_middleware(ConsultasMiddleware)
+
+# Métricas Prometheus (GET /api/metrics)
+app.add_middleware(MetricasMiddleware)
+registrar_pools({"sync": engine, "async": async_engine.sync_engine})
+registro.registrar(IndicadorCalculado(
+    "piar_write_queue_depth", "Escrituras en la cola esperando al escritor", (),
+    lambda: [((), write_queue.pendientes)]
+))
+
 # Importar rutas
 from app.routes import auth, clubes, socios, noticias, eventos, votaciones, instalaciones, documentacion, productos, chat, dashboard
 
@@ -61,6 +80,24 @@ app.include_router(chat.router, prefix="/api", tags=["Chat"])
 app.include_router(dashboard.router, prefix="/api", tags=["Dashboard"])
 
 
+@app.on_event("startup")
+def startup_event():
+    """Comprobar la versión del esquema (las migraciones se aplican en el despliegue)"""
+    verificar_esquema()
+    # Emails que quedaron en la bandeja de salida de la ejecución anterior
+    enviador_emails.iniciar()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Vaciar la cola de escritura antes de apagar"""
+    await enviador_emails.close()
+    await openclaw_service.close()
+    await write_queue.close()
+    password_pool.close()
+    imagen_pool.close()
+
+
 @app.get("/")
 async def root():
     """Endpoint raíz de la API"""
@@ -77,6 +114,18 @@ async def health_check():
     return {"status": "healthy", "service": settings.app_name}
 
 
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Métricas en el formato de texto de Prometheus"""
+    if settings.metrics_token:
+        autorizacion = request.headers.get("Authorization", "")
+        if not autorizacion.startswith("Bearer "):
+            raise HTTPException(status_code=401, detail="Token de métricas requerido")
+        if not secrets.compare_digest(autorizacion[len("Bearer "):], settings.metrics_token):
+            raise HTTPException(status_code=403, detail="Token de métricas no válido")
+    return Response(registro.exponer(), media_type=CONTENT_TYPE)
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc: RequestValidationError):
     """Handle Pydantic validation errors with detailed information"""
@@ -93,6 +142,17 @@ async def validation_exception_handler(request, exc: RequestValidationError):
     )
 
 
+@app.exception_handler(PasswordPoolSaturado)
+async def password_pool_saturado_handler(request, exc: PasswordPoolSaturado):
+    """Demasiados logins/registros simultáneos: pedir al cliente que reintente"""
+    logger.warning(f"Pool de bcrypt saturado en {request.url.path}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, inténtalo de nuevo en unos segundos"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Global exception handler"""
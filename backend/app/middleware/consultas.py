@@ -0,0 +1,151 @@
+"""Perfil de las consultas SQL de cada petición.
+
+Los eventos de SQLAlchemy (before/after_cursor_execute) de los engines de la
+aplicación apuntan cada consulta en el registro de la petición en curso, que
+viaja en una ContextVar (llega también a las sesiones síncronas y al greenlet
+de las asíncronas). Al responder, el middleware añade la cabecera
+Server-Timing con el número de consultas y su tiempo, lo deja en el log y
+avisa de las sentencias que se repiten muchas veces en la misma petición:
+casi siempre es un N+1 (una consulta por cada elemento de un listado). Las
+que superan SQL_SLOW_QUERY_MS van además a app.middleware.consultas_lentas.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.middleware.consultas_lentas import consultas_lentas
+from app.middleware.metricas import plantilla_ruta
+from app.utils.metricas import HTTP_CONSULTAS, SQL_DURACION
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RegistroConsultas:
+    """Consultas SQL lanzadas durante una petición"""
+    metodo: str
+    ruta: str
+    total: int = 0
+    segundos: float = 0.0
+    sentencias: Counter = field(default_factory=Counter)
+    scope: Optional[Scope] = field(default=None, repr=False, compare=False)
+
+    def repetidas(self, umbral: int) -> List[Tuple[str, int]]:
+        """Sentencias (sin parámetros) ejecutadas al menos umbral veces"""
+        return [(sql, veces) for sql, veces in self.sentencias.most_common() if veces >= umbral]
+
+    def llamador(self) -> str:
+        """Método y plantilla de la ruta (el router ya la ha resuelto al llegar las consultas)"""
+        return f"{self.metodo} {plantilla_ruta(self.scope) if self.scope is not None else self.ruta}"
+
+    def describir(self) -> str:
+        return f"{self.total} consulta{'' if self.total == 1 else 's'}"
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.segundos * 1000:.1f};desc="{self.describir()}"'
+
+
+_registro: ContextVar[Optional[RegistroConsultas]] = ContextVar("registro_consultas", default=None)
+_observadores: List[Callable[[RegistroConsultas], None]] = []
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._inicio_consulta = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_inicio_consulta", None)
+    if inicio is None:
+        return
+    segundos = time.perf_counter() - inicio
+    # El histograma global cuenta todas las consultas, también las de fuera
+    # de una petición (migraciones, cola de escritura, tareas)
+    SQL_DURACION.observar(segundos)
+    registro = _registro.get()
+    if segundos * 1000 >= settings.sql_slow_query_ms:
+        llamador = registro.llamador() if registro is not None else "(fuera de una petición)"
+        consultas_lentas.anotar(conn, statement, parameters, executemany, segundos, llamador)
+    if registro is None:
+        return
+    registro.total += 1
+    registro.segundos += segundos
+    registro.sentencias[" ".join(statement.split())] += 1
+
+
+def instrumentar(*engines) -> None:
+    """Engancha el contador a los engines (una vez por engine)"""
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _antes_de_ejecutar):
+            event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+            event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+
+
+@contextmanager
+def observar_peticiones() -> Iterator[List[RegistroConsultas]]:
+    """Lista que se va llenando con el registro de cada petición que termina (para tests)"""
+    registros: List[RegistroConsultas] = []
+    _observadores.append(registros.append)
+    try:
+        yield registros
+    finally:
+        _observadores.remove(registros.append)
+
+
+class ConsultasMiddleware:
+    """Cuenta las consultas de cada petición HTTP y las publica en Server-Timing"""
+
+    def __init__(self, app: ASGIApp, umbral_repetidas: Optional[int] = None):
+        self.app = app
+        self.umbral_repetidas = (
+            umbral_repetidas if umbral_repetidas is not None else settings.sql_n_plus_one_threshold
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registro = RegistroConsultas(scope["method"], scope["path"], scope=scope)
+        inicio = time.perf_counter()
+        estado = None
+
+        async def enviar(message: Message) -> None:
+            nonlocal estado
+            if message["type"] == "http.response.start":
+                estado = message["status"]
+                # Las consultas de un cuerpo en streaming llegan tarde a la
+                # cabecera, pero sí cuentan en el log
+                cabeceras = MutableHeaders(scope=message)
+                cabeceras.append("Server-Timing", registro.server_timing())
+                cabeceras.append("Server-Timing", f"app;dur={(time.perf_counter() - inicio) * 1000:.1f}")
+            await send(message)
+
+        token = _registro.set(registro)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _registro.reset(token)
+            HTTP_CONSULTAS.observar(registro.total, registro.metodo, plantilla_ruta(scope))
+            self._informar(registro, estado, time.perf_counter() - inicio)
+
+    def _informar(self, registro: RegistroConsultas, estado: Optional[int], segundos: float) -> None:
+        logger.info(
+            f"{registro.metodo} {registro.ruta} {estado}: {registro.describir()} SQL "
+            f"({registro.segundos * 1000:.1f} ms de {segundos * 1000:.1f} ms)"
+        )
+        for sql, veces in registro.repetidas(self.umbral_repetidas):
+            logger.warning(
+                f"Posible N+1 en {registro.metodo} {registro.ruta}: {veces} veces la misma consulta: {sql[:300]}"
+            )
+        for observador in list(_observadores):
+            observador(registro)
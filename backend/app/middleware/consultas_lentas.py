@@ -0,0 +1,157 @@
+"""Registro de consultas SQL lentas agrupadas por huella.
+
+Cada sentencia que supera SQL_SLOW_QUERY_MS (los eventos de SQLAlchemy de
+app.middleware.consultas la traen aquí) se agrupa por su huella: el SQL
+normalizado, sin literales y con las listas IN (?, ?, ...) plegadas, para que
+la misma consulta con distintos valores o tamaños cuente junta. La primera vez
+que se ve una huella se guarda su EXPLAIN QUERY PLAN, lanzado sobre la misma
+conexión con los mismos parámetros. Todo queda en memoria (un proceso, hasta
+reiniciar) y se consulta en GET /api/admin/consultas-lentas.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Huellas distintas que se guardan como mucho; las nuevas a partir de ahí solo se cuentan
+LIMITE_HUELLAS = 500
+
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar(sql: str) -> str:
+    """Huella de una sentencia: sin literales, listas IN plegadas y espacios simples"""
+    sql = _CADENAS.sub("?", sql)
+    sql = _NUMEROS.sub("?", sql)
+    sql = _ESPACIOS.sub(" ", sql).strip()
+    return _LISTAS.sub("(?, ...)", sql)
+
+
+def forma_parametros(parametros: Any, executemany: bool = False) -> str:
+    """Tipos de los parámetros ligados, sin sus valores: (int, str, NoneType)"""
+    if executemany and isinstance(parametros, (list, tuple)):
+        filas = list(parametros)
+        return f"{len(filas)} x {forma_parametros(filas[0])}" if filas else "[]"
+    if isinstance(parametros, dict):
+        return "{" + ", ".join(f"{clave}: {type(valor).__name__}" for clave, valor in parametros.items()) + "}"
+    if isinstance(parametros, (list, tuple)):
+        tipos = [type(valor).__name__ for valor in parametros]
+        # Un IN largo repite el mismo tipo: se resume
+        if len(tipos) > 5 and len(set(tipos)) == 1:
+            return f"({tipos[0]} x {len(tipos)})"
+        return "(" + ", ".join(tipos) + ")"
+    return "()" if parametros is None else type(parametros).__name__
+
+
+def plan_de_consulta(conn, sql: str, parametros: Any) -> List[str]:
+    """EXPLAIN QUERY PLAN de SQLite como árbol indentado (vacío si no se puede)"""
+    if conn.dialect.name != "sqlite":
+        return []
+    # Cursor aparte sobre la misma conexión DBAPI (vale también para
+    # aiosqlite, porque el evento corre dentro del greenlet de SQLAlchemy)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parametros or ())
+        filas = cursor.fetchall()
+    except Exception as e:
+        return [f"(sin plan: {e})"]
+    finally:
+        cursor.close()
+
+    profundidad: Dict[int, int] = {0: -1}
+    lineas = []
+    for id_, padre, _, detalle in filas:
+        profundidad[id_] = profundidad.get(padre, -1) + 1
+        lineas.append("  " * profundidad[id_] + detalle)
+    return lineas
+
+
+@dataclass
+class HuellaLenta:
+    """Consultas lentas con la misma huella"""
+    sql: str
+    parametros: str
+    plan: List[str]
+    veces: int = 0
+    segundos_total: float = 0.0
+    segundos_max: float = 0.0
+    llamadores: Counter = field(default_factory=Counter)
+    primera_vez: float = field(default_factory=time.time)
+    ultima_vez: float = field(default_factory=time.time)
+
+    def resumen(self) -> Dict[str, Any]:
+        return {
+            "sql": self.sql,
+            "parametros": self.parametros,
+            "veces": self.veces,
+            "total_ms": round(self.segundos_total * 1000, 2),
+            "media_ms": round(self.segundos_total * 1000 / self.veces, 2),
+            "max_ms": round(self.segundos_max * 1000, 2),
+            "llamadores": dict(self.llamadores.most_common(5)),
+            "plan": self.plan,
+            "primera_vez": self.primera_vez,
+            "ultima_vez": self.ultima_vez,
+        }
+
+
+class RegistroConsultasLentas:
+    ORDENES = {
+        "total": lambda h: h.segundos_total,
+        "max": lambda h: h.segundos_max,
+        "veces": lambda h: h.veces,
+    }
+
+    def __init__(self, limite: int = LIMITE_HUELLAS):
+        self.limite = limite
+        self.descartadas = 0
+        self._huellas: Dict[str, HuellaLenta] = {}
+        self._lock = threading.Lock()
+
+    def anotar(self, conn, sql: str, parametros: Any, executemany: bool, segundos: float, llamador: str) -> None:
+        huella_sql = normalizar(sql)
+        forma = forma_parametros(parametros, executemany)
+        with self._lock:
+            huella = self._huellas.get(huella_sql)
+        if huella is None:
+            if len(self._huellas) >= self.limite:
+                self.descartadas += 1
+                return
+            # El plan se pide fuera del lock: es una consulta a la BD
+            plan = [] if executemany else plan_de_consulta(conn, sql, parametros)
+            with self._lock:
+                huella = self._huellas.setdefault(huella_sql, HuellaLenta(huella_sql, forma, plan))
+            if plan:
+                logger.warning(f"Plan de la consulta lenta {huella_sql[:300]}:\n" + "\n".join(plan))
+
+        with self._lock:
+            huella.veces += 1
+            huella.segundos_total += segundos
+            huella.segundos_max = max(huella.segundos_max, segundos)
+            huella.llamadores[llamador] += 1
+            huella.ultima_vez = time.time()
+        logger.warning(f"Consulta lenta ({segundos * 1000:.1f} ms) en {llamador}: {huella_sql[:300]} {forma}")
+
+    def top(self, limite: int = 20, orden: str = "total") -> List[Dict[str, Any]]:
+        """Las huellas más lentas según el orden (total, max o veces)"""
+        with self._lock:
+            huellas = sorted(self._huellas.values(), key=self.ORDENES[orden], reverse=True)[:limite]
+            return [huella.resumen() for huella in huellas]
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._huellas.clear()
+            self.descartadas = 0
+
+    def __len__(self) -> int:
+        return len(self._huellas)
+
+
+consultas_lentas = RegistroConsultasLentas()
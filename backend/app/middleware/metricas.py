@@ -0,0 +1,84 @@
+"""Métricas HTTP por plantilla de ruta (Prometheus, ver app.utils.metricas).
+
+Las peticiones se agrupan por la plantilla de la ruta que las atendió
+(/api/clubes/{club_id}/noticias), no por la URL: con la URL cada id sería
+una serie nueva. La plantilla sale del endpoint que el router de Starlette
+deja en el scope, con un dict endpoint -> plantilla que se llena la primera
+vez que se ve cada endpoint.
+"""
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metricas import HTTP_DURACION, HTTP_EN_CURSO, HTTP_PETICIONES, IndicadorCalculado, registro
+
+SIN_RUTA = "unmatched"
+
+_plantillas: Dict[object, str] = {}
+
+
+def plantilla_ruta(scope: Scope) -> str:
+    """Plantilla de la ruta que atendió la petición (SIN_RUTA si ninguna)"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return SIN_RUTA
+    plantilla = _plantillas.get(endpoint)
+    if plantilla is None:
+        router = scope.get("router")
+        plantilla = next(
+            (ruta.path for ruta in getattr(router, "routes", ()) if getattr(ruta, "endpoint", None) is endpoint),
+            SIN_RUTA
+        )
+        _plantillas[endpoint] = plantilla
+    return plantilla
+
+
+class MetricasMiddleware:
+    """Cuenta y cronometra cada petición HTTP por método, ruta y estado"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = 500
+
+        async def enviar(message: Message) -> None:
+            nonlocal estado
+            if message["type"] == "http.response.start":
+                estado = message["status"]
+            await send(message)
+
+        HTTP_EN_CURSO.inc()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            HTTP_EN_CURSO.dec()
+            etiquetas = (scope["method"], plantilla_ruta(scope), str(estado))
+            HTTP_PETICIONES.inc(*etiquetas)
+            HTTP_DURACION.observar(time.perf_counter() - inicio, *etiquetas)
+
+
+def registrar_pools(engines: Dict[str, object]) -> None:
+    """Indicadores del pool de conexiones de cada engine ({nombre: engine}).
+
+    Los pools sin estado (NullPool abre una conexión por uso) no publican nada.
+    """
+
+    def estado() -> Iterable[Tuple[Tuple[str, str], float]]:
+        for nombre, engine in engines.items():
+            pool = engine.pool
+            for clave, metodo in (("size", "size"), ("checked_out", "checkedout"), ("idle", "checkedin"), ("overflow", "overflow")):
+                valor: Optional[int] = getattr(pool, metodo, lambda: None)()
+                if valor is not None:
+                    # QueuePool.overflow() empieza en -size: solo interesan las conexiones de más
+                    yield (nombre, clave), max(valor, 0)
+
+    registro.registrar(IndicadorCalculado(
+        "piar_db_pool_connections", "Conexiones del pool de la BD por estado", ("engine", "state"), estado
+    ))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database.db import Base
@@ -17,6 +17,8 @@ class AsistenciaEvento(Base):
     
     fecha_registro = Column(DateTime, server_default=func.now())
     fecha_actualizacion = Column(DateTime, onupdate=func.now())
+    # Momento de entrada en lista de espera: fija el orden (FIFO) de promoción
+    fecha_lista_espera = Column(DateTime, nullable=True)
     
     # Relaciones
     evento = relationship("Evento", backref="asistencias")
@@ -25,6 +27,8 @@ class AsistenciaEvento(Base):
     # Un usuario solo puede tener un registro por evento
     __table_args__ = (
         UniqueConstraint('evento_id', 'usuario_id', name='uq_asistencia_evento_usuario'),
+        # Plazas ocupadas y lista de espera en orden de llegada (migración 0009)
+        Index('ix_asistencias_eventos_evento_estado', 'evento_id', 'estado', 'fecha_lista_espera'),
     )
 
     def __repr__(self):
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, text
+from sqlalchemy.sql import func
+from app.database.db import Base
+
+
+class Blob(Base):
+    """Archivo del almacén direccionado por contenido (fotos, PDFs).
+
+    El contenido vive fuera de la BD (ver app.utils.blob_store); aquí solo
+    queda su hash y cuántas filas lo referencian. Los archivos sin
+    referencias los borra BlobService.recolectar pasado un margen.
+    """
+
+    __tablename__ = "blobs"
+    # Candidatos de la recolección (migración 0009)
+    __table_args__ = (
+        Index("ix_blobs_sin_referencias", "fecha_actualizacion", sqlite_where=text("referencias <= 0")),
+    )
+
+    sha256 = Column(String(64), primary_key=True)
+    tamano = Column(Integer, nullable=False)
+    referencias = Column(Integer, nullable=False, default=0, server_default="0")
+
+    fecha_creacion = Column(DateTime, server_default=func.now())
+    fecha_actualizacion = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<Blob {self.sha256[:12]} refs={self.referencias}>"
+
+
+class BlobVariante(Base):
+    """Versión derivada de un archivo del almacén (p.ej. la miniatura de 256 px en WebP).
+
+    Se genera una sola vez por contenido: socios con la misma foto comparten
+    sus miniaturas. Cada variante es a su vez un Blob con su referencia, que
+    se suelta cuando se recolecta el archivo de origen.
+    """
+
+    __tablename__ = "blob_variantes"
+
+    sha256_origen = Column(String(64), primary_key=True)
+    variante = Column(String(20), primary_key=True)  # "{lado}.{formato}", p.ej. "256.webp"
+    sha256 = Column(String(64), nullable=False)
+    tamano = Column(Integer, nullable=False)
+    mime = Column(String(100), nullable=False)
+
+    fecha_creacion = Column(DateTime, server_default=func.now())
+
+    def __repr__(self):
+        return f"<BlobVariante {self.sha256_origen[:12]} {self.variante}>"
@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.db import Base
 
 class Comentario(Base):
     __tablename__ = "comentarios"
+    # Paginación por cursor del listado (migración 0008)
+    __table_args__ = (Index("ix_comentarios_noticia_fecha_creacion", "noticia_id", "fecha_creacion"),)
 
     id = Column(Integer, primary_key=True, index=True)
     contenido = Column(Text, nullable=False)
@@ -1,10 +1,16 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.database.db import Base
 
 
 class DocumentacionReglamentaria(Base):
-    """Documentacion reglamentaria del socio por club."""
+    """Documentacion reglamentaria del socio por club.
+
+    Los archivos viven en el almacén de archivos (ver app.utils.blob_store);
+    aquí quedan su hash, tamano y tipo MIME. Las columnas *_archivo son el
+    formato antiguo (archivo dentro de la BD), diferidas y pendientes de migrar.
+    """
 
     __tablename__ = "documentacion_reglamentaria"
 
@@ -15,7 +21,9 @@ class DocumentacionReglamentaria(Base):
     rc_numero = Column(String(100), nullable=True)
     rc_fecha_emision = Column(DateTime, nullable=True)
     rc_fecha_vencimiento = Column(DateTime, nullable=True)
-    rc_archivo = Column(LargeBinary, nullable=True)
+    rc_archivo = deferred(Column(LargeBinary, nullable=True))
+    rc_archivo_sha256 = Column(String(64), nullable=True)
+    rc_archivo_tamano = Column(Integer, nullable=True)
     rc_archivo_nombre = Column(String(255), nullable=True)
     rc_archivo_mime = Column(String(100), nullable=True)
 
@@ -23,7 +31,9 @@ class DocumentacionReglamentaria(Base):
     carnet_numero = Column(String(100), nullable=True)
     carnet_fecha_emision = Column(DateTime, nullable=True)
     carnet_fecha_vencimiento = Column(DateTime, nullable=True)
-    carnet_archivo = Column(LargeBinary, nullable=True)
+    carnet_archivo = deferred(Column(LargeBinary, nullable=True))
+    carnet_archivo_sha256 = Column(String(64), nullable=True)
+    carnet_archivo_tamano = Column(Integer, nullable=True)
     carnet_archivo_nombre = Column(String(255), nullable=True)
     carnet_archivo_mime = Column(String(100), nullable=True)
 
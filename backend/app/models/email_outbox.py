@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.database.db import Base
+
+
+class EmailOutbox(Base):
+    """Email pendiente de enviar (bandeja de salida, ver app.services.email_outbox).
+
+    Estados: 'pendiente' (esperando a proximo_intento), 'enviando' (reservado
+    por el enviador hasta proximo_intento), 'enviado' y 'fallido' (agotados
+    los reintentos o rechazado de forma permanente por el servidor SMTP).
+    """
+
+    __tablename__ = "email_outbox"
+    # Mensajes a enviar por orden de vencimiento (migración 0010) y enviados
+    # a purgar por antigüedad (migración 0013)
+    __table_args__ = (
+        Index("ix_email_outbox_estado_proximo_intento", "estado", "proximo_intento"),
+        Index("ix_email_outbox_estado_fecha_envio", "estado", "fecha_envio"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    destinatario = Column(String(255), nullable=False)
+    asunto = Column(String(500), nullable=False)
+    cuerpo_html = Column(Text, nullable=False)
+    cuerpo_texto = Column(Text, nullable=True)  # parte text/plain (migración 0011)
+
+    estado = Column(String(20), nullable=False, default="pendiente", server_default="pendiente")
+    intentos = Column(Integer, nullable=False, default=0, server_default="0")
+    proximo_intento = Column(DateTime, nullable=False)
+    ultimo_error = Column(Text, nullable=True)
+
+    fecha_creacion = Column(DateTime, server_default=func.now())
+    fecha_envio = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<EmailOutbox {self.id} {self.destinatario} {self.estado}>"
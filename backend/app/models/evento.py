@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.sql import func
 from app.database.db import Base
 
@@ -7,9 +7,11 @@ class Evento(Base):
     """Eventos del club - específico por club"""
     
     __tablename__ = "eventos"
+    # Paginación por cursor del listado (migración 0008)
+    __table_args__ = (Index("ix_eventos_club_fecha_inicio", "club_id", "fecha_inicio"),)
     
     id = Column(Integer, primary_key=True, index=True)
-    club_id = Column(Integer, ForeignKey("clubes.id"), index=True, nullable=False)
+    club_id = Column(Integer, ForeignKey("clubes.id"), nullable=False)
     
     nombre = Column(String(255), nullable=False)
     descripcion = Column(Text, nullable=True)
@@ -27,6 +29,11 @@ class Evento(Base):
     # Aforo
     aforo_maximo = Column(Integer, nullable=True)
     
+    # Contadores de asistencia por estado (desnormalizados, los mantiene registrar_asistencia)
+    inscritos_count = Column(Integer, nullable=False, default=0, server_default="0")
+    lista_espera_count = Column(Integer, nullable=False, default=0, server_default="0")
+    cancelados_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Requisitos
     requisitos = Column(JSON, nullable=True)  # {carnet_vigente, seguro, especialidad, etc}
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.db import Base
@@ -7,9 +7,14 @@ class ContrasenaInstalacion(Base):
     """Historial de contraseñas de las instalaciones del club"""
     
     __tablename__ = "contrasena_instalaciones"
+    # Historial paginado (migración 0008) y contraseña activa (0009)
+    __table_args__ = (
+        Index("ix_contrasena_instalaciones_club_fecha_creacion", "club_id", "fecha_creacion"),
+        Index("ix_contrasena_instalaciones_club_activa_fecha", "club_id", "activa", "fecha_creacion"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    club_id = Column(Integer, ForeignKey("clubes.id"), index=True, nullable=False)
+    club_id = Column(Integer, ForeignKey("clubes.id"), nullable=False)
     
     codigo = Column(String(100), nullable=False)
     descripcion = Column(String(255), nullable=True) # Por si hay varias puertas o notas
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.db import Base
@@ -8,9 +8,14 @@ class Invitacion(Base):
     """Invitaciones a clubes - sistema cerrado controlado por admin"""
     
     __tablename__ = "invitaciones"
+    # Paginación del listado (migración 0008) e invitaciones por estado (0009)
+    __table_args__ = (
+        Index("ix_invitaciones_club_fecha_creacion", "club_id", "fecha_creacion"),
+        Index("ix_invitaciones_club_estado", "club_id", "estado"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    club_id = Column(Integer, ForeignKey("clubes.id"), index=True, nullable=False)
+    club_id = Column(Integer, ForeignKey("clubes.id"), nullable=False)
     
     club = relationship("Club", backref="invitaciones")
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.db import Base
@@ -8,9 +8,14 @@ class MiembroClub(Base):
     """Relación Usuario-Club con roles específicos por club"""
     
     __tablename__ = "miembro_club"
+    # Paginación del listado (migración 0008) y membresías del usuario (0009)
+    __table_args__ = (
+        Index("ix_miembro_club_club_estado", "club_id", "estado"),
+        Index("ix_miembro_club_usuario_club_estado", "usuario_id", "club_id", "estado"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    usuario_id = Column(Integer, ForeignKey("usuarios.id"), index=True, nullable=False)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
     club_id = Column(Integer, ForeignKey("clubes.id"), index=True, nullable=False)
     
     # Relaciones
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.db import Base
@@ -8,9 +8,11 @@ class Noticia(Base):
     """Noticias y anuncios del club - específico por club"""
     
     __tablename__ = "noticias"
+    # Paginación por cursor del listado (migración 0008)
+    __table_args__ = (Index("ix_noticias_club_fecha_creacion", "club_id", "fecha_creacion"),)
     
     id = Column(Integer, primary_key=True, index=True)
-    club_id = Column(Integer, ForeignKey("clubes.id"), index=True, nullable=False)
+    club_id = Column(Integer, ForeignKey("clubes.id"), nullable=False)
     
     titulo = Column(String(255), nullable=False)
     contenido = Column(Text, nullable=False)
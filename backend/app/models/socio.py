@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text, LargeBinary
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.database.db import Base
 
@@ -22,8 +23,12 @@ class Socio(Base):
     # Especialidades
     especialidades = Column(JSON, nullable=True)  # array de especialidades
     
-    # Foto de carnet (almacenada como binario para MVP)
-    foto_carnet_blob = Column(LargeBinary, nullable=True)
+    # Foto de carnet en el almacén de archivos (ver app.utils.blob_store)
+    foto_carnet_sha256 = Column(String(64), nullable=True)
+    foto_carnet_tamano = Column(Integer, nullable=True)
+    # Legado: fotos guardadas dentro de la BD, pendientes de mover al almacén.
+    # Diferida: solo se lee al descargarla.
+    foto_carnet_blob = deferred(Column(LargeBinary, nullable=True))
     foto_carnet_mime = Column(String(100), nullable=True)
     foto_carnet_fecha_subida = Column(DateTime, nullable=True)
     
@@ -35,5 +40,9 @@ class Socio(Base):
     fecha_creacion = Column(DateTime, server_default=func.now())
     fecha_actualizacion = Column(DateTime, onupdate=func.now())
     
+    @property
+    def tiene_foto(self) -> bool:
+        return self.foto_carnet_tamano is not None
+    
     def __repr__(self):
         return f"<Socio {self.nombre} club_id={self.club_id}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index
 from sqlalchemy.sql import func
 from app.database.db import Base
 
@@ -7,6 +7,8 @@ class Usuario(Base):
     """Modelo global de Usuario - válido para todos los clubes"""
     
     __tablename__ = "usuarios"
+    # Usuarios de cada frecuencia de resumen, por páginas (migración 0012)
+    __table_args__ = (Index("ix_usuarios_email_digest_id", "email_digest", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
@@ -35,6 +37,7 @@ class Usuario(Base):
     # Preferencias de Usuario
     notifications_enabled = Column(Boolean, default=True)
     email_digest = Column(String(20), default='weekly')  # 'daily', 'weekly', 'never'
+    ultimo_resumen = Column(DateTime, nullable=True)  # contenido hasta aquí ya resumido
     dark_mode = Column(Boolean, default=False)
     language = Column(String(5), default='es')  # 'es', 'en'
 
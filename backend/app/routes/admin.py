@@ -1,27 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from app.database.db import get_db
-from app.models.usuario import Usuario
 from app.models.system_config import SystemConfig
 from app.schemas.system_config import EmailConfigUpdate, EmailConfigResponse, TestEmailRequest
+from app.schemas.consulta_lenta import ConsultasLentasResponse
+from app.schemas.email_outbox import BandejaSalidaResponse, EmailOutboxResponse
+from app.models.email_outbox import EmailOutbox
+from app.services.email_outbox import EMAILS_ENCOLADOS, FALLIDO, PENDIENTE, ahora
+from app.middleware.consultas_lentas import consultas_lentas
 from app.routes.auth import get_current_user
-from app.services.email_service import EmailService
+from app.schemas.auth import Principal
+from app.services.email_service import EmailService, frontend_url_cache
 from app.config import settings
 
 router = APIRouter()
 
 
-def ensure_frontend_url_column(db: Session) -> None:
-    if db.bind and db.bind.dialect.name == "sqlite":
-        columns = db.execute(text("PRAGMA table_info(system_config)"))
-        column_names = {row[1] for row in columns}
-        if "frontend_url" not in column_names:
-            db.execute(text("ALTER TABLE system_config ADD COLUMN frontend_url VARCHAR(255)"))
-            db.commit()
-
 def get_email_config(db: Session) -> SystemConfig:
-    ensure_frontend_url_column(db)
     config = db.query(SystemConfig).first()
     if not config:
         # Create default if not exists
@@ -46,7 +44,7 @@ def get_email_config(db: Session) -> SystemConfig:
 
 @router.get("/config/email", response_model=EmailConfigResponse)
 def get_email_configuration(
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if not current_user.es_superadmin:
@@ -61,7 +59,7 @@ def get_email_configuration(
 @router.put("/config/email", response_model=EmailConfigResponse)
 def update_email_configuration(
     config_update: EmailConfigUpdate,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if not current_user.es_superadmin:
@@ -84,6 +82,7 @@ def update_email_configuration(
         
     db.commit()
     db.refresh(db_config)
+    frontend_url_cache.invalidate("frontend_url")
     
     response_data = EmailConfigResponse.model_validate(db_config)
     response_data.smtp_password = "********"
@@ -92,14 +91,82 @@ def update_email_configuration(
 @router.post("/config/test-email")
 async def send_test_email(
     test_request: TestEmailRequest,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if not current_user.es_superadmin:
         raise HTTPException(status_code=403, detail="Requiere privilegios de superadministrador")
     
-    try:
-        await EmailService.enviar_email_test(test_request.to_email, db)
-        return {"message": "Email de prueba enviado correctamente"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error enviando email: {str(e)}")
+    EmailService.enviar_email_test(db, test_request.to_email)
+    db.commit()
+    return {"message": "Email de prueba encolado; el resultado aparece en /api/admin/emails"}
+
+
+@router.get("/emails", response_model=BandejaSalidaResponse)
+def listar_emails(
+    estado: Literal["pendiente", "enviando", "enviado", "fallido"] = FALLIDO,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Resumen de la bandeja de salida y sus últimos emails en un estado (por defecto, los fallidos)"""
+    if not current_user.es_superadmin:
+        raise HTTPException(status_code=403, detail="Requiere privilegios de superadministrador")
+
+    por_estado = dict(db.query(EmailOutbox.estado, func.count()).group_by(EmailOutbox.estado).all())
+    emails = db.query(EmailOutbox).filter(
+        EmailOutbox.estado == estado
+    ).order_by(EmailOutbox.id.desc()).limit(limit).all()
+    return {"por_estado": por_estado, "emails": emails}
+
+
+@router.post("/emails/{email_id}/reintentar", response_model=EmailOutboxResponse)
+def reintentar_email(
+    email_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Vuelve a poner en la cola un email fallido"""
+    if not current_user.es_superadmin:
+        raise HTTPException(status_code=403, detail="Requiere privilegios de superadministrador")
+
+    email = db.get(EmailOutbox, email_id)
+    if not email:
+        raise HTTPException(status_code=404, detail="Email no encontrado")
+    if email.estado != FALLIDO:
+        raise HTTPException(status_code=400, detail="Solo se pueden reintentar emails fallidos")
+
+    email.estado = PENDIENTE
+    email.intentos = 0
+    email.proximo_intento = ahora()
+    db.info[EMAILS_ENCOLADOS] = True
+    db.commit()
+    db.refresh(email)
+    return email
+
+
+@router.get("/consultas-lentas", response_model=ConsultasLentasResponse)
+def listar_consultas_lentas(
+    limit: int = Query(20, ge=1, le=200),
+    orden: Literal["total", "max", "veces"] = "total",
+    current_user: Principal = Depends(get_current_user)
+):
+    """Consultas SQL más lentas de este proceso desde que arrancó, agrupadas por huella"""
+    if not current_user.es_superadmin:
+        raise HTTPException(status_code=403, detail="Requiere privilegios de superadministrador")
+
+    return {
+        "umbral_ms": settings.sql_slow_query_ms,
+        "huellas": len(consultas_lentas),
+        "descartadas": consultas_lentas.descartadas,
+        "consultas": consultas_lentas.top(limit, orden),
+    }
+
+
+@router.delete("/consultas-lentas", status_code=status.HTTP_204_NO_CONTENT)
+def reiniciar_consultas_lentas(current_user: Principal = Depends(get_current_user)):
+    """Vacía el registro de consultas lentas (p. ej. tras desplegar un índice)"""
+    if not current_user.es_superadmin:
+        raise HTTPException(status_code=403, detail="Requiere privilegios de superadministrador")
+
+    consultas_lentas.reiniciar()
@@ -1,26 +1,30 @@
 """Endpoints de autenticación"""
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, Optional
 from datetime import datetime, timezone
 import os
 from pathlib import Path
 
 from app.config import settings
-from app.database.db import get_db
+from app.database.db import get_db, get_async_db
 from app.models.usuario import Usuario
 from app.models.invitacion import Invitacion
 from app.models.club import Club
 from app.schemas.auth import (
     LoginRequest, UsuarioCreate, UsuarioCreateDesdeInvitacion,
     TokenResponse, UsuarioResponse, GoogleLoginRequest, GoogleOAuthCodeRequest,
-    InvitacionResponse, RefreshTokenRequest, UsuarioUpdate, InvitacionPublicaResponse
+    InvitacionResponse, RefreshTokenRequest, UsuarioUpdate, InvitacionPublicaResponse, Principal,
+    Membresia
 )
-from app.services.auth_service import AuthService
+from app.services.auth_service import AuthService, principal_cache
 from app.services.google_oauth_service import GoogleOAuthService
 from app.services.invitacion_service import InvitacionService
-from app.utils.security import AuthUtils
+from app.services.membresia_service import MembresiaService, membresia_cache
+from app.utils.password_hashing import password_pool
 from app.utils.security import AuthUtils
 
 router = APIRouter()
@@ -38,9 +42,13 @@ async def oauth2_scheme(credentials: HTTPAuthorizationCredentials = Depends(secu
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Usuario:
-    """Obtiene el usuario actual desde el token JWT"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Obtiene el usuario actual desde el token JWT.
+
+    Devuelve un Principal inmutable cacheado por id de usuario (TTL + LRU),
+    así las peticiones autenticadas no consultan `usuarios` en cada llamada.
+    """
     
     token_data = AuthService.validar_token(token)
     
@@ -51,7 +59,30 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    usuario = AuthService.obtener_usuario_por_id(db, token_data.user_id)
+    principal = principal_cache.get(token_data.user_id)
+    if principal is not None:
+        return principal
+
+    usuario = await db.get(Usuario, token_data.user_id)
+    
+    if not usuario:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario no encontrado"
+        )
+    
+    principal = Principal.model_validate(usuario)
+    principal_cache.set(usuario.id, principal)
+    return principal
+
+
+async def get_current_user_db(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Usuario:
+    """Carga la instancia ORM del usuario actual (solo para rutas que lo modifican)"""
+    
+    usuario = await db.get(Usuario, current_user.id)
     
     if not usuario:
         raise HTTPException(
@@ -62,16 +93,71 @@ async def get_current_user(
     return usuario
 
 
+async def get_membresias(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Dict[int, Membresia]:
+    """Membresías del usuario actual indexadas por club.
+
+    Se cargan con una consulta y se cachean entre peticiones; los endpoints
+    que modifican membresías las invalidan con MembresiaService.invalidar.
+    """
+    membresias = membresia_cache.get(current_user.id)
+    if membresias is not None:
+        return membresias
+    return await db.run_sync(MembresiaService.obtener_membresias, current_user.id)
+
+
+def require_club_role(
+    *roles: str,
+    activo: bool = False,
+    permitir_superadmin: bool = False,
+    detail: str = "No tienes acceso a este club"
+):
+    """Dependencia que exige membresía en el club `club_id` de la ruta.
+
+    - roles: roles admitidos (sin roles basta con ser miembro)
+    - activo: exige además estado "activo"
+    - permitir_superadmin: los superadmins pasan aunque no sean miembros
+
+    Devuelve la Membresia del usuario (None si pasa solo por superadmin).
+    """
+
+    async def verificar_membresia(
+        club_id: int,
+        current_user: Principal = Depends(get_current_user),
+        membresias: Dict[int, Membresia] = Depends(get_membresias)
+    ) -> Optional[Membresia]:
+        membresia = membresias.get(club_id)
+        if (
+            membresia is not None
+            and (not roles or membresia.rol in roles)
+            and (not activo or membresia.estado == "activo")
+        ):
+            return membresia
+
+        if permitir_superadmin and current_user.es_superadmin:
+            return membresia
+
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail
+        )
+
+    return verificar_membresia
+
+
 # ==================== REGISTRO ====================
 
 @router.post("/registro", response_model=dict)
 async def registro(
     usuario_create: UsuarioCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Registrar nuevo usuario con email y contraseña"""
     
-    usuario = AuthService.registrar_usuario(db, usuario_create)
+    contraseña_hash = await password_pool.hash(usuario_create.password)
+    usuario = await db.run_sync(AuthService.registrar_usuario, usuario_create, contraseña_hash)
     
     if not usuario:
         raise HTTPException(
@@ -89,11 +175,14 @@ async def registro(
 @router.post("/registrarse-desde-invitacion", response_model=dict)
 async def registrarse_desde_invitacion(
     usuario_create: UsuarioCreateDesdeInvitacion,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Registrar usuario desde invitación a club"""
     
-    usuario, mensaje = AuthService.registrar_desde_invitacion(db, usuario_create)
+    contraseña_hash = await password_pool.hash(usuario_create.password)
+    usuario, mensaje = await db.run_sync(
+        AuthService.registrar_desde_invitacion, usuario_create, contraseña_hash
+    )
     
     if not usuario:
         raise HTTPException(
@@ -116,18 +205,21 @@ async def registrarse_desde_invitacion(
 @router.post("/login", response_model=dict)
 async def login(
     login_request: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login con email y contraseña"""
     
-    usuario = AuthService.login(db, login_request)
+    usuario = await db.run_sync(AuthService.obtener_usuario_para_login, login_request.email)
     
-    if not usuario:
+    # bcrypt se verifica en el pool para no bloquear el event loop
+    if not usuario or not await password_pool.verify(login_request.password, usuario.contraseña_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña inválidos"
         )
     
+    await db.run_sync(AuthService.registrar_login, usuario)
+    
     # Crear tokens
     tokens = AuthService.crear_tokens(usuario)
     
@@ -140,7 +232,7 @@ async def login(
 @router.post("/google-login", response_model=dict)
 async def google_login(
     google_login_request: GoogleLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login con Google OAuth"""
     
@@ -156,7 +248,7 @@ async def google_login(
         )
     
     # Obtener o crear usuario
-    usuario = GoogleOAuthService.obtener_o_crear_usuario(db, user_info)
+    usuario = await db.run_sync(GoogleOAuthService.obtener_o_crear_usuario, user_info)
     
     if not usuario:
         raise HTTPException(
@@ -176,7 +268,7 @@ async def google_login(
 @router.post("/google-oauth", response_model=dict)
 async def google_oauth_login(
     oauth_request: GoogleOAuthCodeRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login con Google OAuth (code flow)"""
 
@@ -207,7 +299,7 @@ async def google_oauth_login(
             detail="No se pudo obtener el perfil de Google"
         )
 
-    usuario = GoogleOAuthService.obtener_o_crear_usuario(db, user_info)
+    usuario = await db.run_sync(GoogleOAuthService.obtener_o_crear_usuario, user_info)
 
     if not usuario:
         raise HTTPException(
@@ -215,8 +307,8 @@ async def google_oauth_login(
             detail="Error al crear usuario desde Google"
         )
 
-    GoogleOAuthService.guardar_tokens_google(
-        db,
+    await db.run_sync(
+        GoogleOAuthService.guardar_tokens_google,
         usuario.id,
         token_data["access_token"],
         token_data.get("refresh_token"),
@@ -236,11 +328,11 @@ async def google_oauth_login(
 @router.post("/refresh-token", response_model=TokenResponse)
 async def refresh_token(
     refresh_request: RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Refrescar access token usando refresh token"""
     
-    tokens = AuthService.refrescar_token(db, refresh_request.refresh_token)
+    tokens = await db.run_sync(AuthService.refrescar_token, refresh_request.refresh_token)
     
     if not tokens:
         raise HTTPException(
@@ -262,29 +354,33 @@ async def logout():
 
 @router.get("/invitaciones/pendientes", response_model=list)
 async def ver_invitaciones_pendientes(
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Ver invitaciones pendientes del usuario actual"""
     
-    invitaciones = InvitacionService.obtener_invitaciones_pendientes(
-        db, current_user.email
+    result = await db.scalars(
+        select(Invitacion).options(selectinload(Invitacion.club)).filter(
+            Invitacion.email == current_user.email,
+            Invitacion.estado == "pendiente",
+            Invitacion.fecha_vencimiento > datetime.now(timezone.utc)
+        )
     )
     
-    return [InvitacionResponse.model_validate(inv) for inv in invitaciones]
+    return [InvitacionResponse.model_validate(inv) for inv in result.all()]
 
 
 @router.get("/invitaciones/{token}", response_model=InvitacionPublicaResponse)
 async def obtener_invitacion_por_token(
     token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtener datos de invitación por token (publico)"""
-    invitacion = db.query(Invitacion).filter(
+    invitacion = await db.scalar(select(Invitacion).filter(
         Invitacion.token == token,
         Invitacion.estado == "pendiente",
         Invitacion.fecha_vencimiento > datetime.now(timezone.utc)
-    ).first()
+    ).limit(1))
 
     if not invitacion:
         raise HTTPException(
@@ -292,7 +388,7 @@ async def obtener_invitacion_por_token(
             detail="Invitación inválida o expirada"
         )
 
-    club = db.query(Club).filter(Club.id == invitacion.club_id).first()
+    club = await db.get(Club, invitacion.club_id)
     club_name = club.nombre if club else "Club"
 
     return InvitacionPublicaResponse(
@@ -306,13 +402,13 @@ async def obtener_invitacion_por_token(
 @router.post("/invitaciones/aceptar/{token}", response_model=dict)
 async def aceptar_invitacion(
     token: str,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Aceptar una invitación a un club"""
     
-    success = InvitacionService.aceptar_invitacion(
-        db, token, current_user.id
+    success = await db.run_sync(
+        InvitacionService.aceptar_invitacion, token, current_user.id
     )
     
     if not success:
@@ -327,12 +423,12 @@ async def aceptar_invitacion(
 @router.post("/invitaciones/rechazar/{token}", response_model=dict)
 async def rechazar_invitacion(
     token: str,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Rechazar una invitación"""
     
-    success = InvitacionService.rechazar_invitacion(db, token)
+    success = await db.run_sync(InvitacionService.rechazar_invitacion, token)
     
     if not success:
         raise HTTPException(
@@ -347,7 +443,7 @@ async def rechazar_invitacion(
 
 @router.get("/usuarios/me", response_model=UsuarioResponse)
 async def get_usuario_actual(
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener datos del usuario actual"""
     return UsuarioResponse.model_validate(current_user)
@@ -356,8 +452,8 @@ async def get_usuario_actual(
 @router.put("/usuarios/me", response_model=UsuarioResponse)
 async def actualizar_usuario(
     usuario_update: UsuarioUpdate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Usuario = Depends(get_current_user_db),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualizar datos del usuario actual (nombre, preferencias, etc.)"""
     
@@ -366,14 +462,15 @@ async def actualizar_usuario(
     for key, value in update_data.items():
         setattr(current_user, key, value)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    AuthService.invalidar_principal(current_user.id)
     
     return UsuarioResponse.model_validate(current_user)
 
 @router.get("/usuarios/me/export", response_model=dict)
 async def exportar_datos_usuario(
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Exportar todos los datos personales del usuario (GDPR)"""
     
@@ -404,8 +501,8 @@ async def exportar_datos_usuario(
 @router.post("/usuarios/cambiar-contraseña", response_model=dict)
 async def cambiar_contraseña(
     contraseña_data: dict,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Usuario = Depends(get_current_user_db),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cambiar contraseña del usuario actual"""
     
@@ -413,7 +510,7 @@ async def cambiar_contraseña(
     contraseña_nueva = contraseña_data.get("contraseña_nueva")
     
     # Verificar contraseña actual
-    if not current_user.contraseña_hash or not AuthUtils.verify_password(
+    if not current_user.contraseña_hash or not await password_pool.verify(
         contraseña_actual,
         current_user.contraseña_hash
     ):
@@ -423,8 +520,9 @@ async def cambiar_contraseña(
         )
     
     # Actualizar contraseña
-    current_user.contraseña_hash = AuthUtils.hash_password(contraseña_nueva)
-    db.commit()
+    current_user.contraseña_hash = await password_pool.hash(contraseña_nueva)
+    await db.commit()
+    AuthService.invalidar_principal(current_user.id)
     
     return {"message": "Contraseña actualizada exitosamente"}
 
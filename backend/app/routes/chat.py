@@ -1,15 +1,19 @@
+import json
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Dict, Any, Tuple
 from ..schemas.chat import ChatRequest, ChatResponse
+from ..services.openclaw_conexion import ErrorOpenClaw
 from ..services.openclaw_service import openclaw_service
 from ..routes.auth import get_current_user
-from ..models.usuario import Usuario
+from ..schemas.auth import Principal
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 @router.get("/openclaw/status")
 async def check_openclaw_status(
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Verifica si hay conexión WebSocket activa con OpenClaw.
@@ -27,7 +31,7 @@ async def check_openclaw_status(
 
 @router.get("/openclaw/debug")
 async def debug_openclaw_connection(
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Diagnostica la conexión a OpenClaw y retorna información detallada.
@@ -55,7 +59,7 @@ async def debug_openclaw_connection(
 async def get_chat_history_route(
     club_id: int = None,
     limit: int = 50,
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Obtiene el historial de chat de la sesión especificada.
@@ -75,16 +79,11 @@ async def get_chat_history_route(
         )
 
 
-@router.post("/openclaw", response_model=ChatResponse)
-async def generate_chat_response(
-    request: ChatRequest,
-    current_user: Usuario = Depends(get_current_user)
-):
-    """
-    Envía mensajes al servicio de OpenClaw y obtiene una respuesta.
-    Requiere autenticación de usuario.
-    """
-    
+USO_VACIO = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+
+def _preparar_chat(request: ChatRequest, current_user: Principal) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Mensajes como dicts y contexto (usuario y club) para el servicio"""
     # Preparar el contexto si es necesario, por ejemplo con info del usuario
     context = request.context or {}
     context.update({
@@ -99,6 +98,19 @@ async def generate_chat_response(
 
     # Convertir mensajes de Pydantic a dict para el servicio
     messages_dicts = [{"role": m.role, "content": m.content} for m in request.messages]
+    return messages_dicts, context
+
+
+@router.post("/openclaw", response_model=ChatResponse)
+async def generate_chat_response(
+    request: ChatRequest,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Envía mensajes al servicio de OpenClaw y obtiene una respuesta.
+    Requiere autenticación de usuario.
+    """
+    messages_dicts, context = _preparar_chat(request, current_user)
 
     try:
         reply_text = await openclaw_service.get_response(
@@ -108,7 +120,7 @@ async def generate_chat_response(
         
         return ChatResponse(
             reply=reply_text,
-            usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0} # Placeholder
+            usage=USO_VACIO # Placeholder
         )
             
     except Exception as e:
@@ -116,3 +128,45 @@ async def generate_chat_response(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al procesar la solicitud de chat: {str(e)}"
         )
+
+
+def _evento_sse(evento: str, datos: Dict[str, Any]) -> str:
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+async def _eventos_chat(messages: List[Dict[str, Any]], context: Dict[str, Any]) -> AsyncIterator[str]:
+    partes: List[str] = []
+    uso: Dict[str, Any] = {}
+    try:
+        async for delta in openclaw_service.stream_response(messages, context, uso=uso):
+            partes.append(delta)
+            yield _evento_sse("delta", {"text": delta})
+    except (ErrorOpenClaw, ValueError) as e:
+        yield _evento_sse("error", {"detail": f"Error al procesar la solicitud de chat: {str(e)}"})
+        return
+    yield _evento_sse("done", {"reply": "".join(partes), "usage": uso or USO_VACIO})
+
+
+@router.post("/openclaw/stream")
+async def stream_chat_response(
+    request: ChatRequest,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Como POST /chat/openclaw, pero devuelve la respuesta según la genera
+    OpenClaw (text/event-stream):
+
+    - `delta`: `{"text": ...}` por cada trozo de texto
+    - `done`: `{"reply": ..., "usage": {...}}` al terminar
+    - `error`: `{"detail": ...}` si falla (la respuesta ya ha empezado con 200)
+
+    El texto se envía según el cliente lo va recibiendo (uno lento no frena
+    a los demás chats) y, si se desconecta, el chat se cancela también en
+    OpenClaw.
+    """
+    messages_dicts, context = _preparar_chat(request, current_user)
+    return StreamingResponse(
+        _eventos_chat(messages_dicts, context),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,34 +1,42 @@
 """Endpoints de gestión de clubes"""
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import desc, select
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
-from app.database.db import get_db
+from app.database.db import get_async_db
 from app.models.usuario import Usuario
 from app.models.club import Club
 from app.models.miembro_club import MiembroClub
+from app.models.invitacion import Invitacion
 from app.models.noticia import Noticia
 from app.models.evento import Evento
 from app.models.producto import ProductoAfiliacion
 from app.schemas.club import ClubCreate, ClubUpdate, ClubResponse, MiembroClubResponse, MiembroRolUpdate, MiembroEstadoUpdate
 from app.schemas.noticia import NoticiaResponse
 from app.services.invitacion_service import InvitacionService
-from app.routes.auth import get_current_user
+from app.services.membresia_service import MembresiaService
+from app.routes.auth import get_current_user, get_membresias, require_club_role
+from app.schemas.auth import Membresia, Principal
 from app.config import settings
+from app.utils.paginacion import LIMITE_MAXIMO, LIMITE_POR_DEFECTO, Orden, publicar_cursor
 
 router = APIRouter()
 
+ORDEN_MIEMBROS = Orden(MiembroClub.id)
+ORDEN_INVITACIONES = Orden(Invitacion.id, Invitacion.fecha_creacion, descendente=True)
+
 
 # ==================== CLUBES ====================
 
 @router.post("", response_model=ClubResponse)
 async def crear_club(
     club_create: ClubCreate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Crear nuevo club (Solo Superadmin)"""
     
@@ -39,7 +47,7 @@ async def crear_club(
         )
     
     # Verificar que el slug sea único
-    club_existente = db.query(Club).filter(Club.slug == club_create.slug).first()
+    club_existente = await db.scalar(select(Club).filter(Club.slug == club_create.slug).limit(1))
     if club_existente:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -55,7 +63,7 @@ async def crear_club(
     )
     
     db.add(nuevo_club)
-    db.flush()  # Para obtener el ID sin hacer commit
+    await db.flush()  # Para obtener el ID sin hacer commit
     
     # Agregar el creador como miembro administrador
     miembro_admin = MiembroClub(
@@ -66,11 +74,12 @@ async def crear_club(
     )
     
     db.add(miembro_admin)
+    nuevos_miembros = [current_user.id]
     
     # Añadir el bot OpenClaw automáticamente si está configurado
     if settings.openclaw_botuser_id:
         bot_email = settings.openclaw_botuser_id.strip('"')
-        bot_user = db.query(Usuario).filter(Usuario.email == bot_email).first()
+        bot_user = await db.scalar(select(Usuario).filter(Usuario.email == bot_email).limit(1))
         
         if bot_user:
             miembro_bot = MiembroClub(
@@ -80,9 +89,11 @@ async def crear_club(
                 estado="activo"
             )
             db.add(miembro_bot)
+            nuevos_miembros.append(bot_user.id)
     
-    db.commit()
-    db.refresh(nuevo_club)
+    await db.commit()
+    MembresiaService.invalidar(*nuevos_miembros)
+    await db.refresh(nuevo_club)
     
     return ClubResponse.model_validate(nuevo_club)
 
@@ -90,19 +101,15 @@ async def crear_club(
 @router.get("/mi-rol/{club_id}", response_model=dict)
 async def obtener_mi_rol(
     club_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    membresias: Dict[int, Membresia] = Depends(get_membresias)
 ):
     """Obtener el rol del usuario en un club específico"""
     
     # 1. Buscar si es miembro directo
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.estado == "activo"
-    ).first()
+    miembro = membresias.get(club_id)
     
-    if miembro:
+    if miembro and miembro.estado == "activo":
         return {"rol": miembro.rol}
         
     # 2. Si es superadmin global, considerar administrador
@@ -117,41 +124,32 @@ async def obtener_mi_rol(
 
 @router.get("", response_model=list)
 async def listar_clubes_usuario(
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Listar clubes del usuario actual"""
     
-    miembros = db.query(MiembroClub).filter(
+    result = await db.scalars(select(Club).join(
+        MiembroClub, MiembroClub.club_id == Club.id
+    ).filter(
         MiembroClub.usuario_id == current_user.id,
         MiembroClub.estado == "activo"
-    ).all()
+    ))
     
-    clubes = [miembro.club for miembro in miembros]
+    clubes = result.all()
     return [ClubResponse.model_validate(club) for club in clubes]
 
 
 @router.get("/{club_id}", response_model=ClubResponse)
 async def get_club(
     club_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role()),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtener detalles del club"""
     
-    # Verificar que el usuario es miembro del club
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes acceso a este club"
-        )
-    
-    club = db.query(Club).filter(Club.id == club_id).first()
+    club = await db.get(Club, club_id)
     
     if not club:
         raise HTTPException(
@@ -166,25 +164,15 @@ async def get_club(
 async def actualizar_club(
     club_id: int,
     club_update: ClubUpdate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(
+        require_club_role("administrador", detail="No tienes permisos para actualizar este club")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualizar detalles del club (solo administradores)"""
     
-    # Verificar que el usuario es administrador del club
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permisos para actualizar este club"
-        )
-    
-    club = db.query(Club).filter(Club.id == club_id).first()
+    club = await db.get(Club, club_id)
     
     if not club:
         raise HTTPException(
@@ -205,8 +193,8 @@ async def actualizar_club(
         if field in allowed_fields and hasattr(club, field):
             setattr(club, field, value)
     
-    db.commit()
-    db.refresh(club)
+    await db.commit()
+    await db.refresh(club)
     
     return ClubResponse.model_validate(club)
 
@@ -216,39 +204,30 @@ async def actualizar_club(
 @router.get("/{club_id}/miembros", response_model=list)
 async def listar_miembros(
     club_id: int,
+    request: Request,
+    response: Response,
     include_inactivos: bool = False,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    current_user: Principal = Depends(get_current_user),
+    miembro_usuario: Membresia = Depends(require_club_role()),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Listar miembros del club"""
     
-    # Verificar que el usuario es miembro del club
-    miembro_usuario = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-    
-    if not miembro_usuario:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes acceso a este club"
-        )
-    
-    miembros_query = db.query(MiembroClub).filter(
+    miembros_query = select(MiembroClub).options(
+        selectinload(MiembroClub.usuario)
+    ).filter(
         MiembroClub.club_id == club_id
     )
     if not include_inactivos:
         miembros_query = miembros_query.filter(MiembroClub.estado == "activo")
-    else:
-        miembro_admin = db.query(MiembroClub).filter(
-            MiembroClub.usuario_id == current_user.id,
-            MiembroClub.club_id == club_id,
-            MiembroClub.rol == "administrador"
-        ).first()
-        if not miembro_admin:
-            miembros_query = miembros_query.filter(MiembroClub.estado == "activo")
+    elif miembro_usuario.rol != "administrador":
+        miembros_query = miembros_query.filter(MiembroClub.estado == "activo")
 
-    miembros = miembros_query.all()
+    filas = (await db.execute(ORDEN_MIEMBROS.consulta(miembros_query, cursor, limit))).all()
+    miembros, siguiente = ORDEN_MIEMBROS.pagina(filas, limit)
+    publicar_cursor(request, response, siguiente)
     
     return [MiembroClubResponse.model_validate(m) for m in miembros]
 
@@ -257,29 +236,19 @@ async def listar_miembros(
 async def invitar_miembro(
     club_id: int,
     invitacion_data: dict,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden invitar miembros")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Invitar miembro(s) al club (solo administradores). Soporta múltiples emails separados por comas."""
     
     emails_input = invitacion_data.get("email", "")
     rol = invitacion_data.get("rol", "miembro")
     
-    # Verificar que el usuario es administrador del club
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden invitar miembros"
-        )
-    
     # Verificar que el club existe
-    club = db.query(Club).filter(Club.id == club_id).first()
+    club = await db.get(Club, club_id)
     
     if not club:
         raise HTTPException(
@@ -302,8 +271,8 @@ async def invitar_miembro(
     
     for email_a_invitar in emails_list:
         try:
-            invitacion = InvitacionService.crear_invitacion(
-                db,
+            invitacion = await db.run_sync(
+                InvitacionService.crear_invitacion,
                 club_id,
                 email_a_invitar,
                 rol,
@@ -335,25 +304,23 @@ async def invitar_miembro(
 @router.get("/{club_id}/miembros/invitaciones", response_model=list)
 async def listar_invitaciones_club(
     club_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden ver invitaciones")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Listar invitaciones pendientes del club (solo administradores)"""
-    
-    # Verificar que el usuario es administrador del club
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden ver invitaciones"
-        )
+    """Listar invitaciones del club, de la más reciente a la más antigua (solo administradores)"""
     
-    invitaciones = InvitacionService.obtener_invitaciones_del_club(db, club_id)
+    filas = (await db.execute(ORDEN_INVITACIONES.consulta(select(Invitacion).filter(
+        Invitacion.club_id == club_id
+    ), cursor, limit))).all()
+    invitaciones, siguiente = ORDEN_INVITACIONES.pagina(filas, limit)
+    publicar_cursor(request, response, siguiente)
     
     return [
         {
@@ -370,24 +337,14 @@ async def listar_invitaciones_club(
 async def remover_miembro(
     club_id: int,
     usuario_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden remover miembros")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remover miembro del club (solo administradores)"""
     
-    # Verificar que el usuario es administrador del club
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden remover miembros"
-        )
-    
     # Verificar que no intente removerse a sí mismo
     if usuario_id == current_user.id:
         raise HTTPException(
@@ -396,15 +353,15 @@ async def remover_miembro(
         )
     
     # Permitir remover por usuario_id o por id de miembro
-    miembro = db.query(MiembroClub).filter(
+    miembro = await db.scalar(select(MiembroClub).filter(
         MiembroClub.usuario_id == usuario_id,
         MiembroClub.club_id == club_id
-    ).first()
+    ).limit(1))
     if not miembro:
-        miembro = db.query(MiembroClub).filter(
+        miembro = await db.scalar(select(MiembroClub).filter(
             MiembroClub.id == usuario_id,
             MiembroClub.club_id == club_id
-        ).first()
+        ).limit(1))
     
     if not miembro:
         raise HTTPException(
@@ -413,8 +370,9 @@ async def remover_miembro(
         )
     
     # Eliminar miembro del club
-    db.delete(miembro)
-    db.commit()
+    await db.delete(miembro)
+    await db.commit()
+    MembresiaService.invalidar(miembro.usuario_id)
 
     return {"message": "Miembro eliminado del club"}
 
@@ -424,33 +382,24 @@ async def actualizar_estado_miembro(
     club_id: int,
     usuario_id: int,
     estado_update: MiembroEstadoUpdate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden cambiar el estado")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualizar estado de un miembro (solo administradores)"""
 
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden cambiar el estado"
-        )
-
     if estado_update.estado not in ["activo", "inactivo"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Estado inválido"
         )
 
-    miembro = db.query(MiembroClub).filter(
+    miembro = await db.scalar(select(MiembroClub).filter(
         MiembroClub.usuario_id == usuario_id,
         MiembroClub.club_id == club_id
-    ).first()
+    ).limit(1))
 
     if not miembro:
         raise HTTPException(
@@ -459,7 +408,8 @@ async def actualizar_estado_miembro(
         )
 
     miembro.estado = estado_update.estado
-    db.commit()
+    await db.commit()
+    MembresiaService.invalidar(miembro.usuario_id)
 
     return {"message": "Estado actualizado"}
 
@@ -469,23 +419,14 @@ async def actualizar_rol_miembro(
     club_id: int,
     usuario_id: int,
     rol_update: MiembroRolUpdate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden cambiar roles")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualizar rol de un miembro (solo administradores)"""
 
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden cambiar roles"
-        )
-
     if usuario_id == current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -512,15 +453,15 @@ async def actualizar_rol_miembro(
             detail="Rol no permitido"
         )
 
-    miembro = db.query(MiembroClub).filter(
+    miembro = await db.scalar(select(MiembroClub).filter(
         MiembroClub.usuario_id == usuario_id,
         MiembroClub.club_id == club_id
-    ).first()
+    ).limit(1))
     if not miembro:
-        miembro = db.query(MiembroClub).filter(
+        miembro = await db.scalar(select(MiembroClub).filter(
             MiembroClub.id == usuario_id,
             MiembroClub.club_id == club_id
-        ).first()
+        ).limit(1))
 
     if not miembro:
         raise HTTPException(
@@ -529,7 +470,8 @@ async def actualizar_rol_miembro(
         )
 
     miembro.rol = rol_normalizado
-    db.commit()
+    await db.commit()
+    MembresiaService.invalidar(miembro.usuario_id)
 
     return {
         "message": "Rol actualizado exitosamente",
@@ -552,8 +494,9 @@ class RecentContentItem(BaseModel):
 @router.get("/{club_id}/contenido-reciente", response_model=List[RecentContentItem])
 async def obtener_contenido_reciente_club(
     club_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    membresias: Dict[int, Membresia] = Depends(get_membresias),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Obtener el contenido más reciente de un club específico.
@@ -561,7 +504,7 @@ async def obtener_contenido_reciente_club(
     """
     
     # Verificar que el club existe
-    club = db.query(Club).filter(Club.id == club_id).first()
+    club = await db.get(Club, club_id)
     if not club:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -569,10 +512,7 @@ async def obtener_contenido_reciente_club(
         )
     
     # Verificar que el usuario es miembro del club
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.club_id == club_id,
-        MiembroClub.usuario_id == current_user.id
-    ).first()
+    miembro = membresias.get(club_id)
     
     if not miembro and not current_user.es_superadmin:
         raise HTTPException(
@@ -583,11 +523,11 @@ async def obtener_contenido_reciente_club(
     resultado = []
     
     # 1. Obtener última noticia publicada
-    ultima_noticia = db.query(Noticia).filter(
+    ultima_noticia = await db.scalar(select(Noticia).filter(
         Noticia.club_id == club_id,
         Noticia.estado == "publicada",
         Noticia.fecha_publicacion.isnot(None)
-    ).order_by(desc(Noticia.fecha_publicacion)).first()
+    ).order_by(desc(Noticia.fecha_publicacion)).limit(1))
     
     if ultima_noticia:
         resultado.append(RecentContentItem(
@@ -599,9 +539,9 @@ async def obtener_contenido_reciente_club(
         ))
     
     # 2. Obtener último evento
-    ultimo_evento = db.query(Evento).filter(
+    ultimo_evento = await db.scalar(select(Evento).filter(
         Evento.club_id == club_id
-    ).order_by(desc(Evento.fecha_creacion)).first()
+    ).order_by(desc(Evento.fecha_creacion)).limit(1))
     
     if ultimo_evento:
         resultado.append(RecentContentItem(
@@ -613,10 +553,10 @@ async def obtener_contenido_reciente_club(
         ))
     
     # 3. Obtener último producto
-    ultimo_producto = db.query(ProductoAfiliacion).filter(
+    ultimo_producto = await db.scalar(select(ProductoAfiliacion).filter(
         ProductoAfiliacion.club_id == club_id,
         ProductoAfiliacion.activo == True
-    ).order_by(desc(ProductoAfiliacion.fecha_creacion)).first()
+    ).order_by(desc(ProductoAfiliacion.fecha_creacion)).limit(1))
     
     if ultimo_producto:
         resultado.append(RecentContentItem(
@@ -635,8 +575,9 @@ async def obtener_contenido_reciente_club(
 @router.post("/{club_id}/generar-datos-ejemplo", response_model=dict)
 async def generar_datos_ejemplo(
     club_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    membresias: Dict[int, Membresia] = Depends(get_membresias),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generar datos de ejemplo para un club:
@@ -660,7 +601,7 @@ async def generar_datos_ejemplo(
         return ''.join(random.choice(chars) for _ in range(length))
     
     # Verificar que el club existe
-    club = db.query(Club).filter(Club.id == club_id).first()
+    club = await db.get(Club, club_id)
     if not club:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -668,13 +609,13 @@ async def generar_datos_ejemplo(
         )
     
     # Verificar permisos
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.estado == "activo"
-    ).first()
+    miembro = membresias.get(club_id)
     
-    if not miembro or (miembro.rol != "administrador" and not current_user.es_superadmin):
+    if (
+        not miembro
+        or miembro.estado != "activo"
+        or (miembro.rol != "administrador" and not current_user.es_superadmin)
+    ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Solo los administradores del club pueden generar datos de ejemplo"
@@ -706,10 +647,10 @@ async def generar_datos_ejemplo(
         resultados["ubicacion_actualizada"] = True
         
         # 2. Crear contraseña de instalaciones
-        existing_password = db.query(ContrasenaInstalacion).filter(
+        existing_password = await db.scalar(select(ContrasenaInstalacion).filter(
             ContrasenaInstalacion.club_id == club_id,
             ContrasenaInstalacion.activa == True
-        ).first()
+        ).limit(1))
         
         if not existing_password:
             nueva_password = ContrasenaInstalacion(
@@ -735,7 +676,7 @@ async def generar_datos_ejemplo(
         for nombre, apellido, username in nombres_ejemplo:
             email = f"{username}@ejemplo.com"
             # Verificar que el usuario no existe
-            usuario_existe = db.query(Usuario).filter(Usuario.email == email).first()
+            usuario_existe = await db.scalar(select(Usuario).filter(Usuario.email == email).limit(1))
             if not usuario_existe:
                 nuevo_usuario = Usuario(
                     email=email,
@@ -745,7 +686,7 @@ async def generar_datos_ejemplo(
                     fecha_creacion=datetime.utcnow()
                 )
                 db.add(nuevo_usuario)
-                db.flush()
+                await db.flush()
                 
                 # Agregar como miembro del club
                 nuevo_miembro = MiembroClub(
@@ -908,7 +849,7 @@ async def generar_datos_ejemplo(
             db.add(nuevo_producto)
             resultados["productos_creados"] += 1
         
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -917,7 +858,7 @@ async def generar_datos_ejemplo(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al generar datos de ejemplo: {str(e)}"
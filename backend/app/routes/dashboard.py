@@ -1,18 +1,18 @@
 """Endpoints para el dashboard - contenido reciente de todos los clubes del usuario"""
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, desc, select
 from typing import List, Union
 from datetime import datetime
 
-from app.database.db import get_db
-from app.models.usuario import Usuario
+from app.database.db import get_async_db
 from app.models.noticia import Noticia
 from app.models.evento import Evento
 from app.models.producto import ProductoAfiliacion
 from app.models.miembro_club import MiembroClub
 from app.models.club import Club
 from app.routes.auth import get_current_user
+from app.schemas.auth import Principal
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -33,8 +33,8 @@ class RecentContentItem(BaseModel):
 
 @router.get("/dashboard/contenido-reciente", response_model=List[RecentContentItem])
 async def obtener_contenido_reciente(
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Obtener el contenido más reciente de todos los clubes del usuario.
@@ -42,10 +42,9 @@ async def obtener_contenido_reciente(
     """
     
     # Obtener IDs de clubes del usuario
-    club_ids = db.query(MiembroClub.club_id).filter(
+    club_ids = (await db.scalars(select(MiembroClub.club_id).filter(
         MiembroClub.usuario_id == current_user.id
-    ).all()
-    club_ids = [cid[0] for cid in club_ids]
+    ))).all()
     
     if not club_ids:
         return []
@@ -53,22 +52,22 @@ async def obtener_contenido_reciente(
     # Obtener clubes para los nombres
     clubes_dict = {
         club.id: club.nombre 
-        for club in db.query(Club).filter(Club.id.in_(club_ids)).all()
+        for club in (await db.scalars(select(Club).filter(Club.id.in_(club_ids)))).all()
     }
     
     resultado = []
     
     # 1. Obtener última noticia publicada
-    ultima_noticia = db.query(Noticia).filter(
+    ultima_noticia = await db.scalar(select(Noticia).filter(
         Noticia.club_id.in_(club_ids),
         Noticia.estado == "publicada",
         Noticia.fecha_publicacion.isnot(None)
-    ).order_by(desc(Noticia.fecha_publicacion)).first()
+    ).order_by(desc(Noticia.fecha_publicacion)).limit(1))
     
     # 2. Obtener último evento
-    ultimo_evento = db.query(Evento).filter(
+    ultimo_evento = await db.scalar(select(Evento).filter(
         Evento.club_id.in_(club_ids)
-    ).order_by(desc(Evento.fecha_creacion)).first()
+    ).order_by(desc(Evento.fecha_creacion)).limit(1))
     
     # Comparar fechas y agregar el más reciente
     if ultima_noticia and ultimo_evento:
@@ -82,7 +81,7 @@ async def obtener_contenido_reciente(
             contenido_reciente = ultimo_evento
             tipo = "evento"
             fecha = ultimo_evento.fecha_creacion
-            titulo = ultimo_evento.titulo
+            titulo = ultimo_evento.nombre
             descripcion = ultimo_evento.descripcion
         
         resultado.append(RecentContentItem(
@@ -108,7 +107,7 @@ async def obtener_contenido_reciente(
         resultado.append(RecentContentItem(
             tipo="evento",
             id=ultimo_evento.id,
-            titulo=ultimo_evento.titulo,
+            titulo=ultimo_evento.nombre,
             descripcion=ultimo_evento.descripcion,
             club_id=ultimo_evento.club_id,
             club_nombre=clubes_dict.get(ultimo_evento.club_id, "Club"),
@@ -116,10 +115,10 @@ async def obtener_contenido_reciente(
         ))
     
     # 3. Obtener último producto
-    ultimo_producto = db.query(ProductoAfiliacion).filter(
+    ultimo_producto = await db.scalar(select(ProductoAfiliacion).filter(
         ProductoAfiliacion.club_id.in_(club_ids),
         ProductoAfiliacion.activo == True
-    ).order_by(desc(ProductoAfiliacion.fecha_creacion)).first()
+    ).order_by(desc(ProductoAfiliacion.fecha_creacion)).limit(1))
     
     if ultimo_producto:
         resultado.append(RecentContentItem(
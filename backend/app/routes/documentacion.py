@@ -1,17 +1,23 @@
+from contextlib import AsyncExitStack
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database.db import get_db
 from app.models.documentacion_reglamentaria import DocumentacionReglamentaria
 from app.models.miembro_club import MiembroClub
-from app.models.usuario import Usuario
 from app.routes.auth import get_current_user
+from app.schemas.auth import Principal
 from app.schemas.documentacion import DocumentacionResponse
+from app.services.blob_service import BlobService
+from app.utils.blobs import respuesta_archivo, respuesta_blob
+from app.utils.subidas import RutaSubida, Subida, limite_subida, recibir_subida
 
-router = APIRouter()
+router = APIRouter(route_class=RutaSubida)
 
 
 def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
@@ -38,18 +44,42 @@ def _to_response(doc: DocumentacionReglamentaria) -> DocumentacionResponse:
         rc_fecha_vencimiento=doc.rc_fecha_vencimiento,
         rc_archivo_nombre=doc.rc_archivo_nombre,
         rc_archivo_mime=doc.rc_archivo_mime,
-        rc_tiene_archivo=doc.rc_archivo is not None,
+        rc_tiene_archivo=doc.rc_archivo_tamano is not None,
         carnet_numero=doc.carnet_numero,
         carnet_fecha_emision=doc.carnet_fecha_emision,
         carnet_fecha_vencimiento=doc.carnet_fecha_vencimiento,
         carnet_archivo_nombre=doc.carnet_archivo_nombre,
         carnet_archivo_mime=doc.carnet_archivo_mime,
-        carnet_tiene_archivo=doc.carnet_archivo is not None,
+        carnet_tiene_archivo=doc.carnet_archivo_tamano is not None,
         fecha_creacion=doc.fecha_creacion,
         fecha_actualizacion=doc.fecha_actualizacion
     )
 
 
+def _respuesta_archivo(
+    request: Request,
+    db: Session,
+    doc: DocumentacionReglamentaria,
+    columna,
+    sha256: Optional[str],
+    tamano: int,
+    filename: str,
+    mime: Optional[str]
+):
+    descarga = dict(
+        tamano=tamano,
+        media_type=mime or "application/octet-stream",
+        cache_control=settings.cache_control_documentos,
+        ultima_modificacion=doc.fecha_actualizacion or doc.fecha_creacion,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+    if sha256:
+        return respuesta_archivo(request, sha256, **descarga)
+
+    # Archivo aún dentro de la BD (pendiente de migrar al almacén)
+    return respuesta_blob(request, db, columna, DocumentacionReglamentaria.id == doc.id, **descarga)
+
+
 @router.get("/ayuda")
 async def get_ayuda():
     return {"ayuda": "Seccion de ayuda"}
@@ -57,7 +87,7 @@ async def get_ayuda():
 
 @router.get("/me", response_model=DocumentacionResponse)
 async def obtener_documentacion_me(
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     doc = db.query(DocumentacionReglamentaria).filter(
@@ -74,6 +104,7 @@ async def obtener_documentacion_me(
 
 
 @router.post("/me", response_model=DocumentacionResponse)
+@limite_subida(lambda: 2 * settings.max_upload_size)  # rc_archivo y carnet_archivo
 async def upsert_documentacion_me(
     rc_numero: Optional[str] = Form(None),
     rc_fecha_emision: Optional[str] = Form(None),
@@ -83,7 +114,7 @@ async def upsert_documentacion_me(
     carnet_fecha_vencimiento: Optional[str] = Form(None),
     rc_archivo: Optional[UploadFile] = File(None),
     carnet_archivo: Optional[UploadFile] = File(None),
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     doc = db.query(DocumentacionReglamentaria).filter(
@@ -110,72 +141,97 @@ async def upsert_documentacion_me(
     if carnet_fecha_vencimiento is not None:
         doc.carnet_fecha_vencimiento = _parse_datetime(carnet_fecha_vencimiento)
 
-    if rc_archivo is not None:
-        doc.rc_archivo = await rc_archivo.read()
-        doc.rc_archivo_nombre = rc_archivo.filename
-        doc.rc_archivo_mime = rc_archivo.content_type
+    async with AsyncExitStack() as temporales:
+        # Primero se reciben los archivos (por trozos, con límite de tamaño) y
+        # después se tocan las filas: la transacción no espera a la red
+        rc = carnet = None
+        if rc_archivo is not None:
+            rc = await temporales.enter_async_context(recibir_subida(rc_archivo, settings.max_upload_size))
+        if carnet_archivo is not None:
+            carnet = await temporales.enter_async_context(recibir_subida(carnet_archivo, settings.max_upload_size))
+
+        # Mover al almacén (con fsync) y confirmar bloquean: en un hilo
+        await run_in_threadpool(_guardar_archivos, db, doc, rc, carnet)
 
-    if carnet_archivo is not None:
-        doc.carnet_archivo = await carnet_archivo.read()
-        doc.carnet_archivo_nombre = carnet_archivo.filename
-        doc.carnet_archivo_mime = carnet_archivo.content_type
+    return _to_response(doc)
+
+
+def _guardar_archivos(
+    db: Session,
+    doc: DocumentacionReglamentaria,
+    rc: Optional[Subida],
+    carnet: Optional[Subida]
+) -> None:
+    if rc is not None:
+        doc.rc_archivo_sha256, doc.rc_archivo_tamano = BlobService.reemplazar(
+            db, rc, doc.rc_archivo_sha256
+        )
+        doc.rc_archivo = None
+        doc.rc_archivo_nombre = rc.nombre
+        doc.rc_archivo_mime = rc.mime
+
+    if carnet is not None:
+        doc.carnet_archivo_sha256, doc.carnet_archivo_tamano = BlobService.reemplazar(
+            db, carnet, doc.carnet_archivo_sha256
+        )
+        doc.carnet_archivo = None
+        doc.carnet_archivo_nombre = carnet.nombre
+        doc.carnet_archivo_mime = carnet.mime
 
     db.commit()
     db.refresh(doc)
 
-    return _to_response(doc)
-
 
 @router.get("/me/rc")
 async def descargar_rc(
-    current_user: Usuario = Depends(get_current_user),
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     doc = db.query(DocumentacionReglamentaria).filter(
         DocumentacionReglamentaria.usuario_id == current_user.id
     ).first()
 
-    if not doc or not doc.rc_archivo:
+    if not doc or not doc.rc_archivo_tamano:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No hay archivo de seguro RC"
         )
 
     filename = doc.rc_archivo_nombre or "seguro_rc"
-    return Response(
-        content=doc.rc_archivo,
-        media_type=doc.rc_archivo_mime or "application/octet-stream",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    return _respuesta_archivo(
+        request, db, doc, DocumentacionReglamentaria.rc_archivo, doc.rc_archivo_sha256,
+        doc.rc_archivo_tamano, filename, doc.rc_archivo_mime
     )
 
 
 @router.get("/me/carnet")
 async def descargar_carnet(
-    current_user: Usuario = Depends(get_current_user),
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     doc = db.query(DocumentacionReglamentaria).filter(
         DocumentacionReglamentaria.usuario_id == current_user.id
     ).first()
 
-    if not doc or not doc.carnet_archivo:
+    if not doc or not doc.carnet_archivo_tamano:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No hay archivo de carnet"
         )
 
     filename = doc.carnet_archivo_nombre or "carnet_piloto"
-    return Response(
-        content=doc.carnet_archivo,
-        media_type=doc.carnet_archivo_mime or "application/octet-stream",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    return _respuesta_archivo(
+        request, db, doc, DocumentacionReglamentaria.carnet_archivo, doc.carnet_archivo_sha256,
+        doc.carnet_archivo_tamano, filename, doc.carnet_archivo_mime
     )
 
 
 @router.get("/usuarios/{usuario_id}", response_model=DocumentacionResponse)
 async def obtener_documentacion_usuario(
     usuario_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # TODO: Refinar permisos. Por ahora, permitimos acceso autenticado para MVP.
@@ -197,7 +253,8 @@ async def obtener_documentacion_usuario(
 @router.get("/usuarios/{usuario_id}/rc")
 async def descargar_rc_usuario(
     usuario_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # TODO: Refinar permisos.
@@ -205,24 +262,24 @@ async def descargar_rc_usuario(
         DocumentacionReglamentaria.usuario_id == usuario_id
     ).first()
 
-    if not doc or not doc.rc_archivo:
+    if not doc or not doc.rc_archivo_tamano:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No hay archivo de seguro RC"
         )
 
     filename = doc.rc_archivo_nombre or "seguro_rc"
-    return Response(
-        content=doc.rc_archivo,
-        media_type=doc.rc_archivo_mime or "application/octet-stream",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    return _respuesta_archivo(
+        request, db, doc, DocumentacionReglamentaria.rc_archivo, doc.rc_archivo_sha256,
+        doc.rc_archivo_tamano, filename, doc.rc_archivo_mime
     )
 
 
 @router.get("/usuarios/{usuario_id}/carnet")
 async def descargar_carnet_usuario(
     usuario_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # TODO: Refinar permisos.
@@ -230,15 +287,14 @@ async def descargar_carnet_usuario(
         DocumentacionReglamentaria.usuario_id == usuario_id
     ).first()
 
-    if not doc or not doc.carnet_archivo:
+    if not doc or not doc.carnet_archivo_tamano:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No hay archivo de carnet"
         )
 
     filename = doc.carnet_archivo_nombre or "carnet_piloto"
-    return Response(
-        content=doc.carnet_archivo,
-        media_type=doc.carnet_archivo_mime or "application/octet-stream",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    return _respuesta_archivo(
+        request, db, doc, DocumentacionReglamentaria.carnet_archivo, doc.carnet_archivo_sha256,
+        doc.carnet_archivo_tamano, filename, doc.carnet_archivo_mime
     )
@@ -1,20 +1,26 @@
 """Endpoints de gestión de eventos"""
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.database.db import get_db
-from app.models.usuario import Usuario
+from app.database.db import get_async_db
+from app.database.write_queue import write_queue
 from app.models.evento import Evento
 from app.models.club import Club
-from app.models.miembro_club import MiembroClub
 from app.models.asistencia import AsistenciaEvento
 from app.schemas.evento import EventoCreate, EventoResponse, EventoUpdate
 from app.schemas.asistencia import AsistenciaCreate, AsistenciaResponse, AsistenciaUpdate
-from app.routes.auth import get_current_user
-from datetime import datetime
+from app.routes.auth import get_current_user, require_club_role
+from app.schemas.auth import Membresia, Principal
+from app.services.asistencia_service import AsistenciaService
+from app.utils.paginacion import LIMITE_MAXIMO, Orden, publicar_cursor
+from typing import Optional
 
 router = APIRouter()
 
+ORDEN_EVENTOS = Orden(Evento.id, Evento.fecha_inicio, descendente=True)
+
 
 # ==================== EVENTOS ====================
 
@@ -22,26 +28,16 @@ router = APIRouter()
 async def crear_evento(
     club_id: int,
     evento_create: EventoCreate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden crear eventos")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Crear nuevo evento en el club (solo administradores)"""
     
-    # Verificar que el usuario es administrador del club
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden crear eventos"
-        )
-    
     # Verificar que el club existe
-    club = db.query(Club).filter(Club.id == club_id).first()
+    club = await db.scalar(select(Club).filter(Club.id == club_id).limit(1))
     
     if not club:
         raise HTTPException(
@@ -68,8 +64,8 @@ async def crear_evento(
     )
     
     db.add(nuevo_evento)
-    db.commit()
-    db.refresh(nuevo_evento)
+    await db.commit()
+    await db.refresh(nuevo_evento)
     
     return EventoResponse.model_validate(nuevo_evento)
 
@@ -77,74 +73,41 @@ async def crear_evento(
 @router.get("/clubes/{club_id}/eventos", response_model=list)
 async def listar_eventos_club(
     club_id: int,
-    skip: int = 0,
-    limit: int = 20,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, description="Obsoleto: usa cursor"),
+    limit: int = Query(20, ge=1, le=LIMITE_MAXIMO),
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role()),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Listar eventos del club"""
-    
-    # Verificar que el usuario es miembro del club
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes acceso a este club"
-        )
+    """Listar eventos del club, del que empieza más tarde al que empieza antes"""
     
-    eventos = db.query(Evento).filter(
+    filas = (await db.execute(ORDEN_EVENTOS.consulta(select(Evento).filter(
         Evento.club_id == club_id
-    ).order_by(Evento.fecha_inicio.desc()).offset(skip).limit(limit).all()
+    ).offset(skip), cursor, limit))).all()
+    eventos, siguiente = ORDEN_EVENTOS.pagina(filas, limit)
+    publicar_cursor(request, response, siguiente)
     
-    # Calcular inscritos para cada evento
-    results = []
-    for evento in eventos:
-        inscritos = db.query(AsistenciaEvento).filter(
-            AsistenciaEvento.evento_id == evento.id,
-            AsistenciaEvento.estado == "inscrito"
-        ).count()
-        
-        # Convertir a dict y agregar campo extra
-        # Nota: EventoResponse.model_validate(evento) fallaría validación si el campo es obligatorio y no está en el modelo
-        # Pero como agregamos inscritos_count con default=0 al schema, validará lo del modelo y usará 0.
-        # Luego nosotros lo sobrescribimos.
-        
-        evento_resp = EventoResponse.model_validate(evento)
-        evento_resp.inscritos_count = inscritos
-        results.append(evento_resp)
-        
-    return results
+    # Los contadores de asistencia viajan en la propia fila del evento
+    return [EventoResponse.model_validate(evento) for evento in eventos]
 
 
 @router.get("/clubes/{club_id}/eventos/{evento_id}", response_model=EventoResponse)
 async def obtener_evento(
     club_id: int,
     evento_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role()),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtener detalles de un evento"""
     
-    # Verificar que el usuario es miembro del club
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes acceso a este club"
-        )
-    
-    evento = db.query(Evento).filter(
+    evento = await db.scalar(select(Evento).filter(
         Evento.id == evento_id,
         Evento.club_id == club_id
-    ).first()
+    ).limit(1))
     
     if not evento:
         raise HTTPException(
@@ -152,15 +115,7 @@ async def obtener_evento(
             detail="Evento no encontrado"
         )
     
-    # Calcular inscritos
-    inscritos = db.query(AsistenciaEvento).filter(
-        AsistenciaEvento.evento_id == evento.id,
-        AsistenciaEvento.estado == "inscrito"
-    ).count()
-    
-    response = EventoResponse.model_validate(evento)
-    response.inscritos_count = inscritos
-    return response
+    return EventoResponse.model_validate(evento)
 
 
 @router.put("/clubes/{club_id}/eventos/{evento_id}", response_model=EventoResponse)
@@ -168,28 +123,18 @@ async def actualizar_evento(
     club_id: int,
     evento_id: int,
     evento_update: EventoUpdate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden actualizar eventos")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualizar evento (solo administradores)"""
     
-    # Verificar que el usuario es administrador del club
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden actualizar eventos"
-        )
-    
-    evento = db.query(Evento).filter(
+    evento = await db.scalar(select(Evento).filter(
         Evento.id == evento_id,
         Evento.club_id == club_id
-    ).first()
+    ).limit(1))
     
     if not evento:
         raise HTTPException(
@@ -198,49 +143,37 @@ async def actualizar_evento(
         )
     
     # Actualizar campos
-    for field, value in evento_update.model_dump(exclude_unset=True).items():
+    cambios = evento_update.model_dump(exclude_unset=True)
+    for field, value in cambios.items():
         setattr(evento, field, value)
     
-    db.commit()
-    db.refresh(evento)
+    if "aforo_maximo" in cambios:
+        # Si se amplía el aforo, las plazas nuevas son para la lista de espera
+        await db.flush()
+        await AsistenciaService.promover_lista_espera(db, evento.id)
     
-    # Calcular inscritos
-    inscritos = db.query(AsistenciaEvento).filter(
-        AsistenciaEvento.evento_id == evento.id,
-        AsistenciaEvento.estado == "inscrito"
-    ).count()
+    await db.commit()
+    await db.refresh(evento)
     
-    response = EventoResponse.model_validate(evento)
-    response.inscritos_count = inscritos
-    return response
+    return EventoResponse.model_validate(evento)
 
 
 @router.delete("/clubes/{club_id}/eventos/{evento_id}", response_model=dict)
 async def eliminar_evento(
     club_id: int,
     evento_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden eliminar eventos")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Eliminar evento (solo administradores)"""
     
-    # Verificar que el usuario es administrador del club
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden eliminar eventos"
-        )
-    
-    evento = db.query(Evento).filter(
+    evento = await db.scalar(select(Evento).filter(
         Evento.id == evento_id,
         Evento.club_id == club_id
-    ).first()
+    ).limit(1))
     
     if not evento:
         raise HTTPException(
@@ -248,8 +181,8 @@ async def eliminar_evento(
             detail="Evento no encontrado"
         )
     
-    db.delete(evento)
-    db.commit()
+    await db.delete(evento)
+    await db.commit()
     
     return {"message": "Evento eliminado exitosamente"}
 
@@ -261,59 +194,36 @@ async def registrar_asistencia(
     club_id: int,
     evento_id: int,
     asistencia_in: AsistenciaCreate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(
+        require_club_role(activo=True, detail="Debes ser miembro del club para inscribirte")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Registrar o actualizar asistencia a un evento"""
-    
-    # 1. Verificar membresía
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.estado == "activo"
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(status_code=403, detail="Debes ser miembro del club para inscribirte")
 
     # 2. Verificar evento
-    evento = db.query(Evento).filter(Evento.id == evento_id, Evento.club_id == club_id).first()
+    evento = await db.scalar(select(Evento).filter(Evento.id == evento_id, Evento.club_id == club_id).limit(1))
     if not evento:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
 
-    # 3. Verificar estado previo
-    asistencia = db.query(AsistenciaEvento).filter(
-        AsistenciaEvento.evento_id == evento_id,
-        AsistenciaEvento.usuario_id == current_user.id
-    ).first()
+    usuario_id = current_user.id
+    estado_solicitado = asistencia_in.estado
 
-    nuevo_estado = asistencia_in.estado
-    
-    # 4. Control de Aforo (si se está inscribiendo)
-    if nuevo_estado == "inscrito" and (not asistencia or asistencia.estado != "inscrito"):
-        if evento.aforo_maximo:
-            inscritos = db.query(AsistenciaEvento).filter(
-                AsistenciaEvento.evento_id == evento_id,
-                AsistenciaEvento.estado == "inscrito"
-            ).count()
-            
-            if inscritos >= evento.aforo_maximo:
-                nuevo_estado = "lista_espera" # Auto-move to waitlist
-                # Opcional: Avisar al usuario que quedo en espera
+    async def guardar_asistencia(writer_db: AsyncSession) -> int:
+        # La plaza se reserva con un UPDATE condicional (atómico también entre
+        # procesos); si se libera una, se promueve al primero de la lista de espera
+        asistencia = await AsistenciaService.registrar(writer_db, evento_id, usuario_id, estado_solicitado)
+        return asistencia.id
 
-    if asistencia:
-        asistencia.estado = nuevo_estado
-        asistencia.fecha_actualizacion = datetime.now()
-    else:
-        asistencia = AsistenciaEvento(
-            evento_id=evento_id,
-            usuario_id=current_user.id,
-            estado=nuevo_estado
-        )
-        db.add(asistencia)
-    
-    db.commit()
-    db.refresh(asistencia)
+    asistencia_id = await write_queue.submit(guardar_asistencia)
+
+    asistencia = await db.scalar(
+        select(AsistenciaEvento)
+        .options(selectinload(AsistenciaEvento.usuario))
+        .filter(AsistenciaEvento.id == asistencia_id)
+        .execution_options(populate_existing=True)
+    )
     return AsistenciaResponse.model_validate(asistencia)
 
 
@@ -321,27 +231,20 @@ async def registrar_asistencia(
 async def listar_asistentes(
     club_id: int,
     evento_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role(activo=True, detail="Acceso denegado")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Listar asistentes a un evento (para ver quién va)"""
-    
-    # Solo miembros activos ven la lista
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.estado == "activo"
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(status_code=403, detail="Acceso denegado")
 
     # Obtener lista (inscritos y lista_espera, excluidos cancelados para limpieza visual?)
     # Generalmente se quiere ver quien va.
-    asistentes = db.query(AsistenciaEvento).filter(
+    asistentes = (await db.scalars(select(AsistenciaEvento).options(
+        selectinload(AsistenciaEvento.usuario)
+    ).filter(
         AsistenciaEvento.evento_id == evento_id,
         AsistenciaEvento.estado.in_(["inscrito", "lista_espera"])
-    ).all()
+    ))).all()
     
     # Eager load usuario if needed, but Pydantic creates user info from relationship?
     # Relationship is defined in model, schema has UserResponse.
@@ -354,14 +257,16 @@ async def listar_asistentes(
 async def obtener_mi_asistencia(
     club_id: int,
     evento_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Ver mi estado actual de inscripción"""
-    asistencia = db.query(AsistenciaEvento).filter(
+    asistencia = await db.scalar(select(AsistenciaEvento).options(
+        selectinload(AsistenciaEvento.usuario)
+    ).filter(
         AsistenciaEvento.evento_id == evento_id,
         AsistenciaEvento.usuario_id == current_user.id
-    ).first()
+    ).limit(1))
     
     if not asistencia:
         # Retornar objeto vacío/dummy o 404? 
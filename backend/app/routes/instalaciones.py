@@ -1,41 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.database.db import get_db
-from app.models.usuario import Usuario
 from app.models.club import Club
 from app.models.instalacion import ContrasenaInstalacion
-from app.models.miembro_club import MiembroClub
 from app.schemas.instalacion import ContrasenaCreate, ContrasenaResponse, ContrasenaHistory
-from app.routes.auth import get_current_user
-from typing import List
+from app.routes.auth import get_current_user, require_club_role
+from app.schemas.auth import Membresia, Principal
+from app.utils.paginacion import LIMITE_MAXIMO, LIMITE_POR_DEFECTO, Orden, publicar_cursor
+from typing import List, Optional
 
 router = APIRouter()
 
+ORDEN_HISTORIAL = Orden(ContrasenaInstalacion.id, ContrasenaInstalacion.fecha_creacion, descendente=True)
+
 # ==================== CONTRASEÑA DE INSTALACIONES ====================
 
 @router.get("/clubes/{club_id}/instalacion/password", response_model=ContrasenaResponse)
 async def obtener_contrasena_actual(
     club_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    miembro_act: Membresia = Depends(
+        require_club_role(activo=True, detail="Debes ser miembro activo del club para ver la contraseña")
+    ),
     db: Session = Depends(get_db)
 ):
     """
     Obtener la contraseña actual de las instalaciones.
     Requiere ser miembro activo del club.
     """
-    # Verificar membresía activa
-    miembro_act = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.estado == "activo"
-    ).first()
-
-    if not miembro_act:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Debes ser miembro activo del club para ver la contraseña"
-        )
-    
     # Buscar la última contraseña activa de ese club
     contrasena = db.query(ContrasenaInstalacion).filter(
         ContrasenaInstalacion.club_id == club_id,
@@ -55,7 +48,10 @@ async def obtener_contrasena_actual(
 async def crear_contrasena(
     club_id: int,
     contrasena_data: ContrasenaCreate,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", "propietario", detail="No tienes permisos de administrador")
+    ),
     db: Session = Depends(get_db)
 ):
     """
@@ -63,18 +59,6 @@ async def crear_contrasena(
     (Solo Admin/Owner)
     """
 
-    # Verificar rol
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-
-    if not miembro_admin or miembro_admin.rol not in ["administrador", "propietario"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permisos de administrador"
-        )
-    
     # Desactivar contraseñas antiguas del club
     db.query(ContrasenaInstalacion).filter(
         ContrasenaInstalacion.club_id == club_id,
@@ -100,7 +84,14 @@ async def crear_contrasena(
 @router.get("/clubes/{club_id}/instalacion/history", response_model=List[ContrasenaHistory])
 async def historial_contrasenas(
     club_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", "propietario", detail="Solo administradores pueden ver el historial")
+    ),
     db: Session = Depends(get_db)
 ):
     """
@@ -108,18 +99,10 @@ async def historial_contrasenas(
     (Solo Admin/Owner)
     """
     
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-
-    if not miembro_admin or miembro_admin.rol not in ["administrador", "propietario"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden ver el historial"
-        )
-    
-    return db.query(ContrasenaInstalacion).filter(
+    filas = db.execute(ORDEN_HISTORIAL.consulta(select(ContrasenaInstalacion).filter(
         ContrasenaInstalacion.club_id == club_id
-    ).order_by(ContrasenaInstalacion.fecha_creacion.desc()).all()
+    ), cursor, limit)).all()
+    contrasenas, siguiente = ORDEN_HISTORIAL.pagina(filas, limit)
+    publicar_cursor(request, response, siguiente)
+    return contrasenas
 
@@ -1,24 +1,31 @@
 """Endpoints de gestión de noticias"""
-from fastapi import APIRouter, HTTPException, Depends, status, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, status, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 import logging
 import json
 
-from app.database.db import get_db
-from app.models.usuario import Usuario
+from app.database.db import get_async_db
+from app.database.write_queue import write_queue
 from app.models.noticia import Noticia
 from app.models.comentario import Comentario  # Added
 from app.models.club import Club
-from app.models.miembro_club import MiembroClub
-from app.schemas.noticia import NoticiaCreate, NoticiaResponse, NoticiaUpdate
+from app.schemas.noticia import NoticiaCreate, NoticiaResponse, NoticiaUpdate, ResultadoBusquedaNoticia
 from app.schemas.comentario import ComentarioCreate, ComentarioResponse, ComentarioUpdate # Added
-from app.routes.auth import get_current_user
-from datetime import datetime
-from typing import List # Added
+from app.routes.auth import get_current_user, get_membresias, require_club_role
+from app.services.busqueda_service import BusquedaService
+from app.utils.paginacion import LIMITE_MAXIMO, LIMITE_POR_DEFECTO, Orden, publicar_cursor
+from app.schemas.auth import Membresia, Principal
+from datetime import datetime, timezone
+from typing import Dict, List, Optional # Added
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+ORDEN_NOTICIAS = Orden(Noticia.id, Noticia.fecha_creacion, descendente=True)
+ORDEN_COMENTARIOS = Orden(Comentario.id, Comentario.fecha_creacion)
+
 
 # ==================== NOTICIAS ====================
 
@@ -26,8 +33,11 @@ router = APIRouter()
 async def crear_noticia(
     club_id: int,
     noticia_create: NoticiaCreate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden crear noticias")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Crear nueva noticia en el club (solo administradores)"""
     
@@ -35,21 +45,8 @@ async def crear_noticia(
     logger.info(f"[CREATE NOTICIA] Club ID: {club_id}, User: {current_user.email}")
     logger.info(f"[CREATE NOTICIA] Data: {noticia_create.model_dump()}")
     
-    # Verificar que el usuario es administrador del club
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden crear noticias"
-        )
-    
     # Verificar que el club existe
-    club = db.query(Club).filter(Club.id == club_id).first()
+    club = await db.scalar(select(Club).filter(Club.id == club_id).limit(1))
     
     if not club:
         raise HTTPException(
@@ -68,12 +65,15 @@ async def crear_noticia(
         permite_comentarios=noticia_create.permite_comentarios,
         autor_id=current_user.id,
         estado="publicada",
-        fecha_publicacion=datetime.now()
+        # UTC sin zona, como fecha_creacion (CURRENT_TIMESTAMP): los resúmenes
+        # y el dashboard la comparan con fechas de la BD
+        fecha_publicacion=datetime.now(timezone.utc).replace(tzinfo=None)
     )
     
     db.add(nueva_noticia)
-    db.commit()
-    db.refresh(nueva_noticia)
+    await db.commit()
+    await db.refresh(nueva_noticia)
+    await db.refresh(nueva_noticia, ["autor"])
     
     return NoticiaResponse.model_validate(nueva_noticia)
 
@@ -81,57 +81,65 @@ async def crear_noticia(
 @router.get("/clubes/{club_id}/noticias", response_model=list)
 async def listar_noticias_club(
     club_id: int,
-    skip: int = 0,
-    limit: int = 10,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, description="Obsoleto: usa cursor"),
+    limit: int = Query(10, ge=1, le=LIMITE_MAXIMO),
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role()),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Listar noticias del club"""
-    
-    # Verificar que el usuario es miembro del club
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
+    """Listar noticias del club, de la más reciente a la más antigua"""
     
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes acceso a este club"
-        )
-    
-    noticias = db.query(Noticia).filter(
+    filas = (await db.execute(ORDEN_NOTICIAS.consulta(select(Noticia).options(
+        selectinload(Noticia.autor)
+    ).filter(
         Noticia.club_id == club_id
-    ).order_by(Noticia.fecha_creacion.desc()).offset(skip).limit(limit).all()
+    ).offset(skip), cursor, limit))).all()
+    noticias, siguiente = ORDEN_NOTICIAS.pagina(filas, limit)
+    publicar_cursor(request, response, siguiente)
     
     return [NoticiaResponse.model_validate(n) for n in noticias]
 
 
+@router.get("/clubes/{club_id}/noticias/buscar", response_model=List[ResultadoBusquedaNoticia])
+async def buscar_noticias(
+    club_id: int,
+    q: str = Query("", max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role()),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Buscar en las noticias del club y en sus comentarios, por relevancia"""
+
+    consulta = BusquedaService.consulta_fts(q)
+    if consulta is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Escribe al menos una palabra para buscar"
+        )
+
+    return await BusquedaService.buscar_noticias(db, club_id, consulta, limite=limit)
+
+
 @router.get("/clubes/{club_id}/noticias/{noticia_id}", response_model=NoticiaResponse)
 async def obtener_noticia(
     club_id: int,
     noticia_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role()),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtener detalles de una noticia"""
     
-    # Verificar que el usuario es miembro del club
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes acceso a este club"
-        )
-    
-    noticia = db.query(Noticia).filter(
+    noticia = await db.scalar(select(Noticia).options(
+        selectinload(Noticia.autor)
+    ).filter(
         Noticia.id == noticia_id,
         Noticia.club_id == club_id
-    ).first()
+    ).limit(1))
     
     if not noticia:
         raise HTTPException(
@@ -147,15 +155,18 @@ async def actualizar_noticia(
     club_id: int,
     noticia_id: int,
     noticia_update: NoticiaUpdate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    membresias: Dict[int, Membresia] = Depends(get_membresias),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualizar noticia (solo administradores o autor)"""
     
-    noticia = db.query(Noticia).filter(
+    noticia = await db.scalar(select(Noticia).options(
+        selectinload(Noticia.autor)
+    ).filter(
         Noticia.id == noticia_id,
         Noticia.club_id == club_id
-    ).first()
+    ).limit(1))
     
     if not noticia:
         raise HTTPException(
@@ -164,12 +175,9 @@ async def actualizar_noticia(
         )
     
     # Verificar permisos (administrador o autor)
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
+    miembro = membresias.get(club_id)
     
-    if noticia.autor_id != current_user.id and miembro.rol != "administrador":
+    if noticia.autor_id != current_user.id and (not miembro or miembro.rol != "administrador"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos para editar esta noticia"
@@ -179,8 +187,9 @@ async def actualizar_noticia(
     for field, value in noticia_update.model_dump(exclude_unset=True).items():
         setattr(noticia, field, value)
     
-    db.commit()
-    db.refresh(noticia)
+    await db.commit()
+    await db.refresh(noticia)
+    await db.refresh(noticia, ["autor"])
     
     return NoticiaResponse.model_validate(noticia)
 
@@ -189,15 +198,16 @@ async def actualizar_noticia(
 async def eliminar_noticia(
     club_id: int,
     noticia_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    membresias: Dict[int, Membresia] = Depends(get_membresias),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Eliminar noticia (solo administradores o autor)"""
     
-    noticia = db.query(Noticia).filter(
+    noticia = await db.scalar(select(Noticia).filter(
         Noticia.id == noticia_id,
         Noticia.club_id == club_id
-    ).first()
+    ).limit(1))
     
     if not noticia:
         raise HTTPException(
@@ -206,19 +216,16 @@ async def eliminar_noticia(
         )
     
     # Verificar permisos
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
+    miembro = membresias.get(club_id)
     
-    if noticia.autor_id != current_user.id and miembro.rol != "administrador":
+    if noticia.autor_id != current_user.id and (not miembro or miembro.rol != "administrador"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos para eliminar esta noticia"
         )
     
-    db.delete(noticia)
-    db.commit()
+    await db.delete(noticia)
+    await db.commit()
     
     return {"message": "Noticia eliminada correctamente"}
 
@@ -229,41 +236,39 @@ async def eliminar_noticia(
 async def listar_comentarios(
     club_id: int,
     noticia_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(
+        require_club_role(activo=True, detail="No eres miembro activo de este club")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Listar comentarios de una noticia"""
     
     # Verificar acceso al club/noticia
-    noticia = db.query(Noticia).filter(
+    noticia = await db.scalar(select(Noticia).filter(
         Noticia.id == noticia_id,
         Noticia.club_id == club_id
-    ).first()
+    ).limit(1))
     
     if not noticia:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Noticia no encontrada"
         )
-        
-    # Verificar membresía
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.estado == "activo"
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No eres miembro activo de este club"
-        )
 
-    # Devolver comentarios ordenados por fecha (más recientes abajo? o arriba?)
-    # Usualmente comentarios cronológicos: más viejos arriba.
-    return db.query(Comentario).filter(
+    # Comentarios en orden cronológico: más viejos arriba
+    filas = (await db.execute(ORDEN_COMENTARIOS.consulta(select(Comentario).options(
+        selectinload(Comentario.autor)
+    ).filter(
         Comentario.noticia_id == noticia_id
-    ).order_by(Comentario.fecha_creacion.asc()).all()
+    ), cursor, limit))).all()
+    comentarios, siguiente = ORDEN_COMENTARIOS.pagina(filas, limit)
+    publicar_cursor(request, response, siguiente)
+    return comentarios
 
 
 @router.post("/clubes/{club_id}/noticias/{noticia_id}/comentarios", response_model=ComentarioResponse)
@@ -271,15 +276,18 @@ async def crear_comentario(
     club_id: int,
     noticia_id: int,
     comentario: ComentarioCreate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(
+        require_club_role(activo=True, detail="No eres miembro activo de este club")
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Publicar un comentario en una noticia"""
     
-    noticia = db.query(Noticia).filter(
+    noticia = await db.scalar(select(Noticia).filter(
         Noticia.id == noticia_id,
         Noticia.club_id == club_id
-    ).first()
+    ).limit(1))
     
     if not noticia:
         raise HTTPException(
@@ -292,31 +300,26 @@ async def crear_comentario(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Los comentarios están desactivados para esta noticia"
         )
+        
+    autor_id = current_user.id
 
-    # Verificar membresía
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.estado == "activo"
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No eres miembro activo de este club"
+    async def guardar_comentario(writer_db: AsyncSession) -> int:
+        nuevo_comentario = Comentario(
+            contenido=comentario.contenido,
+            autor_id=autor_id,
+            noticia_id=noticia_id
         )
-        
-    nuevo_comentario = Comentario(
-        contenido=comentario.contenido,
-        autor_id=current_user.id,
-        noticia_id=noticia_id
+        writer_db.add(nuevo_comentario)
+        await writer_db.flush()
+        return nuevo_comentario.id
+
+    comentario_id = await write_queue.submit(guardar_comentario)
+
+    return await db.scalar(
+        select(Comentario)
+        .options(selectinload(Comentario.autor))
+        .filter(Comentario.id == comentario_id)
     )
-    
-    db.add(nuevo_comentario)
-    db.commit()
-    db.refresh(nuevo_comentario)
-    
-    return nuevo_comentario
 
 
 @router.delete("/clubes/{club_id}/noticias/{noticia_id}/comentarios/{comentario_id}")
@@ -324,15 +327,16 @@ async def eliminar_comentario(
     club_id: int,
     noticia_id: int,
     comentario_id: int,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    membresias: Dict[int, Membresia] = Depends(get_membresias),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Eliminar un comentario (autor o administrador)"""
     
-    comentario = db.query(Comentario).filter(
+    comentario = await db.scalar(select(Comentario).filter(
         Comentario.id == comentario_id,
         Comentario.noticia_id == noticia_id
-    ).first()
+    ).limit(1))
     
     if not comentario:
         raise HTTPException(
@@ -341,10 +345,7 @@ async def eliminar_comentario(
         )
         
     # Verificar permisos (Autor o Admin del club)
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
+    miembro = membresias.get(club_id)
     
     es_admin = miembro and miembro.rol in ["administrador", "propietario"]
     es_autor = comentario.autor_id == current_user.id
@@ -355,8 +356,8 @@ async def eliminar_comentario(
             detail="No tienes permiso para eliminar este comentario"
         )
         
-    db.delete(comentario)
-    db.commit()
+    await db.delete(comentario)
+    await db.commit()
     
     return {"message": "Comentario eliminado"}
     
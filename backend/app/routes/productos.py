@@ -4,17 +4,16 @@ from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.database.db import get_db
-from app.models.usuario import Usuario
 from app.models.producto import ProductoAfiliacion
 from app.models.club import Club
-from app.models.miembro_club import MiembroClub
 from app.schemas.producto import (
     ProductoAfiliacionCreate,
     ProductoAfiliacionUpdate,
     ProductoAfiliacionResponse,
     ProductoAfiliacionListResponse
 )
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_user, require_club_role
+from app.schemas.auth import Membresia, Principal
 
 router = APIRouter()
 
@@ -25,24 +24,14 @@ router = APIRouter()
 async def crear_producto(
     club_id: int,
     producto_create: ProductoAfiliacionCreate,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden crear productos")
+    ),
     db: Session = Depends(get_db)
 ):
     """Crear nuevo producto de afiliación (solo administradores)"""
     
-    # Verificar que el usuario es administrador del club
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden crear productos"
-        )
-    
     # Verificar que el club existe
     club = db.query(Club).filter(Club.id == club_id).first()
     if not club:
@@ -81,23 +70,12 @@ async def listar_productos_club(
     categoria: Optional[str] = None,
     solo_activos: bool = True,
     solo_destacados: bool = False,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role()),
     db: Session = Depends(get_db)
 ):
     """Listar productos de afiliación del club"""
     
-    # Verificar que el usuario es miembro del club
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes acceso a este club"
-        )
-    
     # Construir query
     query = db.query(ProductoAfiliacion).filter(
         ProductoAfiliacion.club_id == club_id
@@ -129,23 +107,12 @@ async def listar_productos_club(
 async def obtener_producto(
     club_id: int,
     producto_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role()),
     db: Session = Depends(get_db)
 ):
     """Obtener detalle de un producto"""
     
-    # Verificar que el usuario es miembro del club
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes acceso a este club"
-        )
-    
     producto = db.query(ProductoAfiliacion).filter(
         ProductoAfiliacion.id == producto_id,
         ProductoAfiliacion.club_id == club_id
@@ -165,24 +132,14 @@ async def actualizar_producto(
     club_id: int,
     producto_id: int,
     producto_update: ProductoAfiliacionUpdate,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden actualizar productos")
+    ),
     db: Session = Depends(get_db)
 ):
     """Actualizar producto (solo administradores)"""
     
-    # Verificar que el usuario es administrador
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden actualizar productos"
-        )
-    
     producto = db.query(ProductoAfiliacion).filter(
         ProductoAfiliacion.id == producto_id,
         ProductoAfiliacion.club_id == club_id
@@ -209,24 +166,14 @@ async def actualizar_producto(
 async def eliminar_producto(
     club_id: int,
     producto_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    miembro_admin: Membresia = Depends(
+        require_club_role("administrador", detail="Solo administradores pueden eliminar productos")
+    ),
     db: Session = Depends(get_db)
 ):
     """Eliminar producto (solo administradores)"""
     
-    # Verificar que el usuario es administrador
-    miembro_admin = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    
-    if not miembro_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden eliminar productos"
-        )
-    
     producto = db.query(ProductoAfiliacion).filter(
         ProductoAfiliacion.id == producto_id,
         ProductoAfiliacion.club_id == club_id
@@ -246,23 +193,12 @@ async def eliminar_producto(
 async def registrar_click(
     club_id: int,
     producto_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    miembro: Membresia = Depends(require_club_role()),
     db: Session = Depends(get_db)
 ):
     """Registrar click en enlace de afiliación (para estadísticas)"""
     
-    # Verificar que el usuario es miembro
-    miembro = db.query(MiembroClub).filter(
-        MiembroClub.usuario_id == current_user.id,
-        MiembroClub.club_id == club_id
-    ).first()
-    
-    if not miembro:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes acceso a este club"
-        )
-    
     producto = db.query(ProductoAfiliacion).filter(
         ProductoAfiliacion.id == producto_id,
         ProductoAfiliacion.club_id == club_id
@@ -1,53 +1,52 @@
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Union
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database.db import get_db
 from app.models.socio import Socio
 from app.models.club import Club
-from app.models.usuario import Usuario
-from app.models.miembro_club import MiembroClub
 from app.schemas.socio import SocioCreate, SocioUpdate, SocioResponse
 from app.routes.auth import get_current_user
+from app.schemas.auth import Principal
+from app.services.membresia_service import MembresiaService
+from app.services.blob_service import BlobService
+from app.utils.blob_store import blob_store
+from app.utils.blobs import respuesta_archivo, respuesta_blob
+from app.utils.imagenes import FORMATOS_MINIATURA, LADOS_MINIATURA, FotoProcesada, ImagenNoValida, imagen_pool
+from app.utils.paginacion import LIMITE_MAXIMO, LIMITE_POR_DEFECTO, Orden, publicar_cursor
+from app.utils.subidas import RutaSubida, limite_subida, recibir_subida
 
-router = APIRouter()
+router = APIRouter(route_class=RutaSubida)
 
+ORDEN_SOCIOS = Orden(Socio.id)
 
-def _check_permission(db: Session, user: Usuario, club_id: int):
+
+def _check_permission(db: Session, user: Principal, club_id: int):
     # Verificar si es admin del club
-    member = db.query(MiembroClub).filter(
-        MiembroClub.club_id == club_id,
-        MiembroClub.usuario_id == user.id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    if not member and not user.es_superadmin:
+    member = MembresiaService.obtener_membresia(db, user.id, club_id)
+    if (not member or member.rol != "administrador") and not user.es_superadmin:
          raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos para gestionar socios de este club"
         )
 
 
-def _check_permission_or_self(db: Session, user: Usuario, club_id: int, socio_user_id: int):
+def _check_permission_or_self(db: Session, user: Principal, club_id: int, socio_user_id: int):
     if user.es_superadmin:
         return
 
-    member_admin = db.query(MiembroClub).filter(
-        MiembroClub.club_id == club_id,
-        MiembroClub.usuario_id == user.id,
-        MiembroClub.rol == "administrador"
-    ).first()
-    if member_admin:
+    # Una sola membresía (cacheada) cubre tanto el caso admin como el propio socio
+    member = MembresiaService.obtener_membresia(db, user.id, club_id)
+    if member and member.rol == "administrador":
         return
 
-    if socio_user_id == user.id:
-        member = db.query(MiembroClub).filter(
-            MiembroClub.club_id == club_id,
-            MiembroClub.usuario_id == user.id
-        ).first()
-        if member:
-            return
+    if socio_user_id == user.id and member:
+        return
 
     raise HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
@@ -58,18 +57,23 @@ def _check_permission_or_self(db: Session, user: Usuario, club_id: int, socio_us
 @router.get("/", response_model=List[SocioResponse])
 async def listar_socios(
     club_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Listar socios de un club especifico"""
     # Verificar acceso (miembros pueden ver lista? asumamos que si por ahora, o solo admins)
     # _check_permission(db, current_user, club_id) # Descomentar para restringir solo a admins
     
-    socios = db.query(Socio).filter(Socio.club_id == club_id).all()
-    # Mapear campo tiene_foto
-    for s in socios:
-        s.tiene_foto = s.foto_carnet_blob is not None
-        
+    # foto_carnet_blob es diferida: tiene_foto sale de su tamaño, sin leer las fotos
+    filas = db.execute(ORDEN_SOCIOS.consulta(
+        select(Socio).filter(Socio.club_id == club_id), cursor, limit
+    )).all()
+    socios, siguiente = ORDEN_SOCIOS.pagina(filas, limit)
+    publicar_cursor(request, response, siguiente)
     return socios
 
 
@@ -77,7 +81,7 @@ async def listar_socios(
 async def crear_socio(
     socio_in: SocioCreate,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Registrar nuevo socio en club"""
     _check_permission_or_self(db, current_user, socio_in.club_id, socio_in.usuario_id)
@@ -104,7 +108,6 @@ async def crear_socio(
     db.add(nuevo_socio)
     db.commit()
     db.refresh(nuevo_socio)
-    nuevo_socio.tiene_foto = False
     return nuevo_socio
 
 
@@ -112,7 +115,7 @@ async def crear_socio(
 async def obtener_socio(
     socio_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     socio = db.query(Socio).filter(Socio.id == socio_id).first()
     if not socio:
@@ -121,7 +124,6 @@ async def obtener_socio(
     # Permisos? Miembro del club o Admin
     # Por ahora abierto a autenticados para simplificar MVP funcional
     
-    socio.tiene_foto = socio.foto_carnet_blob is not None
     return socio
 
 
@@ -130,7 +132,7 @@ async def actualizar_socio(
     socio_id: int,
     socio_in: SocioUpdate,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     socio_db = db.query(Socio).filter(Socio.id == socio_id).first()
     if not socio_db:
@@ -144,16 +146,16 @@ async def actualizar_socio(
         
     db.commit()
     db.refresh(socio_db)
-    socio_db.tiene_foto = socio_db.foto_carnet_blob is not None
     return socio_db
 
 
 @router.post("/{socio_id}/foto")
+@limite_subida(lambda: settings.max_foto_upload_size)
 async def subir_foto_socio(
     socio_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     socio_db = db.query(Socio).filter(Socio.id == socio_id).first()
     if not socio_db:
@@ -165,35 +167,112 @@ async def subir_foto_socio(
     if file.content_type not in ["image/jpeg", "image/png", "image/webp"]:
         raise HTTPException(status_code=400, detail="Formato de imagen no soportado")
 
-    contents = await file.read()
-    socio_db.foto_carnet_blob = contents
-    socio_db.foto_carnet_mime = file.content_type
-    socio_db.foto_carnet_fecha_subida = datetime.now()
-    
-    db.commit()
+    # Se guarda una versión normalizada (orientada, sin EXIF, lado acotado)
+    # y sus miniaturas; el procesado va a otro proceso, que lee la subida
+    # del temporal, y la escritura en el almacén (con fsync) y en la BD a un
+    # hilo: ninguno de los dos bloquea el bucle
+    async with recibir_subida(file, settings.max_foto_upload_size) as subida:
+        try:
+            foto = await imagen_pool.procesar_foto(str(subida.ruta))
+        except ImagenNoValida:
+            raise HTTPException(status_code=400, detail="El archivo no es una imagen válida")
+
+    await run_in_threadpool(_guardar_foto, db, socio_db, foto)
     return {"message": "Foto actualizada correctamente"}
 
 
+def _guardar_foto(db: Session, socio_db: Socio, foto: FotoProcesada) -> None:
+    """Guarda la foto procesada y sus miniaturas en el almacén y confirma (en un hilo)"""
+    socio_db.foto_carnet_sha256, socio_db.foto_carnet_tamano = BlobService.reemplazar(
+        db, foto.datos, socio_db.foto_carnet_sha256
+    )
+    for lado, miniatura in foto.miniaturas.items():
+        if not BlobService.obtener_variante(db, socio_db.foto_carnet_sha256, f"{lado}.webp"):
+            BlobService.guardar_variante(db, socio_db.foto_carnet_sha256, f"{lado}.webp", miniatura, "image/webp")
+    socio_db.foto_carnet_blob = None  # copia antigua dentro de la BD, si la había
+    socio_db.foto_carnet_mime = foto.mime
+    socio_db.foto_carnet_fecha_subida = datetime.now(timezone.utc).replace(tzinfo=None)  # UTC, como func.now()
+
+    db.commit()
+
+
 @router.get("/{socio_id}/foto")
 async def obtener_foto_socio(
     socio_id: int,
+    request: Request,
+    size: Optional[int] = Query(None, description="Lado de la miniatura en px: 64, 256 o 512"),
+    formato: str = Query("webp", description="Formato de la miniatura: webp o jpeg"),
     db: Session = Depends(get_db)
 ):
+    if size is not None and size not in LADOS_MINIATURA:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tamaño no soportado; usa {', '.join(str(lado) for lado in LADOS_MINIATURA)}"
+        )
+    if formato not in FORMATOS_MINIATURA:
+        raise HTTPException(status_code=400, detail="Formato no soportado; usa webp o jpeg")
+
     socio_db = db.query(Socio).filter(Socio.id == socio_id).first()
-    if not socio_db or not socio_db.foto_carnet_blob:
+    if not socio_db or not socio_db.foto_carnet_tamano:
          # Retornar imagen por defecto o 404? 404 es mejor para API
         raise HTTPException(status_code=404, detail="Foto no encontrada")
-        
-    return Response(
-        content=socio_db.foto_carnet_blob, 
-        media_type=socio_db.foto_carnet_mime or "image/jpeg"
+    
+    descarga = dict(
+        tamano=socio_db.foto_carnet_tamano,
+        media_type=socio_db.foto_carnet_mime or "image/jpeg",
+        cache_control=settings.cache_control_fotos,
+        ultima_modificacion=socio_db.foto_carnet_fecha_subida
     )
+    if socio_db.foto_carnet_sha256:
+        if size is not None:
+            variante = await _miniatura(db, socio_db.foto_carnet_sha256, size, formato)
+            descarga.update(tamano=variante.tamano, media_type=variante.mime)
+            return respuesta_archivo(request, variante.sha256, **descarga)
+        return respuesta_archivo(request, socio_db.foto_carnet_sha256, **descarga)
+    
+    # Foto aún dentro de la BD (pendiente de migrar al almacén): sin
+    # miniaturas, se sirve la original también cuando se pide ?size=
+    return respuesta_blob(request, db, Socio.foto_carnet_blob, Socio.id == socio_id, **descarga)
+
+
+async def _miniatura(db: Session, sha256: str, lado: int, formato: str):
+    """Variante de la foto; si no existe (fotos anteriores, JPEG) se genera y se guarda"""
+    nombre = f"{lado}.{formato}"
+    variante = BlobService.obtener_variante(db, sha256, nombre)
+    if variante:
+        return variante
+
+    # Leer el original y guardar la variante tocan disco y BD: en un hilo
+    original = await run_in_threadpool(_original, sha256)
+    try:
+        datos = await imagen_pool.miniatura(original, lado, formato)
+    except ImagenNoValida:
+        raise HTTPException(status_code=404, detail="La foto no admite miniaturas")
+
+    return await run_in_threadpool(_guardar_miniatura, db, sha256, nombre, datos, FORMATOS_MINIATURA[formato][1])
+
+
+def _original(sha256: str) -> Union[str, bytes]:
+    """Ruta del original en disco o, si el almacén no la tiene, su contenido"""
+    if not blob_store.existe(sha256):
+        raise HTTPException(status_code=404, detail="Archivo no encontrado en el almacén")
+    ruta = blob_store.ruta_local(sha256)
+    if ruta is not None:
+        return str(ruta)
+    with blob_store.abrir(sha256) as f:
+        return f.read()
+
+
+def _guardar_miniatura(db: Session, sha256: str, nombre: str, datos: bytes, mime: str):
+    variante = BlobService.guardar_variante(db, sha256, nombre, datos, mime)
+    db.commit()
+    return variante
 
 @router.delete("/{socio_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_socio(
     socio_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     socio_db = db.query(Socio).filter(Socio.id == socio_id).first()
     if not socio_db:
@@ -201,6 +280,7 @@ async def eliminar_socio(
     
     _check_permission(db, current_user, socio_db.club_id)
     
+    BlobService.liberar(db, socio_db.foto_carnet_sha256)
     db.delete(socio_db)
     db.commit()
     return None
@@ -60,6 +60,41 @@ class UsuarioResponse(UsuarioBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class Principal(BaseModel):
+    """Usuario autenticado que reciben las rutas: inmutable y sin secretos.
+
+    Se cachea entre peticiones; las rutas que modifican al usuario cargan la
+    instancia ORM con get_current_user_db.
+    """
+    id: int
+    email: str
+    nombre_completo: str
+    email_verificado: Optional[bool] = False
+    activo: Optional[bool] = True
+    es_superadmin: Optional[bool] = False
+    dos_fa_habilitado: Optional[bool] = False
+    google_id: Optional[str] = None
+    google_photo_url: Optional[str] = None
+    fecha_creacion: Optional[datetime] = None
+    ultimo_login: Optional[datetime] = None
+    notifications_enabled: Optional[bool] = True
+    email_digest: Optional[str] = "weekly"
+    dark_mode: Optional[bool] = False
+    language: Optional[str] = "es"
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class Membresia(BaseModel):
+    """Membresía del usuario autenticado en un club (rol y estado), cacheada entre peticiones"""
+    id: int
+    club_id: int
+    rol: str
+    estado: str
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
 class UsuarioUpdate(BaseModel):
     """Schema para actualizar perfil/preferencias del usuario"""
     nombre_completo: Optional[str] = None
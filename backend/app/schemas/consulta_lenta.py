@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Dict, List
+
+
+class ConsultaLentaResponse(BaseModel):
+    """Huella de consulta lenta (SQL normalizado) con sus tiempos y su plan"""
+    sql: str
+    parametros: str
+    veces: int
+    total_ms: float
+    media_ms: float
+    max_ms: float
+    llamadores: Dict[str, int]
+    plan: List[str]
+    primera_vez: float
+    ultima_vez: float
+
+
+class ConsultasLentasResponse(BaseModel):
+    umbral_ms: float
+    huellas: int
+    descartadas: int
+    consultas: List[ConsultaLentaResponse]
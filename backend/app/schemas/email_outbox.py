@@ -0,0 +1,23 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class EmailOutboxResponse(BaseModel):
+    """Email de la bandeja de salida (sin el cuerpo)"""
+    id: int
+    destinatario: str
+    asunto: str
+    estado: str
+    intentos: int
+    proximo_intento: datetime
+    ultimo_error: Optional[str] = None
+    fecha_creacion: Optional[datetime] = None
+    fecha_envio: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BandejaSalidaResponse(BaseModel):
+    por_estado: Dict[str, int]
+    emails: List[EmailOutboxResponse]
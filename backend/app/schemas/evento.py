@@ -53,6 +53,8 @@ class EventoResponse(BaseModel):
     aforo_maximo: Optional[int] = None
     imagen_url: Optional[str] = None
     inscritos_count: int = 0
+    lista_espera_count: int = 0
+    cancelados_count: int = 0
 
     model_config = ConfigDict(from_attributes=True)
     ubicacion: Optional[str] = None
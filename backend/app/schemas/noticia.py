@@ -51,3 +51,16 @@ class NoticiaResponse(BaseModel):
     fecha_actualizacion: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ResultadoBusquedaNoticia(BaseModel):
+    """Resultado de la búsqueda de noticias: la noticia o uno de sus comentarios.
+
+    titulo y fragmento son HTML escapado con las coincidencias entre <mark>.
+    """
+    noticia_id: int
+    comentario_id: Optional[int] = None
+    titulo: str
+    fragmento: str
+    fecha: Optional[datetime] = None
+    puntuacion: float
@@ -0,0 +1,140 @@
+"""Servicio de asistencia a eventos (RSVP): aforo y lista de espera"""
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.asistencia import AsistenciaEvento
+from app.models.evento import Evento
+
+# Columna de Evento que cuenta las asistencias en cada estado
+CONTADORES_ASISTENCIA = {
+    "inscrito": Evento.inscritos_count,
+    "lista_espera": Evento.lista_espera_count,
+    "cancelado": Evento.cancelados_count,
+}
+
+
+class AsistenciaService:
+    """Asignación de plazas de eventos.
+
+    Las plazas se reservan con un UPDATE condicional sobre
+    eventos.inscritos_count (solo suma si queda aforo), que la BD aplica de
+    forma atómica: aunque varios procesos inscriban a la vez nunca se supera
+    aforo_maximo. Quien no obtiene plaza pasa a lista de espera, y cada plaza
+    liberada se ofrece al primero de la lista (FIFO por fecha_lista_espera).
+
+    Los métodos no hacen commit: se ejecutan dentro de la transacción del
+    llamador (normalmente un trabajo de la cola de escritura).
+    """
+
+    @staticmethod
+    async def registrar(
+        db: AsyncSession,
+        evento_id: int,
+        usuario_id: int,
+        estado_solicitado: str
+    ) -> AsistenciaEvento:
+        """Registra o cambia la asistencia del usuario aplicando aforo y lista de espera"""
+        asistencia = await db.scalar(select(AsistenciaEvento).filter(
+            AsistenciaEvento.evento_id == evento_id,
+            AsistenciaEvento.usuario_id == usuario_id
+        ).limit(1))
+        estado_anterior = asistencia.estado if asistencia else None
+
+        nuevo_estado = estado_solicitado
+        if nuevo_estado == "inscrito" and estado_anterior != "inscrito":
+            if not await AsistenciaService._reservar_plaza(db, evento_id):
+                nuevo_estado = "lista_espera"
+
+        if asistencia is None:
+            asistencia = AsistenciaEvento(evento_id=evento_id, usuario_id=usuario_id, estado=nuevo_estado)
+            db.add(asistencia)
+        elif nuevo_estado != estado_anterior:
+            asistencia.estado = nuevo_estado
+            asistencia.fecha_actualizacion = datetime.now()
+
+        if nuevo_estado == "lista_espera" and estado_anterior != "lista_espera":
+            # Entrar (o volver) a la lista de espera pone al usuario al final de la cola
+            asistencia.fecha_lista_espera = datetime.now()
+
+        await AsistenciaService._mover_contadores(db, evento_id, estado_anterior, nuevo_estado)
+        await db.flush()
+
+        if estado_anterior == "inscrito" and nuevo_estado != "inscrito":
+            await AsistenciaService.promover_lista_espera(db, evento_id)
+
+        return asistencia
+
+    @staticmethod
+    async def promover_lista_espera(db: AsyncSession, evento_id: int) -> List[AsistenciaEvento]:
+        """Ocupa las plazas libres con la lista de espera en orden de llegada"""
+        promovidos = []
+        while True:
+            siguiente = await db.scalar(select(AsistenciaEvento).filter(
+                AsistenciaEvento.evento_id == evento_id,
+                AsistenciaEvento.estado == "lista_espera"
+            ).order_by(
+                AsistenciaEvento.fecha_lista_espera,
+                AsistenciaEvento.id
+            ).limit(1))
+
+            if siguiente is None or not await AsistenciaService._reservar_plaza(db, evento_id):
+                return promovidos
+
+            siguiente.estado = "inscrito"
+            siguiente.fecha_actualizacion = datetime.now()
+            siguiente.fecha_lista_espera = None
+            await AsistenciaService._mover_contadores(db, evento_id, "lista_espera", "inscrito")
+            await db.flush()
+            promovidos.append(siguiente)
+
+    @staticmethod
+    async def _reservar_plaza(db: AsyncSession, evento_id: int) -> bool:
+        """Suma un inscrito solo si queda aforo (aforo vacío o 0 = ilimitado)"""
+        resultado = await db.execute(
+            update(Evento)
+            .where(
+                Evento.id == evento_id,
+                or_(
+                    Evento.aforo_maximo.is_(None),
+                    Evento.aforo_maximo <= 0,
+                    Evento.inscritos_count < Evento.aforo_maximo
+                )
+            )
+            .values(inscritos_count=Evento.inscritos_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        return resultado.rowcount == 1
+
+    @staticmethod
+    async def _mover_contadores(
+        db: AsyncSession,
+        evento_id: int,
+        estado_anterior: Optional[str],
+        estado_nuevo: str
+    ):
+        """Mueve una asistencia entre los contadores del evento.
+
+        inscritos_count solo lo incrementa _reservar_plaza, que es quien
+        garantiza el aforo; aquí únicamente se descuenta al salir de "inscrito".
+        """
+        if estado_anterior == estado_nuevo:
+            return
+
+        valores = {}
+        if estado_anterior in CONTADORES_ASISTENCIA:
+            columna = CONTADORES_ASISTENCIA[estado_anterior]
+            valores[columna.key] = columna - 1
+        if estado_nuevo in CONTADORES_ASISTENCIA and estado_nuevo != "inscrito":
+            columna = CONTADORES_ASISTENCIA[estado_nuevo]
+            valores[columna.key] = columna + 1
+
+        if valores:
+            await db.execute(
+                update(Evento)
+                .where(Evento.id == evento_id)
+                .values(**valores)
+                .execution_options(synchronize_session=False)
+            )
@@ -8,12 +8,21 @@ from app.models.usuario import Usuario
 from app.models.club import Club
 from app.models.miembro_club import MiembroClub
 from app.models.invitacion import Invitacion
+from app.config import settings
+from app.services.membresia_service import MembresiaService
+from app.utils.cache import TTLCache
 from app.utils.security import AuthUtils, generate_invitation_token
 from app.schemas.auth import (
     LoginRequest, UsuarioCreate, UsuarioCreateDesdeInvitacion,
     TokenResponse, TokenData
 )
 
+# Principals de usuarios autenticados compartidos entre peticiones (ver get_current_user)
+principal_cache = TTLCache(
+    maxsize=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl_seconds
+)
+
 
 class AuthService:
     """Servicio de autenticación"""
@@ -21,9 +30,14 @@ class AuthService:
     @staticmethod
     def registrar_usuario(
         db: Session,
-        usuario_create: UsuarioCreate
+        usuario_create: UsuarioCreate,
+        contraseña_hash: Optional[str] = None
     ) -> Optional[Usuario]:
-        """Registra un nuevo usuario con email y contraseña"""
+        """Registra un nuevo usuario con email y contraseña.
+
+        Las rutas async calculan el hash en el pool de bcrypt y lo pasan en
+        contraseña_hash para no hacerlo dentro del event loop.
+        """
         # Verificar que el email no exista
         usuario_existente = db.query(Usuario).filter(
             Usuario.email == usuario_create.email
@@ -36,7 +50,7 @@ class AuthService:
         usuario = Usuario(
             email=usuario_create.email,
             nombre_completo=usuario_create.nombre_completo,
-            contraseña_hash=AuthUtils.hash_password(usuario_create.password),
+            contraseña_hash=contraseña_hash or AuthUtils.hash_password(usuario_create.password),
             email_verificado=True,  # Simplificado, en producción verificar email
             activo=True
         )
@@ -75,7 +89,8 @@ class AuthService:
     @staticmethod
     def registrar_desde_invitacion(
         db: Session,
-        usuario_create: UsuarioCreateDesdeInvitacion
+        usuario_create: UsuarioCreateDesdeInvitacion,
+        contraseña_hash: Optional[str] = None
     ) -> Optional[Tuple[Usuario, str]]:
         """Registra usuario desde invitación y lo vincula al club"""
         # Validar token de invitación
@@ -104,7 +119,7 @@ class AuthService:
         usuario = Usuario(
             email=usuario_create.email,
             nombre_completo=usuario_create.nombre_completo,
-            contraseña_hash=AuthUtils.hash_password(usuario_create.password),
+            contraseña_hash=contraseña_hash or AuthUtils.hash_password(usuario_create.password),
             email_verificado=True,
             activo=True
         )
@@ -133,13 +148,10 @@ class AuthService:
         return usuario, "Usuario registrado y vinculado al club correctamente"
     
     @staticmethod
-    def login(
-        db: Session,
-        login_request: LoginRequest
-    ) -> Optional[Usuario]:
-        """Verifica credenciales y retorna usuario si son válidas"""
+    def obtener_usuario_para_login(db: Session, email: str) -> Optional[Usuario]:
+        """Usuario activo con contraseña local para el email (la verificación se hace aparte)"""
         usuario = db.query(Usuario).filter(
-            Usuario.email == login_request.email,
+            Usuario.email == email,
             Usuario.activo == True
         ).first()
         
@@ -150,15 +162,32 @@ class AuthService:
         if not usuario.contraseña_hash:
             return None
         
-        if not AuthUtils.verify_password(
+        return usuario
+    
+    @staticmethod
+    def login(
+        db: Session,
+        login_request: LoginRequest
+    ) -> Optional[Usuario]:
+        """Verifica credenciales y retorna usuario si son válidas"""
+        usuario = AuthService.obtener_usuario_para_login(db, login_request.email)
+        
+        if not usuario or not AuthUtils.verify_password(
             login_request.password,
             usuario.contraseña_hash
         ):
             return None
         
-        # Actualizar último login
+        return AuthService.registrar_login(db, usuario)
+    
+    @staticmethod
+    def registrar_login(db: Session, usuario: Usuario) -> Usuario:
+        """Marca el último login tras validar las credenciales"""
         usuario.ultimo_login = datetime.now(timezone.utc)
         db.commit()
+        # Un login nuevo parte siempre de datos frescos del usuario y sus clubes
+        AuthService.invalidar_principal(usuario.id)
+        MembresiaService.invalidar(usuario.id)
         
         return usuario
     
@@ -225,6 +254,11 @@ class AuthService:
         
         return AuthService.crear_tokens(usuario)
     
+    @staticmethod
+    def invalidar_principal(usuario_id: int) -> None:
+        """Descarta el principal cacheado tras modificar al usuario"""
+        principal_cache.invalidate(usuario_id)
+    
     @staticmethod
     def obtener_usuario_por_id(db: Session, user_id: int) -> Optional[Usuario]:
         """Obtiene usuario por ID"""
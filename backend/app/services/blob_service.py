@@ -0,0 +1,296 @@
+"""
+Servicio del almacén de archivos: deduplicación, referencias y migración.
+
+Los archivos (fotos de carnet, PDFs de documentación) se guardan en
+app.utils.blob_store por su SHA-256; la tabla blobs cuenta cuántas filas
+usan cada uno. Subir dos veces el mismo archivo solo lo guarda una vez.
+
+Los archivos que aún están dentro de la BD (formato antiguo) se mueven al
+almacén por lotes, con la aplicación en marcha:
+
+    python -m app.services.blob_service migrar [--lote 50] [--pausa 0.2]
+    python -m app.services.blob_service gc [--gracia 3600]
+    python -m app.services.blob_service status
+"""
+import argparse
+import hashlib
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.blob import Blob, BlobVariante
+from app.models.documentacion_reglamentaria import DocumentacionReglamentaria
+from app.models.socio import Socio
+from app.utils.blob_store import blob_store
+from app.utils.subidas import Subida
+
+logger = logging.getLogger(__name__)
+
+# (modelo, columna antigua con el archivo, columna del hash, columna del tamaño)
+COLUMNAS_ARCHIVO = [
+    (Socio, "foto_carnet_blob", "foto_carnet_sha256", "foto_carnet_tamano"),
+    (DocumentacionReglamentaria, "rc_archivo", "rc_archivo_sha256", "rc_archivo_tamano"),
+    (DocumentacionReglamentaria, "carnet_archivo", "carnet_archivo_sha256", "carnet_archivo_tamano"),
+]
+
+
+def _insert(db: Session):
+    """INSERT con soporte de ON CONFLICT del dialecto de la sesión"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+class BlobService:
+    """Referencias a archivos del almacén.
+
+    Orden que evita perder archivos con subidas y recolección a la vez:
+    - guardar: primero suma la referencia en la BD y después escribe el
+      archivo (si falta).
+    - recolectar: borra la fila y el archivo dentro de la misma transacción,
+      así que una subida concurrente del mismo contenido espera al commit y
+      vuelve a escribir el archivo.
+    """
+
+    @staticmethod
+    def guardar(db: Session, datos: bytes) -> Tuple[str, int]:
+        """Guarda el contenido (si no estaba) y suma una referencia. Devuelve (sha256, tamaño)"""
+        sha256 = hashlib.sha256(datos).hexdigest()
+        BlobService._referenciar(db, sha256, len(datos))
+        blob_store.escribir(sha256, datos)
+        return sha256, len(datos)
+
+    @staticmethod
+    def guardar_subida(db: Session, subida: Subida) -> Tuple[str, int]:
+        """Como guardar, pero con el contenido en el temporal de una subida (hash ya calculado)"""
+        BlobService._referenciar(db, subida.sha256, subida.tamano)
+        blob_store.importar(subida.sha256, subida.ruta)
+        return subida.sha256, subida.tamano
+
+    @staticmethod
+    def reemplazar(db: Session, contenido: Union[bytes, Subida], sha256_anterior: Optional[str]) -> Tuple[str, int]:
+        """Guarda el nuevo contenido y suelta la referencia al anterior"""
+        if isinstance(contenido, Subida):
+            resultado = BlobService.guardar_subida(db, contenido)
+        else:
+            resultado = BlobService.guardar(db, contenido)
+        BlobService.liberar(db, sha256_anterior)
+        return resultado
+
+    @staticmethod
+    def liberar(db: Session, sha256: Optional[str]) -> None:
+        """Resta una referencia; el archivo se borra al recolectar, pasado el margen"""
+        if not sha256:
+            return
+        db.execute(
+            update(Blob)
+            .where(Blob.sha256 == sha256)
+            .values(referencias=Blob.referencias - 1, fecha_actualizacion=datetime.now())
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def obtener_variante(db: Session, sha256_origen: str, variante: str) -> Optional[BlobVariante]:
+        return db.get(BlobVariante, (sha256_origen, variante))
+
+    @staticmethod
+    def guardar_variante(db: Session, sha256_origen: str, variante: str, datos: bytes, mime: str) -> BlobVariante:
+        """Guarda una variante del archivo de origen (si dos peticiones la generan a la vez, queda una)"""
+        sha256, tamano = BlobService.guardar(db, datos)
+        insertada = db.execute(_insert(db)(BlobVariante).values(
+            sha256_origen=sha256_origen,
+            variante=variante,
+            sha256=sha256,
+            tamano=tamano,
+            mime=mime,
+            fecha_creacion=datetime.now()
+        ).on_conflict_do_nothing())
+        if not insertada.rowcount:
+            BlobService.liberar(db, sha256)
+        return BlobService.obtener_variante(db, sha256_origen, variante)
+
+    @staticmethod
+    def recolectar(db: Session, gracia_segundos: Optional[int] = None) -> Tuple[int, int]:
+        """Borra archivos sin referencias y archivos huérfanos (sin fila en blobs).
+
+        Solo toca los que llevan más de gracia_segundos así: una subida en
+        curso ya ha escrito su archivo pero aún no ha hecho commit.
+        Devuelve (sin referencias, huérfanos) borrados.
+        """
+        gracia = settings.blob_gc_grace_seconds if gracia_segundos is None else gracia_segundos
+        limite = datetime.now() - timedelta(seconds=gracia)
+
+        sin_referencias = 0
+        candidatos = db.scalars(select(Blob.sha256).where(
+            Blob.referencias <= 0,
+            Blob.fecha_actualizacion <= limite
+        )).all()
+        for sha256 in candidatos:
+            borrada = db.execute(delete(Blob).where(Blob.sha256 == sha256, Blob.referencias <= 0))
+            if borrada.rowcount:
+                blob_store.borrar(sha256)
+                BlobService._liberar_variantes(db, sha256)
+                sin_referencias += 1
+            db.commit()
+
+        huerfanos = 0
+        for sha256 in list(blob_store.listar()):
+            if blob_store.antiguedad(sha256) < gracia or db.get(Blob, sha256) is not None:
+                continue
+            # La fila temporal bloquea el hash mientras se borra el archivo
+            db.execute(_insert(db)(Blob).values(
+                sha256=sha256, tamano=0, referencias=0, fecha_creacion=datetime.now(), fecha_actualizacion=datetime.now()
+            ))
+            blob_store.borrar(sha256)
+            db.execute(delete(Blob).where(Blob.sha256 == sha256))
+            db.commit()
+            huerfanos += 1
+
+        temporales = blob_store.limpiar_temporales(gracia)
+        if temporales:
+            logger.info(f"Temporales de subidas interrumpidas borrados: {temporales}")
+
+        return sin_referencias, huerfanos
+
+    @staticmethod
+    def migrar_lote(db: Session, modelo, columna_blob: str, columna_sha: str, columna_tamano: str, lote: int) -> int:
+        """Mueve al almacén hasta `lote` archivos que siguen dentro de la BD.
+
+        Lee los archivos de uno en uno (memoria acotada) y hace un único commit
+        por lote. Cada fila cambia de formato de forma atómica: hasta el
+        commit se sigue sirviendo desde la columna antigua.
+        """
+        blob = getattr(modelo, columna_blob)
+        sha = getattr(modelo, columna_sha)
+        tamano = getattr(modelo, columna_tamano)
+
+        ids = db.scalars(
+            select(modelo.id).where(blob.isnot(None), sha.is_(None)).order_by(modelo.id).limit(lote)
+        ).all()
+
+        movidos = 0
+        for fila_id in ids:
+            datos = db.scalar(select(blob).where(modelo.id == fila_id, sha.is_(None)))
+            if datos is None:
+                continue
+
+            sha256 = hashlib.sha256(datos).hexdigest()
+            # Condicionado: si una subida ha reemplazado el archivo mientras
+            # tanto, esta fila ya no se toca
+            actualizada = db.execute(
+                update(modelo)
+                .where(modelo.id == fila_id, sha.is_(None), blob.isnot(None))
+                .values({sha: sha256, tamano: len(datos), blob: None})
+                .execution_options(synchronize_session=False)
+            )
+            if actualizada.rowcount == 1:
+                BlobService._referenciar(db, sha256, len(datos))
+                blob_store.escribir(sha256, datos)
+                movidos += 1
+
+        db.commit()
+        return movidos
+
+    @staticmethod
+    def migrar(db: Session, lote: int = 50, pausa: float = 0.2) -> int:
+        """Mueve todos los archivos de la BD al almacén, lote a lote"""
+        total = 0
+        for modelo, columna_blob, columna_sha, columna_tamano in COLUMNAS_ARCHIVO:
+            while True:
+                movidos = BlobService.migrar_lote(db, modelo, columna_blob, columna_sha, columna_tamano, lote)
+                if not movidos:
+                    break
+                total += movidos
+                logger.info(f"{modelo.__tablename__}.{columna_blob}: {movidos} archivos movidos (total {total})")
+                # Deja respirar a las escrituras de la aplicación entre lotes
+                time.sleep(pausa)
+        return total
+
+    @staticmethod
+    def pendientes(db: Session) -> List[Tuple[str, int]]:
+        """Archivos que siguen dentro de la BD, por columna"""
+        return [
+            (
+                f"{modelo.__tablename__}.{columna_blob}",
+                db.scalar(select(func.count()).select_from(modelo).where(
+                    getattr(modelo, columna_blob).isnot(None),
+                    getattr(modelo, columna_sha).is_(None)
+                ))
+            )
+            for modelo, columna_blob, columna_sha, _ in COLUMNAS_ARCHIVO
+        ]
+
+    @staticmethod
+    def _liberar_variantes(db: Session, sha256_origen: str) -> None:
+        """Suelta las variantes de un archivo borrado (se recolectan en una pasada posterior)"""
+        variantes = db.scalars(
+            select(BlobVariante.sha256).where(BlobVariante.sha256_origen == sha256_origen)
+        ).all()
+        for sha256 in variantes:
+            BlobService.liberar(db, sha256)
+        db.execute(delete(BlobVariante).where(BlobVariante.sha256_origen == sha256_origen))
+
+    @staticmethod
+    def _referenciar(db: Session, sha256: str, tamano: int) -> None:
+        """Suma una referencia al hash (creando su fila si es nuevo) en una sola sentencia"""
+        ahora = datetime.now()
+        insert = _insert(db)
+        sentencia = insert(Blob).values(
+            sha256=sha256,
+            tamano=tamano,
+            referencias=1,
+            fecha_creacion=ahora,
+            fecha_actualizacion=ahora
+        )
+        db.execute(sentencia.on_conflict_do_update(
+            index_elements=[Blob.sha256],
+            set_={"referencias": Blob.referencias + 1, "fecha_actualizacion": ahora}
+        ))
+
+
+def main(argv: List[str]) -> int:
+    from app.database.db import SessionLocal
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(prog="python -m app.services.blob_service")
+    sub = parser.add_subparsers(dest="comando")
+    migrar = sub.add_parser("migrar", help="Mover al almacén los archivos guardados en la BD")
+    migrar.add_argument("--lote", type=int, default=50, help="Archivos por transacción")
+    migrar.add_argument("--pausa", type=float, default=0.2, help="Segundos de pausa entre lotes")
+    gc = sub.add_parser("gc", help="Borrar archivos sin referencias")
+    gc.add_argument("--gracia", type=int, default=None, help="Antigüedad mínima en segundos")
+    sub.add_parser("status", help="Archivos pendientes de migrar")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        if args.comando == "migrar":
+            total = BlobService.migrar(db, lote=args.lote, pausa=args.pausa)
+            print(f"Archivos movidos al almacén: {total}")
+            if total:
+                print("El espacio en la BD se recupera con VACUUM (bloquea la BD mientras dura)")
+            return 0
+
+        if args.comando == "gc":
+            sin_referencias, huerfanos = BlobService.recolectar(db, args.gracia)
+            print(f"Archivos borrados: {sin_referencias} sin referencias, {huerfanos} huérfanos")
+            return 0
+
+        if args.comando == "status":
+            for columna, pendientes in BlobService.pendientes(db):
+                print(f"{columna}: {pendientes} pendientes")
+            return 0
+
+    parser.print_help()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
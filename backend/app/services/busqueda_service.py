@@ -0,0 +1,120 @@
+"""
+Búsqueda de texto completo en noticias y comentarios (SQLite FTS5).
+
+Los índices noticias_fts y comentarios_fts (migración 0007) se mantienen con
+triggers; aquí solo se consultan, siempre dentro de un club. La consulta del usuario nunca se pasa tal
+cual a MATCH: se trocea en palabras y cada una se busca como prefijo
+("entrenamiento" encuentra "entrenamientos"), sin palabras vacías del español.
+"""
+import html
+import re
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.noticia import ResultadoBusquedaNoticia
+
+# Palabras demasiado comunes para aportar algo a la búsqueda
+PALABRAS_VACIAS = frozenset("""
+    a al algo como con de del e el en es esa ese esta este la las le lo los mas me mi
+    muy no o para pero por que se si sin sobre su sus te tu un una uno unos unas y ya
+""".split())
+
+# Marcadores que no aparecen en texto normal; se cambian por <mark> tras escapar
+_INICIO, _FIN = "\x02", "\x03"
+
+# Peso del título frente al contenido en BM25
+PESO_TITULO = 5.0
+
+# Se ordena y se corta a `limite` dentro de cada índice (el filtro por club
+# va en el MATCH); los JOIN con las tablas solo se hacen para esas filas.
+# Las palabras del usuario se limitan a las columnas de texto: club_id está
+# indexado y buscar "12" en el club 12 lo encontraría en todas las filas
+_COLUMNAS_NOTICIA = "{titulo contenido}"
+_COLUMNAS_COMENTARIO = "contenido"
+_SQL_BUSQUEDA = text(f"""
+    WITH mejores AS (
+        SELECT rowid AS noticia_id,
+               NULL AS comentario_id,
+               highlight(noticias_fts, 0, :inicio, :fin) AS titulo,
+               snippet(noticias_fts, 1, :inicio, :fin, '…', :palabras) AS fragmento,
+               -bm25(noticias_fts, {PESO_TITULO}, 1.0, 0.0) AS puntuacion
+        FROM noticias_fts
+        WHERE noticias_fts MATCH :consulta_noticias
+        UNION ALL
+        SELECT noticia_id, rowid, NULL,
+               snippet(comentarios_fts, 0, :inicio, :fin, '…', :palabras),
+               -bm25(comentarios_fts, 1.0, 0.0, 0.0)
+        FROM comentarios_fts
+        WHERE comentarios_fts MATCH :consulta_comentarios
+        ORDER BY puntuacion DESC
+        LIMIT :limite
+    )
+    SELECT m.noticia_id,
+           m.comentario_id,
+           COALESCE(m.titulo, n.titulo) AS titulo,
+           m.fragmento,
+           COALESCE(c.fecha_creacion, n.fecha_creacion) AS fecha,
+           m.puntuacion
+    FROM mejores m
+    JOIN noticias n ON n.id = m.noticia_id
+    LEFT JOIN comentarios c ON c.id = m.comentario_id
+    ORDER BY m.puntuacion DESC
+""")
+
+
+def _resaltado(texto: Optional[str]) -> str:
+    """Escapa el HTML del texto y convierte los marcadores de FTS5 en <mark>"""
+    return html.escape(texto or "").replace(_INICIO, "<mark>").replace(_FIN, "</mark>")
+
+
+class BusquedaService:
+
+    @staticmethod
+    def consulta_fts(q: str) -> Optional[str]:
+        """Consulta FTS5 segura a partir del texto del usuario (None si no queda ninguna palabra).
+
+        Se descartan las letras sueltas y las palabras vacías, pero no los
+        números de una cifra ("jornada 3").
+        """
+        palabras = [
+            p for p in re.findall(r"\w+", q.lower())
+            if (len(p) > 1 or p.isdigit()) and p not in PALABRAS_VACIAS
+        ]
+        if not palabras:
+            return None
+        # Cada palabra entre comillas (sin sintaxis de FTS5) y como prefijo;
+        # separadas por espacios, FTS5 exige todas (AND)
+        return " ".join(f'"{p}"*' for p in dict.fromkeys(palabras))
+
+    @staticmethod
+    async def buscar_noticias(
+        db: AsyncSession,
+        club_id: int,
+        consulta: str,
+        limite: int = 20,
+        palabras_fragmento: int = 16
+    ) -> List[ResultadoBusquedaNoticia]:
+        """Noticias y comentarios del club que coinciden, de más a menos relevantes (BM25)"""
+        filas = (await db.execute(_SQL_BUSQUEDA, {
+            "consulta_noticias": f'club_id:"{int(club_id)}" AND {_COLUMNAS_NOTICIA}:({consulta})',
+            "consulta_comentarios": f'club_id:"{int(club_id)}" AND {_COLUMNAS_COMENTARIO}:({consulta})',
+            "club_id": club_id,
+            "inicio": _INICIO,
+            "fin": _FIN,
+            "palabras": palabras_fragmento,
+            "limite": limite,
+        })).mappings().all()
+
+        return [
+            ResultadoBusquedaNoticia(
+                noticia_id=fila["noticia_id"],
+                comentario_id=fila["comentario_id"],
+                titulo=_resaltado(fila["titulo"]),
+                fragmento=_resaltado(fila["fragmento"]),
+                fecha=fila["fecha"],
+                puntuacion=fila["puntuacion"]
+            )
+            for fila in filas
+        ]
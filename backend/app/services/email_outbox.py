@@ -0,0 +1,491 @@
+"""Envío en segundo plano de la bandeja de salida de emails (tabla email_outbox).
+
+Las peticiones solo encolan (EmailService.encolar añade la fila a la sesión
+de la petición, así que el email existe si y solo si se confirma lo que lo
+origina). Al hacer commit se despierta al enviador, que:
+
+1. Reserva un lote de mensajes vencidos (UPDATE ... RETURNING a través de la
+   cola de escritura): pasan a 'enviando' con una reserva que caduca, de modo
+   que si el proceso muere se vuelven a enviar.
+2. Los reparte entre EMAIL_SMTP_CONNECTIONS hilos, cada uno con una conexión
+   SMTP del pool: el handshake TLS y el login se hacen una vez y sirven para
+   muchos mensajes.
+3. Apunta el resultado: 'enviado'; reintento con espera exponencial
+   (EMAIL_RETRY_BASE_SECONDS * 2^intentos, con algo de azar); o 'fallido'
+   (dead letter) si el servidor lo rechaza con un 5xx o se agotan
+   EMAIL_MAX_ATTEMPTS. Los fallidos se reactivan desde /api/admin/emails.
+
+Cada hora el enviador borra los 'enviado' con más de
+EMAIL_OUTBOX_RETENTION_DAYS días, para que los cuerpos no se acumulen.
+
+Sin servidor SMTP configurado (desarrollo) los mensajes se dan por enviados
+y solo quedan en el log, como antes.
+"""
+import asyncio
+import contextvars
+import logging
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from functools import partial
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.write_queue import write_queue
+from app.models.email_outbox import EmailOutbox
+from app.models.system_config import SystemConfig
+from app.utils.metricas import EMAILS_ENVIADOS, EMAILS_PENDIENTES
+
+logger = logging.getLogger(__name__)
+
+PENDIENTE, ENVIANDO, ENVIADO, FALLIDO = "pendiente", "enviando", "enviado", "fallido"
+
+# Tiempo que un lote queda reservado; pasado, otro enviador puede retomarlo
+RESERVA = timedelta(minutes=5)
+ESPERA_MAXIMA = timedelta(hours=6)
+# Cada cuánto se borran los enviados antiguos y cuántos por transacción
+PURGA_CADA = timedelta(hours=1)
+PURGA_LOTE = 500
+
+# Marca en session.info de que la sesión ha encolado emails
+EMAILS_ENCOLADOS = "emails_encolados"
+
+
+def ahora() -> datetime:
+    """Hora UTC sin zona, como CURRENT_TIMESTAMP de SQLite"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class ConfigSMTP:
+    servidor: str
+    puerto: int
+    usuario: str
+    password: str
+    remitente: str
+    use_tls: bool
+    use_ssl: bool
+
+    @classmethod
+    def desde(cls, config: Optional[SystemConfig]) -> Optional["ConfigSMTP"]:
+        if not config or not config.smtp_server:
+            return None
+        return cls(
+            servidor=config.smtp_server,
+            puerto=config.smtp_port,
+            usuario=config.smtp_username or "",
+            password=config.smtp_password or "",
+            remitente=config.smtp_from_email or "noreply@piarapp.com",
+            use_tls=bool(config.smtp_use_tls),
+            use_ssl=bool(config.smtp_use_ssl),
+        )
+
+
+@dataclass(frozen=True)
+class Mensaje:
+    id: int
+    destinatario: str
+    asunto: str
+    cuerpo_html: str
+    intentos: int
+    cuerpo_texto: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Resultado:
+    id: int
+    intentos: int
+    error: Optional[str] = None
+    permanente: bool = False
+
+
+def _permanente(error: Exception) -> bool:
+    """Rechazo definitivo del servidor (5xx): reintentar no va a servir"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(codigo >= 500 for codigo, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        # Unas credenciales mal puestas se corrigen en la configuración
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+class PoolSMTP:
+    """Conexiones SMTP autenticadas que se reutilizan entre mensajes.
+
+    Cada hilo toma una conexión, envía su parte del lote y la devuelve. Las
+    conexiones se renuevan tras max_mensajes (muchos servidores limitan los
+    mensajes por sesión), se comprueban con NOOP si llevan un rato paradas y
+    se descartan todas si cambia la configuración.
+    """
+
+    INACTIVIDAD_NOOP = 30.0
+
+    def __init__(self, max_mensajes: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_mensajes = (
+            max_mensajes if max_mensajes is not None else settings.email_smtp_max_messages_per_connection
+        )
+        self.timeout = timeout if timeout is not None else settings.email_smtp_timeout_seconds
+        self._libres: List[Tuple[smtplib.SMTP, float, int]] = []
+        self._config: Optional[ConfigSMTP] = None
+        self._lock = threading.Lock()
+        self.abiertas = 0
+
+    def _abrir(self, config: ConfigSMTP) -> smtplib.SMTP:
+        if config.use_ssl:
+            smtp = smtplib.SMTP_SSL(config.servidor, config.puerto, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(config.servidor, config.puerto, timeout=self.timeout)
+        try:
+            if config.use_tls and not config.use_ssl:
+                smtp.starttls()
+            if config.usuario and config.password:
+                smtp.login(config.usuario, config.password)
+        except Exception:
+            self._cerrar(smtp)
+            raise
+        with self._lock:
+            self.abiertas += 1
+        return smtp
+
+    @staticmethod
+    def _cerrar(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _tomar(self, config: ConfigSMTP) -> Tuple[smtplib.SMTP, int]:
+        with self._lock:
+            if config != self._config:
+                viejas, self._libres, self._config = self._libres, [], config
+            else:
+                viejas = []
+            libre = self._libres.pop() if self._libres else None
+        for smtp, _, _ in viejas:
+            self._cerrar(smtp)
+
+        if libre is not None:
+            smtp, ultimo_uso, usos = libre
+            if time.monotonic() - ultimo_uso < self.INACTIVIDAD_NOOP:
+                return smtp, usos
+            try:
+                if smtp.noop()[0] == 250:
+                    return smtp, usos
+            except smtplib.SMTPException:
+                pass
+            self._cerrar(smtp)
+        return self._abrir(config), 0
+
+    @contextmanager
+    def conexion(self, config: ConfigSMTP) -> Iterator["_Uso"]:
+        smtp, usos = self._tomar(config)
+        uso = _Uso(smtp, usos)
+        try:
+            yield uso
+        except Exception:
+            self._cerrar(uso.smtp)
+            raise
+        with self._lock:
+            if config == self._config and uso.usos < self.max_mensajes:
+                self._libres.append((uso.smtp, time.monotonic(), uso.usos))
+                return
+        self._cerrar(uso.smtp)
+
+    def enviar(self, mensajes: List[Mensaje], config: ConfigSMTP) -> List[Resultado]:
+        """Envía los mensajes por una conexión (se llama desde un hilo)"""
+        resultados: List[Resultado] = []
+        try:
+            with self.conexion(config) as uso:
+                for mensaje in mensajes:
+                    if uso.usos >= self.max_mensajes:
+                        # Sesión agotada: se sigue con una nueva
+                        self._cerrar(uso.smtp)
+                        uso.smtp, uso.usos = self._abrir(config), 0
+                    intentos = mensaje.intentos + 1
+                    try:
+                        uso.smtp.send_message(_mime(mensaje, config))
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                        resultados.append(Resultado(mensaje.id, intentos, _describir(e), _permanente(e)))
+                    else:
+                        resultados.append(Resultado(mensaje.id, intentos))
+                    uso.usos += 1
+        except (OSError, smtplib.SMTPException) as e:
+            # Conexión, TLS, login o desconexión a mitad: el resto se reintenta
+            hechos = {r.id for r in resultados}
+            resultados += [
+                Resultado(m.id, m.intentos + 1, _describir(e), _permanente(e))
+                for m in mensajes if m.id not in hechos
+            ]
+        return resultados
+
+    def cerrar(self) -> None:
+        with self._lock:
+            libres, self._libres = self._libres, []
+        for smtp, _, _ in libres:
+            self._cerrar(smtp)
+
+
+@dataclass
+class _Uso:
+    smtp: smtplib.SMTP
+    usos: int
+
+
+def _describir(error: Exception) -> str:
+    return f"{type(error).__name__}: {error}"[:1000]
+
+
+def _mime(mensaje: Mensaje, config: ConfigSMTP) -> MIMEMultipart:
+    mime = MIMEMultipart("alternative")
+    mime["Subject"] = mensaje.asunto
+    mime["From"] = config.remitente
+    mime["To"] = mensaje.destinatario
+    # En multipart/alternative la parte preferida va la última
+    if mensaje.cuerpo_texto:
+        mime.attach(MIMEText(mensaje.cuerpo_texto, "plain"))
+    mime.attach(MIMEText(mensaje.cuerpo_html, "html"))
+    return mime
+
+
+def espera_reintento(intentos: int) -> timedelta:
+    """Espera exponencial tras el intento número `intentos`, con ±20% de azar"""
+    segundos = settings.email_retry_base_seconds * 2 ** (intentos - 1) * random.uniform(0.8, 1.2)
+    return min(timedelta(seconds=segundos), ESPERA_MAXIMA)
+
+
+class EnviadorEmails:
+    """Tarea en segundo plano que vacía la bandeja de salida"""
+
+    def __init__(self, lote: Optional[int] = None, conexiones: Optional[int] = None, pool: Optional[PoolSMTP] = None):
+        self.lote = lote if lote is not None else settings.email_outbox_batch_size
+        self.conexiones = conexiones if conexiones is not None else settings.email_smtp_connections
+        self.pool = pool if pool is not None else PoolSMTP()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._evento: Optional[asyncio.Event] = None
+        self._cerrando = False
+        self._proxima_purga = 0.0
+        # Un lote cada vez en este proceso (la tarea y vaciar() no se pisan)
+        self._procesando: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = None
+
+    def iniciar(self) -> None:
+        """Arranca la tarea en el loop actual (en el arranque de la aplicación)"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._cerrando = False
+            self._evento = asyncio.Event()
+            # Contexto vacío, como la cola de escritura: sus consultas no son
+            # de ninguna petición
+            self._worker = loop.create_task(self._run(), context=contextvars.Context())
+
+    def despertar(self) -> None:
+        """Avisa a la tarea de que hay emails nuevos; sin tarea, esperan a vaciar()"""
+        if self._worker is None or self._worker.done() or self._loop.is_closed():
+            return
+        try:
+            mismo_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            mismo_loop = False
+        if mismo_loop:
+            self._evento.set()
+        else:
+            # Desde un hilo (rutas síncronas): se avisa al loop del enviador
+            self._loop.call_soon_threadsafe(self._evento.set)
+
+    async def close(self) -> None:
+        """Detiene la tarea (tras el lote en curso) y cierra las conexiones"""
+        if self._worker is not None and not self._worker.done():
+            self._cerrando = True
+            self._evento.set()
+            await self._worker
+        self._worker = None
+        self.pool.cerrar()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self) -> None:
+        while not self._cerrando:
+            self._evento.clear()
+            if time.monotonic() >= self._proxima_purga:
+                self._proxima_purga = time.monotonic() + PURGA_CADA.total_seconds()
+                try:
+                    await self.purgar()
+                except Exception:
+                    logger.exception("Error inesperado purgando la bandeja de salida")
+            try:
+                procesados = await self.procesar_lote()
+            except Exception:
+                logger.exception("Error inesperado enviando la bandeja de salida")
+                procesados = 0
+            if procesados >= self.lote or self._cerrando:
+                continue
+            try:
+                await asyncio.wait_for(self._evento.wait(), timeout=settings.email_outbox_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def vaciar(self) -> int:
+        """Procesa lotes hasta que no quede nada vencido; devuelve los mensajes procesados"""
+        total = 0
+        while procesados := await self.procesar_lote():
+            total += procesados
+        return total
+
+    async def purgar(self) -> int:
+        """Borra los enviados con más de EMAIL_OUTBOX_RETENTION_DAYS días; devuelve cuántos"""
+        if settings.email_outbox_retention_days <= 0:
+            return 0
+        antes = ahora() - timedelta(days=settings.email_outbox_retention_days)
+        total = 0
+        # Por lotes: cada transacción de la cola de escritura sigue siendo corta
+        while True:
+            borrados = await write_queue.submit(partial(self._purgar, antes, PURGA_LOTE))
+            total += borrados
+            if borrados < PURGA_LOTE:
+                break
+        if total:
+            logger.info(f"Bandeja de salida: {total} email(s) enviado(s) antes de {antes:%Y-%m-%d} borrado(s)")
+        return total
+
+    async def procesar_lote(self) -> int:
+        """Reserva, envía y apunta un lote; devuelve cuántos mensajes tenía"""
+        loop = asyncio.get_running_loop()
+        if self._procesando is None or self._procesando[0] is not loop:
+            self._procesando = (loop, asyncio.Lock())
+        async with self._procesando[1]:
+            return await self._procesar_lote()
+
+    async def _procesar_lote(self) -> int:
+        config, mensajes = await write_queue.submit(partial(self._reservar, self.lote))
+        if not mensajes:
+            return 0
+
+        if config is None:
+            for mensaje in mensajes:
+                logger.info(f"[EMAIL MOCK] Sin servidor SMTP configurado. To: {mensaje.destinatario} | Subject: {mensaje.asunto}")
+            resultados = [Resultado(m.id, m.intentos + 1) for m in mensajes]
+        else:
+            resultados = await self._enviar(mensajes, config)
+
+        await write_queue.submit(partial(self._apuntar, resultados))
+        return len(mensajes)
+
+    async def _enviar(self, mensajes: List[Mensaje], config: ConfigSMTP) -> List[Resultado]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.conexiones, thread_name_prefix="smtp")
+        loop = asyncio.get_running_loop()
+        partes = [mensajes[i::self.conexiones] for i in range(self.conexiones) if mensajes[i::self.conexiones]]
+        listas = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, self.pool.enviar, parte, config) for parte in partes
+        ))
+        return [resultado for lista in listas for resultado in lista]
+
+    @staticmethod
+    async def _reservar(limite: int, db: AsyncSession) -> Tuple[Optional[ConfigSMTP], List[Mensaje]]:
+        momento = ahora()
+        vencidos = (
+            select(EmailOutbox.id)
+            .filter(EmailOutbox.estado.in_((PENDIENTE, ENVIANDO)), EmailOutbox.proximo_intento <= momento)
+            .order_by(EmailOutbox.proximo_intento)
+            .limit(limite)
+        )
+        # La condición se repite en el UPDATE: con varios procesos, solo uno
+        # se queda con cada fila
+        filas = (await db.execute(
+            update(EmailOutbox)
+            .filter(
+                EmailOutbox.id.in_(vencidos.scalar_subquery()),
+                EmailOutbox.estado.in_((PENDIENTE, ENVIANDO)),
+                EmailOutbox.proximo_intento <= momento,
+            )
+            .values(estado=ENVIANDO, proximo_intento=momento + RESERVA)
+            .returning(
+                EmailOutbox.id, EmailOutbox.destinatario, EmailOutbox.asunto,
+                EmailOutbox.cuerpo_html, EmailOutbox.intentos, EmailOutbox.cuerpo_texto
+            )
+            .execution_options(synchronize_session=False)
+        )).all()
+        mensajes = sorted((Mensaje(*fila) for fila in filas), key=lambda m: m.id)
+
+        EMAILS_PENDIENTES.fijar(valor=await db.scalar(
+            select(func.count()).select_from(EmailOutbox).filter(EmailOutbox.estado.in_((PENDIENTE, ENVIANDO)))
+        ))
+        if not mensajes:
+            return None, []
+        config = await db.scalar(select(SystemConfig).limit(1))
+        return ConfigSMTP.desde(config), mensajes
+
+    @staticmethod
+    async def _purgar(antes: datetime, limite: int, db: AsyncSession) -> int:
+        antiguos = (
+            select(EmailOutbox.id)
+            .filter(EmailOutbox.estado == ENVIADO, EmailOutbox.fecha_envio < antes)
+            .limit(limite)
+        )
+        resultado = await db.execute(
+            delete(EmailOutbox)
+            .filter(EmailOutbox.id.in_(antiguos.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        return resultado.rowcount
+
+    @staticmethod
+    async def _apuntar(resultados: List[Resultado], db: AsyncSession) -> None:
+        momento = ahora()
+        cambios = []
+        for resultado in resultados:
+            if resultado.error is None:
+                cambios.append({
+                    "id": resultado.id, "estado": ENVIADO, "intentos": resultado.intentos,
+                    "fecha_envio": momento, "ultimo_error": None,
+                })
+                EMAILS_ENVIADOS.inc("sent")
+            elif resultado.permanente or resultado.intentos >= settings.email_max_attempts:
+                cambios.append({
+                    "id": resultado.id, "estado": FALLIDO, "intentos": resultado.intentos,
+                    "ultimo_error": resultado.error,
+                })
+                EMAILS_ENVIADOS.inc("dead")
+                logger.error(f"Email {resultado.id} descartado tras {resultado.intentos} intento(s): {resultado.error}")
+            else:
+                cambios.append({
+                    "id": resultado.id, "estado": PENDIENTE, "intentos": resultado.intentos,
+                    "proximo_intento": momento + espera_reintento(resultado.intentos),
+                    "ultimo_error": resultado.error,
+                })
+                EMAILS_ENVIADOS.inc("retry")
+                logger.warning(f"Email {resultado.id} no enviado (intento {resultado.intentos}): {resultado.error}")
+        # Filas con las mismas claves: un UPDATE por grupo (executemany por clave primaria)
+        grupos = {}
+        for cambio in cambios:
+            grupos.setdefault(tuple(sorted(cambio)), []).append(cambio)
+        for grupo in grupos.values():
+            await db.execute(update(EmailOutbox), grupo)
+
+
+enviador_emails = EnviadorEmails()
+
+
+@event.listens_for(Session, "after_commit")
+def _despertar_tras_commit(session: Session) -> None:
+    if session.info.pop(EMAILS_ENCOLADOS, False):
+        enviador_emails.despertar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _olvidar_tras_rollback(session: Session) -> None:
+    session.info.pop(EMAILS_ENCOLADOS, None)
@@ -7,6 +7,7 @@ import httpx
 from app.config import settings
 from app.models.usuario import Usuario
 from app.models.token_google import TokenGoogle
+from app.services.auth_service import AuthService
 
 
 class GoogleOAuthService:
@@ -105,6 +106,7 @@ class GoogleOAuthService:
             usuario.google_email = email
             usuario.google_photo_url = photo_url
             db.commit()
+            AuthService.invalidar_principal(usuario.id)
             return usuario
         
         # Crear nuevo usuario desde Google
@@ -196,4 +198,5 @@ class GoogleOAuthService:
         ).delete()
         
         db.commit()
+        AuthService.invalidar_principal(usuario_id)
         return True
@@ -2,12 +2,12 @@
 from typing import Optional, List
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
-import asyncio
 
 from app.models.invitacion import Invitacion
 from app.models.usuario import Usuario
 from app.models.club import Club
 from app.models.miembro_club import MiembroClub
+from app.services.membresia_service import MembresiaService
 from app.utils.security import AuthUtils
 from app.services.email_service import EmailService
 from app.config import settings
@@ -61,30 +61,25 @@ class InvitacionService:
         )
         
         db.add(invitacion)
+        
+        # El email va a la bandeja de salida en la misma transacción: se
+        # envía en segundo plano cuando la invitación queda confirmada
+        if usuario_existente:
+            # Usuario ya existe, enviar invitación simple
+            EmailService.enviar_invitacion_club(db, email, token, club)
+        else:
+            # Usuario nuevo, enviar invitación con registro
+            EmailService.enviar_bienvenida_nuevo_usuario(
+                db,
+                email, 
+                nombre_completo or email, 
+                club, 
+                token
+            )
+        
         db.commit()
         db.refresh(invitacion)
         
-        # Enviar email de invitación asincronamente
-        try:
-            if usuario_existente:
-                # Usuario ya existe, enviar invitación simple
-                asyncio.create_task(
-                    EmailService.enviar_invitacion_club(email, token, club.nombre)
-                )
-            else:
-                # Usuario nuevo, enviar invitación con registro
-                asyncio.create_task(
-                    EmailService.enviar_bienvenida_nuevo_usuario(
-                        email, 
-                        nombre_completo or email, 
-                        club.nombre, 
-                        token
-                    )
-                )
-        except Exception as e:
-            # Log el error pero continúa (el usuario puede aceptar la invitación sin email)
-            print(f"Error enviando email de invitación: {str(e)}")
-        
         return invitacion
     
     @staticmethod
@@ -151,6 +146,7 @@ class InvitacionService:
             miembro_existente.rol = invitacion.rol
         
         db.commit()
+        MembresiaService.invalidar(usuario_id)
         return True
     
     @staticmethod
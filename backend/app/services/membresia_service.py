@@ -0,0 +1,42 @@
+"""Servicio de membresías de clubes con cache por usuario"""
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.miembro_club import MiembroClub
+from app.schemas.auth import Membresia
+from app.utils.cache import TTLCache
+
+# Mapa {club_id: Membresia} de cada usuario compartido entre peticiones (ver require_club_role)
+membresia_cache = TTLCache(
+    maxsize=settings.membership_cache_size,
+    ttl=settings.membership_cache_ttl_seconds
+)
+
+
+class MembresiaService:
+    """Servicio de consulta de membresías"""
+
+    @staticmethod
+    def obtener_membresias(db: Session, usuario_id: int) -> Dict[int, Membresia]:
+        """Devuelve todas las membresías del usuario indexadas por club (una sola consulta)"""
+        membresias = membresia_cache.get(usuario_id)
+        if membresias is not None:
+            return membresias
+
+        miembros = db.query(MiembroClub).filter(MiembroClub.usuario_id == usuario_id).all()
+        membresias = {m.club_id: Membresia.model_validate(m) for m in miembros}
+        membresia_cache.set(usuario_id, membresias)
+        return membresias
+
+    @staticmethod
+    def obtener_membresia(db: Session, usuario_id: int, club_id: int) -> Optional[Membresia]:
+        """Membresía del usuario en un club o None si no es miembro"""
+        return MembresiaService.obtener_membresias(db, usuario_id).get(club_id)
+
+    @staticmethod
+    def invalidar(*usuario_ids: int) -> None:
+        """Descarta las membresías cacheadas tras modificar las de esos usuarios"""
+        for usuario_id in usuario_ids:
+            membresia_cache.invalidate(usuario_id)
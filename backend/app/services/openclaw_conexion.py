@@ -0,0 +1,300 @@
+"""Conexión persistente con el gateway de OpenClaw (WebSocket).
+
+Se abre una vez: se espera el connect.challenge y se hace el handshake, y a
+partir de ahí la comparten todas las peticiones. Una sola tarea lee del
+socket y reparte lo que llega:
+
+- Las respuestas ('res') van a quien hizo la petición con ese id.
+- Los eventos de chat ('chat', 'agent') van por payload.sessionKey al chat
+  en curso en esa sesión; los que no la traen, por payload.runId al chat que
+  lanzó esa ejecución, y si tampoco, al único chat en curso si solo hay uno.
+  Los de ejecuciones ya terminadas (p.ej. un 'chat' final que llega tras el
+  fin del agente) se descartan: no deben llegar al siguiente turno de la
+  sesión.
+
+websockets envía los pings de keepalive. Si la conexión se cae, las
+peticiones en curso fallan con ErrorOpenClaw y la conexión queda marcada
+como cerrada para que el servicio abra otra.
+
+El reparto nunca espera a quien consume: cada chat tiene su propia cola, así
+que un cliente lento solo retrasa su respuesta y no la de las demás sesiones.
+Si un chat se abandona antes de terminar (p.ej. el navegador cierra el
+stream), se envía chat.abort para que el gateway deje de generar.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set, Union
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+# runIds terminados que se recuerdan para descartar sus eventos rezagados
+EJECUCIONES_TERMINADAS = 1000
+# Lo que se espera al 'chat' final (trae los tokens) tras el fin del agente
+ESPERA_FINAL = 2.0
+
+
+class ErrorOpenClaw(Exception):
+    """Fallo hablando con el gateway; el mensaje se muestra tal cual en el chat"""
+
+
+def parametros_handshake(token: str, modo: str = "backend", user_agent: str = "piarapp-backend/1.0.0") -> Dict[str, Any]:
+    return {
+        "minProtocol": 3,
+        "maxProtocol": 3,
+        "client": {
+            "id": "cli",
+            "version": "1.0.0",
+            "platform": "python",
+            "mode": modo
+        },
+        "role": "operator",
+        "scopes": ["operator.read", "operator.write", "operator.admin"],
+        "auth": {
+            "token": token,
+            "password": token
+        },
+        "locale": "es-ES",
+        "userAgent": user_agent
+    }
+
+
+def normalizar_uso(uso: Any) -> Optional[Dict[str, int]]:
+    """Tokens del turno en el formato de ChatResponse.usage (acepta el de OpenClaw y el de OpenAI)"""
+    if not isinstance(uso, dict):
+        return None
+    entrada = uso.get("prompt_tokens", uso.get("input", 0)) or 0
+    salida = uso.get("completion_tokens", uso.get("output", 0)) or 0
+    total = uso.get("total_tokens", uso.get("totalTokens")) or entrada + salida
+    return {"prompt_tokens": int(entrada), "completion_tokens": int(salida), "total_tokens": int(total)}
+
+
+def handshake_aceptado(respuesta: Dict[str, Any]) -> bool:
+    return bool(respuesta.get("ok", respuesta.get("type") == "res"))
+
+
+class ConexionOpenClaw:
+    """WebSocket con el handshake hecho, compartido por peticiones concurrentes"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.cerrada = False
+        self._pendientes: Dict[str, asyncio.Future] = {}
+        self._sesiones: Dict[str, asyncio.Queue] = {}
+        self._ejecuciones: Dict[str, asyncio.Queue] = {}
+        self._terminadas: Dict[str, None] = {}  # por orden de fin, como un conjunto acotado
+        self._lector: Optional[asyncio.Task] = None
+        self._tareas: Set[asyncio.Task] = set()
+
+    @classmethod
+    async def abrir(
+        cls,
+        url: str,
+        token: str,
+        timeout: float = 10.0,
+        ping_interval: Optional[float] = 20.0
+    ) -> "ConexionOpenClaw":
+        ws = await websockets.connect(url, open_timeout=timeout, ping_interval=ping_interval, ping_timeout=ping_interval)
+        try:
+            challenge = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+            if not (challenge.get("type") == "event" and challenge.get("event") == "connect.challenge"):
+                raise ErrorOpenClaw(f"Respuesta inesperada del servidor (no challenge): {challenge}")
+            await ws.send(json.dumps({
+                "type": "req",
+                "id": uuid.uuid4().hex,
+                "method": "connect",
+                "params": parametros_handshake(token)
+            }))
+            respuesta = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+            if not handshake_aceptado(respuesta):
+                raise ErrorOpenClaw(f"Fallo en handshake: {respuesta}")
+        except BaseException:
+            await ws.close()
+            raise
+
+        conexion = cls(ws)
+        conexion._lector = asyncio.get_running_loop().create_task(conexion._leer())
+        logger.info(f"Conexión con OpenClaw abierta: {url}")
+        return conexion
+
+    @property
+    def en_curso(self) -> int:
+        return len(self._pendientes) + len(self._sesiones)
+
+    async def cerrar(self) -> None:
+        self.cerrada = True
+        if self._lector is not None:
+            self._lector.cancel()
+        await self.ws.close()
+
+    async def _leer(self) -> None:
+        error = ErrorOpenClaw("Conexión cerrada")
+        try:
+            while True:
+                self._repartir(json.loads(await self.ws.recv()))
+        except websockets.exceptions.ConnectionClosed as e:
+            error = ErrorOpenClaw(f"Conexión cerrada inesperadamente: {e}")
+            logger.warning(str(error))
+        except Exception as e:
+            error = ErrorOpenClaw(f"Error WebSocket: {e}")
+            logger.warning(str(error))
+        finally:
+            self._descartar(error)
+
+    def _repartir(self, mensaje: Dict[str, Any]) -> None:
+        tipo = mensaje.get("type")
+        if tipo == "res":
+            futuro = self._pendientes.pop(str(mensaje.get("id")), None)
+            if futuro is not None and not futuro.done():
+                futuro.set_result(mensaje)
+        elif tipo == "event":
+            payload = mensaje.get("payload")
+            payload = payload if isinstance(payload, dict) else {}
+            clave, run_id = payload.get("sessionKey"), payload.get("runId")
+            if run_id in self._terminadas:
+                return
+            cola = self._sesiones.get(clave) if clave else None
+            if cola is None and clave is None:
+                cola = self._ejecuciones.get(run_id) if run_id else None
+                if cola is None and len(self._sesiones) == 1:
+                    cola = next(iter(self._sesiones.values()))
+            if cola is not None:
+                cola.put_nowait(mensaje)
+        # El resto (tick, presence, health...) no los espera nadie
+
+    def _descartar(self, error: ErrorOpenClaw) -> None:
+        self.cerrada = True
+        pendientes, self._pendientes = self._pendientes, {}
+        for futuro in pendientes.values():
+            if not futuro.done():
+                futuro.set_exception(error)
+        for cola in self._sesiones.values():
+            cola.put_nowait(error)
+
+    async def pedir(self, metodo: str, params: Dict[str, Any], timeout: float, id_: Optional[str] = None) -> Dict[str, Any]:
+        """Envía una petición y espera su 'res' (sin mirar si es ok)"""
+        if self.cerrada:
+            raise ErrorOpenClaw("Conexión cerrada")
+        id_ = id_ or uuid.uuid4().hex
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendientes[id_] = futuro
+        try:
+            await self.ws.send(json.dumps({"type": "req", "id": id_, "method": metodo, "params": params}))
+            return await asyncio.wait_for(futuro, timeout)
+        finally:
+            self._pendientes.pop(id_, None)
+
+    @asynccontextmanager
+    async def _sesion(self, clave: str) -> AsyncIterator[asyncio.Queue]:
+        cola: asyncio.Queue = asyncio.Queue()
+        self._sesiones[clave] = cola
+        try:
+            yield cola
+        finally:
+            if self._sesiones.get(clave) is cola:
+                del self._sesiones[clave]
+            for run_id in [r for r, c in self._ejecuciones.items() if c is cola]:
+                del self._ejecuciones[run_id]
+                self._terminadas[run_id] = None
+            while len(self._terminadas) > EJECUCIONES_TERMINADAS:
+                del self._terminadas[next(iter(self._terminadas))]
+
+    def _abortar(self, clave: str, run_id: Optional[str]) -> None:
+        """Pide al gateway que pare el chat sin esperar la respuesta (puede llamarse al cancelar)"""
+        params = {"sessionKey": clave}
+        if run_id:
+            params["runId"] = run_id
+
+        async def abortar() -> None:
+            try:
+                respuesta = await self.pedir("chat.abort", params, timeout=5.0)
+                if not respuesta.get("ok"):
+                    logger.warning(f"OpenClaw no canceló el chat de {clave}: {respuesta.get('error')}")
+            except Exception as e:
+                logger.warning(f"No se pudo cancelar el chat de {clave} en OpenClaw: {e}")
+
+        tarea = asyncio.get_running_loop().create_task(abortar())
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+    async def chat(
+        self,
+        clave: str,
+        mensaje: str,
+        timeout: float = 30.0,
+        uso: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Envía el mensaje a la sesión y va devolviendo el texto de la respuesta.
+
+        Un solo chat por sesión a la vez (lo asegura el servicio). Si pasa
+        timeout segundos sin eventos, termina con lo recibido o falla si no
+        ha llegado nada. Si el gateway informa de los tokens, se guardan en
+        uso: tras el fin del agente se espera hasta ESPERA_FINAL segundos al
+        'chat' final, que es el que los trae. Si se deja de leer antes del
+        final, se cancela en el gateway.
+        """
+        async with self._sesion(clave) as cola:
+            id_ = uuid.uuid4().hex
+            idempotencia = f"idem_{id_}"
+            # El gateway usa la clave de idempotencia como runId; se registra
+            # antes de enviar por si algún evento llega antes que el ACK
+            self._ejecuciones[idempotencia] = cola
+            respuesta = await self.pedir(
+                "chat.send", {"sessionKey": clave, "message": mensaje, "idempotencyKey": idempotencia}, timeout, id_
+            )
+            if not respuesta.get("ok"):
+                raise ErrorOpenClaw(f"Error en chat.send: {respuesta.get('error')}")
+            run_id = (respuesta.get("payload") or {}).get("runId")
+            if run_id:
+                self._ejecuciones[run_id] = cola
+            propias = {idempotencia, run_id}
+
+            recibido = False
+            terminado = False
+            espera = timeout
+            try:
+                while True:
+                    try:
+                        evento: Union[Dict[str, Any], ErrorOpenClaw] = await asyncio.wait_for(cola.get(), espera)
+                    except asyncio.TimeoutError:
+                        if recibido or terminado:
+                            return
+                        raise ErrorOpenClaw("Error: Tiempo de espera agotado esperando respuesta de OpenClaw") from None
+                    if isinstance(evento, ErrorOpenClaw):
+                        raise evento
+
+                    payload = evento.get("payload", {})
+                    if payload.get("runId") and payload["runId"] not in propias:
+                        continue  # de otra ejecución de la sesión (p.ej. el turno anterior)
+                    if evento.get("event") == "agent":
+                        datos = payload.get("data", {})
+                        if payload.get("stream") == "assistant" and datos.get("delta"):
+                            recibido = True
+                            yield datos["delta"]
+                        elif payload.get("stream") == "lifecycle" and datos.get("phase") == "end":
+                            # El agente ha terminado; falta el final con los tokens
+                            terminado = True
+                            espera = min(timeout, ESPERA_FINAL)
+                    elif evento.get("event") == "chat":
+                        if payload.get("state") == "final":
+                            terminado = True
+                            mensaje_final = payload.get("message", {})
+                            if uso is not None:
+                                uso.update(normalizar_uso(payload.get("usage") or mensaje_final.get("usage")) or {})
+                            # El texto completo solo hace falta si no llegó por partes
+                            contenido = mensaje_final.get("content", [])
+                            if not recibido and isinstance(contenido, list):
+                                texto = "".join(c.get("text", "") for c in contenido if c.get("type") == "text")
+                                if texto:
+                                    yield texto
+                            return
+                        if payload.get("state") == "error":
+                            terminado = True
+                            raise ErrorOpenClaw(f"Error en chat: {payload.get('errorMessage', payload)}")
+            finally:
+                if not terminado and not self.cerrada:
+                    self._abortar(clave, run_id)
@@ -2,20 +2,72 @@ import websockets
 import json
 import asyncio
 import logging
-import traceback
-from typing import List, Dict, Any, Optional
+import time
+from collections import Counter
+from contextlib import aclosing
+from functools import wraps
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from ..config import Settings
+from ..utils.metricas import OPENCLAW_IDA_Y_VUELTA
+from .openclaw_conexion import ConexionOpenClaw, ErrorOpenClaw
 
 logger = logging.getLogger(__name__)
 settings = Settings()
 
+# Los errores de get_response llegan como texto para mostrarlos en el chat
+_PREFIJOS_ERROR = ("Error", "Fallo en handshake", "Conexión cerrada", "Respuesta inesperada")
+
+
+def _medir(operacion: str, exito: Callable[[Any], bool] = lambda resultado: True):
+    """Observa la duración de la operación en piar_openclaw_roundtrip_seconds"""
+    def decorador(funcion):
+        @wraps(funcion)
+        async def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            resultado_ok = False
+            try:
+                resultado = await funcion(*args, **kwargs)
+                resultado_ok = exito(resultado)
+                return resultado
+            finally:
+                OPENCLAW_IDA_Y_VUELTA.observar(
+                    time.perf_counter() - inicio, operacion, "ok" if resultado_ok else "error"
+                )
+        return envoltura
+    return decorador
+
+
+def _ultimo_mensaje_usuario(messages: List[Dict[str, Any]]) -> str:
+    # OpenClaw espera un string simple en 'message' para 'chat.send'
+    for m in reversed(messages or []):
+        if m.get("role") == "user":
+            return m.get("content", "")
+    return "Hola"
+
+
 class OpenClawService:
+    """Cliente del gateway de OpenClaw.
+
+    Las peticiones comparten hasta OPENCLAW_WS_CONNECTIONS conexiones
+    persistentes (ver openclaw_conexion): el handshake se hace al abrir cada
+    una y no en cada mensaje. Se abren al primer uso, se reabren si se caen y
+    se cierran con close() al apagar la API.
+    """
+
     def __init__(self):
         self.auth_mode = settings.openclaw_auth_mode
         self.api_key = settings.openclaw_api_key
         # Use WS URL (convert http/https to ws/wss if needed, or expect correct config)
         self.ws_url = settings.openclaw_api_url.replace("http://", "ws://").replace("https://", "wss://").replace("/v1/chat", "") 
         self.password = settings.openclaw_password
+        self.max_conexiones = max(1, settings.openclaw_ws_connections)
+        # Las conexiones pertenecen al event loop en el que se abrieron
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._conexiones: List[ConexionOpenClaw] = []
+        self._abriendo: Optional[asyncio.Lock] = None
+        # Un chat a la vez por sesión; se olvida la sesión cuando nadie espera
+        self._sesiones_en_curso: Dict[str, asyncio.Lock] = {}
+        self._turnos_pedidos: Counter = Counter()
         logger.info(f"OpenClawService initialized: url={self.ws_url}, auth_mode={self.auth_mode}")
         
     def _get_token(self) -> str:
@@ -43,176 +95,98 @@ class OpenClawService:
         
         return "agent:main:main"
 
-    async def get_response(self, messages: List[Dict[str, Any]], context: Optional[Dict[str, Any]] = None) -> str:
-        """
-        Conecta por WebSocket, realiza el handshake y envía los mensajes.
-        """
-        uri = self.ws_url
-        token = self._get_token()
-        session_key = self._get_session_key(context)
-        
-        logger.info(f"OpenClaw get_response called: uri={uri}, session_key={session_key}")
-        
-        try:
-            logger.info(f"Attempting WebSocket connection to {uri}")
-            async with websockets.connect(uri) as websocket:
-                logger.info("WebSocket connection established")
-                # 1. Esperar al challenge de conexión
-                response = await websocket.recv()
-                challenge = json.loads(response)
-                
-                if challenge.get("type") == "event" and challenge.get("event") == "connect.challenge":
-                    # 2. Enviar respuesta al challenge (Handshake)
-                    handshake_payload = {
-                        "type": "req",
-                        "id": "1",
-                        "method": "connect",
-                        "params": {
-                            "minProtocol": 3,
-                            "maxProtocol": 3,
-                            "client": {
-                                "id": "cli",
-                                "version": "1.0.0",
-                                "platform": "python",
-                                "mode": "backend"
-                            },
-                            "role": "operator",
-                            "scopes": ["operator.read", "operator.write", "operator.admin"],
-                            "auth": {
-                                "token": token,
-                                "password": token
-                            },
-                            "locale": "es-ES",
-                            "userAgent": "piarapp-backend/1.0.0"
-                        }
-                    }
-                    logger.info("Sending handshake payload...")
-                    await websocket.send(json.dumps(handshake_payload))
-                    
-                    # 3. Esperar confirmación de conexión (asumiendo que devuelve algo)
-                    logger.info("Waiting for handshake response...")
-                    # El ejemplo JS no muestra que pasa después, pero es normal esperar un 'op': 'connected' o similar.
-                    # Por ahora devolvemos "Conexión WS Establecida" para probar el handshake.
-                    # En una implementación real de chat, aquí enviaríamos el mensaje del usuario.
-                    
-                    # Para el propósito de "get_response", voy a intentar enviar el mensaje si el handshake es exitoso.
-                    # Como no tengo la especificación de cómo enviar mensajes por WS en OpenClaw,
-                    # asumiré por ahora que solo probamos conexión o usaré un formato genérico si confirma.
-                    
-                    connect_response = await websocket.recv()
-                    logger.info(f"Handshake response: {connect_response[:200]}...")
-                    connect_data = json.loads(connect_response)
-                    
-                    if not (connect_data.get("ok") or connect_data.get("type") == "res"):
-                        error_msg = f"Fallo en handshake: {connect_data}"
-                        logger.error(error_msg)
-                        return error_msg
-                    
-                    logger.info("Handshake successful")
-                        
-                    # 4. Enviar mensaje de chat
-                    # Generar ID único para la solicitud
-                    chat_req_id = f"req_{asyncio.get_event_loop().time()}"
-                    
-                    # Extraer el último mensaje del usuario para enviarlo
-                    # OpenClaw parece esperar un string simple en 'message' para 'chat.send'
-                    user_msg = "Hola"
-                    if messages:
-                         for m in reversed(messages):
-                              if m.get("role") == "user":
-                                   user_msg = m.get("content", "")
-                                   break
-                    
-                    chat_payload = {
-                        "type": "req",
-                        "id": chat_req_id,
-                        "method": "chat.send",
-                        "params": {
-                            "sessionKey": session_key,
-                            "message": user_msg,
-                            "idempotencyKey": f"idem_{chat_req_id}"
-                        }
-                    }
-                    logger.info(f"Sending chat message: {user_msg[:100]}...")
-                    await websocket.send(json.dumps(chat_payload))
-                    logger.info("Chat message sent, waiting for response...")
-                    
-                    # 5. Esperar respuesta del chat
-                    # Flujo: primero llega un 'res' confirmando recepción, luego 'event' con el contenido
-                    accumulated_response = ""
-                    response_started = False
-                    
-                    while True:
-                        try:
-                            msg_raw = await asyncio.wait_for(websocket.recv(), timeout=30.0)
-                            msg = json.loads(msg_raw)
-
-                            # 1. Chequear 'res' del request enviado
-                            if msg.get("type") == "res" and msg.get("id") == chat_req_id:
-                                # Aquí confirmamos recepción.
-                                if not msg.get("ok"):
-                                    return f"Error en chat.send: {msg.get('error')}"
-                                # El servidor confirma 'request valid received'
-                                # Ahora esperamos el evento 'chat' real.
-                                continue
+    def _del_loop_actual(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Las de otro loop (ya cerrado, p.ej. entre tests) no se pueden usar
+            self._loop = loop
+            self._conexiones = []
+            self._abriendo = asyncio.Lock()
+            self._sesiones_en_curso = {}
+            self._turnos_pedidos = Counter()
 
-                            # 2. Chequear eventos de chat y agente (respuesta real asíncrona)
-                            if msg.get("type") == "event":
-                                event_type = msg.get("event")
-                                payload = msg.get("payload", {})
-                                
-                                # Caso A: Evento 'agent' con stream de texto
-                                if event_type == "agent":
-                                    stream_type = payload.get("stream")
-                                    if stream_type == "assistant":
-                                        data = payload.get("data", {})
-                                        delta = data.get("delta", "")
-                                        accumulated_response += delta
-                                        # Si hay un indicador de fin en data? (no visto en logs)
-                                        
-                                    elif stream_type == "lifecycle":
-                                        data = payload.get("data", {})
-                                        if data.get("phase") == "end":
-                                            return accumulated_response
+    async def _conexion(self, timeout: Optional[float] = None) -> ConexionOpenClaw:
+        """La conexión abierta menos ocupada; abre otra si todas trabajan y caben más"""
+        self._del_loop_actual()
+        timeout = timeout or settings.openclaw_connect_timeout_seconds
+        async with self._abriendo:
+            self._conexiones = [c for c in self._conexiones if not c.cerrada]
+            libre = min(self._conexiones, key=lambda c: c.en_curso, default=None)
+            if libre is not None and (libre.en_curso == 0 or len(self._conexiones) >= self.max_conexiones):
+                return libre
+            conexion = await ConexionOpenClaw.abrir(
+                self.ws_url,
+                self._get_token(),
+                timeout=timeout,
+                ping_interval=settings.openclaw_ping_interval_seconds or None
+            )
+            self._conexiones.append(conexion)
+            return conexion
 
-                                # Caso B: Evento 'chat' (estado del mensaje)
-                                elif event_type == "chat":
-                                    state = payload.get("state")
-                                    if state == "final":
-                                        # Podemos extraer el texto completo de aquí si lo preferimos
-                                        msg_content = payload.get("message", {}).get("content", [])
-                                        if isinstance(msg_content, list):
-                                             full_text = "".join([c.get("text", "") for c in msg_content if c.get("type") == "text"])
-                                             if full_text:
-                                                  return full_text
-                                        return accumulated_response
+    async def close(self) -> None:
+        """Cierra las conexiones abiertas (apagado de la API)"""
+        conexiones, self._conexiones = self._conexiones, []
+        if self._loop is not asyncio.get_running_loop():
+            return
+        for conexion in conexiones:
+            await conexion.cerrar()
 
-                        except asyncio.TimeoutError:
-                            # Si ya recibimos algo, devolvemos eso
-                            if accumulated_response:
-                                return accumulated_response
-                            return "Error: Tiempo de espera agotado esperando respuesta de OpenClaw"
-                        
-                        # Add simple break interval if not using wait_for (but we are used wait_for)
-                        # Just in case websocket connection is problematic
-                        await asyncio.sleep(0.01)
-                            
-                else:
-                    error_msg = f"Respuesta inesperada del servidor (no challenge): {response}"
-                    logger.error(error_msg)
-                    return error_msg
+    async def stream_response(
+        self,
+        messages: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None,
+        uso: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Texto de la respuesta según llega; los fallos salen como ErrorOpenClaw.
 
+        Los mensajes a una misma sesión se envían de uno en uno: sus eventos
+        se reparten por sessionKey. Los tokens del turno, si el gateway los
+        da, quedan en uso. Cerrar el generador antes del final cancela el
+        chat en el gateway.
+        """
+        session_key = self._get_session_key(context)
+        user_msg = _ultimo_mensaje_usuario(messages)
+        self._del_loop_actual()
+        turno = self._sesiones_en_curso.setdefault(session_key, asyncio.Lock())
+        self._turnos_pedidos[session_key] += 1
+        inicio = time.perf_counter()
+        primero = True
+        try:
+            async with turno:
+                conexion = await self._conexion()
+                logger.info(f"Sending chat message: session_key={session_key}, message={user_msg[:100]}...")
+                async with aclosing(conexion.chat(session_key, user_msg, timeout=30.0, uso=uso)) as deltas:
+                    async for delta in deltas:
+                        if primero:
+                            OPENCLAW_IDA_Y_VUELTA.observar(time.perf_counter() - inicio, "chat_first_token", "ok")
+                            primero = False
+                        yield delta
+        except (ErrorOpenClaw, ValueError):
+            raise
         except websockets.exceptions.ConnectionClosedError as e:
-            error_msg = f"Conexión cerrada inesperadamente: {e}"
-            logger.error(error_msg)
-            logger.error(traceback.format_exc())
-            return error_msg
+            raise ErrorOpenClaw(f"Conexión cerrada inesperadamente: {e}") from e
         except Exception as e:
-            error_msg = f"Error WebSocket: {str(e)}"
+            raise ErrorOpenClaw(f"Error WebSocket: {str(e)}") from e
+        finally:
+            self._turnos_pedidos[session_key] -= 1
+            if not self._turnos_pedidos[session_key]:
+                del self._turnos_pedidos[session_key]
+                self._sesiones_en_curso.pop(session_key, None)
+
+    @_medir("chat", lambda respuesta: not str(respuesta).startswith(_PREFIJOS_ERROR))
+    async def get_response(self, messages: List[Dict[str, Any]], context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Envía el último mensaje del usuario por la conexión compartida y
+        devuelve la respuesta completa (o el error como texto).
+        """
+        try:
+            return "".join([delta async for delta in self.stream_response(messages, context)])
+        except (ErrorOpenClaw, ValueError) as e:
+            error_msg = str(e) if str(e).startswith(_PREFIJOS_ERROR) else f"Error WebSocket: {e}"
             logger.error(error_msg)
-            logger.error(traceback.format_exc())
             return error_msg
 
+    @_medir("history")
     async def get_chat_history(self, session_key: Optional[str] = None, context: Optional[Dict[str, Any]] = None, limit: int = 50) -> List[Dict[str, Any]]:
         """
         Recupera el historial de chat.
@@ -220,158 +194,45 @@ class OpenClawService:
         """
         if not session_key:
              session_key = self._get_session_key(context)
-             
-        uri = self.ws_url
-        token = self._get_token()
-        
-        try:
-            async with websockets.connect(uri) as websocket:
-                # 1. Esperar al challenge de conexión
-                response = await websocket.recv()
-                challenge = json.loads(response)
-                
-                if challenge.get("type") == "event" and challenge.get("event") == "connect.challenge":
-                    # 2. Enviar respuesta al challenge (Handshake) - Reutilizamos payload
-                    handshake_payload = {
-                        "type": "req",
-                        "id": "1",
-                        "method": "connect",
-                        "params": {
-                            "minProtocol": 3,
-                            "maxProtocol": 3,
-                            "client": {
-                                "id": "cli",
-                                "version": "1.0.0",
-                                "platform": "python",
-                                "mode": "backend"
-                            },
-                            "role": "operator",
-                            "scopes": ["operator.read", "operator.write", "operator.admin"],
-                            "auth": {
-                                "token": token,
-                                "password": token
-                            },
-                            "locale": "es-ES",
-                            "userAgent": "piarapp-backend/1.0.0"
-                        }
-                    }
-                    await websocket.send(json.dumps(handshake_payload))
-                    
-                    # 3. Esperar confirmación
-                    connect_response = await websocket.recv()
-                    connect_data = json.loads(connect_response)
-                    
-                    if not (connect_data.get("ok") or connect_data.get("type") == "res"):
-                        print(f"Fallo en handshake history: {connect_data}")
-                        return []
 
-                    # 4. Solicitar historial
-                    hist_req_id = f"req_hist_{asyncio.get_event_loop().time()}"
-                    history_payload = {
-                        "type": "req",
-                        "id": hist_req_id,
-                        "method": "chat.history",
-                        "params": {
-                            "sessionKey": session_key,
-                            "limit": limit
-                        }
-                    }
-                    await websocket.send(json.dumps(history_payload))
-                    
-                    # 5. Esperar respuesta
-                    # La respuesta debe ser de type 'res' con el payload conteniendo 'messages' o similar
-                    # O tal vez un evento. Asumiremos 'res' directo primero.
-                    try:
-                        while True:
-                            msg_raw = await asyncio.wait_for(websocket.recv(), timeout=10.0)
-                            msg = json.loads(msg_raw)
-                            
-                            if msg.get("type") == "res" and msg.get("id") == hist_req_id:
-                                if msg.get("ok"):
-                                    # Payload debería tener la lista de mensajes
-                                    # Estructura observada: payload: { messages: [...] }
-                                    payload = msg.get("payload", {})
-                                    
-                                    messages = []
-                                    if isinstance(payload, list):
-                                        messages = payload
-                                    else:
-                                        messages = payload.get("messages", []) or payload.get("history", []) or []
-                                        
-                                    # Filtrar solo mensajes de usuario y asistente para no ensuciar la UI con logs de herramientas
-                                    # Opcional: Si queremos debugging, lo dejamos. Para usuario final, mejor filtrar.
-                                    filtered = [
-                                        m for m in messages 
-                                        if m.get("role") in ["user", "assistant"]
-                                    ]
-                                    return filtered
-                                else:
-                                    print(f"Error recuperando historial: {msg.get('error')}")
-                                    return []
-                            
-                            # Ignorar otros eventos mientras esperamos la respuesta
-                            
-                    except asyncio.TimeoutError:
-                        print("Timeout esperando historial")
-                        return []
-                
+        try:
+            conexion = await self._conexion()
+            msg = await conexion.pedir("chat.history", {"sessionKey": session_key, "limit": limit}, timeout=10.0)
+        except asyncio.TimeoutError:
+            logger.warning("Timeout esperando historial")
+            return []
         except Exception as e:
-            print(f"Error obteniendo historial: {e}")
+            logger.warning(f"Error obteniendo historial: {e}")
+            return []
+
+        if not msg.get("ok"):
+            logger.warning(f"Error recuperando historial: {msg.get('error')}")
             return []
-        
-        return []
 
+        # Estructura observada: payload: { messages: [...] }
+        payload = msg.get("payload", {})
+        if isinstance(payload, list):
+            messages = payload
+        else:
+            messages = payload.get("messages", []) or payload.get("history", []) or []
+
+        # Solo mensajes de usuario y asistente, sin los logs de herramientas
+        return [m for m in messages if m.get("role") in ["user", "assistant"]]
+
+    @_medir("status", lambda estado: estado.get("connected", False))
     async def check_connection_status(self) -> Dict[str, Any]:
         """
-        Verifica rápidamente si hay conexión WebSocket con OpenClaw.
+        Verifica rápidamente si hay conexión WebSocket con OpenClaw (abriendo
+        la conexión compartida si no lo estaba).
         Retorna: {"connected": bool, "error": str | None}
         """
         try:
-            token = self._get_token()
-            async with websockets.connect(self.ws_url, open_timeout=5) as websocket:
-                # Esperar challenge
-                response = await asyncio.wait_for(websocket.recv(), timeout=5.0)
-                challenge = json.loads(response)
-                
-                if challenge.get("type") == "event" and challenge.get("event") == "connect.challenge":
-                    # Enviar handshake mínimo
-                    handshake_payload = {
-                        "type": "req",
-                        "id": "status_check",
-                        "method": "connect",
-                        "params": {
-                            "minProtocol": 3,
-                            "maxProtocol": 3,
-                            "client": {
-                                "id": "cli",
-                                "version": "1.0.0",
-                                "platform": "python",
-                                "mode": "status_check"
-                            },
-                            "role": "operator",
-                            "scopes": ["operator.read"],
-                            "auth": {
-                                "token": token,
-                                "password": token
-                            }
-                        }
-                    }
-                    await websocket.send(json.dumps(handshake_payload))
-                    
-                    # Esperar confirmación
-                    connect_response = await asyncio.wait_for(websocket.recv(), timeout=5.0)
-                    connect_data = json.loads(connect_response)
-                    
-                    if connect_data.get("ok") or connect_data.get("type") == "res":
-                        return {"connected": True, "error": None}
-                    else:
-                        error_msg = connect_data.get("error", {}).get("message", "Unknown error")
-                        return {"connected": False, "error": f"Handshake failed: {error_msg}"}
-                        
-                return {"connected": False, "error": "Unexpected challenge format"}
-                
+            await asyncio.wait_for(self._conexion(timeout=5.0), timeout=5.0)
+            return {"connected": True, "error": None}
         except asyncio.TimeoutError:
             return {"connected": False, "error": "Connection timeout"}
+        except ErrorOpenClaw as e:
+            return {"connected": False, "error": f"Handshake failed: {str(e)}"}
         except websockets.exceptions.WebSocketException as e:
             return {"connected": False, "error": f"WebSocket error: {str(e)}"}
         except Exception as e:
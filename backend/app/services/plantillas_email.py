@@ -0,0 +1,199 @@
+"""Plantillas de email precompiladas, con la imagen de cada club.
+
+Las plantillas viven en app/templates/email/: <nombre>.html y <nombre>.txt
+con el contenido, dentro de _base.html / _base.txt. Los campos se escriben
+{{ campo }} y en la versión HTML se escapan.
+
+Cada plantilla se lee y se compila una vez (la lista de trozos fijos y
+campos). Los campos que son iguales para todos los destinatarios de un club
+(nombre, colores, logo, URL del frontend) se rellenan aparte y ese resultado
+queda cacheado, así que renderizar un email solo une unas pocas cadenas con
+los campos de ese destinatario:
+
+    plantilla = plantilla_email("invitacion_club", Marca.de_club(club, base_url))
+    email = plantilla.renderizar(url=...)
+    emails = plantilla.renderizar_lote({"url": ...} for ... in invitados)
+
+Las partes repetidas (p.ej. un apartado por club en el resumen) son
+fragmentos: se renderizan por separado y se insertan como HTMLSeguro.
+"""
+import html
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from app.config import settings
+
+PLANTILLAS_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+_CAMPO = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_COLOR = re.compile(r"^#[0-9A-Fa-f]{6}$")
+
+COLOR_POR_DEFECTO = "#007bff"
+
+ASUNTOS = {
+    "invitacion_club": "Invitación a {{ club_nombre }} - PiarAPP",
+    "bienvenida": "Bienvenido a PiarAPP - Invitación a {{ club_nombre }}",
+    "verificacion": "Verifica tu email en PiarAPP",
+    "reset_contrasena": "Restablecer contraseña en PiarAPP",
+    "prueba": "Email de prueba - PiarAPP",
+    "resumen": "Tu resumen {{ periodo }} de PiarAPP",
+}
+
+
+class HTMLSeguro(str):
+    """Valor que se inserta tal cual en la versión HTML (ya es HTML válido)"""
+
+
+class Plantilla:
+    """Texto compilado: trozos fijos intercalados con campos.
+
+    partes tiene siempre un elemento más que campos; renderizar es unir
+    partes[0], valor(campos[0]), partes[1], ...
+    """
+
+    __slots__ = ("partes", "campos", "escapar")
+
+    def __init__(self, partes: Tuple[str, ...], campos: Tuple[str, ...], escapar: bool):
+        self.partes = partes
+        self.campos = campos
+        self.escapar = escapar
+
+    @classmethod
+    def compilar(cls, texto: str, escapar: bool = False) -> "Plantilla":
+        trozos = _CAMPO.split(texto)
+        return cls(tuple(trozos[0::2]), tuple(trozos[1::2]), escapar)
+
+    def _valor(self, valor: Any) -> str:
+        if valor is None:
+            return ""
+        if self.escapar and not isinstance(valor, HTMLSeguro):
+            return html.escape(str(valor))
+        return str(valor)
+
+    def rellenar(self, valores: Mapping[str, Any]) -> "Plantilla":
+        """Nueva plantilla con esos campos ya sustituidos (los demás siguen libres)"""
+        partes: List[str] = [self.partes[0]]
+        campos: List[str] = []
+        for campo, parte in zip(self.campos, self.partes[1:]):
+            if campo in valores:
+                partes[-1] += self._valor(valores[campo]) + parte
+            else:
+                campos.append(campo)
+                partes.append(parte)
+        return Plantilla(tuple(partes), tuple(campos), self.escapar)
+
+    def renderizar(self, valores: Mapping[str, Any]) -> str:
+        try:
+            trozos = [self.partes[0]]
+            for campo, parte in zip(self.campos, self.partes[1:]):
+                trozos.append(self._valor(valores[campo]))
+                trozos.append(parte)
+        except KeyError as e:
+            raise ValueError(f"Falta el campo {e.args[0]} de la plantilla") from None
+        return "".join(trozos)
+
+
+@dataclass(frozen=True)
+class Marca:
+    """Lo que es común a los emails de un club: su imagen y la URL del frontend"""
+    base_url: str
+    club_nombre: str = "PiarAPP"
+    color_primario: str = COLOR_POR_DEFECTO
+    logo_url: Optional[str] = None
+
+    @classmethod
+    def de_club(cls, club, base_url: str) -> "Marca":
+        # Son datos que edita el club: solo colores #rrggbb y logos http(s)
+        color = club.color_primario if club.color_primario and _COLOR.match(club.color_primario) else None
+        logo = club.logo_url if club.logo_url and club.logo_url.startswith(("https://", "http://")) else None
+        return cls(
+            base_url=base_url,
+            club_nombre=club.nombre,
+            color_primario=color or COLOR_POR_DEFECTO,
+            logo_url=logo,
+        )
+
+    def valores(self) -> Dict[str, Any]:
+        logo = ""
+        if self.logo_url:
+            logo = HTMLSeguro(
+                f'<img src="{html.escape(self.logo_url)}" alt="{html.escape(self.club_nombre)}" '
+                'style="max-height: 64px; margin-bottom: 10px;">'
+            )
+        return {
+            "base_url": self.base_url,
+            "club_nombre": self.club_nombre,
+            "color_primario": self.color_primario,
+            "logo": logo,
+            "dias_invitacion": settings.invitation_token_expiry_days,
+        }
+
+
+@dataclass(frozen=True)
+class EmailRenderizado:
+    asunto: str
+    cuerpo_html: str
+    cuerpo_texto: str
+
+
+class PlantillaEmail:
+    """Asunto, HTML y texto de un email, con los campos de la marca ya puestos"""
+
+    __slots__ = ("asunto", "cuerpo_html", "cuerpo_texto")
+
+    def __init__(self, asunto: Plantilla, cuerpo_html: Plantilla, cuerpo_texto: Plantilla):
+        self.asunto = asunto
+        self.cuerpo_html = cuerpo_html
+        self.cuerpo_texto = cuerpo_texto
+
+    def rellenar(self, valores: Mapping[str, Any]) -> "PlantillaEmail":
+        return PlantillaEmail(
+            self.asunto.rellenar(valores), self.cuerpo_html.rellenar(valores), self.cuerpo_texto.rellenar(valores)
+        )
+
+    def renderizar(self, **valores: Any) -> EmailRenderizado:
+        return next(self.renderizar_lote((valores,)))
+
+    def renderizar_lote(self, destinatarios: Iterable[Mapping[str, Any]]) -> Iterator[EmailRenderizado]:
+        """Un email por cada diccionario de campos (miles sin volver a compilar nada)"""
+        asunto, cuerpo_html, cuerpo_texto = self.asunto, self.cuerpo_html, self.cuerpo_texto
+        for valores in destinatarios:
+            yield EmailRenderizado(
+                asunto.renderizar(valores), cuerpo_html.renderizar(valores), cuerpo_texto.renderizar(valores)
+            )
+
+
+def _leer(nombre: str) -> str:
+    return (PLANTILLAS_DIR / nombre).read_text(encoding="utf-8")
+
+
+@lru_cache(maxsize=None)
+def compilar(nombre: str) -> PlantillaEmail:
+    """Plantilla sin rellenar: se lee del disco y se compila una sola vez"""
+    if nombre not in ASUNTOS:
+        raise ValueError(f"Plantilla de email desconocida: {nombre}")
+    contenido_html = _leer(f"{nombre}.html")
+    contenido_texto = _leer(f"{nombre}.txt")
+    return PlantillaEmail(
+        Plantilla.compilar(ASUNTOS[nombre]),
+        Plantilla.compilar(_leer("_base.html").replace("{{ contenido }}", contenido_html), escapar=True),
+        Plantilla.compilar(_leer("_base.txt").replace("{{ contenido }}", contenido_texto)),
+    )
+
+
+@lru_cache(maxsize=None)
+def fragmento(nombre: str) -> Tuple[Plantilla, Plantilla]:
+    """Trozo (HTML, texto) sin asunto ni _base, para repetir dentro de otra plantilla"""
+    return (
+        Plantilla.compilar(_leer(f"{nombre}.html").rstrip("\n"), escapar=True),
+        Plantilla.compilar(_leer(f"{nombre}.txt").rstrip("\n")),
+    )
+
+
+@lru_cache(maxsize=512)
+def plantilla_email(nombre: str, marca: Marca) -> PlantillaEmail:
+    """Plantilla con la marca del club ya rellena (cacheada por club y URL)"""
+    return compilar(nombre).rellenar(marca.valores())
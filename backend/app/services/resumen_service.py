@@ -0,0 +1,250 @@
+"""Resúmenes periódicos por email (Usuario.email_digest: 'daily' o 'weekly').
+
+Lo lanza un cron (scripts/enviar_resumenes.py). Cada ejecución recorre por
+páginas de ids los usuarios de esa frecuencia a los que les toca resumen:
+tienen las notificaciones activas y su último resumen (ultimo_resumen) es
+de hace más de un periodo. Por cada página:
+
+1. Una consulta con los clubes de los usuarios.
+2. Las novedades de los clubes que aún no estén calculadas para ese
+   "desde" (noticias publicadas, eventos nuevos y comentarios nuevos por
+   noticia), con tres consultas para todos los clubes a la vez. Cada
+   apartado de club se renderiza una vez y sirve para todas las páginas.
+3. Los usuarios de la página con el mismo contenido (mismo "desde" y
+   mismos clubes con novedades) comparten un cuerpo, que se renderiza una
+   vez y se encola para todos ellos con EmailService.encolar_lote.
+4. ultimo_resumen pasa a "hasta" para toda la página, en la misma
+   transacción que los emails: si el proceso se corta, la siguiente
+   ejecución sigue con los usuarios que faltan.
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.club import Club
+from app.models.comentario import Comentario
+from app.models.evento import Evento
+from app.models.miembro_club import MiembroClub
+from app.models.noticia import Noticia
+from app.models.usuario import Usuario
+from app.services.email_outbox import ahora
+from app.services.email_service import EmailService
+from app.services.plantillas_email import EmailRenderizado, HTMLSeguro, Marca, PlantillaEmail, fragmento
+
+logger = logging.getLogger(__name__)
+
+FRECUENCIAS = {"daily": timedelta(days=1), "weekly": timedelta(days=7)}
+NOMBRES_PERIODO = {"daily": "diario", "weekly": "semanal"}
+
+# Holgura para que un cron que arranca unos segundos antes que la vez
+# anterior no se salte un periodo
+MARGEN = timedelta(hours=1)
+# Elementos por apartado; del resto solo se dice cuántos hay
+MAX_ELEMENTOS = 10
+
+Seccion = Optional[Tuple[str, str]]
+
+
+@dataclass
+class EstadisticasResumen:
+    usuarios: int = 0
+    emails: int = 0
+    cuerpos: int = 0
+    paginas: int = 0
+
+
+def _componer(nombre: str, valores: dict, campo: str, partes: List[Tuple[str, str]]) -> Tuple[str, str]:
+    """Renderiza el fragmento (HTML, texto) con campo = las partes ya renderizadas, una por línea"""
+    html, texto = fragmento(nombre)
+    return (
+        html.renderizar({**valores, campo: HTMLSeguro("\n".join(h for h, _ in partes))}),
+        texto.renderizar({**valores, campo: "\n".join(t for _, t in partes)}),
+    )
+
+
+def _apartado(titulo: str, url: str, elementos: List[Tuple[str, str]]) -> Tuple[str, str]:
+    visibles = elementos[:MAX_ELEMENTOS]
+    if len(elementos) > MAX_ELEMENTOS:
+        visibles.append((f"y {len(elementos) - MAX_ELEMENTOS} más", ""))
+    html, texto = fragmento("resumen_elemento")
+    lineas = [
+        (html.renderizar({"texto": t, "detalle": d}), texto.renderizar({"texto": t, "detalle": d}))
+        for t, d in visibles
+    ]
+    return _componer("resumen_apartado", {"titulo": titulo, "url": url}, "elementos", lineas)
+
+
+def _comentarios_nuevos(total: int) -> str:
+    return "(1 comentario nuevo)" if total == 1 else f"({total} comentarios nuevos)"
+
+
+class ResumenService:
+    """Genera y encola los resúmenes de una frecuencia"""
+
+    @staticmethod
+    def generar(
+        db: Session,
+        frecuencia: str,
+        hasta: Optional[datetime] = None,
+        pagina: int = 1000
+    ) -> EstadisticasResumen:
+        """Encola los resúmenes pendientes hasta "hasta" (ahora, en UTC); confirma cada página"""
+        if frecuencia not in FRECUENCIAS:
+            raise ValueError(f"Frecuencia de resumen desconocida: {frecuencia}")
+        periodo = FRECUENCIAS[frecuencia]
+        hasta = hasta or ahora()
+        vencido = hasta - periodo + MARGEN
+        base_url = EmailService._get_frontend_url(db)
+        plantilla = EmailService.plantilla(db, "resumen")
+
+        estadisticas = EstadisticasResumen()
+        secciones: Dict[Tuple[int, datetime], Seccion] = {}
+        cursor = 0
+        while True:
+            usuarios = db.execute(
+                select(Usuario.id, Usuario.email, Usuario.ultimo_resumen)
+                .filter(
+                    Usuario.email_digest == frecuencia,
+                    Usuario.id > cursor,
+                    Usuario.activo.is_not(False),
+                    Usuario.notifications_enabled.is_not(False),
+                    or_(Usuario.ultimo_resumen.is_(None), Usuario.ultimo_resumen <= vencido),
+                )
+                .order_by(Usuario.id)
+                .limit(pagina)
+            ).all()
+            if not usuarios:
+                break
+            cursor = usuarios[-1].id
+            ids = [u.id for u in usuarios]
+
+            clubes_de: Dict[int, List[int]] = defaultdict(list)
+            for usuario_id, club_id in db.execute(
+                select(MiembroClub.usuario_id, MiembroClub.club_id)
+                .filter(MiembroClub.usuario_id.in_(ids), MiembroClub.estado == "activo")
+                .order_by(MiembroClub.usuario_id, MiembroClub.club_id)
+            ):
+                clubes_de[usuario_id].append(club_id)
+
+            # Novedades que faltan, agrupadas por "desde" (casi siempre uno solo:
+            # la hora de la ejecución anterior)
+            desde_de = {u.id: u.ultimo_resumen or hasta - periodo for u in usuarios}
+            pendientes: Dict[datetime, Set[int]] = defaultdict(set)
+            for u in usuarios:
+                for club_id in clubes_de[u.id]:
+                    if (club_id, desde_de[u.id]) not in secciones:
+                        pendientes[desde_de[u.id]].add(club_id)
+            for desde, clubes in pendientes.items():
+                secciones.update(ResumenService._secciones(db, clubes, desde, hasta, base_url))
+
+            destinatarios: Dict[Tuple[datetime, Tuple[int, ...]], List[str]] = defaultdict(list)
+            for u in usuarios:
+                desde = desde_de[u.id]
+                con_novedades = tuple(c for c in clubes_de[u.id] if secciones[(c, desde)])
+                if con_novedades:
+                    destinatarios[(desde, con_novedades)].append(u.email)
+
+            emails = []
+            for (desde, clubes), correos in destinatarios.items():
+                cuerpo = ResumenService._cuerpo(plantilla, frecuencia, desde, [secciones[(c, desde)] for c in clubes])
+                emails.extend((correo, cuerpo) for correo in correos)
+            encolados = EmailService.encolar_lote(db, emails)
+
+            db.execute(
+                update(Usuario).where(Usuario.id.in_(ids)).values(ultimo_resumen=hasta)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            estadisticas.usuarios += len(usuarios)
+            estadisticas.emails += encolados
+            estadisticas.cuerpos += len(destinatarios)
+            estadisticas.paginas += 1
+            logger.info("Resumen %s: página hasta el usuario %s, %s emails", frecuencia, cursor, encolados)
+
+        return estadisticas
+
+    @staticmethod
+    def _cuerpo(plantilla: PlantillaEmail, frecuencia: str, desde: datetime, partes: List[Tuple[str, str]]) -> EmailRenderizado:
+        valores = {"periodo": NOMBRES_PERIODO[frecuencia], "desde": desde.strftime("%d/%m/%Y")}
+        return EmailRenderizado(
+            plantilla.asunto.renderizar(valores),
+            plantilla.cuerpo_html.renderizar({**valores, "secciones": HTMLSeguro("\n".join(h for h, _ in partes))}),
+            plantilla.cuerpo_texto.renderizar({**valores, "secciones": "\n".join(t for _, t in partes)}),
+        )
+
+    @staticmethod
+    def _secciones(
+        db: Session, clubes: Set[int], desde: datetime, hasta: datetime, base_url: str
+    ) -> Dict[Tuple[int, datetime], Seccion]:
+        """Apartado renderizado (HTML, texto) de cada club, o None si no hay novedades"""
+        ids = sorted(clubes)
+        noticias: Dict[int, List[Tuple[str, str]]] = defaultdict(list)
+        for club_id, titulo, fecha in db.execute(
+            select(Noticia.club_id, Noticia.titulo, Noticia.fecha_publicacion)
+            .filter(
+                Noticia.club_id.in_(ids),
+                Noticia.estado == "publicada",
+                Noticia.fecha_publicacion > desde,
+                Noticia.fecha_publicacion <= hasta,
+            )
+            .order_by(Noticia.club_id, Noticia.fecha_publicacion.desc())
+        ):
+            noticias[club_id].append((titulo, fecha.strftime("%d/%m")))
+
+        eventos: Dict[int, List[Tuple[str, str]]] = defaultdict(list)
+        for club_id, nombre, fecha_inicio in db.execute(
+            select(Evento.club_id, Evento.nombre, Evento.fecha_inicio)
+            .filter(
+                Evento.club_id.in_(ids),
+                Evento.fecha_creacion > desde,
+                Evento.fecha_creacion <= hasta,
+                Evento.estado != "cancelado",
+            )
+            .order_by(Evento.club_id, Evento.fecha_inicio)
+        ):
+            eventos[club_id].append((nombre, fecha_inicio.strftime("%d/%m/%Y")))
+
+        comentarios: Dict[int, List[Tuple[str, str]]] = defaultdict(list)
+        nuevos = func.count(Comentario.id)
+        for club_id, titulo, total in db.execute(
+            select(Noticia.club_id, Noticia.titulo, nuevos)
+            .join(Comentario, Comentario.noticia_id == Noticia.id)
+            .filter(
+                Noticia.club_id.in_(ids),
+                Noticia.estado == "publicada",
+                Comentario.fecha_creacion > desde,
+                Comentario.fecha_creacion <= hasta,
+            )
+            .group_by(Noticia.id)
+            .order_by(Noticia.club_id, nuevos.desc(), Noticia.id)
+        ):
+            comentarios[club_id].append((titulo, _comentarios_nuevos(total)))
+
+        con_novedades = set(noticias) | set(eventos) | set(comentarios)
+        marcas = {
+            club.id: Marca.de_club(club, base_url)
+            for club in db.execute(
+                select(Club.id, Club.nombre, Club.color_primario, Club.logo_url).filter(Club.id.in_(sorted(con_novedades)))
+            )
+        } if con_novedades else {}
+
+        resultado: Dict[Tuple[int, datetime], Seccion] = {}
+        for club_id in ids:
+            if club_id not in marcas:
+                resultado[(club_id, desde)] = None
+                continue
+            url = f"{base_url}/clubes/{club_id}"
+            apartados = []
+            if noticias[club_id]:
+                apartados.append(_apartado("Noticias", f"{url}/noticias", noticias[club_id]))
+            if eventos[club_id]:
+                apartados.append(_apartado("Eventos nuevos", f"{url}/eventos", eventos[club_id]))
+            if comentarios[club_id]:
+                apartados.append(_apartado("Comentarios", f"{url}/noticias", comentarios[club_id]))
+            resultado[(club_id, desde)] = _componer("resumen_club", marcas[club_id].valores(), "apartados", apartados)
+        return resultado
@@ -0,0 +1,161 @@
+"""Almacén de archivos direccionado por contenido (SHA-256)"""
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from app.config import settings
+
+
+class BlobStore(ABC):
+    """Backend de almacenamiento de archivos identificados por su SHA-256.
+
+    Solo guarda y entrega bytes: la deduplicación y el conteo de referencias
+    (qué filas usan cada archivo) los lleva BlobService en la BD.
+    """
+
+    @abstractmethod
+    def escribir(self, sha256: str, datos: bytes) -> None:
+        """Guarda el contenido si no existe ya (escritura atómica)"""
+
+    @abstractmethod
+    def importar(self, sha256: str, ruta: Path) -> None:
+        """Mueve al almacén un temporal de ruta_temporal() (si el contenido no existía ya)"""
+
+    def ruta_temporal(self) -> Path:
+        """Archivo temporal nuevo y vacío para recibir una subida"""
+        fd, temporal = tempfile.mkstemp(prefix="piar-subida-")
+        os.close(fd)
+        return Path(temporal)
+
+    def limpiar_temporales(self, antiguedad_minima: float) -> int:
+        """Borra temporales de subidas interrumpidas (p.ej. por un reinicio); devuelve cuántos"""
+        return 0
+
+    @abstractmethod
+    def existe(self, sha256: str) -> bool:
+        ...
+
+    @abstractmethod
+    def abrir(self, sha256: str) -> BinaryIO:
+        """Abre el archivo para lectura en binario"""
+
+    @abstractmethod
+    def borrar(self, sha256: str) -> None:
+        ...
+
+    @abstractmethod
+    def listar(self) -> Iterator[str]:
+        """Hashes de todos los archivos guardados"""
+
+    @abstractmethod
+    def antiguedad(self, sha256: str) -> float:
+        """Segundos desde la última escritura del archivo"""
+
+    def ruta_local(self, sha256: str) -> Optional[Path]:
+        """Ruta en disco si el backend la tiene (permite servir con FileResponse)"""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    """Archivos en el sistema de ficheros local, repartidos por prefijo del hash.
+
+    <directorio>/ab/cd/abcd... : dos niveles de 256 subdirectorios evitan
+    directorios con cientos de miles de entradas.
+    """
+
+    def __init__(self, directorio: str):
+        self.directorio = Path(directorio)
+
+    def _ruta(self, sha256: str) -> Path:
+        return self.directorio / sha256[:2] / sha256[2:4] / sha256
+
+    def escribir(self, sha256: str, datos: bytes) -> None:
+        ruta = self._ruta(sha256)
+        if ruta.is_file():
+            return
+
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        # Se escribe a un temporal del mismo directorio y se renombra: un
+        # lector nunca ve un archivo a medias
+        fd, temporal = tempfile.mkstemp(dir=ruta.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(datos)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.unlink(temporal)
+            raise
+
+    def importar(self, sha256: str, ruta: Path) -> None:
+        destino = self._ruta(sha256)
+        if destino.is_file():
+            return
+
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(ruta, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(ruta, destino)
+
+    def ruta_temporal(self) -> Path:
+        # En el mismo sistema de ficheros que el almacén, para que importar sea un rename
+        directorio = self.directorio / ".tmp"
+        directorio.mkdir(parents=True, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=directorio, prefix="subida-")
+        os.close(fd)
+        return Path(temporal)
+
+    def limpiar_temporales(self, antiguedad_minima: float) -> int:
+        directorio = self.directorio / ".tmp"
+        if not directorio.is_dir():
+            return 0
+        borrados = 0
+        for ruta in directorio.iterdir():
+            try:
+                if time.time() - ruta.stat().st_mtime >= antiguedad_minima:
+                    ruta.unlink()
+                    borrados += 1
+            except FileNotFoundError:
+                continue
+        return borrados
+
+    def existe(self, sha256: str) -> bool:
+        return self._ruta(sha256).is_file()
+
+    def abrir(self, sha256: str) -> BinaryIO:
+        return open(self._ruta(sha256), "rb")
+
+    def borrar(self, sha256: str) -> None:
+        self._ruta(sha256).unlink(missing_ok=True)
+
+    def listar(self) -> Iterator[str]:
+        if not self.directorio.is_dir():
+            return
+        for ruta in self.directorio.glob("??/??/*"):
+            if ruta.is_file() and not ruta.name.startswith(".tmp-"):
+                yield ruta.name
+
+    def antiguedad(self, sha256: str) -> float:
+        return time.time() - self._ruta(sha256).stat().st_mtime
+
+    def ruta_local(self, sha256: str) -> Optional[Path]:
+        return self._ruta(sha256)
+
+
+def crear_blob_store() -> BlobStore:
+    """Instancia el backend configurado en BLOB_STORE_BACKEND"""
+    if settings.blob_store_backend == "local":
+        return LocalBlobStore(settings.blob_store_path)
+    raise ValueError(f"Backend de almacén de archivos desconocido: {settings.blob_store_backend}")
+
+
+# Instancia global usada por BlobService
+blob_store = crear_blob_store()
@@ -0,0 +1,265 @@
+"""Respuestas de descarga de archivos: desde el almacén o desde columnas BLOB antiguas.
+
+Todas las descargas pasan por respuesta_descarga, que añade validadores
+(ETag con el SHA-256 del contenido, Last-Modified), responde 304 a las
+peticiones condicionales y atiende rangos (206) para reanudar descargas.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.utils.blob_store import blob_store
+
+
+class RangoNoSatisfacible(Exception):
+    """El rango pedido cae fuera del archivo (416)"""
+
+
+def parsear_rango(cabecera: Optional[str], tamano: int) -> Optional[Tuple[int, int]]:
+    """(inicio, fin) inclusivos de una cabecera Range de un único rango de bytes.
+
+    Devuelve None si la cabecera no existe o no se entiende (varios rangos,
+    otra unidad...): en ese caso se sirve el archivo completo, como permite
+    el RFC 9110. Lanza RangoNoSatisfacible si el rango no solapa el archivo.
+    """
+    if not cabecera or not cabecera.startswith("bytes=") or "," in cabecera:
+        return None
+
+    inicio_txt, separador, fin_txt = cabecera[len("bytes="):].strip().partition("-")
+    if not separador:
+        return None
+    try:
+        if inicio_txt:
+            inicio = int(inicio_txt)
+            fin = int(fin_txt) if fin_txt else tamano - 1
+        else:
+            # bytes=-N: los últimos N bytes
+            sufijo = int(fin_txt)
+            if sufijo <= 0:
+                raise RangoNoSatisfacible()
+            inicio, fin = max(0, tamano - sufijo), tamano - 1
+    except ValueError:
+        return None
+
+    if inicio >= tamano:
+        raise RangoNoSatisfacible()
+    if inicio < 0 or fin < inicio:
+        return None
+    return inicio, min(fin, tamano - 1)
+
+
+def _utc(fecha: datetime) -> datetime:
+    """Fecha en UTC con precisión de segundos (la de las cabeceras HTTP).
+
+    Las fechas sin zona se guardan en UTC (CURRENT_TIMESTAMP de SQLite).
+    """
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return fecha.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _http_date(fecha: datetime) -> str:
+    return format_datetime(_utc(fecha), usegmt=True)
+
+
+def _coincide_etag(cabecera: str, etag: Optional[str]) -> bool:
+    """Comparación débil de If-None-Match (lista de etags o *)"""
+    if etag is None:
+        return False
+    candidatos = [c.strip() for c in cabecera.split(",")]
+    return "*" in candidatos or any(c.removeprefix("W/") == etag for c in candidatos)
+
+
+def _no_modificado(request: Request, etag: Optional[str], ultima_modificacion: Optional[datetime]) -> bool:
+    """¿Puede responderse 304? If-None-Match manda sobre If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _coincide_etag(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and ultima_modificacion is not None:
+        try:
+            desde = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if desde.tzinfo is None:
+            desde = desde.replace(tzinfo=timezone.utc)
+        return _utc(ultima_modificacion) <= desde
+    return False
+
+
+def _rango_vigente(request: Request, etag: Optional[str], last_modified: Optional[str]) -> bool:
+    """If-Range: el rango solo vale si el archivo no ha cambiado (comparación fuerte)"""
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return etag is not None and if_range == etag
+    return last_modified is not None and if_range == last_modified
+
+
+def respuesta_descarga(
+    request: Request,
+    *,
+    tamano: int,
+    media_type: str,
+    cache_control: str,
+    leer: Callable[[int, int], Iterator[bytes]],
+    sha256: Optional[str] = None,
+    ultima_modificacion: Optional[datetime] = None,
+    ruta: Optional[Path] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Respuesta 200/206/304/416 para un archivo de `tamano` bytes.
+
+    - leer(inicio, fin) devuelve los bytes [inicio, fin] en trozos
+    - ruta: si el archivo está en disco, el 200 completo va con FileResponse
+    """
+    etag = f'"{sha256}"' if sha256 else None
+    last_modified = _http_date(ultima_modificacion) if ultima_modificacion else None
+
+    validadores = {"Cache-Control": cache_control}
+    if etag:
+        validadores["ETag"] = etag
+    if last_modified:
+        validadores["Last-Modified"] = last_modified
+
+    if _no_modificado(request, etag, ultima_modificacion):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validadores)
+
+    cabeceras = {**validadores, "Accept-Ranges": "bytes", **(headers or {})}
+
+    rango = None
+    if _rango_vigente(request, etag, last_modified):
+        try:
+            rango = parsear_rango(request.headers.get("range"), tamano)
+        except RangoNoSatisfacible:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**cabeceras, "Content-Range": f"bytes */{tamano}"}
+            )
+
+    if rango is not None:
+        inicio, fin = rango
+        cabeceras["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+        cabeceras["Content-Length"] = str(fin - inicio + 1)
+        return StreamingResponse(
+            leer(inicio, fin),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers=cabeceras
+        )
+
+    if ruta is not None:
+        return FileResponse(ruta, media_type=media_type, headers=cabeceras)
+
+    cabeceras["Content-Length"] = str(tamano)
+    return StreamingResponse(leer(0, tamano - 1), media_type=media_type, headers=cabeceras)
+
+
+def leer_archivo(sha256: str, inicio: int, fin: int) -> Iterator[bytes]:
+    """Bytes [inicio, fin] de un archivo del almacén, en trozos"""
+    chunk_size = settings.blob_stream_chunk_size
+    with blob_store.abrir(sha256) as f:
+        f.seek(inicio)
+        restantes = fin - inicio + 1
+        while restantes > 0:
+            trozo = f.read(min(chunk_size, restantes))
+            if not trozo:
+                return
+            restantes -= len(trozo)
+            yield trozo
+
+
+def respuesta_archivo(
+    request: Request,
+    sha256: str,
+    *,
+    tamano: int,
+    media_type: str,
+    cache_control: str,
+    ultima_modificacion: Optional[datetime] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Sirve un archivo del almacén.
+
+    Con el backend local el 200 completo es un FileResponse: se lee del disco
+    por trozos (o con sendfile si el servidor lo soporta) sin pasar por la BD.
+    """
+    if not blob_store.existe(sha256):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archivo no encontrado en el almacén"
+        )
+
+    return respuesta_descarga(
+        request,
+        tamano=tamano,
+        media_type=media_type,
+        cache_control=cache_control,
+        leer=partial(leer_archivo, sha256),
+        sha256=sha256,
+        ultima_modificacion=ultima_modificacion,
+        ruta=blob_store.ruta_local(sha256),
+        headers=headers
+    )
+
+
+def leer_blob(db: Session, columna, *condiciones, inicio: int, fin: int) -> Iterator[bytes]:
+    """Bytes [inicio, fin] de un BLOB de la BD, en trozos leídos con substr().
+
+    En memoria solo hay un trozo a la vez. Todos los trozos se leen en la
+    misma transacción, así que salen de la misma versión de la fila aunque
+    se suba otro archivo mientras tanto.
+    """
+    chunk_size = settings.blob_stream_chunk_size
+    try:
+        for desde in range(inicio, fin + 1, chunk_size):
+            longitud = min(chunk_size, fin + 1 - desde)
+            trozo = db.execute(
+                select(func.substr(columna, desde + 1, longitud)).where(*condiciones)
+            ).scalar()
+            if not trozo:
+                return
+            yield bytes(trozo)
+    finally:
+        # La sesión es la del request: se cierra al terminar de enviar el cuerpo
+        db.close()
+
+
+def respuesta_blob(
+    request: Request,
+    db: Session,
+    columna,
+    *condiciones,
+    tamano: int,
+    media_type: str,
+    cache_control: str,
+    ultima_modificacion: Optional[datetime] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Sirve un archivo guardado aún dentro de la BD (formato anterior al almacén).
+
+    Sin hash del contenido no hay ETag: las peticiones condicionales usan
+    Last-Modified.
+    """
+    def leer(inicio: int, fin: int) -> Iterator[bytes]:
+        return leer_blob(db, columna, *condiciones, inicio=inicio, fin=fin)
+
+    return respuesta_descarga(
+        request,
+        tamano=tamano,
+        media_type=media_type,
+        cache_control=cache_control,
+        leer=leer,
+        ultima_modificacion=ultima_modificacion,
+        headers=headers
+    )
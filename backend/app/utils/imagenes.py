@@ -0,0 +1,134 @@
+"""Procesado de fotos de carnet (Pillow) en un pool de procesos"""
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Union
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.config import settings
+
+# Lados (px) de las miniaturas servidas con ?size=
+LADOS_MINIATURA = (64, 256, 512)
+# formato de la petición -> (formato Pillow, tipo MIME)
+FORMATOS_MINIATURA = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+CALIDAD_JPEG = 88
+CALIDAD_WEBP = 80
+
+# Rechazar "bombas de descompresión" (p.ej. un PNG pequeño de 30000x30000 px)
+Image.MAX_IMAGE_PIXELS = 40_000_000
+
+
+class ImagenNoValida(Exception):
+    """El archivo subido no es una imagen que Pillow pueda procesar"""
+
+
+@dataclass
+class FotoProcesada:
+    datos: bytes
+    mime: str
+    # lado -> miniatura WebP
+    miniaturas: Dict[int, bytes]
+
+
+# ---- Funciones que se ejecutan en los procesos del pool (deben ser picklables) ----
+
+def _abrir(origen: Union[bytes, str]) -> Image.Image:
+    """Abre la imagen (bytes o ruta) aplicando la orientación EXIF (las fotos de móvil vienen giradas)"""
+    try:
+        imagen = Image.open(io.BytesIO(origen) if isinstance(origen, bytes) else origen)
+        imagen.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as exc:
+        raise ImagenNoValida(str(exc)) from None
+    return ImageOps.exif_transpose(imagen)
+
+
+def _tiene_alfa(imagen: Image.Image) -> bool:
+    return imagen.mode in ("RGBA", "LA", "PA") or (imagen.mode == "P" and "transparency" in imagen.info)
+
+
+def _codificar(imagen: Image.Image, formato: str) -> bytes:
+    """Codifica sin metadatos: no se pasa exif/icc, así que la salida no lleva EXIF (ni GPS)"""
+    salida = io.BytesIO()
+    if formato == "JPEG":
+        if _tiene_alfa(imagen):
+            fondo = Image.new("RGB", imagen.size, (255, 255, 255))
+            fondo.paste(imagen.convert("RGBA"), mask=imagen.convert("RGBA").split()[-1])
+            imagen = fondo
+        imagen.convert("RGB").save(salida, "JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+    elif formato == "WEBP":
+        imagen = imagen.convert("RGBA" if _tiene_alfa(imagen) else "RGB")
+        imagen.save(salida, "WEBP", quality=CALIDAD_WEBP, method=4)
+    else:
+        imagen.save(salida, formato, optimize=True)
+    return salida.getvalue()
+
+
+def _reducir(imagen: Image.Image, lado: int) -> Image.Image:
+    copia = imagen.copy()
+    copia.thumbnail((lado, lado), Image.LANCZOS)
+    return copia
+
+
+def procesar_foto(origen: Union[bytes, str], lado_maximo: int, lados: Iterable[int]) -> FotoProcesada:
+    """Original acotado a lado_maximo (JPEG, o PNG si tiene transparencia) y miniaturas WebP"""
+    imagen = _reducir(_abrir(origen), lado_maximo)
+    if _tiene_alfa(imagen):
+        original, mime = _codificar(imagen, "PNG"), "image/png"
+    else:
+        original, mime = _codificar(imagen, "JPEG"), "image/jpeg"
+
+    miniaturas = {lado: _codificar(_reducir(imagen, lado), "WEBP") for lado in lados}
+    return FotoProcesada(datos=original, mime=mime, miniaturas=miniaturas)
+
+
+def generar_miniatura(origen: Union[bytes, str], lado: int, formato: str) -> bytes:
+    """Miniatura de `lado` px en el formato Pillow indicado"""
+    return _codificar(_reducir(_abrir(origen), lado), formato)
+
+
+class ImagenPool:
+    """Ejecuta el procesado de imágenes en procesos aparte.
+
+    Redimensionar y recodificar una foto de móvil son cientos de ms de CPU
+    con el GIL tomado en buena parte: en un hilo frenaría al resto de la
+    API, así que va a un pool de procesos (creado al primer uso, con
+    "spawn" para no heredar hilos ni conexiones del servidor). Con una ruta
+    en lugar de bytes, el archivo lo lee el proceso del pool y no pasa por
+    la memoria del servidor.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.image_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def procesar_foto(self, origen: Union[bytes, str]) -> FotoProcesada:
+        return await self._ejecutar(procesar_foto, origen, settings.foto_max_lado, LADOS_MINIATURA)
+
+    async def miniatura(self, origen: Union[bytes, str], lado: int, formato: str) -> bytes:
+        formato_pillow, _ = FORMATOS_MINIATURA[formato]
+        return await self._ejecutar(generar_miniatura, origen, lado, formato_pillow)
+
+    def close(self):
+        """Detiene los procesos del pool (se recrea en el siguiente uso)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _ejecutar(self, funcion, *args):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcion, *args)
+
+
+# Instancia global usada por las rutas de socios
+imagen_pool = ImagenPool()
@@ -0,0 +1,191 @@
+"""Métricas de la aplicación en el formato de texto de Prometheus.
+
+Implementación mínima sin dependencias: contadores, indicadores (gauges) e
+histogramas con etiquetas, más indicadores calculados al exponer (estado del
+pool de conexiones, colas...). Registrar un valor es una búsqueda en un dict
+y unas sumas bajo un lock, unos pocos microsegundos; el texto solo se genera
+cuando Prometheus pide GET /api/metrics.
+
+Los valores de las etiquetas se pasan en posición, en el orden en que se
+declararon: HTTP_DURACION.observar(0.012, "GET", "/api/clubes/{club_id}", "200").
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Starlette añade "; charset=utf-8" a los tipos text/*
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+Etiquetas = Tuple[str, ...]
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Metrica(ABC):
+    tipo = "untyped"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+
+    def _selector(self, valores: Etiquetas, extra: str = "") -> str:
+        pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(self.etiquetas, valores)]
+        if extra:
+            pares.append(extra)
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+    @abstractmethod
+    def muestras(self) -> Iterable[str]:
+        """Líneas de cada serie en el formato de texto de Prometheus"""
+
+    def exponer(self) -> List[str]:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}", *self.muestras()]
+
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        # Sin etiquetas hay una única serie, que se expone desde el principio
+        self._valores: Dict[Etiquetas, float] = {} if self.etiquetas else {(): 0}
+
+    def inc(self, *etiquetas: str, valor: float = 1) -> None:
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def valor(self, *etiquetas: str) -> float:
+        return self._valores.get(etiquetas, 0)
+
+    def muestras(self) -> Iterable[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        for etiquetas, valor in valores:
+            yield f"{self.nombre}{self._selector(etiquetas)} {_numero(valor)}"
+
+
+class Indicador(Contador):
+    """Valor que sube y baja (peticiones en curso, tamaño de una cola...)"""
+    tipo = "gauge"
+
+    def dec(self, *etiquetas: str, valor: float = 1) -> None:
+        self.inc(*etiquetas, valor=-valor)
+
+    def fijar(self, *etiquetas: str, valor: float) -> None:
+        with self._lock:
+            self._valores[etiquetas] = valor
+
+
+class IndicadorCalculado(Metrica):
+    """Indicador que se calcula al exponer: la función devuelve (etiquetas, valor)"""
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str], funcion: Callable[[], Iterable[Tuple[Etiquetas, float]]]):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+
+    def muestras(self) -> Iterable[str]:
+        for etiquetas, valor in self.funcion():
+            yield f"{self.nombre}{self._selector(etiquetas)} {_numero(valor)}"
+
+
+class Histograma(Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), limites: Sequence[float] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites))
+        # Por etiquetas: [cubos no acumulados..., +Inf, suma, cuenta]
+        self._series: Dict[Etiquetas, List[float]] = {} if self.etiquetas else {(): self._vacia()}
+
+    def _vacia(self) -> List[float]:
+        return [0] * (len(self.limites) + 3)
+
+    def observar(self, valor: float, *etiquetas: str) -> None:
+        cubo = bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = self._vacia()
+            serie[cubo] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    @contextmanager
+    def medir(self, *etiquetas: str) -> Iterator[None]:
+        """Observa los segundos que tarda el bloque"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, *etiquetas)
+
+    def cuenta(self, *etiquetas: str) -> int:
+        serie = self._series.get(etiquetas)
+        return serie[-1] if serie else 0
+
+    def muestras(self) -> Iterable[str]:
+        with self._lock:
+            series = [(etiquetas, list(serie)) for etiquetas, serie in self._series.items()]
+        for etiquetas, serie in series:
+            acumulado = 0
+            for limite, veces in zip(self.limites + (float("inf"),), serie):
+                acumulado += veces
+                le = f'le="{_numero(limite)}"'
+                yield f"{self.nombre}_bucket{self._selector(etiquetas, le)} {acumulado}"
+            yield f"{self.nombre}_sum{self._selector(etiquetas)} {_numero(float(serie[-2]))}"
+            yield f"{self.nombre}_count{self._selector(etiquetas)} {serie[-1]}"
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas: Dict[str, Metrica] = {}
+
+    def registrar(self, metrica: Metrica) -> Metrica:
+        if metrica.nombre in self._metricas:
+            raise ValueError(f"Métrica duplicada: {metrica.nombre}")
+        self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def exponer(self) -> str:
+        lineas = []
+        for metrica in self._metricas.values():
+            lineas += metrica.exponer()
+        return "\n".join(lineas) + "\n"
+
+
+registro = RegistroMetricas()
+
+LATENCIAS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LATENCIAS_SQL = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+
+HTTP_PETICIONES = registro.registrar(Contador(
+    "piar_http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status")))
+HTTP_DURACION = registro.registrar(Histograma(
+    "piar_http_request_duration_seconds", "Duración de las peticiones HTTP", ("method", "route", "status"), LATENCIAS_HTTP))
+HTTP_EN_CURSO = registro.registrar(Indicador(
+    "piar_http_requests_in_flight", "Peticiones HTTP en curso"))
+HTTP_CONSULTAS = registro.registrar(Histograma(
+    "piar_http_request_db_queries", "Consultas SQL por petición", ("method", "route"), (1, 2, 3, 5, 8, 13, 21, 34, 55)))
+SQL_DURACION = registro.registrar(Histograma(
+    "piar_db_query_duration_seconds", "Duración de las consultas SQL", (), LATENCIAS_SQL))
+OPENCLAW_IDA_Y_VUELTA = registro.registrar(Histograma(
+    "piar_openclaw_roundtrip_seconds", "Tiempo de las operaciones con OpenClaw por WebSocket", ("operation", "outcome"),
+    (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)))
+EMAILS_PENDIENTES = registro.registrar(Indicador(
+    "piar_email_queue_depth", "Emails pendientes de enviar en la bandeja de salida"))
+EMAILS_ENVIADOS = registro.registrar(Contador(
+    "piar_emails_total", "Intentos de envío de emails por resultado (sent, retry, dead)", ("outcome",)))
@@ -0,0 +1,97 @@
+"""Paginación por cursor (keyset) de los listados.
+
+En lugar de saltar filas con OFFSET, cada página pide las que van después de
+la última entregada según el orden (clave, id) del listado. Con un índice
+sobre (filtro, clave) SQLite salta directamente a ese punto, así que la
+página 500 cuesta lo mismo que la primera, y las filas que se crean o borran
+entre página y página no provocan repetidos ni huecos.
+
+El cursor es opaco para el cliente: base64 de [clave, id] de la última fila,
+con la clave tal y como está guardada en la BD (las fechas de SQLite son
+texto y pueden venir con o sin microsegundos; compararlas ya convertidas a
+datetime descuadraría el orden). El siguiente cursor viaja en la cabecera
+X-Next-Cursor y en un Link rel="next", y el cuerpo sigue siendo la lista.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import Select, String, literal, tuple_, type_coerce
+
+LIMITE_MAXIMO = 200
+LIMITE_POR_DEFECTO = 100  # listados que antes devolvían todas las filas
+
+
+def codificar_cursor(clave: Optional[str], id: int) -> str:
+    datos = json.dumps([clave, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(datos).rstrip(b"=").decode()
+
+
+def decodificar_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    """(clave, id) de un cursor; 400 si no lo generó esta API"""
+    try:
+        datos = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        clave, id = json.loads(datos)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        clave = id = None
+    if not isinstance(id, int) or isinstance(id, bool) or not (clave is None or isinstance(clave, str)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación no válido"
+        )
+    return clave, id
+
+
+@dataclass(frozen=True)
+class Orden:
+    """Orden de un listado: por clave y, a igualdad, por id (o solo por id).
+
+    La clave no puede ser NULL: las comparaciones de SQL descartan esas filas.
+    """
+    id: Any
+    clave: Any = None
+    descendente: bool = False
+
+    def consulta(self, stmt: Select, cursor: Optional[str], limite: int) -> Select:
+        """Añade a la consulta el orden, el punto de partida y el límite.
+
+        Pide una fila de más para saber si hay otra página; la clave en
+        crudo sale como última columna para construir el siguiente cursor.
+        """
+        columnas = (self.id,) if self.clave is None else (self.clave, self.id)
+        if self.clave is not None:
+            stmt = stmt.add_columns(type_coerce(self.clave, String).label("clave_cursor"))
+
+        if cursor:
+            clave, ultimo_id = decodificar_cursor(cursor)
+            if self.clave is None:
+                posicion, referencia = self.id, ultimo_id
+            else:
+                posicion = tuple_(*columnas)
+                referencia = tuple_(literal(clave, String), literal(ultimo_id))
+            stmt = stmt.filter(posicion < referencia if self.descendente else posicion > referencia)
+
+        return stmt.order_by(
+            *(columna.desc() if self.descendente else columna.asc() for columna in columnas)
+        ).limit(limite + 1)
+
+    def pagina(self, filas: Sequence[Any], limite: int) -> Tuple[List[Any], Optional[str]]:
+        """Objetos de la página y cursor de la siguiente (None si es la última)"""
+        objetos = [fila[0] for fila in filas[:limite]]
+        if len(filas) <= limite:
+            return objetos, None
+        ultima = filas[limite - 1]
+        clave = ultima[-1] if self.clave is not None else None
+        return objetos, codificar_cursor(clave, ultima[0].id)
+
+
+def publicar_cursor(request: Request, response: Response, cursor: Optional[str]) -> None:
+    """Cabeceras X-Next-Cursor y Link rel="next" si hay más páginas"""
+    if cursor is None:
+        return
+    siguiente = request.url.remove_query_params("skip").include_query_params(cursor=cursor)
+    response.headers["X-Next-Cursor"] = cursor
+    response.headers["Link"] = f'<{siguiente}>; rel="next"'
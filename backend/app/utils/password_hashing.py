@@ -0,0 +1,87 @@
+"""Pool acotado para el hashing de contraseñas (bcrypt) fuera del event loop"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import settings
+from app.utils.security import AuthUtils
+
+
+class PasswordPoolSaturado(Exception):
+    """El pool de hashing no admite más trabajo: el cliente debe reintentar"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Pool de hashing de contraseñas saturado")
+        self.retry_after = retry_after
+
+
+class PasswordHashingPool:
+    """Ejecuta bcrypt en un pool de hilos con control de admisión.
+
+    Cada hash/verificación tarda del orden de 200 ms de CPU; hecho dentro de
+    una ruta async bloquea el event loop y congela el resto de peticiones.
+    bcrypt libera el GIL mientras calcula, así que un pool de hilos basta para
+    sacarlo del loop y ejecutar varios en paralelo.
+
+    - workers: operaciones bcrypt simultáneas (limita la CPU dedicada a ello)
+    - max_pendientes: operaciones admitidas a la vez (en curso + en espera);
+      a partir de ahí se rechaza con PasswordPoolSaturado en lugar de acumular
+      una cola que solo añade latencia.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pendientes: Optional[int] = None,
+        retry_after: Optional[int] = None
+    ):
+        self.workers = workers if workers is not None else settings.password_hash_workers
+        self.max_pendientes = (
+            max_pendientes if max_pendientes is not None else settings.password_hash_max_pending
+        )
+        self.retry_after = (
+            retry_after if retry_after is not None else settings.password_hash_retry_after_seconds
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pendientes = 0
+        self.rechazadas = 0
+
+    @property
+    def pendientes(self) -> int:
+        return self._pendientes
+
+    async def hash(self, password: str) -> str:
+        """Hash bcrypt de una contraseña"""
+        return await self._ejecutar(AuthUtils.hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica una contraseña contra su hash"""
+        return await self._ejecutar(AuthUtils.verify_password, plain_password, hashed_password)
+
+    def close(self):
+        """Detiene los hilos del pool (se recrea en el siguiente uso)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _ejecutar(self, funcion: Callable[..., Any], *args) -> Any:
+        # El contador solo se toca desde el event loop, no necesita lock
+        if self._pendientes >= self.max_pendientes:
+            self.rechazadas += 1
+            raise PasswordPoolSaturado(self.retry_after)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="bcrypt"
+            )
+
+        self._pendientes += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, funcion, *args)
+        finally:
+            self._pendientes -= 1
+
+
+# Instancia global usada por las rutas de autenticación
+password_pool = PasswordHashingPool()
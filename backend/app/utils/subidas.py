@@ -0,0 +1,124 @@
+"""Recepción de archivos subidos: por trozos, con límite de tamaño y hash al vuelo.
+
+El límite se aplica dos veces:
+
+- Al cuerpo entero, antes de que FastAPI lo procese (RutaSubida y
+  @limite_subida): 413 sin leer nada si Content-Length ya lo supera, y si no
+  lo trae (chunked), en cuanto lo recibido pasa del límite. Así una subida
+  demasiado grande no llega a recibirse entera ni a escribirse en disco.
+- A cada archivo, en recibir_subida: el multipart de Starlette ya lo ha
+  guardado en su temporal (SpooledTemporaryFile) y desde ahí se copia a un
+  temporal del almacén (mismo disco) a la vez que se calcula su SHA-256, así
+  que en memoria solo hay un trozo por subida. Al guardarlo, BlobService lo
+  mueve a su sitio con un rename atómico.
+"""
+import hashlib
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, Request, UploadFile, status
+from fastapi.routing import APIRoute
+from starlette.types import Message, Receive
+
+from app.config import settings
+from app.utils.blob_store import blob_store
+
+
+# Lo que ocupa el multipart además de los archivos (separadores, cabeceras
+# de cada parte y campos de texto del formulario)
+MARGEN_MULTIPART = 64 * 1024
+
+
+def _demasiado_grande(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"El archivo supera el tamaño máximo permitido ({max_bytes / (1024 * 1024):g} MB)"
+    )
+
+
+def limite_subida(max_archivos: Callable[[], int]):
+    """Marca un endpoint con el máximo de bytes de sus archivos (se lee en cada petición).
+
+    Solo tiene efecto en routers con route_class=RutaSubida.
+    """
+    def decorador(endpoint):
+        endpoint.max_archivos = max_archivos
+        return endpoint
+    return decorador
+
+
+def _recibir_con_limite(receive: Receive, max_cuerpo: int, max_archivos: int) -> Receive:
+    recibidos = 0
+
+    async def recibir() -> Message:
+        nonlocal recibidos
+        mensaje = await receive()
+        if mensaje["type"] == "http.request":
+            recibidos += len(mensaje.get("body", b""))
+            if recibidos > max_cuerpo:
+                raise _demasiado_grande(max_archivos)
+        return mensaje
+
+    return recibir
+
+
+class RutaSubida(APIRoute):
+    """Ruta que corta con 413 los cuerpos que superan el límite de @limite_subida
+    antes de que FastAPI los lea"""
+
+    def get_route_handler(self):
+        manejador = super().get_route_handler()
+        max_archivos = getattr(self.endpoint, "max_archivos", None)
+        if max_archivos is None:
+            return manejador
+
+        async def con_limite(request: Request):
+            limite = max_archivos()
+            max_cuerpo = limite + MARGEN_MULTIPART
+            longitud = request.headers.get("content-length", "")
+            if longitud.isdigit() and int(longitud) > max_cuerpo:
+                raise _demasiado_grande(limite)
+            return await manejador(Request(request.scope, _recibir_con_limite(request.receive, max_cuerpo, limite)))
+
+        return con_limite
+
+
+@dataclass
+class Subida:
+    ruta: Path  # temporal con el contenido; se borra al salir de recibir_subida
+    sha256: str
+    tamano: int
+    nombre: Optional[str]
+    mime: Optional[str]
+
+
+@asynccontextmanager
+async def recibir_subida(archivo: UploadFile, max_bytes: int) -> AsyncIterator[Subida]:
+    """Copia la subida (ya recibida) a un temporal por trozos; 413 si pasa de max_bytes"""
+    ruta = blob_store.ruta_temporal()
+    sha256 = hashlib.sha256()
+    tamano = 0
+    try:
+        async with aiofiles.open(ruta, "wb") as destino:
+            while trozo := await archivo.read(settings.blob_stream_chunk_size):
+                tamano += len(trozo)
+                if tamano > max_bytes:
+                    raise _demasiado_grande(max_bytes)
+                sha256.update(trozo)
+                await destino.write(trozo)
+
+        yield Subida(
+            ruta=ruta,
+            sha256=sha256.hexdigest(),
+            tamano=tamano,
+            nombre=archivo.filename,
+            mime=archivo.content_type
+        )
+    finally:
+        # Si se guardó en el almacén ya no existe (se movió)
+        with suppress(FileNotFoundError):
+            await aiofiles.os.remove(ruta)
@@ -0,0 +1,330 @@
+-- Esquema inicial: tablas existentes antes del runner de migraciones.
+-- Usa IF NOT EXISTS para que sea inocuo sobre BDs creadas con create_all.
+
+CREATE TABLE IF NOT EXISTS system_config (
+    id INTEGER NOT NULL,
+    smtp_server VARCHAR(255),
+    smtp_port INTEGER,
+    smtp_username VARCHAR(255),
+    smtp_password VARCHAR(255),
+    smtp_from_email VARCHAR(255),
+    smtp_use_tls BOOLEAN,
+    smtp_use_ssl BOOLEAN,
+    frontend_url VARCHAR(255),
+    PRIMARY KEY (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_system_config_id ON system_config (id);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    nombre_completo VARCHAR(255) NOT NULL,
+    "contraseña_hash" VARCHAR(255),
+    google_id VARCHAR(255),
+    google_email VARCHAR(255),
+    google_photo_url TEXT,
+    email_verificado BOOLEAN,
+    activo BOOLEAN,
+    es_superadmin BOOLEAN,
+    dos_fa_habilitado BOOLEAN,
+    dos_fa_secret VARCHAR(255),
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    ultimo_login DATETIME,
+    fecha_actualizacion DATETIME,
+    notifications_enabled BOOLEAN,
+    email_digest VARCHAR(20),
+    dark_mode BOOLEAN,
+    language VARCHAR(5),
+    PRIMARY KEY (id),
+    UNIQUE (google_id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_usuarios_email ON usuarios (email);
+CREATE INDEX IF NOT EXISTS ix_usuarios_id ON usuarios (id);
+
+CREATE TABLE IF NOT EXISTS clubes (
+    id INTEGER NOT NULL,
+    slug VARCHAR(100) NOT NULL,
+    nombre VARCHAR(255) NOT NULL,
+    descripcion TEXT,
+    logo_url TEXT,
+    color_primario VARCHAR(7),
+    color_secundario VARCHAR(7),
+    color_acento VARCHAR(7),
+    favicon_url TEXT,
+    pais VARCHAR(100),
+    region VARCHAR(100),
+    latitud FLOAT,
+    longitud FLOAT,
+    email_contacto VARCHAR(255),
+    telefono VARCHAR(20),
+    sitio_web VARCHAR(255),
+    redes_sociales JSON,
+    zona_horaria VARCHAR(50),
+    idioma_por_defecto VARCHAR(10),
+    ayuda_documentacion_md TEXT,
+    estado VARCHAR(20),
+    creador_id INTEGER NOT NULL,
+    settings JSON,
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_actualizacion DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(creador_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_clubes_id ON clubes (id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_clubes_slug ON clubes (slug);
+
+CREATE TABLE IF NOT EXISTS documentacion_reglamentaria (
+    id INTEGER NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    rc_numero VARCHAR(100),
+    rc_fecha_emision DATETIME,
+    rc_fecha_vencimiento DATETIME,
+    rc_archivo BLOB,
+    rc_archivo_nombre VARCHAR(255),
+    rc_archivo_mime VARCHAR(100),
+    carnet_numero VARCHAR(100),
+    carnet_fecha_emision DATETIME,
+    carnet_fecha_vencimiento DATETIME,
+    carnet_archivo BLOB,
+    carnet_archivo_nombre VARCHAR(255),
+    carnet_archivo_mime VARCHAR(100),
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_actualizacion DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(usuario_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_documentacion_reglamentaria_id ON documentacion_reglamentaria (id);
+CREATE INDEX IF NOT EXISTS ix_documentacion_reglamentaria_usuario_id ON documentacion_reglamentaria (usuario_id);
+
+CREATE TABLE IF NOT EXISTS token_google (
+    id INTEGER NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    access_token TEXT NOT NULL,
+    refresh_token TEXT,
+    expires_at DATETIME NOT NULL,
+    scope VARCHAR(255),
+    token_type VARCHAR(20),
+    fecha_actualizacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    PRIMARY KEY (id),
+    UNIQUE (usuario_id),
+    FOREIGN KEY(usuario_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_token_google_id ON token_google (id);
+
+CREATE TABLE IF NOT EXISTS contrasena_instalaciones (
+    id INTEGER NOT NULL,
+    club_id INTEGER NOT NULL,
+    codigo VARCHAR(100) NOT NULL,
+    descripcion VARCHAR(255),
+    creado_por_id INTEGER NOT NULL,
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    activa BOOLEAN,
+    PRIMARY KEY (id),
+    FOREIGN KEY(club_id) REFERENCES clubes (id),
+    FOREIGN KEY(creado_por_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_contrasena_instalaciones_club_id ON contrasena_instalaciones (club_id);
+CREATE INDEX IF NOT EXISTS ix_contrasena_instalaciones_id ON contrasena_instalaciones (id);
+
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER NOT NULL,
+    club_id INTEGER NOT NULL,
+    nombre VARCHAR(255) NOT NULL,
+    descripcion TEXT,
+    tipo VARCHAR(50),
+    fecha_inicio DATETIME NOT NULL,
+    fecha_fin DATETIME,
+    hora_inicio VARCHAR(10),
+    hora_fin VARCHAR(10),
+    ubicacion VARCHAR(255),
+    aforo_maximo INTEGER,
+    requisitos JSON,
+    contacto_responsable_id INTEGER,
+    estado VARCHAR(20),
+    imagen_url TEXT,
+    permite_comentarios BOOLEAN,
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_actualizacion DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(club_id) REFERENCES clubes (id),
+    FOREIGN KEY(contacto_responsable_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_eventos_club_id ON eventos (club_id);
+CREATE INDEX IF NOT EXISTS ix_eventos_id ON eventos (id);
+
+CREATE TABLE IF NOT EXISTS invitaciones (
+    id INTEGER NOT NULL,
+    club_id INTEGER NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    usuario_id INTEGER,
+    rol VARCHAR(50) NOT NULL,
+    nombre_completo VARCHAR(255),
+    token VARCHAR(255) NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    creado_por_id INTEGER NOT NULL,
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_vencimiento DATETIME NOT NULL,
+    fecha_aceptacion DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(club_id) REFERENCES clubes (id),
+    FOREIGN KEY(usuario_id) REFERENCES usuarios (id),
+    FOREIGN KEY(creado_por_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_invitaciones_club_id ON invitaciones (club_id);
+CREATE INDEX IF NOT EXISTS ix_invitaciones_email ON invitaciones (email);
+CREATE INDEX IF NOT EXISTS ix_invitaciones_id ON invitaciones (id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_invitaciones_token ON invitaciones (token);
+
+CREATE TABLE IF NOT EXISTS miembro_club (
+    id INTEGER NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    club_id INTEGER NOT NULL,
+    rol VARCHAR(50) NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    fecha_inscripcion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_aprobacion DATETIME,
+    aprobado_por_id INTEGER,
+    fecha_ultimo_acceso DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(usuario_id) REFERENCES usuarios (id),
+    FOREIGN KEY(club_id) REFERENCES clubes (id),
+    FOREIGN KEY(aprobado_por_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_miembro_club_club_id ON miembro_club (club_id);
+CREATE INDEX IF NOT EXISTS ix_miembro_club_id ON miembro_club (id);
+CREATE INDEX IF NOT EXISTS ix_miembro_club_usuario_id ON miembro_club (usuario_id);
+
+CREATE TABLE IF NOT EXISTS noticias (
+    id INTEGER NOT NULL,
+    club_id INTEGER NOT NULL,
+    titulo VARCHAR(255) NOT NULL,
+    contenido TEXT NOT NULL,
+    categoria VARCHAR(50),
+    autor_id INTEGER NOT NULL,
+    estado VARCHAR(20),
+    visible_para VARCHAR(20),
+    permite_comentarios BOOLEAN,
+    imagen_url TEXT,
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_publicacion DATETIME,
+    fecha_actualizacion DATETIME,
+    fecha_archivado DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(club_id) REFERENCES clubes (id),
+    FOREIGN KEY(autor_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_noticias_club_id ON noticias (club_id);
+CREATE INDEX IF NOT EXISTS ix_noticias_id ON noticias (id);
+
+CREATE TABLE IF NOT EXISTS productos_afiliacion (
+    id INTEGER NOT NULL,
+    club_id INTEGER NOT NULL,
+    nombre VARCHAR(255) NOT NULL,
+    descripcion TEXT,
+    categoria VARCHAR(100),
+    url_afiliacion TEXT NOT NULL,
+    codigo_afiliacion VARCHAR(100),
+    proveedor VARCHAR(100),
+    imagen_url TEXT,
+    precio_referencia VARCHAR(50),
+    activo BOOLEAN,
+    orden INTEGER,
+    destacado BOOLEAN,
+    clicks INTEGER,
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_actualizacion DATETIME,
+    creado_por_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(club_id) REFERENCES clubes (id),
+    FOREIGN KEY(creado_por_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_productos_afiliacion_club_id ON productos_afiliacion (club_id);
+CREATE INDEX IF NOT EXISTS ix_productos_afiliacion_id ON productos_afiliacion (id);
+
+CREATE TABLE IF NOT EXISTS socios (
+    id INTEGER NOT NULL,
+    club_id INTEGER NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    nombre VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    telefono VARCHAR(20),
+    fecha_nacimiento DATETIME,
+    direccion TEXT,
+    especialidades JSON,
+    foto_carnet_blob BLOB,
+    foto_carnet_mime VARCHAR(100),
+    foto_carnet_fecha_subida DATETIME,
+    estado VARCHAR(20),
+    fecha_alta DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_actualizacion DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(club_id) REFERENCES clubes (id),
+    FOREIGN KEY(usuario_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_socios_club_id ON socios (club_id);
+CREATE INDEX IF NOT EXISTS ix_socios_id ON socios (id);
+CREATE INDEX IF NOT EXISTS ix_socios_usuario_id ON socios (usuario_id);
+
+CREATE TABLE IF NOT EXISTS votaciones (
+    id INTEGER NOT NULL,
+    club_id INTEGER NOT NULL,
+    titulo VARCHAR(255) NOT NULL,
+    descripcion TEXT,
+    tipo VARCHAR(20),
+    creador_id INTEGER NOT NULL,
+    fecha_inicio DATETIME NOT NULL,
+    fecha_fin DATETIME NOT NULL,
+    estado VARCHAR(20),
+    visible BOOLEAN,
+    anonima BOOLEAN,
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_cierre DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(club_id) REFERENCES clubes (id),
+    FOREIGN KEY(creador_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_votaciones_club_id ON votaciones (club_id);
+CREATE INDEX IF NOT EXISTS ix_votaciones_id ON votaciones (id);
+
+CREATE TABLE IF NOT EXISTS asistencias_eventos (
+    id INTEGER NOT NULL,
+    evento_id INTEGER NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    fecha_registro DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_actualizacion DATETIME,
+    PRIMARY KEY (id),
+    CONSTRAINT uq_asistencia_evento_usuario UNIQUE (evento_id, usuario_id),
+    FOREIGN KEY(evento_id) REFERENCES eventos (id),
+    FOREIGN KEY(usuario_id) REFERENCES usuarios (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_asistencias_eventos_id ON asistencias_eventos (id);
+
+CREATE TABLE IF NOT EXISTS comentarios (
+    id INTEGER NOT NULL,
+    contenido TEXT NOT NULL,
+    fecha_creacion DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    fecha_actualizacion DATETIME,
+    autor_id INTEGER NOT NULL,
+    noticia_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(autor_id) REFERENCES usuarios (id),
+    FOREIGN KEY(noticia_id) REFERENCES noticias (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_comentarios_id ON comentarios (id);
@@ -0,0 +1,70 @@
+"""
+Columnas añadidas a mano antes de existir el runner de migraciones.
+
+Consolida los ALTER TABLE que hacían init_db(), los scripts
+patch_clubes_schema.py / patch_socios_schema.py, las comprobaciones de
+frontend_url por petición y 2026_02_14_add_usuario_preferences.sql.
+Solo añade las columnas que falten, así que es inocua sobre BDs nuevas.
+"""
+from sqlalchemy import inspect, text
+
+COLUMNAS = {
+    "clubes": [
+        ("logo_url", "TEXT"),
+        ("color_primario", "VARCHAR(7) DEFAULT '#FF6B35'"),
+        ("color_secundario", "VARCHAR(7) DEFAULT '#004E89'"),
+        ("color_acento", "VARCHAR(7) DEFAULT '#F77F00'"),
+        ("favicon_url", "TEXT"),
+        ("pais", "VARCHAR(100)"),
+        ("region", "VARCHAR(100)"),
+        ("latitud", "FLOAT"),
+        ("longitud", "FLOAT"),
+        ("email_contacto", "VARCHAR(255)"),
+        ("telefono", "VARCHAR(20)"),
+        ("sitio_web", "VARCHAR(255)"),
+        ("redes_sociales", "TEXT"),
+        ("zona_horaria", "VARCHAR(50) DEFAULT 'Europe/Madrid'"),
+        ("idioma_por_defecto", "VARCHAR(10) DEFAULT 'es'"),
+        ("estado", "VARCHAR(20) DEFAULT 'inactivo'"),
+        ("settings", "TEXT"),
+    ],
+    "socios": [
+        ("club_id", "INTEGER"),
+        ("usuario_id", "INTEGER"),
+        ("nombre", "VARCHAR(255)"),
+        ("email", "VARCHAR(255)"),
+        ("telefono", "VARCHAR(20)"),
+        ("fecha_nacimiento", "DATETIME"),
+        ("direccion", "TEXT"),
+        ("especialidades", "TEXT"),
+        ("foto_carnet_blob", "BLOB"),
+        ("foto_carnet_mime", "VARCHAR(100)"),
+        ("foto_carnet_fecha_subida", "DATETIME"),
+        ("estado", "VARCHAR(20) DEFAULT 'activo'"),
+        ("fecha_alta", "DATETIME"),
+        ("fecha_creacion", "DATETIME"),
+        ("fecha_actualizacion", "DATETIME"),
+    ],
+    "system_config": [
+        ("frontend_url", "VARCHAR(255)"),
+    ],
+    "usuarios": [
+        ("notifications_enabled", "BOOLEAN DEFAULT 1"),
+        ("email_digest", "VARCHAR(20) DEFAULT 'weekly'"),
+        ("dark_mode", "BOOLEAN DEFAULT 0"),
+        ("language", "VARCHAR(5) DEFAULT 'es'"),
+    ],
+}
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    tablas = set(inspector.get_table_names())
+
+    for tabla, columnas in COLUMNAS.items():
+        if tabla not in tablas:
+            continue
+        existentes = {columna["name"] for columna in inspector.get_columns(tabla)}
+        for nombre, tipo in columnas:
+            if nombre not in existentes:
+                connection.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {nombre} {tipo}"))
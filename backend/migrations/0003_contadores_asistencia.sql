@@ -0,0 +1,22 @@
+-- Contadores de asistencia desnormalizados en eventos.
+-- Los mantiene registrar_asistencia en la misma transacción que la asistencia,
+-- así listar eventos no necesita un COUNT por evento.
+
+ALTER TABLE eventos ADD COLUMN inscritos_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE eventos ADD COLUMN lista_espera_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE eventos ADD COLUMN cancelados_count INTEGER NOT NULL DEFAULT 0;
+
+-- Rellenar a partir de las asistencias existentes
+UPDATE eventos SET
+    inscritos_count = (
+        SELECT COUNT(*) FROM asistencias_eventos a
+        WHERE a.evento_id = eventos.id AND a.estado = 'inscrito'
+    ),
+    lista_espera_count = (
+        SELECT COUNT(*) FROM asistencias_eventos a
+        WHERE a.evento_id = eventos.id AND a.estado = 'lista_espera'
+    ),
+    cancelados_count = (
+        SELECT COUNT(*) FROM asistencias_eventos a
+        WHERE a.evento_id = eventos.id AND a.estado = 'cancelado'
+    );
@@ -0,0 +1,8 @@
+-- Orden de la lista de espera: las plazas liberadas se asignan por orden de
+-- llegada (fecha_lista_espera) a quien esté en 'lista_espera'.
+
+ALTER TABLE asistencias_eventos ADD COLUMN fecha_lista_espera DATETIME;
+
+UPDATE asistencias_eventos
+SET fecha_lista_espera = COALESCE(fecha_actualizacion, fecha_registro)
+WHERE estado = 'lista_espera';
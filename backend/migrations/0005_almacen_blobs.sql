@@ -0,0 +1,32 @@
+-- Almacén de archivos direccionado por contenido (SHA-256).
+-- Las fotos de carnet y los PDFs de documentación pasan a guardarse fuera de
+-- la BD; en las filas solo quedan su hash, tamaño y tipo MIME. blobs lleva la
+-- cuenta de referencias de cada archivo para deduplicar y recolectar.
+
+CREATE TABLE blobs (
+    sha256 VARCHAR(64) NOT NULL PRIMARY KEY,
+    tamano INTEGER NOT NULL,
+    referencias INTEGER NOT NULL DEFAULT 0,
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE socios ADD COLUMN foto_carnet_sha256 VARCHAR(64);
+ALTER TABLE socios ADD COLUMN foto_carnet_tamano INTEGER;
+
+ALTER TABLE documentacion_reglamentaria ADD COLUMN rc_archivo_sha256 VARCHAR(64);
+ALTER TABLE documentacion_reglamentaria ADD COLUMN rc_archivo_tamano INTEGER;
+ALTER TABLE documentacion_reglamentaria ADD COLUMN carnet_archivo_sha256 VARCHAR(64);
+ALTER TABLE documentacion_reglamentaria ADD COLUMN carnet_archivo_tamano INTEGER;
+
+-- Los archivos existentes siguen dentro de la BD hasta que se muevan con
+-- "python -m app.services.blob_service migrar"; mientras tanto se sirven
+-- desde la columna antigua, que necesita su tamaño.
+UPDATE socios SET foto_carnet_tamano = length(foto_carnet_blob)
+WHERE foto_carnet_blob IS NOT NULL;
+
+UPDATE documentacion_reglamentaria SET rc_archivo_tamano = length(rc_archivo)
+WHERE rc_archivo IS NOT NULL;
+
+UPDATE documentacion_reglamentaria SET carnet_archivo_tamano = length(carnet_archivo)
+WHERE carnet_archivo IS NOT NULL;
@@ -0,0 +1,13 @@
+-- Miniaturas de las fotos de carnet (64/256/512 px, WebP o JPEG).
+-- Se generan una vez por contenido y se guardan en el almacén como cualquier
+-- otro archivo; esta tabla relaciona cada archivo de origen con sus variantes.
+
+CREATE TABLE blob_variantes (
+    sha256_origen VARCHAR(64) NOT NULL,
+    variante VARCHAR(20) NOT NULL,
+    sha256 VARCHAR(64) NOT NULL,
+    tamano INTEGER NOT NULL,
+    mime VARCHAR(100) NOT NULL,
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sha256_origen, variante)
+);
@@ -0,0 +1,58 @@
+-- Búsqueda de texto completo (FTS5) en noticias y comentarios.
+-- Los triggers mantienen los índices al día en la misma transacción que cada
+-- escritura. unicode61 con remove_diacritics 2 hace que "cancion" encuentre
+-- "canción" (y al revés) y no distingue mayúsculas.
+--
+-- club_id va indexado como una palabra más: la búsqueda siempre es dentro de
+-- un club y filtrar en el propio MATCH evita puntuar (BM25) las coincidencias
+-- de los demás clubes. Las tablas guardan su copia del texto para los
+-- fragmentos y para borrar por rowid sin necesitar los valores antiguos.
+
+CREATE VIRTUAL TABLE noticias_fts USING fts5(
+    titulo,
+    contenido,
+    club_id,
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE comentarios_fts USING fts5(
+    contenido,
+    club_id,
+    noticia_id UNINDEXED,
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER noticias_fts_insertar AFTER INSERT ON noticias BEGIN
+    INSERT INTO noticias_fts (rowid, titulo, contenido, club_id)
+    VALUES (new.id, new.titulo, new.contenido, new.club_id);
+END;
+
+CREATE TRIGGER noticias_fts_borrar AFTER DELETE ON noticias BEGIN
+    DELETE FROM noticias_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER noticias_fts_actualizar AFTER UPDATE OF titulo, contenido, club_id ON noticias BEGIN
+    UPDATE noticias_fts SET titulo = new.titulo, contenido = new.contenido, club_id = new.club_id
+    WHERE rowid = new.id;
+END;
+
+CREATE TRIGGER comentarios_fts_insertar AFTER INSERT ON comentarios BEGIN
+    INSERT INTO comentarios_fts (rowid, contenido, club_id, noticia_id)
+    VALUES (new.id, new.contenido, (SELECT club_id FROM noticias WHERE id = new.noticia_id), new.noticia_id);
+END;
+
+CREATE TRIGGER comentarios_fts_borrar AFTER DELETE ON comentarios BEGIN
+    DELETE FROM comentarios_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER comentarios_fts_actualizar AFTER UPDATE OF contenido ON comentarios BEGIN
+    UPDATE comentarios_fts SET contenido = new.contenido WHERE rowid = new.id;
+END;
+
+-- Indexar lo que ya existe
+INSERT INTO noticias_fts (rowid, titulo, contenido, club_id)
+SELECT id, titulo, contenido, club_id FROM noticias;
+
+INSERT INTO comentarios_fts (rowid, contenido, club_id, noticia_id)
+SELECT c.id, c.contenido, n.club_id, c.noticia_id
+FROM comentarios c JOIN noticias n ON n.id = c.noticia_id;
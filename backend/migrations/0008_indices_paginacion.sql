@@ -0,0 +1,11 @@
+-- Índices para la paginación por cursor de los listados (app/utils/paginacion.py).
+-- Cada uno cubre el filtro del listado seguido de su clave de orden; el id, que
+-- desempata, va implícito al final de todo índice de SQLite (es el rowid).
+-- Socios y miembros se ordenan solo por id: les basta el índice por club_id.
+
+CREATE INDEX ix_noticias_club_fecha_creacion ON noticias (club_id, fecha_creacion);
+CREATE INDEX ix_eventos_club_fecha_inicio ON eventos (club_id, fecha_inicio);
+CREATE INDEX ix_comentarios_noticia_fecha_creacion ON comentarios (noticia_id, fecha_creacion);
+CREATE INDEX ix_miembro_club_club_estado ON miembro_club (club_id, estado);
+CREATE INDEX ix_invitaciones_club_fecha_creacion ON invitaciones (club_id, fecha_creacion);
+CREATE INDEX ix_contrasena_instalaciones_club_fecha_creacion ON contrasena_instalaciones (club_id, fecha_creacion);
@@ -0,0 +1,26 @@
+-- Índices compuestos para los filtros reales de las consultas más frecuentes.
+-- El asesor de índices de los tests (tests/asesor_indices.py) hace fallar
+-- cualquier consulta que recorra entera una de las tablas grandes.
+
+-- Membresías del usuario (caché de permisos, "mis clubes") y comprobaciones
+-- de membresía activa en un club concreto
+CREATE INDEX ix_miembro_club_usuario_club_estado ON miembro_club (usuario_id, club_id, estado);
+
+-- Plazas ocupadas y lista de espera de un evento, en orden de llegada
+CREATE INDEX ix_asistencias_eventos_evento_estado ON asistencias_eventos (evento_id, estado, fecha_lista_espera);
+
+-- Invitaciones de un club por estado
+CREATE INDEX ix_invitaciones_club_estado ON invitaciones (club_id, estado);
+
+-- Contraseña activa de las instalaciones (la más reciente)
+CREATE INDEX ix_contrasena_instalaciones_club_activa_fecha ON contrasena_instalaciones (club_id, activa, fecha_creacion);
+
+-- Candidatos de la recolección de archivos: solo los que no tienen referencias
+CREATE INDEX ix_blobs_sin_referencias ON blobs (fecha_actualizacion) WHERE referencias <= 0;
+
+-- Índices de una columna que ya son prefijo de uno compuesto
+DROP INDEX IF EXISTS ix_miembro_club_usuario_id;
+DROP INDEX IF EXISTS ix_noticias_club_id;
+DROP INDEX IF EXISTS ix_eventos_club_id;
+DROP INDEX IF EXISTS ix_invitaciones_club_id;
+DROP INDEX IF EXISTS ix_contrasena_instalaciones_club_id;
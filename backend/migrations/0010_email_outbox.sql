@@ -0,0 +1,20 @@
+-- Bandeja de salida de emails: las peticiones solo encolan (en la misma
+-- transacción que los datos que los originan) y un proceso en segundo plano
+-- los envía reutilizando conexiones SMTP, con reintentos y los agotados en
+-- estado 'fallido'. proximo_intento marca cuándo puede (re)enviarse, también
+-- el vencimiento de la reserva de los que están 'enviando'.
+
+CREATE TABLE email_outbox (
+    id INTEGER NOT NULL PRIMARY KEY,
+    destinatario VARCHAR(255) NOT NULL,
+    asunto VARCHAR(500) NOT NULL,
+    cuerpo_html TEXT NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento DATETIME NOT NULL,
+    ultimo_error TEXT,
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    fecha_envio DATETIME
+);
+
+CREATE INDEX ix_email_outbox_estado_proximo_intento ON email_outbox (estado, proximo_intento);
@@ -0,0 +1,4 @@
+-- Parte text/plain de los emails (se envían como multipart/alternative con
+-- la versión HTML). Los encolados antes de esta migración solo tienen HTML.
+
+ALTER TABLE email_outbox ADD COLUMN cuerpo_texto TEXT;
@@ -0,0 +1,8 @@
+-- Resúmenes por email (app/services/resumen_service.py): hasta dónde llegó
+-- el último resumen de cada usuario, para que cada ejecución continúe donde
+-- lo dejó la anterior, y el recorrido por páginas de los usuarios de cada
+-- frecuencia sin leer la tabla entera.
+
+ALTER TABLE usuarios ADD COLUMN ultimo_resumen DATETIME;
+
+CREATE INDEX ix_usuarios_email_digest_id ON usuarios (email_digest, id);
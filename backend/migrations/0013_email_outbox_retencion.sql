@@ -0,0 +1,5 @@
+-- Retención de la bandeja de salida: el enviador borra los emails 'enviado'
+-- con más de EMAIL_OUTBOX_RETENTION_DAYS días (con sus cuerpos). El índice
+-- permite encontrarlos por fecha_envio sin recorrer la tabla.
+
+CREATE INDEX ix_email_outbox_estado_fecha_envio ON email_outbox (estado, fecha_envio);
@@ -0,0 +1,174 @@
+"""
+Benchmark de throughput de lectura contra un único worker de uvicorn.
+
+Levanta la API sobre una BD SQLite temporal, siembra un club con noticias y
+eventos, y lanza peticiones concurrentes contra los endpoints de lectura más
+usados. Ejecutarlo en dos revisiones (p.ej. antes y después de migrar las rutas
+a AsyncSession) permite comparar req/s y latencias con la misma carga.
+
+Uso (desde backend/):
+    python scripts/bench_async_db.py
+    python scripts/bench_async_db.py --concurrency 64 --requests 4000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "Password123!"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_ready(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            resp = await client.get("/api/health")
+            if resp.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+async def _seed(client: httpx.AsyncClient, db_path: str, noticias: int, eventos: int):
+    """Crea un superadmin, un club y contenido de ejemplo; devuelve (headers, club_id)"""
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    resp = await client.post(
+        "/api/auth/registro",
+        json={"nombre_completo": "Bench User", "email": email, "password": PASSWORD},
+    )
+    resp.raise_for_status()
+
+    # Crear clubes requiere superadmin: se eleva directamente en la BD temporal
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE usuarios SET es_superadmin = 1 WHERE email = ?", (email,))
+
+    resp = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    resp.raise_for_status()
+    headers = {"Authorization": f"Bearer {resp.json()['tokens']['access_token']}"}
+
+    resp = await client.post(
+        "/api/clubes",
+        json={"nombre": "Club Benchmark", "slug": f"bench-{uuid.uuid4().hex[:8]}", "descripcion": "Benchmark"},
+        headers=headers,
+    )
+    resp.raise_for_status()
+    club_id = resp.json()["id"]
+
+    for i in range(noticias):
+        resp = await client.post(
+            f"/api/clubes/{club_id}/noticias",
+            json={"titulo": f"Noticia {i:04d}", "contenido": "Contenido de benchmark " * 5},
+            headers=headers,
+        )
+        resp.raise_for_status()
+
+    inicio = datetime.now() + timedelta(days=7)
+    for i in range(eventos):
+        resp = await client.post(
+            f"/api/clubes/{club_id}/eventos",
+            json={
+                "nombre": f"Evento {i:04d}",
+                "descripcion": "Evento de benchmark",
+                "tipo": "social",
+                "fecha_inicio": (inicio + timedelta(days=i)).isoformat(),
+                "fecha_fin": (inicio + timedelta(days=i, hours=2)).isoformat(),
+                "aforo_maximo": 50,
+            },
+            headers=headers,
+        )
+        resp.raise_for_status()
+
+    return headers, club_id
+
+
+async def _run_load(client: httpx.AsyncClient, paths, headers, total: int, concurrency: int):
+    latencies = []
+    errores = 0
+    contador = iter(range(total))
+
+    async def worker():
+        nonlocal errores
+        for i in contador:
+            path = paths[i % len(paths)]
+            t0 = time.perf_counter()
+            resp = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - t0)
+            if resp.status_code != 200:
+                errores += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t0, latencies, errores
+
+
+def _percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+async def main(args):
+    tmpdir = tempfile.mkdtemp(prefix="piar-bench-")
+    db_path = os.path.join(tmpdir, "bench.db")
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await _wait_until_ready(client)
+            headers, club_id = await _seed(client, db_path, args.noticias, args.eventos)
+
+            paths = [
+                f"/api/clubes/{club_id}/noticias",
+                f"/api/clubes/{club_id}/eventos",
+                f"/api/clubes/{club_id}",
+                "/api/clubes",
+            ]
+            # Calentamiento para no medir el arranque en frío
+            await _run_load(client, paths, headers, min(200, args.requests), args.concurrency)
+            elapsed, latencies, errores = await _run_load(client, paths, headers, args.requests, args.concurrency)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    print(f"Peticiones:   {len(latencies)} ({errores} errores)")
+    print(f"Concurrencia: {args.concurrency}")
+    print(f"Duración:     {elapsed:.2f}s")
+    print(f"Throughput:   {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latencia p50: {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"Latencia p95: {_percentil(latencies, 0.95) * 1000:.1f} ms")
+    print(f"Latencia p99: {_percentil(latencies, 0.99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de throughput de lectura de la API")
+    parser.add_argument("--concurrency", type=int, default=32, help="Peticiones simultáneas")
+    parser.add_argument("--requests", type=int, default=2000, help="Total de peticiones medidas")
+    parser.add_argument("--noticias", type=int, default=50, help="Noticias sembradas en el club")
+    parser.add_argument("--eventos", type=int, default=20, help="Eventos sembrados en el club")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,143 @@
+"""
+Benchmark de memoria al listar los socios de un club con foto de carnet.
+
+Crea una BD SQLite temporal con un club de N socios (cada uno con una foto
+de --foto-kb KB) y mide, en un proceso nuevo por modo, cuánto crece la RSS
+del proceso al cargar el listado y serializarlo como lo hace
+GET /api/socios/?club_id=...:
+
+  - diferido: el mapeo actual (foto_carnet_blob diferida, tiene_foto sale de
+    foto_carnet_tamano)
+  - completo: el mapeo anterior, con la foto cargada en cada fila
+    (undefer(Socio.foto_carnet_blob))
+
+Usa /proc/self/status, así que solo funciona en Linux.
+
+Uso (desde backend/):
+    python scripts/bench_blob_memory.py
+    python scripts/bench_blob_memory.py --socios 5000 --foto-kb 200
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODOS = ("diferido", "completo")
+
+
+def _memoria_mb():
+    """(RSS actual, pico de RSS) del proceso en MB"""
+    valores = {}
+    with open("/proc/self/status") as f:
+        for linea in f:
+            clave, _, resto = linea.partition(":")
+            if clave in ("VmRSS", "VmHWM"):
+                valores[clave] = int(resto.split()[0]) / 1024
+    return valores["VmRSS"], valores["VmHWM"]
+
+
+def _sembrar(db_path: str, socios: int, foto_kb: int) -> int:
+    """Aplica las migraciones y crea el club con sus socios; devuelve el club_id"""
+    from app.database.migrations import aplicar_migraciones
+
+    aplicar_migraciones()
+
+    sufijo = uuid.uuid4().hex[:8]
+    foto = os.urandom(foto_kb * 1024)
+    with sqlite3.connect(db_path) as conn:
+        usuario_id = conn.execute(
+            "INSERT INTO usuarios (email, nombre_completo) VALUES (?, ?)",
+            (f"bench-blob-{sufijo}@example.com", "Bench Blob"),
+        ).lastrowid
+        club_id = conn.execute(
+            "INSERT INTO clubes (nombre, slug, creador_id) VALUES (?, ?, ?)",
+            ("Club Benchmark Fotos", f"bench-blob-{sufijo}", usuario_id),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO socios (club_id, usuario_id, nombre, email, estado, "
+            "foto_carnet_blob, foto_carnet_tamano, foto_carnet_mime) "
+            "VALUES (?, ?, ?, ?, 'activo', ?, ?, 'image/jpeg')",
+            (
+                (club_id, usuario_id, f"Socio {i:05d}", f"socio-{i}@example.com", foto, len(foto))
+                for i in range(socios)
+            ),
+        )
+    return club_id
+
+
+def _medir(modo: str, club_id: int):
+    """Se ejecuta en un proceso nuevo: carga y serializa el listado, imprime JSON"""
+    from sqlalchemy.orm import undefer
+
+    import app.main  # noqa: F401  (registra todos los modelos y sus relaciones)
+    from app.database.db import SessionLocal
+    from app.models.socio import Socio
+    from app.schemas.socio import SocioResponse
+
+    rss_inicial, _ = _memoria_mb()
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        query = db.query(Socio).filter(Socio.club_id == club_id)
+        if modo == "completo":
+            query = query.options(undefer(Socio.foto_carnet_blob))
+        socios = query.all()
+        cuerpo = json.dumps([SocioResponse.model_validate(s).model_dump(mode="json") for s in socios])
+        rss_final, pico = _memoria_mb()
+    elapsed = time.perf_counter() - t0
+
+    print(json.dumps({
+        "socios": len(socios),
+        "bytes_json": len(cuerpo),
+        "segundos": elapsed,
+        "rss_inicial": rss_inicial,
+        "rss_final": rss_final,
+        "pico": pico,
+    }))
+
+
+def main(args):
+    tmpdir = tempfile.mkdtemp(prefix="piar-bench-blob-")
+    db_path = os.path.join(tmpdir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, BACKEND_DIR)
+
+    print(f"Sembrando {args.socios} socios con fotos de {args.foto_kb} KB...")
+    club_id = _sembrar(db_path, args.socios, args.foto_kb)
+
+    resultados = {}
+    for modo in MODOS:
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--medir", modo, "--club-id", str(club_id)],
+            cwd=BACKEND_DIR, env=dict(os.environ), check=True, capture_output=True, text=True,
+        )
+        resultados[modo] = json.loads(salida.stdout.strip().splitlines()[-1])
+
+    print(f"Listado de {args.socios} socios (foto de {args.foto_kb} KB cada uno)")
+    for modo in MODOS:
+        r = resultados[modo]
+        print(f"  {modo:9s} RSS +{r['rss_final'] - r['rss_inicial']:8.1f} MB  "
+              f"(pico {r['pico']:.1f} MB, {r['segundos'] * 1000:.0f} ms, JSON {r['bytes_json'] / 1024:.0f} KB)")
+    ahorro = (resultados["completo"]["rss_final"] - resultados["completo"]["rss_inicial"]) - \
+        (resultados["diferido"]["rss_final"] - resultados["diferido"]["rss_inicial"])
+    print(f"  Ahorro con la columna diferida: {ahorro:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de memoria del listado de socios con foto")
+    parser.add_argument("--socios", type=int, default=2000, help="Socios del club")
+    parser.add_argument("--foto-kb", type=int, default=100, help="Tamaño de cada foto en KB")
+    parser.add_argument("--medir", choices=MODOS, help=argparse.SUPPRESS)
+    parser.add_argument("--club-id", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        sys.path.insert(0, BACKEND_DIR)
+        _medir(args.medir, args.club_id)
+    else:
+        main(args)
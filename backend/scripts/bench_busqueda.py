@@ -0,0 +1,190 @@
+"""
+Benchmark de la búsqueda de noticias (GET /clubes/{club_id}/noticias/buscar).
+
+Crea una BD SQLite temporal con las migraciones aplicadas, siembra N noticias
+sintéticas repartidas entre varios clubes (más comentarios) y mide la
+latencia de BusquedaService.buscar_noticias para consultas con palabras
+raras, frecuentes, varias palabras y prefijos. Como referencia, mide también
+la misma búsqueda con LIKE '%palabra%', que es lo que haría falta sin índice.
+
+Los textos salen de un vocabulario de ~20.000 palabras (unas 100 reales y
+el resto inventadas) con distribución de Zipf, como el texto real: hay
+palabras que aparecen en casi todas las noticias y otras en muy pocas.
+
+Uso (desde backend/):
+    python scripts/bench_busqueda.py
+    python scripts/bench_busqueda.py --noticias 200000 --clubes 20 --repeticiones 100
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RAICES = """
+    entrenamiento partido torneo liga copa final semifinal equipo jugador entrenador
+    piscina natacion carrera maraton ciclismo montaña ruta excursion travesia escalada
+    asamblea junta socio cuota inscripcion reglamento seguro licencia federacion arbitro
+    cena comida fiesta navidad verano invierno primavera otoño aniversario celebracion
+    material camiseta equipacion balon red porteria pista campo pabellon vestuario
+    horario calendario sabado domingo mañana tarde noche semana mes temporada
+    resultado victoria derrota empate clasificacion puntos goles canasta marca record
+    viaje autobus hotel desplazamiento salida llegada punto encuentro plaza estacion
+    curso taller clinic tecnica tactica preparacion fisica nutricion lesion fisioterapia
+    votacion eleccion presidente tesorero secretario vocal presupuesto cuentas memoria
+""".split()
+RELLENO = "el la los las de del en con para por que una un y a al se es como mas muy todos".split()
+
+SILABAS = "ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo la le li lo lu ma me mi mo mu " \
+          "na ne ni no nu pa pe pi po pu ra re ri ro ru sa se si so su ta te ti to tu za ce zo".split()
+
+
+def _vocabulario(rng: random.Random, palabras: int):
+    """Palabras por orden de frecuencia: primero las reales, después las inventadas"""
+    reales = RAICES[:]
+    rng.shuffle(reales)
+    inventadas = set()
+    while len(inventadas) < palabras - len(reales):
+        inventadas.add("".join(rng.choices(SILABAS, k=rng.randint(3, 4))))
+    vocabulario = reales + sorted(inventadas - set(reales))
+    # Zipf: la palabra k-ésima aparece con frecuencia ~ 1/k
+    return vocabulario, [1 / (k + 1) for k in range(len(vocabulario))]
+
+
+def _consultas(vocabulario):
+    return [
+        ("muy frecuente", vocabulario[0]),
+        ("frecuencia media", vocabulario[300]),
+        ("palabra rara", vocabulario[8000]),
+        ("dos palabras", f"{vocabulario[5]} {vocabulario[40]}"),
+        ("sin acentos", "montana otono"),
+        ("prefijo", "celebr"),
+        ("sin resultados", "zzzinexistente"),
+    ]
+
+
+def _texto(rng: random.Random, vocabulario, pesos, palabras: int) -> str:
+    elegidas = rng.choices(vocabulario, cum_weights=pesos, k=palabras)
+    return " ".join(
+        palabra if rng.random() < 0.6 else f"{rng.choice(RELLENO)} {palabra}"
+        for palabra in elegidas
+    )
+
+
+def _sembrar(db_path: str, noticias: int, clubes: int, comentarios: int, vocabulario, pesos, semilla: int):
+    """Aplica las migraciones y crea clubes, noticias y comentarios; devuelve los club_id"""
+    from app.database.migrations import aplicar_migraciones
+
+    aplicar_migraciones()
+
+    rng = random.Random(semilla)
+    acumulados = list(itertools.accumulate(pesos))
+
+    with sqlite3.connect(db_path) as conn:
+        usuario_id = conn.execute(
+            "INSERT INTO usuarios (email, nombre_completo) VALUES ('bench-busqueda@example.com', 'Bench')"
+        ).lastrowid
+        club_ids = [
+            conn.execute(
+                "INSERT INTO clubes (nombre, slug, creador_id) VALUES (?, ?, ?)",
+                (f"Club {i}", f"bench-busqueda-{i}", usuario_id),
+            ).lastrowid
+            for i in range(clubes)
+        ]
+        # Los triggers de la migración 0007 indexan cada fila al insertarla
+        conn.executemany(
+            "INSERT INTO noticias (club_id, titulo, contenido, autor_id, estado) VALUES (?, ?, ?, ?, 'publicada')",
+            (
+                (rng.choice(club_ids), _texto(rng, vocabulario, acumulados, 6).capitalize(), _texto(rng, vocabulario, acumulados, rng.randint(40, 120)), usuario_id)
+                for _ in range(noticias)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO comentarios (contenido, autor_id, noticia_id) VALUES (?, ?, ?)",
+            (
+                (_texto(rng, vocabulario, acumulados, rng.randint(5, 30)), usuario_id, rng.randint(1, noticias))
+                for _ in range(comentarios)
+            ),
+        )
+    return club_ids
+
+
+def _percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+async def _medir(club_ids, consultas, repeticiones: int):
+    from app.database.db import AsyncSessionLocal, async_engine
+    from app.services.busqueda_service import BusquedaService
+
+    resultados = []
+    async with AsyncSessionLocal() as db:
+        for nombre, q in consultas:
+            consulta = BusquedaService.consulta_fts(q)
+            tiempos, encontrados = [], 0
+            for i in range(repeticiones):
+                club_id = club_ids[i % len(club_ids)]
+                t0 = time.perf_counter()
+                filas = await BusquedaService.buscar_noticias(db, club_id, consulta)
+                tiempos.append((time.perf_counter() - t0) * 1000)
+                encontrados += len(filas)
+            resultados.append((nombre, q, tiempos, encontrados / repeticiones))
+    await async_engine.dispose()
+    return resultados
+
+
+def _medir_like(db_path: str, club_id: int, palabra: str) -> float:
+    with sqlite3.connect(db_path) as conn:
+        t0 = time.perf_counter()
+        conn.execute(
+            "SELECT id FROM noticias WHERE club_id = ? AND (titulo LIKE ? OR contenido LIKE ?) LIMIT 20",
+            (club_id, f"%{palabra}%", f"%{palabra}%"),
+        ).fetchall()
+        return (time.perf_counter() - t0) * 1000
+
+
+def main(args):
+    tmpdir = tempfile.mkdtemp(prefix="piar-bench-busqueda-")
+    db_path = os.path.join(tmpdir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, BACKEND_DIR)
+
+    vocabulario, pesos = _vocabulario(random.Random(args.semilla), args.vocabulario)
+    consultas = _consultas(vocabulario)
+
+    print(f"Sembrando {args.noticias} noticias y {args.comentarios} comentarios en {args.clubes} clubes...")
+    t0 = time.perf_counter()
+    club_ids = _sembrar(db_path, args.noticias, args.clubes, args.comentarios, vocabulario, pesos, args.semilla)
+    print(f"  {time.perf_counter() - t0:.1f} s (inserción con los triggers de FTS5 activos), "
+          f"BD de {os.path.getsize(db_path) / 1024 / 1024:.0f} MB")
+
+    resultados = asyncio.run(_medir(club_ids, consultas, args.repeticiones))
+
+    print(f"\nBúsqueda FTS5 (top 20 por BM25, {args.repeticiones} repeticiones por consulta)")
+    for nombre, q, tiempos, media_resultados in resultados:
+        print(f"  {nombre:17s} {q!r:24s} p50 {statistics.median(tiempos):6.2f} ms  "
+              f"p95 {_percentil(tiempos, 0.95):6.2f} ms  ({media_resultados:.0f} resultados)")
+
+    print("\nReferencia sin índice: LIKE '%palabra%' (primeras 20 coincidencias, sin ordenar)")
+    for nombre, q in consultas:
+        if " " not in q:
+            print(f"  {nombre:17s} {q!r:24s} {_medir_like(db_path, club_ids[0], q):8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la búsqueda de noticias con FTS5")
+    parser.add_argument("--noticias", type=int, default=100_000, help="Noticias a sembrar")
+    parser.add_argument("--comentarios", type=int, default=50_000, help="Comentarios a sembrar")
+    parser.add_argument("--clubes", type=int, default=20, help="Clubes entre los que se reparten")
+    parser.add_argument("--vocabulario", type=int, default=20_000, help="Palabras distintas del texto sintético")
+    parser.add_argument("--repeticiones", type=int, default=50, help="Repeticiones por consulta")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de los textos sintéticos")
+    main(parser.parse_args())
@@ -0,0 +1,100 @@
+"""
+Benchmark de throughput del envío de emails.
+
+Levanta el servidor SMTP de pruebas (tests/smtp_stub.py) con una latencia
+por sesión que simula el handshake TLS y el login de un servidor real, y
+envía N emails de dos formas:
+
+  - por_mensaje: como antes de la bandeja de salida, una conexión SMTP
+    nueva (conexión + login + envío + QUIT) por email, con el mismo número
+    de hilos que conexiones tiene el pool
+  - bandeja: encola los emails en email_outbox (BD SQLite temporal) y los
+    envía EnviadorEmails por lotes sobre el pool de conexiones reutilizadas
+
+Uso (desde backend/):
+    python scripts/bench_email_outbox.py
+    python scripts/bench_email_outbox.py --emails 2000 --latencia-sesion 0.3 --conexiones 4
+"""
+import argparse
+import asyncio
+import os
+import smtplib
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _por_mensaje(servidor, total: int, hilos: int) -> float:
+    from app.services.email_outbox import ConfigSMTP, Mensaje, _mime
+
+    config = ConfigSMTP("127.0.0.1", servidor.puerto, "piar", "secreto", "noreply@piarapp.com", False, False)
+
+    def enviar(i: int) -> None:
+        with smtplib.SMTP(config.servidor, config.puerto, timeout=30) as smtp:
+            smtp.login(config.usuario, config.password)
+            smtp.send_message(_mime(Mensaje(i, f"bench-{i}@example.com", "Bench", "<p>hola</p>", 0), config))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        list(executor.map(enviar, range(total)))
+    return time.perf_counter() - t0
+
+
+async def _bandeja(servidor, total: int) -> float:
+    from app.database.db import SessionLocal
+    from app.models.system_config import SystemConfig
+    from app.services.email_outbox import enviador_emails
+    from app.services.email_service import EmailService
+
+    with SessionLocal() as db:
+        db.add(SystemConfig(
+            smtp_server="127.0.0.1", smtp_port=servidor.puerto, smtp_username="piar", smtp_password="secreto",
+            smtp_from_email="noreply@piarapp.com", smtp_use_tls=False, smtp_use_ssl=False,
+        ))
+        for i in range(total):
+            EmailService.encolar(db, f"bench-{i}@example.com", "Bench", "<p>hola</p>")
+        db.commit()
+
+    t0 = time.perf_counter()
+    enviados = await enviador_emails.vaciar()
+    elapsed = time.perf_counter() - t0
+    await enviador_emails.close()
+    assert enviados == total, enviados
+    return elapsed
+
+
+def main(args):
+    tmpdir = tempfile.mkdtemp(prefix="piar-bench-email-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ["EMAIL_SMTP_CONNECTIONS"] = str(args.conexiones)
+    os.environ["EMAIL_OUTBOX_BATCH_SIZE"] = str(args.lote)
+    sys.path.insert(0, BACKEND_DIR)
+
+    import app.main  # noqa: F401  (registra todos los modelos)
+    from app.database.migrations import aplicar_migraciones
+    from tests.smtp_stub import ServidorSMTP
+
+    aplicar_migraciones()
+
+    print(f"{args.emails} emails, {args.conexiones} conexiones, "
+          f"{args.latencia_sesion * 1000:.0f} ms por sesión SMTP, lotes de {args.lote}")
+    with ServidorSMTP(latencia_sesion=args.latencia_sesion) as servidor:
+        segundos = _por_mensaje(servidor, args.emails, args.conexiones)
+        print(f"  por_mensaje {args.emails / segundos:8.1f} emails/s  ({segundos:.2f}s, {servidor.conexiones} sesiones)")
+
+    with ServidorSMTP(latencia_sesion=args.latencia_sesion) as servidor:
+        segundos = asyncio.run(_bandeja(servidor, args.emails))
+        print(f"  bandeja     {args.emails / segundos:8.1f} emails/s  ({segundos:.2f}s, {servidor.conexiones} sesiones)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de envío de emails: conexión por mensaje vs bandeja de salida")
+    parser.add_argument("--emails", type=int, default=500, help="Emails enviados en cada modo")
+    parser.add_argument("--conexiones", type=int, default=2, help="Conexiones SMTP simultáneas")
+    parser.add_argument("--lote", type=int, default=50, help="Emails por lote de la bandeja")
+    parser.add_argument("--latencia-sesion", type=float, default=0.2,
+                        help="Segundos que tarda el servidor en abrir una sesión (saludo + login)")
+    main(parser.parse_args())
@@ -0,0 +1,145 @@
+"""
+Benchmark de logins concurrentes mezclados con tráfico GET normal.
+
+Levanta la API en un único worker de uvicorn sobre una BD SQLite temporal,
+registra varios usuarios y lanza a la vez ráfagas de logins (bcrypt) y
+peticiones GET autenticadas. Mide el throughput de login, cuántos logins se
+rechazan con 503 (control de admisión del pool de bcrypt) y la latencia de
+los GET, que no debería dispararse mientras se verifican contraseñas.
+
+Uso (desde backend/):
+    python scripts/bench_login.py
+    python scripts/bench_login.py --logins 200 --login-concurrency 40 --get-concurrency 16
+    PASSWORD_HASH_WORKERS=8 python scripts/bench_login.py
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from bench_async_db import BACKEND_DIR, PASSWORD, _free_port, _percentil, _wait_until_ready
+
+
+async def _registrar_usuarios(client: httpx.AsyncClient, total: int):
+    emails = []
+    for _ in range(total):
+        email = f"login-bench-{uuid.uuid4().hex[:8]}@example.com"
+        resp = await client.post(
+            "/api/auth/registro",
+            json={"nombre_completo": "Login Bench", "email": email, "password": PASSWORD},
+        )
+        resp.raise_for_status()
+        emails.append(email)
+    return emails
+
+
+async def _carga_logins(client: httpx.AsyncClient, emails, total: int, concurrency: int):
+    latencias, codigos = [], {}
+    contador = iter(range(total))
+
+    async def worker():
+        for i in contador:
+            t0 = time.perf_counter()
+            resp = await client.post(
+                "/api/auth/login", json={"email": emails[i % len(emails)], "password": PASSWORD}
+            )
+            latencias.append(time.perf_counter() - t0)
+            codigos[resp.status_code] = codigos.get(resp.status_code, 0) + 1
+            if resp.status_code == 503:
+                # Respetar el Retry-After acortado para no convertir el bench en un bucle de reintentos
+                await asyncio.sleep(min(float(resp.headers.get("Retry-After", "1")), 1.0) / 10)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t0, latencias, codigos
+
+
+async def _carga_gets(client: httpx.AsyncClient, headers, parar: asyncio.Event, concurrency: int):
+    latencias, errores = [], 0
+
+    async def worker():
+        nonlocal errores
+        while not parar.is_set():
+            t0 = time.perf_counter()
+            resp = await client.get("/api/clubes", headers=headers)
+            latencias.append(time.perf_counter() - t0)
+            if resp.status_code != 200:
+                errores += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencias, errores
+
+
+async def main(args):
+    tmpdir = tempfile.mkdtemp(prefix="piar-bench-login-")
+    db_path = os.path.join(tmpdir, "bench.db")
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        conexiones = args.login_concurrency + args.get_concurrency
+        limits = httpx.Limits(max_connections=conexiones, max_keepalive_connections=conexiones)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+            await _wait_until_ready(client)
+            emails = await _registrar_usuarios(client, args.usuarios)
+
+            resp = await client.post("/api/auth/login", json={"email": emails[0], "password": PASSWORD})
+            resp.raise_for_status()
+            headers = {"Authorization": f"Bearer {resp.json()['tokens']['access_token']}"}
+
+            # Línea base: latencia de los GET sin logins en paralelo
+            parar = asyncio.Event()
+            tarea_base = asyncio.ensure_future(_carga_gets(client, headers, parar, args.get_concurrency))
+            await asyncio.sleep(args.baseline_seconds)
+            parar.set()
+            base_latencias, _ = await tarea_base
+
+            parar = asyncio.Event()
+            tarea_gets = asyncio.ensure_future(_carga_gets(client, headers, parar, args.get_concurrency))
+            elapsed, login_latencias, codigos = await _carga_logins(
+                client, emails, args.logins, args.login_concurrency
+            )
+            parar.set()
+            get_latencias, get_errores = await tarea_gets
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    aceptados = codigos.get(200, 0)
+    print(f"Logins:            {len(login_latencias)} en {elapsed:.2f}s (concurrencia {args.login_concurrency})")
+    print(f"  aceptados:       {aceptados} ({aceptados / elapsed:.1f} logins/s)")
+    print(f"  rechazados 503:  {codigos.get(503, 0)}")
+    otros = {c: n for c, n in codigos.items() if c not in (200, 503)}
+    if otros:
+        print(f"  otros códigos:   {otros}")
+    print(f"  latencia p50/p95: {statistics.median(login_latencias) * 1000:.1f} / "
+          f"{_percentil(login_latencias, 0.95) * 1000:.1f} ms")
+    print(f"GET /api/clubes (concurrencia {args.get_concurrency})")
+    print(f"  sin logins  p50/p95/p99: {statistics.median(base_latencias) * 1000:.1f} / "
+          f"{_percentil(base_latencias, 0.95) * 1000:.1f} / {_percentil(base_latencias, 0.99) * 1000:.1f} ms")
+    print(f"  con logins  p50/p95/p99: {statistics.median(get_latencias) * 1000:.1f} / "
+          f"{_percentil(get_latencias, 0.95) * 1000:.1f} / {_percentil(get_latencias, 0.99) * 1000:.1f} ms "
+          f"({len(get_latencias)} peticiones, {get_errores} errores)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de logins concurrentes con tráfico GET")
+    parser.add_argument("--usuarios", type=int, default=20, help="Usuarios registrados para el login")
+    parser.add_argument("--logins", type=int, default=100, help="Total de logins lanzados")
+    parser.add_argument("--login-concurrency", type=int, default=20, help="Logins simultáneos")
+    parser.add_argument("--get-concurrency", type=int, default=8, help="Clientes GET simultáneos")
+    parser.add_argument("--baseline-seconds", type=float, default=3.0, help="Duración de la línea base de GET")
+    asyncio.run(main(parser.parse_args()))
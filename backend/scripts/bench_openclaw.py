@@ -0,0 +1,110 @@
+"""
+Benchmark del chat con OpenClaw: conexión por llamada vs conexión persistente.
+
+Levanta el gateway de pruebas (tests/openclaw_stub.py) con una latencia de
+handshake que simula la de un gateway real y mide:
+
+  - latencia: N mensajes seguidos de una misma sesión (p50 / p95)
+  - concurrencia: S sesiones mandando un mensaje a la vez (tiempo total,
+    conexiones abiertas y sesiones por conexión)
+
+en dos modos:
+
+  - por_llamada: como antes, cada mensaje abre su WebSocket, espera el
+    challenge, hace el handshake y lo cierra al terminar
+  - persistente: OpenClawService con sus conexiones compartidas
+    (OPENCLAW_WS_CONNECTIONS)
+
+Uso (desde backend/):
+    python scripts/bench_openclaw.py
+    python scripts/bench_openclaw.py --mensajes 200 --sesiones 500 --latencia-handshake 0.1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _por_llamada(gateway, sesion: str, mensaje: str) -> str:
+    from app.services.openclaw_conexion import ConexionOpenClaw
+    from tests.openclaw_stub import TOKEN
+
+    conexion = await ConexionOpenClaw.abrir(gateway.url, TOKEN)
+    try:
+        return "".join([delta async for delta in conexion.chat(sesion, mensaje)])
+    finally:
+        await conexion.cerrar()
+
+
+def _servicio(gateway):
+    from app.services.openclaw_service import OpenClawService
+    from tests.openclaw_stub import TOKEN
+
+    servicio = OpenClawService()
+    servicio.ws_url = gateway.url
+    servicio.auth_mode = "password"
+    servicio.password = TOKEN
+    return servicio
+
+
+async def _modo(nombre: str, args) -> None:
+    from tests.openclaw_stub import GatewayOpenClaw
+
+    async with GatewayOpenClaw(args.latencia_handshake, args.latencia_respuesta) as gateway:
+        servicio = _servicio(gateway)
+
+        async def chat(i: int, mensaje: str) -> str:
+            if nombre == "por_llamada":
+                return await _por_llamada(gateway, f"agent:main:club_1_user_{i}", mensaje)
+            return await servicio.get_response([{"role": "user", "content": mensaje}], {"user_id": i, "club_id": 1})
+
+        latencias = []
+        for n in range(args.mensajes):
+            t0 = time.perf_counter()
+            respuesta = await chat(1, f"hola {n}")
+            latencias.append(time.perf_counter() - t0)
+            assert respuesta == f"Eco: hola {n}", respuesta
+        cuantiles = statistics.quantiles(latencias, n=20)
+        print(f"  {nombre:<12} latencia     p50 {statistics.median(latencias) * 1000:7.1f} ms   "
+              f"p95 {cuantiles[18] * 1000:7.1f} ms  ({gateway.handshakes} handshakes)")
+
+        conexiones_antes = gateway.conexiones
+        t0 = time.perf_counter()
+        respuestas = await asyncio.gather(*(chat(i, "hola") for i in range(args.sesiones)))
+        segundos = time.perf_counter() - t0
+        assert all(r == "Eco: hola" for r in respuestas)
+        conexiones = gateway.conexiones - conexiones_antes
+        if nombre == "persistente":
+            # Las que ya estaban abiertas también cuentan
+            conexiones = len(servicio._conexiones)
+        print(f"  {nombre:<12} concurrencia {args.sesiones} sesiones en {segundos:6.2f} s "
+              f"({args.sesiones / segundos:7.1f} chats/s), {conexiones} conexiones, "
+              f"{args.sesiones / max(conexiones, 1):.0f} sesiones por conexión")
+        await servicio.close()
+
+
+def main(args):
+    os.environ["OPENCLAW_WS_CONNECTIONS"] = str(args.conexiones)
+    sys.path.insert(0, BACKEND_DIR)
+
+    print(f"{args.mensajes} mensajes seguidos y {args.sesiones} sesiones simultáneas; handshake "
+          f"{args.latencia_handshake * 1000:.0f} ms, respuesta {args.latencia_respuesta * 1000:.0f} ms, "
+          f"{args.conexiones} conexiones persistentes")
+    asyncio.run(_modo("por_llamada", args))
+    asyncio.run(_modo("persistente", args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del chat con OpenClaw: conexión por llamada vs persistente")
+    parser.add_argument("--mensajes", type=int, default=100, help="Mensajes seguidos para medir la latencia")
+    parser.add_argument("--sesiones", type=int, default=200, help="Sesiones que chatean a la vez")
+    parser.add_argument("--conexiones", type=int, default=1, help="OPENCLAW_WS_CONNECTIONS del modo persistente")
+    parser.add_argument("--latencia-handshake", type=float, default=0.05,
+                        help="Segundos que tarda el gateway en aceptar una conexión")
+    parser.add_argument("--latencia-respuesta", type=float, default=0.02,
+                        help="Segundos que tarda el agente en empezar a responder")
+    main(parser.parse_args())
@@ -0,0 +1,59 @@
+"""
+Encola los resúmenes por email de una frecuencia (Usuario.email_digest).
+
+Pensado para un cron, uno por frecuencia:
+
+    0 7 * * *  cd /app && python scripts/enviar_resumenes.py --frecuencia daily
+    0 7 * * 1  cd /app && python scripts/enviar_resumenes.py --frecuencia weekly
+
+Los emails van a la bandeja de salida y los envía la API en marcha (o este
+mismo proceso con --enviar). Se puede relanzar sin duplicar resúmenes: cada
+usuario guarda hasta dónde se le ha resumido.
+
+Uso (desde backend/):
+    python scripts/enviar_resumenes.py --frecuencia weekly
+    python scripts/enviar_resumenes.py --frecuencia daily --pagina 500 --enviar
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.main  # noqa: E402,F401  (registra todos los modelos)
+from app.database.db import SessionLocal  # noqa: E402
+from app.services.email_outbox import enviador_emails  # noqa: E402
+from app.services.resumen_service import FRECUENCIAS, ResumenService  # noqa: E402
+
+
+async def _enviar() -> int:
+    try:
+        return await enviador_emails.vaciar()
+    finally:
+        await enviador_emails.close()
+
+
+def main(args: argparse.Namespace) -> None:
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        resultado = ResumenService.generar(db, args.frecuencia, pagina=args.pagina)
+    segundos = time.perf_counter() - t0
+    print(f"Resumen {args.frecuencia}: {resultado.usuarios:,} usuarios en {resultado.paginas} páginas, "
+          f"{resultado.emails:,} emails encolados con {resultado.cuerpos:,} cuerpos distintos ({segundos:.1f} s)")
+
+    if args.enviar:
+        print(f"Enviados: {asyncio.run(_enviar()):,}")
+
+
+def _argumentos(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Encola los resúmenes por email de una frecuencia")
+    parser.add_argument("--frecuencia", choices=sorted(FRECUENCIAS), required=True, help="Resúmenes a generar")
+    parser.add_argument("--pagina", type=int, default=1000, help="Usuarios por página (y por transacción)")
+    parser.add_argument("--enviar", action="store_true", help="Vaciar también la bandeja de salida al terminar")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(_argumentos())
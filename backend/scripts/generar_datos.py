@@ -0,0 +1,302 @@
+"""
+Generador de datos sintéticos para pruebas de carga.
+
+Crea N clubes con M usuarios (miembros) cada uno y, por club, el volumen que
+se pida de noticias, comentarios, eventos con sus inscripciones, productos y
+documentación de los usuarios. Todo se inserta con insert() de SQLAlchemy
+Core en lotes (executemany), con los ids asignados aquí para enlazar las
+claves ajenas sin volver a leer la BD, y la contraseña se hashea una sola vez
+para todos los usuarios. Con la misma semilla se generan los mismos datos.
+
+Escribe en la BD de DATABASE_URL (con las migraciones aplicadas) y no debe
+haber otros procesos escribiendo mientras tanto: los ids se calculan a partir
+del máximo actual de cada tabla. Los emails y slugs llevan el prefijo
+indicado, así que para generar dos veces en la misma BD hay que cambiarlo.
+
+Uso (desde backend/):
+    python scripts/generar_datos.py --clubes 5 --usuarios-por-club 50
+    DATABASE_URL=sqlite:///./data/carga.db python scripts/generar_datos.py \\
+        --clubes 20 --usuarios-por-club 2000 --noticias-por-club 1000 \\
+        --comentarios-por-noticia 20 --eventos-por-club 200 --asistencias-por-evento 100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Datos de prueba: si se corta la luz a medias se vuelven a generar
+os.environ.setdefault("SQLITE_SYNCHRONOUS", "OFF")
+
+from sqlalchemy import func, insert, select
+
+from app.database.db import engine
+from app.models.asistencia import AsistenciaEvento
+from app.models.club import Club
+from app.models.comentario import Comentario
+from app.models.documentacion_reglamentaria import DocumentacionReglamentaria
+from app.models.evento import Evento
+from app.models.miembro_club import MiembroClub
+from app.models.noticia import Noticia
+from app.models.producto import ProductoAfiliacion
+from app.models.usuario import Usuario
+from app.utils.security import AuthUtils
+
+PALABRAS = """
+    vuelo avion planeador helicoptero dron motor helice bateria servo emisora receptor pista
+    hangar aterrizaje despegue viento termica ladera acrobacia escala maqueta montaje
+    entrenamiento competicion concurso jornada exhibicion curso taller seguridad licencia
+    seguro reglamento socios junta asamblea cuota calendario sabado domingo mañana tarde
+    revision ajuste reparacion carbono balsa madera espuma pegamento tornillo tren ala cola
+""".split()
+CATEGORIAS_NOTICIA = ["anuncio", "evento", "resultado", "general"]
+TIPOS_EVENTO = ["volar_grupo", "competicion", "formacion", "social", "otro"]
+CATEGORIAS_PRODUCTO = ["Equipos", "Repuestos", "Baterías", "Software", "Herramientas"]
+PROVEEDORES = ["Amazon", "AliExpress", "HobbyKing", "Tienda local"]
+# Columna de Evento que cuenta cada estado de inscripción
+CONTADORES = {"inscrito": "inscritos_count", "lista_espera": "lista_espera_count", "cancelado": "cancelados_count"}
+
+
+class Generador:
+    """Genera las filas tabla a tabla y las inserta en lotes"""
+
+    def __init__(self, conn, args: argparse.Namespace):
+        self.conn = conn
+        self.args = args
+        self.rng = random.Random(args.semilla)
+        self.inicio = datetime(2024, 1, 1)
+        self.filas: Dict[str, int] = {}
+        # Frases ya hechas: generar un texto por fila dominaría el tiempo total
+        self.frases = [self._frase(self.rng.randint(6, 14)) for _ in range(2000)]
+
+    def _frase(self, palabras: int) -> str:
+        return " ".join(self.rng.choices(PALABRAS, k=palabras)).capitalize() + "."
+
+    def _texto(self, frases: int) -> str:
+        return " ".join(self.rng.choices(self.frases, k=frases))
+
+    def _fecha(self, dias: int = 365) -> datetime:
+        return self.inicio + timedelta(seconds=self.rng.randrange(dias * 86400))
+
+    def _siguiente_id(self, modelo) -> int:
+        return (self.conn.scalar(select(func.max(modelo.id))) or 0) + 1
+
+    def insertar(self, modelo, filas: Iterable[dict]) -> None:
+        """executemany en lotes de --lote filas"""
+        tabla = modelo.__table__
+        lote: List[dict] = []
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) >= self.args.lote:
+                self.conn.execute(insert(tabla), lote)
+                self.filas[tabla.name] = self.filas.get(tabla.name, 0) + len(lote)
+                lote = []
+        if lote:
+            self.conn.execute(insert(tabla), lote)
+            self.filas[tabla.name] = self.filas.get(tabla.name, 0) + len(lote)
+
+    def generar(self) -> None:
+        a = self.args
+        prefijo = a.prefijo
+        if self.conn.scalar(select(Club.id).filter(Club.slug == f"{prefijo}-0")):
+            raise SystemExit(f"Ya hay datos con el prefijo '{prefijo}': usa otro con --prefijo")
+
+        contrasena_hash = AuthUtils.hash_password(a.password)
+        id_usuario = self._siguiente_id(Usuario)
+        id_club = self._siguiente_id(Club)
+        id_noticia = self._siguiente_id(Noticia)
+        id_evento = self._siguiente_id(Evento)
+
+        clubes = list(range(id_club, id_club + a.clubes))
+        # usuarios[c]: ids de los usuarios del club c (el primero lo administra)
+        usuarios = {
+            club_id: list(range(id_usuario + i * a.usuarios_por_club, id_usuario + (i + 1) * a.usuarios_por_club))
+            for i, club_id in enumerate(clubes)
+        }
+
+        self.insertar(Usuario, (
+            {
+                "id": usuario_id,
+                "email": f"{prefijo}-{usuario_id}@example.com",
+                "nombre_completo": f"Piloto {usuario_id}",
+                "contraseña_hash": contrasena_hash,
+                "email_verificado": True,
+                "fecha_creacion": self._fecha(),
+            }
+            for ids in usuarios.values() for usuario_id in ids
+        ))
+        self.insertar(Club, (
+            {
+                "id": club_id,
+                "slug": f"{prefijo}-{i}",
+                "nombre": f"Club de Aeromodelismo {prefijo} {i}",
+                "descripcion": self._texto(2),
+                "estado": "activo",
+                "creador_id": usuarios[club_id][0],
+            }
+            for i, club_id in enumerate(clubes)
+        ))
+        self.insertar(MiembroClub, (
+            {
+                "usuario_id": usuario_id,
+                "club_id": club_id,
+                "rol": "administrador" if j == 0 else "miembro",
+                "estado": "activo",
+                "fecha_aprobacion": self._fecha(),
+            }
+            for club_id, ids in usuarios.items() for j, usuario_id in enumerate(ids)
+        ))
+
+        noticias = {
+            club_id: range(id_noticia + i * a.noticias_por_club, id_noticia + (i + 1) * a.noticias_por_club)
+            for i, club_id in enumerate(clubes)
+        }
+        self.insertar(Noticia, self._noticias(noticias, usuarios))
+        self.insertar(Comentario, self._comentarios(noticias, usuarios))
+
+        eventos = {
+            club_id: range(id_evento + i * a.eventos_por_club, id_evento + (i + 1) * a.eventos_por_club)
+            for i, club_id in enumerate(clubes)
+        }
+        # Las inscripciones se generan antes que los eventos para guardar sus contadores
+        asistencias: List[dict] = []
+        contadores = {}
+        for club_id, ids in eventos.items():
+            for evento_id in ids:
+                contadores[evento_id] = self._asistencias(evento_id, usuarios[club_id], asistencias)
+        self.insertar(Evento, (
+            {
+                "id": evento_id,
+                "club_id": club_id,
+                "nombre": self._frase(3)[:-1],
+                "descripcion": self._texto(2),
+                "tipo": self.rng.choice(TIPOS_EVENTO),
+                "fecha_inicio": self._fecha(730),
+                "aforo_maximo": a.aforo or None,
+                "estado": "no_iniciado",
+                **contadores[evento_id],
+            }
+            for club_id, ids in eventos.items() for evento_id in ids
+        ))
+        self.insertar(AsistenciaEvento, asistencias)
+
+        self.insertar(ProductoAfiliacion, (
+            {
+                "club_id": club_id,
+                "nombre": self._frase(3)[:-1],
+                "descripcion": self._texto(1),
+                "categoria": self.rng.choice(CATEGORIAS_PRODUCTO),
+                "url_afiliacion": f"https://example.com/p/{club_id}-{j}",
+                "proveedor": self.rng.choice(PROVEEDORES),
+                "precio_referencia": f"{self.rng.uniform(5, 300):.2f}€",
+                "orden": j,
+                "creado_por_id": usuarios[club_id][0],
+            }
+            for club_id in clubes for j in range(a.productos_por_club)
+        ))
+        self.insertar(DocumentacionReglamentaria, self._documentos(usuarios))
+
+    def _noticias(self, noticias: Dict[int, range], usuarios: Dict[int, List[int]]) -> Iterator[dict]:
+        for club_id, ids in noticias.items():
+            for noticia_id in ids:
+                fecha = self._fecha()
+                yield {
+                    "id": noticia_id,
+                    "club_id": club_id,
+                    "titulo": self._frase(5)[:-1],
+                    "contenido": self._texto(self.rng.randint(3, 10)),
+                    "categoria": self.rng.choice(CATEGORIAS_NOTICIA),
+                    "autor_id": self.rng.choice(usuarios[club_id][:5]),
+                    "estado": "publicada",
+                    "fecha_creacion": fecha,
+                    "fecha_publicacion": fecha,
+                }
+
+    def _comentarios(self, noticias: Dict[int, range], usuarios: Dict[int, List[int]]) -> Iterator[dict]:
+        for club_id, ids in noticias.items():
+            for noticia_id in ids:
+                for _ in range(self.args.comentarios_por_noticia):
+                    yield {
+                        "contenido": self._texto(1),
+                        "autor_id": self.rng.choice(usuarios[club_id]),
+                        "noticia_id": noticia_id,
+                        "fecha_creacion": self._fecha(),
+                    }
+
+    def _asistencias(self, evento_id: int, usuarios: List[int], filas: List[dict]) -> Dict[str, int]:
+        """Inscripciones de un evento (respetando el aforo) y los contadores que resultan"""
+        cuantas = min(self.args.asistencias_por_evento, len(usuarios))
+        contadores = dict.fromkeys(CONTADORES.values(), 0)
+        for usuario_id in self.rng.sample(usuarios, cuantas):
+            fecha = self._fecha()
+            if self.rng.random() < 0.1:
+                estado = "cancelado"
+            elif self.args.aforo and contadores["inscritos_count"] >= self.args.aforo:
+                estado = "lista_espera"
+            else:
+                estado = "inscrito"
+            contadores[CONTADORES[estado]] += 1
+            filas.append({
+                "evento_id": evento_id,
+                "usuario_id": usuario_id,
+                "estado": estado,
+                "fecha_registro": fecha,
+                "fecha_lista_espera": fecha if estado == "lista_espera" else None,
+            })
+        return contadores
+
+    def _documentos(self, usuarios: Dict[int, List[int]]) -> Iterator[dict]:
+        # Solo los datos de los documentos: los archivos van al almacén de blobs
+        for ids in usuarios.values():
+            for usuario_id in ids:
+                if self.rng.random() >= self.args.documentos:
+                    continue
+                emision = self._fecha()
+                yield {
+                    "usuario_id": usuario_id,
+                    "rc_numero": f"RC-{usuario_id:08d}",
+                    "rc_fecha_emision": emision,
+                    "rc_fecha_vencimiento": emision + timedelta(days=365),
+                    "carnet_numero": f"CP-{usuario_id:08d}",
+                    "carnet_fecha_emision": emision,
+                    "carnet_fecha_vencimiento": emision + timedelta(days=730),
+                }
+
+
+def main(args: argparse.Namespace) -> None:
+    print(f"Generando en {engine.url}...")
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        generador = Generador(conn, args)
+        generador.generar()
+    segundos = time.perf_counter() - t0
+
+    total = sum(generador.filas.values())
+    for tabla, filas in generador.filas.items():
+        print(f"  {tabla:28s} {filas:>10,}")
+    print(f"{total:,} filas en {segundos:.1f} s ({total / segundos:,.0f} filas/s)")
+
+
+def _argumentos(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos para pruebas de carga")
+    parser.add_argument("--clubes", type=int, default=5, help="Clubes a crear")
+    parser.add_argument("--usuarios-por-club", type=int, default=100, help="Usuarios (miembros) de cada club")
+    parser.add_argument("--noticias-por-club", type=int, default=100, help="Noticias publicadas por club")
+    parser.add_argument("--comentarios-por-noticia", type=int, default=5, help="Comentarios de cada noticia")
+    parser.add_argument("--eventos-por-club", type=int, default=20, help="Eventos por club")
+    parser.add_argument("--asistencias-por-evento", type=int, default=20, help="Inscripciones de cada evento")
+    parser.add_argument("--aforo", type=int, default=0, help="Aforo de los eventos (0: sin límite)")
+    parser.add_argument("--productos-por-club", type=int, default=10, help="Productos de la tienda por club")
+    parser.add_argument("--documentos", type=float, default=0.5, help="Fracción de usuarios con documentación")
+    parser.add_argument("--password", default="Password123", help="Contraseña de todos los usuarios")
+    parser.add_argument("--prefijo", default="carga", help="Prefijo de emails y slugs")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de los datos")
+    parser.add_argument("--lote", type=int, default=5000, help="Filas por executemany")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(_argumentos())
@@ -15,6 +15,7 @@ sys.path.insert(0, str(backend_dir))
 from sqlalchemy import create_engine, text, inspect
 from app.config import settings
 from app.database.db import Base
+from app.database.migrations import aplicar_migraciones
 
 # Asegurar que el directorio data existe
 data_dir = backend_dir / "data"
@@ -41,6 +42,15 @@ from app.models.votacion import Votacion
 from app.models.socio import Socio
 
 
+def _tablas_virtuales(connection):
+    """Tablas virtuales (índices FTS5) de una BD SQLite"""
+    if connection.dialect.name != "sqlite":
+        return []
+    return [fila[0] for fila in connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%'"
+    ))]
+
+
 def reset_database(confirm: bool = False):
     """
     Elimina todos los datos de la base de datos.
@@ -79,8 +89,16 @@ def reset_database(confirm: bool = False):
             
             print(f"\n📋 Tablas encontradas: {len(tables)}")
             
-            # Eliminar datos de cada tabla
+            # Las tablas internas de los índices FTS5 (noticias_fts_data...) no
+            # se tocan: se vacían al vaciar su tabla virtual
+            virtuales = _tablas_virtuales(connection)
+            
+            # Eliminar datos de cada tabla (el registro de migraciones se conserva)
             for table_name in tables:
+                if table_name == "schema_migrations":
+                    continue
+                if any(table_name.startswith(f"{v}_") for v in virtuales):
+                    continue
                 try:
                     # Eliminar todos los registros
                     connection.execute(text(f"DELETE FROM {table_name}"))
@@ -135,12 +153,17 @@ def recreate_database():
         # Eliminar todas las tablas
         print("🗑️  Eliminando tablas existentes...")
         Base.metadata.drop_all(bind=engine)
+        with engine.begin() as connection:
+            # Índices FTS5 de la búsqueda: no son modelos, se crean en las migraciones
+            for tabla in _tablas_virtuales(connection):
+                connection.execute(text(f"DROP TABLE IF EXISTS {tabla}"))
+            connection.execute(text("DROP TABLE IF EXISTS schema_migrations"))
         print("✓ Tablas eliminadas")
         
-        # Recrear todas las tablas
-        print("\n🔨 Creando tablas nuevas...")
-        Base.metadata.create_all(bind=engine)
-        print("✓ Tablas creadas")
+        # Recrear todas las tablas aplicando las migraciones desde cero
+        print("\n🔨 Aplicando migraciones...")
+        aplicadas = aplicar_migraciones(engine)
+        print(f"✓ Migraciones aplicadas: {', '.join(aplicadas)}")
         
         print("\n✅ Base de datos recreada exitosamente.")
         return True
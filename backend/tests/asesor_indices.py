@@ -0,0 +1,108 @@
+"""Asesor de índices para los tests.
+
+Escucha las consultas que lanzan los engines de la aplicación durante cada
+test, les pasa EXPLAIN QUERY PLAN con los mismos parámetros y apunta las que
+recorren entera alguna de las tablas que crecen con el uso. conftest hace
+fallar el test que las provoque: una consulta nueva sin índice se ve aquí y
+no en producción, cuando la tabla ya tiene cientos de miles de filas.
+
+Un recorrido intencionado (un recuento global del panel de administración,
+la recolección de archivos huérfanos...) se declara en SCANS_PERMITIDOS con
+el motivo, o en el propio test con @pytest.mark.permite_scan("tabla").
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Tablas que crecen con los clubes, sus miembros y su actividad
+TABLAS_GRANDES = frozenset({
+    "usuarios", "miembro_club", "invitaciones", "socios", "documentacion_reglamentaria",
+    "noticias", "comentarios", "eventos", "asistencias_eventos", "votaciones",
+    "contrasena_instalaciones", "productos_afiliacion", "blobs", "blob_variantes",
+})
+
+# (tabla, fragmento de la consulta) -> motivo
+SCANS_PERMITIDOS: Dict[Tuple[str, str], str] = {
+    ("socios", "foto_carnet_blob IS NOT NULL"): "migración única de las fotos guardadas en la BD al almacén",
+    ("documentacion_reglamentaria", "rc_archivo IS NOT NULL"): "migración única de los PDFs guardados en la BD al almacén",
+    ("documentacion_reglamentaria", "carnet_archivo IS NOT NULL"): "migración única de los PDFs guardados en la BD al almacén",
+}
+
+_SENTENCIAS = ("SELECT", "WITH", "UPDATE", "DELETE")
+_ALIAS = re.compile(r"\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+AS)?\s+(\w+)", re.IGNORECASE)
+_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+@dataclass
+class Recorrido:
+    tabla: str
+    detalle: str
+    sql: str
+
+    def __str__(self):
+        return f"{self.detalle} ({self.tabla})\n    {' '.join(self.sql.split())}"
+
+
+def recorridos(plan: List[tuple], sql: str) -> List[Recorrido]:
+    """Pasos del plan que leen entera una tabla grande (o uno de sus índices)"""
+    alias = {nombre.lower(): tabla.lower() for tabla, nombre in _ALIAS.findall(sql)}
+    encontrados = []
+    for fila in plan:
+        detalle = fila[-1]
+        coincidencia = _SCAN.match(detalle)
+        if not coincidencia:
+            continue
+        tabla = alias.get(coincidencia.group(1).lower(), coincidencia.group(1).lower())
+        if tabla in TABLAS_GRANDES and not _permitido(tabla, sql):
+            encontrados.append(Recorrido(tabla, detalle, sql))
+    return encontrados
+
+
+def _permitido(tabla: str, sql: str) -> bool:
+    return any(t == tabla and fragmento in sql for t, fragmento in SCANS_PERMITIDOS)
+
+
+class AsesorIndices:
+    """Acumula los recorridos completos de las consultas de los engines vigilados"""
+
+    def __init__(self):
+        self.encontrados: List[Recorrido] = []
+        self.permitidas: frozenset = frozenset()
+        self._engines = []
+
+    def vigilar(self, *engines):
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._antes_de_ejecutar)
+            self._engines.append(engine)
+
+    def retirar(self):
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._antes_de_ejecutar)
+        self._engines.clear()
+
+    def reiniciar(self, permitidas=()):
+        self.encontrados = []
+        self.permitidas = frozenset(permitidas)
+
+    def _antes_de_ejecutar(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(_SENTENCIAS):
+            return
+        plan = self._plan(conn, statement, parameters)
+        if plan is None:
+            return
+        self.encontrados += [r for r in recorridos(plan, statement) if r.tabla not in self.permitidas]
+
+    @staticmethod
+    def _plan(conn, statement: str, parameters) -> Optional[List[tuple]]:
+        # Cursor aparte sobre la misma conexión DBAPI (vale también para
+        # aiosqlite, porque el evento corre dentro del greenlet de SQLAlchemy)
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return cursor.fetchall()
+        except Exception:
+            return None
+        finally:
+            cursor.close()
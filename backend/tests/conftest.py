@@ -1,6 +1,155 @@
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
 import pytest
 
+from tests.asesor_indices import AsesorIndices
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "permite_scan(*tablas): el test puede recorrer enteras esas tablas sin que falle el asesor de índices"
+    )
+
 
 @pytest.fixture
 def anyio_backend():
     return "asyncio"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    """Deja el esquema de la BD de tests al día una vez por sesión"""
+    from app.database.migrations import aplicar_migraciones
+
+    aplicar_migraciones()
+
+
+@dataclass
+class ClubDePrueba:
+    """Lo que siembra crear_club: el club y sus usuarios (el primero es el creador)"""
+    id: int
+    usuarios: List[int]
+    emails: List[str]
+    tokens: List[str]
+
+    @property
+    def usuario_id(self) -> int:
+        return self.usuarios[0]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return self.headers_de(0)
+
+    def headers_de(self, i: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[i]}"}
+
+
+@pytest.fixture
+def crear_club():
+    """crear_club(prefijo, usuarios=1, ...): club con N usuarios activos y sus tokens.
+
+    El creador entra con rol_creador (None: sin membresía, p.ej. si es
+    superadmin) y el resto como 'miembro'. Emails y slug llevan un sufijo
+    aleatorio: la BD de tests se comparte entre ejecuciones.
+    """
+    from app.database.db import SessionLocal
+    from app.models.club import Club
+    from app.models.miembro_club import MiembroClub
+    from app.models.usuario import Usuario
+    from app.utils.security import AuthUtils
+
+    def crear(
+        prefijo: str,
+        usuarios: int = 1,
+        rol_creador: Optional[str] = "administrador",
+        superadmin: bool = False,
+        nombre: Optional[str] = None
+    ) -> ClubDePrueba:
+        sufijo = uuid.uuid4().hex[:8]
+        with SessionLocal() as db:
+            filas = [
+                Usuario(email=f"{prefijo}-{sufijo}-{i}@example.com", nombre_completo=f"Usuario {i}",
+                        es_superadmin=superadmin and i == 0)
+                for i in range(usuarios)
+            ]
+            db.add_all(filas)
+            db.flush()
+            club = Club(nombre=nombre or f"Club {prefijo}", slug=f"{prefijo}-{sufijo}", creador_id=filas[0].id)
+            db.add(club)
+            db.flush()
+            roles = [rol_creador] + ["miembro"] * (usuarios - 1)
+            db.add_all(
+                MiembroClub(usuario_id=u.id, club_id=club.id, rol=rol, estado="activo")
+                for u, rol in zip(filas, roles) if rol is not None
+            )
+            db.commit()
+            return ClubDePrueba(
+                id=club.id,
+                usuarios=[u.id for u in filas],
+                emails=[u.email for u in filas],
+                tokens=[AuthUtils.create_access_token({"user_id": u.id, "email": u.email}) for u in filas],
+            )
+
+    return crear
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    """Servidor SMTP de pruebas configurado como el de la aplicación, sin espera entre reintentos"""
+    from app.config import settings
+    from app.services import email_outbox
+    from tests.smtp_stub import ServidorSMTP
+
+    with ServidorSMTP(rechazar={"nadie@example.com"}) as servidor:
+        config = email_outbox.ConfigSMTP(
+            "127.0.0.1", servidor.puerto, "piar", "secreto", "noreply@piarapp.com", False, False
+        )
+        monkeypatch.setattr(email_outbox.ConfigSMTP, "desde", classmethod(lambda cls, _: config))
+        monkeypatch.setattr(settings, "email_retry_base_seconds", 0)
+        yield servidor, config
+
+
+@pytest.fixture(scope="session")
+def _asesor(migrated_database):
+    from app.database.db import async_engine, engine
+
+    asesor = AsesorIndices()
+    asesor.vigilar(engine, async_engine.sync_engine)
+    yield asesor
+    asesor.retirar()
+
+
+@pytest.fixture(autouse=True)
+def asesor_indices(request, _asesor):
+    """Falla el test si alguna de sus consultas recorre entera una tabla grande"""
+    marca = request.node.get_closest_marker("permite_scan")
+    _asesor.reiniciar(marca.args if marca else ())
+    yield _asesor
+    if _asesor.encontrados:
+        detalle = "\n".join(f"  - {r}" for r in dict.fromkeys(map(str, _asesor.encontrados)))
+        pytest.fail(f"Consultas sin índice (EXPLAIN QUERY PLAN):\n{detalle}", pytrace=False)
+
+
+@pytest.fixture
+def presupuesto_consultas():
+    """with presupuesto_consultas(n): falla si alguna petición del bloque lanza más de n consultas SQL"""
+    from app.middleware.consultas import observar_peticiones
+
+    @contextmanager
+    def presupuesto(maximo: int):
+        with observar_peticiones() as registros:
+            yield registros
+        excedidas = [r for r in registros if r.total > maximo]
+        if excedidas:
+            detalle = "\n".join(
+                f"  - {r.metodo} {r.ruta}: {r.describir()}\n"
+                + "\n".join(f"      {veces}x {sql[:200]}" for sql, veces in r.sentencias.most_common())
+                for r in excedidas
+            )
+            pytest.fail(f"Presupuesto de {maximo} consultas superado:\n{detalle}", pytrace=False)
+
+    return presupuesto
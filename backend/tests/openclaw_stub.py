@@ -0,0 +1,142 @@
+"""Gateway de OpenClaw de pruebas (WebSocket en 127.0.0.1).
+
+Habla lo justo del protocolo: connect.challenge, handshake 'connect',
+chat.send (ACK con runId y, tras latencia_respuesta, la respuesta en eventos
+'agent' por trozos separados pausa_trozos segundos más el 'chat' final con
+los tokens, todos con su sessionKey y su runId; con clave_en_agent=False
+los 'agent' van solo con el runId; con pausa_final, el 'agent' de fin
+(lifecycle end) va antes y el 'chat' final llega esos segundos después),
+chat.abort (para la respuesta en curso
+y la apunta en abortados) y chat.history con lo hablado en cada sesión.
+latencia_handshake simula lo que tarda un gateway real en aceptar una
+conexión (TLS, autenticación).
+
+    async with GatewayOpenClaw(latencia_handshake=0.05) as gateway:
+        servicio.ws_url = gateway.url
+"""
+import asyncio
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import websockets
+
+TOKEN = "secreto-gateway"
+
+
+class GatewayOpenClaw:
+    def __init__(
+        self,
+        latencia_handshake: float = 0.0,
+        latencia_respuesta: float = 0.0,
+        trozos: int = 3,
+        pausa_trozos: float = 0.0,
+        clave_en_agent: bool = True,
+        pausa_final: Optional[float] = None
+    ):
+        self.latencia_handshake = latencia_handshake
+        self.latencia_respuesta = latencia_respuesta
+        self.trozos = trozos
+        self.pausa_trozos = pausa_trozos
+        self.clave_en_agent = clave_en_agent
+        self.pausa_final = pausa_final
+        self.abortados: List[str] = []
+        self._respuestas: Dict[str, asyncio.Task] = {}
+        self.conexiones = 0
+        self.handshakes = 0
+        self.historial: Dict[str, List[dict]] = defaultdict(list)
+        self._servidor = None
+        self._sockets = set()
+        self.url: Optional[str] = None
+
+    async def __aenter__(self) -> "GatewayOpenClaw":
+        self._servidor = await websockets.serve(self._atender, "127.0.0.1", 0)
+        puerto = next(iter(self._servidor.sockets)).getsockname()[1]
+        self.url = f"ws://127.0.0.1:{puerto}"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._servidor.close()
+        await self._servidor.wait_closed()
+
+    async def cortar(self) -> None:
+        """Cierra las conexiones abiertas, como un gateway que se reinicia"""
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def _atender(self, ws) -> None:
+        self.conexiones += 1
+        self._sockets.add(ws)
+        try:
+            await ws.send(json.dumps({"type": "event", "event": "connect.challenge", "payload": {"nonce": "n"}}))
+            peticion = json.loads(await ws.recv())
+            await asyncio.sleep(self.latencia_handshake)
+            if peticion.get("method") != "connect" or peticion["params"]["auth"].get("token") != TOKEN:
+                await ws.send(json.dumps({"type": "res", "id": peticion.get("id"), "ok": False,
+                                          "error": {"message": "unauthorized"}}))
+                return
+            self.handshakes += 1
+            await ws.send(json.dumps({"type": "res", "id": peticion["id"], "ok": True,
+                                      "payload": {"protocol": 3, "server": {"version": "stub"}}}))
+            tareas = set()
+            async for crudo in ws:
+                peticion = json.loads(crudo)
+                tarea = asyncio.create_task(self._responder(ws, peticion))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self._sockets.discard(ws)
+
+    async def _responder(self, ws, peticion: dict) -> None:
+        metodo, params = peticion.get("method"), peticion.get("params", {})
+        clave = params.get("sessionKey")
+        if metodo == "chat.history":
+            mensajes = self.historial[clave][-params.get("limit", 50):]
+            await ws.send(json.dumps({"type": "res", "id": peticion["id"], "ok": True,
+                                      "payload": {"sessionKey": clave, "messages": mensajes}}))
+            return
+        if metodo == "chat.abort":
+            tarea = self._respuestas.pop(params.get("runId"), None)
+            if tarea is not None:
+                tarea.cancel()
+                self.abortados.append(clave)
+            await ws.send(json.dumps({"type": "res", "id": peticion["id"], "ok": True,
+                                      "payload": {"aborted": tarea is not None}}))
+            return
+        if metodo != "chat.send":
+            await ws.send(json.dumps({"type": "res", "id": peticion["id"], "ok": False,
+                                      "error": {"message": f"unknown method {metodo}"}}))
+            return
+
+        run_id = params["idempotencyKey"]
+        self._respuestas[run_id] = asyncio.current_task()
+        await ws.send(json.dumps({"type": "res", "id": peticion["id"], "ok": True,
+                                  "payload": {"runId": run_id, "status": "started"}}))
+        try:
+            await asyncio.sleep(self.latencia_respuesta)
+            texto = f"Eco: {params['message']}"
+            paso = max(1, -(-len(texto) // self.trozos))
+            eventos = [{"stream": "assistant", "data": {"delta": texto[i:i + paso]}} for i in range(0, len(texto), paso)]
+            if self.pausa_final is not None:
+                eventos.append({"stream": "lifecycle", "data": {"phase": "end"}})
+            for i, evento in enumerate(eventos):
+                if i and evento["stream"] == "assistant":
+                    await asyncio.sleep(self.pausa_trozos)
+                evento["runId"] = run_id
+                if self.clave_en_agent:
+                    evento["sessionKey"] = clave
+                await ws.send(json.dumps({"type": "event", "event": "agent", "payload": evento}))
+            if self.pausa_final is not None:
+                await asyncio.sleep(self.pausa_final)
+            await ws.send(json.dumps({"type": "event", "event": "chat", "payload": {
+                "sessionKey": clave, "runId": run_id, "state": "final",
+                "message": {"role": "assistant", "content": [{"type": "text", "text": texto}],
+                            "usage": {"input": len(params["message"]), "output": len(texto)}}}}))
+        finally:
+            self._respuestas.pop(run_id, None)
+        self.historial[clave] += [
+            {"role": "user", "content": params["message"]},
+            {"role": "assistant", "content": [{"type": "text", "text": texto}]},
+        ]
@@ -0,0 +1,121 @@
+"""Servidor SMTP mínimo en un hilo, para tests y benchmarks del envío de emails.
+
+Habla lo justo de SMTP para smtplib (EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT,
+DATA, RSET, NOOP, QUIT; sin TLS), guarda los mensajes recibidos y cuenta
+conexiones y logins. Puede simular la latencia de abrir una sesión (el
+handshake TLS y el login de un servidor real) y fallos:
+
+    with ServidorSMTP(rechazar={"nadie@example.com"}, fallos_temporales=2) as smtp:
+        ... smtp.puerto, smtp.mensajes, smtp.conexiones, smtp.logins
+"""
+import socketserver
+import threading
+import time
+from email import message_from_bytes, policy
+from typing import List, Optional, Set
+
+
+class _Sesion(socketserver.StreamRequestHandler):
+    server: "_Servidor"
+
+    def _responder(self, linea: str) -> None:
+        self.wfile.write(linea.encode() + b"\r\n")
+
+    def _leer(self) -> Optional[str]:
+        linea = self.rfile.readline()
+        return linea.decode().rstrip("\r\n") if linea else None
+
+    def handle(self) -> None:
+        stub = self.server.stub
+        stub._anotar("conexiones")
+        time.sleep(stub.latencia_sesion / 2)
+        self._responder("220 stub ESMTP")
+        remitente, destinatarios = None, []
+        while (linea := self._leer()) is not None:
+            comando = linea[:4].upper()
+            if comando in ("EHLO", "HELO"):
+                self.wfile.write(b"250-stub\r\n250-AUTH PLAIN LOGIN\r\n250 OK\r\n")
+            elif comando == "AUTH":
+                if linea.upper().startswith("AUTH LOGIN"):
+                    self._responder("334 VXNlcm5hbWU6")
+                    self._leer()
+                    self._responder("334 UGFzc3dvcmQ6")
+                    self._leer()
+                time.sleep(stub.latencia_sesion / 2)
+                stub._anotar("logins")
+                self._responder("235 Authentication successful")
+            elif comando == "MAIL":
+                remitente, destinatarios = linea.split(":", 1)[1].strip(" <>"), []
+                self._responder("250 OK")
+            elif comando == "RCPT":
+                destinatario = linea.split(":", 1)[1].strip(" <>")
+                if destinatario in stub.rechazar:
+                    self._responder("550 No such user")
+                else:
+                    destinatarios.append(destinatario)
+                    self._responder("250 OK")
+            elif comando == "DATA":
+                self._responder("354 End data with <CR><LF>.<CR><LF>")
+                lineas = []
+                while (linea := self.rfile.readline()) not in (b".\r\n", b""):
+                    lineas.append(linea[1:] if linea.startswith(b"..") else linea)
+                if stub._fallo_temporal():
+                    self._responder("451 Try again later")
+                else:
+                    stub._guardar(remitente, destinatarios, b"".join(lineas))
+                    self._responder("250 OK")
+            elif comando in ("RSET", "NOOP"):
+                self._responder("250 OK")
+            elif comando == "QUIT":
+                self._responder("221 Bye")
+                return
+            else:
+                self._responder("502 Command not implemented")
+
+
+class _Servidor(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ServidorSMTP:
+    def __init__(self, rechazar: Set[str] = frozenset(), fallos_temporales: int = 0, latencia_sesion: float = 0.0):
+        self.rechazar = set(rechazar)
+        self.fallos_temporales = fallos_temporales
+        self.latencia_sesion = latencia_sesion
+        self.mensajes: List[dict] = []
+        self.conexiones = 0
+        self.logins = 0
+        self._lock = threading.Lock()
+        self._servidor = _Servidor(("127.0.0.1", 0), _Sesion)
+        self._servidor.stub = self
+        self.puerto = self._servidor.server_address[1]
+
+    def _anotar(self, contador: str) -> None:
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def _fallo_temporal(self) -> bool:
+        with self._lock:
+            if self.fallos_temporales > 0:
+                self.fallos_temporales -= 1
+                return True
+            return False
+
+    def _guardar(self, remitente: str, destinatarios: List[str], datos: bytes) -> None:
+        mensaje = message_from_bytes(datos, policy=policy.default)
+        with self._lock:
+            self.mensajes.append({
+                "de": remitente,
+                "para": destinatarios,
+                "asunto": str(mensaje["Subject"]),
+                "partes": {parte.get_content_type(): parte.get_content() for parte in mensaje.iter_parts()},
+            })
+
+    def __enter__(self) -> "ServidorSMTP":
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
@@ -0,0 +1,216 @@
+import io
+import os
+
+import httpx
+import pytest
+from sqlalchemy import select
+from PIL import Image
+
+from app.main import app
+from app.database.db import SessionLocal
+from app.models.blob import Blob, BlobVariante
+from app.models.socio import Socio
+from app.models.documentacion_reglamentaria import DocumentacionReglamentaria
+from app.services.blob_service import BlobService
+from app.utils.blob_store import BlobStore, LocalBlobStore, blob_store
+
+
+@pytest.fixture(autouse=True)
+def almacen_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "directorio", tmp_path / "blobs")
+    return tmp_path / "blobs"
+
+
+def _crear_socios(crear_club, num_socios: int, foto_en_bd: bytes = None):
+    """Superadmin con N socios en un club; con foto_en_bd, la foto va en la columna antigua"""
+    club = crear_club("store", rol_creador=None, superadmin=True, nombre="Club Almacén")
+    with SessionLocal() as db:
+        socios = [
+            Socio(
+                club_id=club.id,
+                usuario_id=club.usuario_id,
+                nombre=f"Socio {i}",
+                email=f"socio-{i}-{club.emails[0]}",
+                foto_carnet_blob=foto_en_bd,
+                foto_carnet_tamano=len(foto_en_bd) if foto_en_bd else None,
+                foto_carnet_mime="image/jpeg" if foto_en_bd else None
+            )
+            for i in range(num_socios)
+        ]
+        db.add_all(socios)
+        db.commit()
+        return [s.id for s in socios], club.usuario_id, club.headers
+
+
+def _jpeg(lado: int) -> bytes:
+    """JPEG de ruido (no se comprime: ocupa casi lo mismo tras normalizarlo)"""
+    salida = io.BytesIO()
+    Image.frombytes("RGB", (lado, lado), os.urandom(lado * lado * 3)).save(salida, "JPEG", quality=95)
+    return salida.getvalue()
+
+
+def _leer(sha256: str) -> bytes:
+    with blob_store.abrir(sha256) as f:
+        return f.read()
+
+
+def _referencias(sha256: str):
+    with SessionLocal() as db:
+        blob = db.get(Blob, sha256)
+        return blob.referencias if blob else None
+
+
+def _variante(sha256: str, variante: str) -> str:
+    with SessionLocal() as db:
+        return db.get(BlobVariante, (sha256, variante)).sha256
+
+
+def _socio(socio_id: int) -> Socio:
+    with SessionLocal() as db:
+        return db.get(Socio, socio_id)
+
+
+async def _subir_foto(client, socio_id, datos, headers):
+    resp = await client.post(
+        f"/api/socios/{socio_id}/foto",
+        files={"file": ("foto.jpg", datos, "image/jpeg")},
+        headers=headers
+    )
+    assert resp.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_fotos_iguales_se_guardan_una_vez_y_se_sirven_desde_disco(crear_club):
+    socio_ids, _, headers = _crear_socios(crear_club, 2)
+    foto = _jpeg(300)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for socio_id in socio_ids:
+            await _subir_foto(client, socio_id, foto, headers)
+
+        socio = _socio(socio_ids[0])
+        guardada = _leer(socio.foto_carnet_sha256)
+        assert socio.foto_carnet_tamano == len(guardada)
+        assert _socio(socio_ids[1]).foto_carnet_sha256 == socio.foto_carnet_sha256
+        # Un único archivo en disco (más sus miniaturas), con dos referencias,
+        # y nada dentro de la BD
+        with SessionLocal() as db:
+            miniaturas = db.scalars(
+                select(BlobVariante.sha256).where(BlobVariante.sha256_origen == socio.foto_carnet_sha256)
+            ).all()
+        assert len(miniaturas) == 3
+        assert set(blob_store.listar()) == {socio.foto_carnet_sha256, *miniaturas}
+        assert _referencias(socio.foto_carnet_sha256) == 2
+        with SessionLocal() as db:
+            assert db.query(Socio).filter(Socio.id.in_(socio_ids), Socio.foto_carnet_blob.isnot(None)).count() == 0
+
+        resp = await client.get(f"/api/socios/{socio_ids[0]}/foto")
+        assert resp.status_code == 200
+        assert resp.content == guardada
+        assert resp.headers["content-length"] == str(len(guardada))
+        assert resp.headers["content-type"] == "image/jpeg"
+
+        resp = await client.get(f"/api/socios/?club_id={socio.club_id}", headers=headers)
+        assert all(s["tiene_foto"] for s in resp.json())
+
+
+@pytest.mark.anyio
+async def test_reemplazar_y_borrar_liberan_referencias_y_gc_limpia(crear_club):
+    socio_ids, _, headers = _crear_socios(crear_club, 2)
+    compartida, nueva = _jpeg(32), _jpeg(32)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for socio_id in socio_ids:
+            await _subir_foto(client, socio_id, compartida, headers)
+        sha_compartida = _socio(socio_ids[0]).foto_carnet_sha256
+
+        await _subir_foto(client, socio_ids[0], nueva, headers)
+        sha_nueva = _socio(socio_ids[0]).foto_carnet_sha256
+        assert _referencias(sha_compartida) == 1
+
+        resp = await client.delete(f"/api/socios/{socio_ids[1]}", headers=headers)
+        assert resp.status_code == 204
+        assert _referencias(sha_compartida) == 0
+
+    # Dentro del margen no se borra nada; sin margen se va el archivo sin referencias
+    with SessionLocal() as db:
+        BlobService.recolectar(db)
+        assert blob_store.existe(sha_compartida)
+        sin_referencias, _ = BlobService.recolectar(db, gracia_segundos=0)
+
+    assert sin_referencias >= 1
+    assert not blob_store.existe(sha_compartida)
+    assert _referencias(sha_compartida) is None
+    assert blob_store.existe(sha_nueva)
+    assert _referencias(sha_nueva) == 1
+
+    # Las miniaturas de la foto borrada quedan sin referencias y caen en la siguiente pasada
+    with SessionLocal() as db:
+        assert db.get(BlobVariante, (sha_compartida, "64.webp")) is None
+        assert db.get(BlobVariante, (sha_nueva, "64.webp")) is not None
+        BlobService.recolectar(db, gracia_segundos=0)
+    assert set(blob_store.listar()) == {sha_nueva, *(
+        _variante(sha_nueva, f"{lado}.webp") for lado in (64, 256, 512)
+    )}
+
+
+def test_gc_borra_archivos_huerfanos():
+    huerfano = "ab" * 32
+    blob_store.escribir(huerfano, b"sin fila en blobs")
+
+    with SessionLocal() as db:
+        assert BlobService.recolectar(db)[1] == 0
+        assert BlobService.recolectar(db, gracia_segundos=0)[1] == 1
+    assert not blob_store.existe(huerfano)
+
+
+@pytest.mark.anyio
+async def test_migracion_por_lotes_mueve_los_archivos_de_la_bd(crear_club):
+    foto = os.urandom(50_000)
+    pdf = b"%PDF-1.4 " + os.urandom(10_000)
+    socio_ids, usuario_id, headers = _crear_socios(crear_club, 5, foto_en_bd=foto)
+    with SessionLocal() as db:
+        db.add(DocumentacionReglamentaria(
+            usuario_id=usuario_id,
+            rc_archivo=pdf,
+            rc_archivo_tamano=len(pdf),
+            rc_archivo_nombre="rc.pdf",
+            rc_archivo_mime="application/pdf"
+        ))
+        db.commit()
+
+    with SessionLocal() as db:
+        movidos = BlobService.migrar(db, lote=2, pausa=0)
+        assert movidos >= 6
+        assert dict(BlobService.pendientes(db)) == {
+            "socios.foto_carnet_blob": 0,
+            "documentacion_reglamentaria.rc_archivo": 0,
+            "documentacion_reglamentaria.carnet_archivo": 0,
+        }
+
+    socio = _socio(socio_ids[0])
+    assert socio.foto_carnet_tamano == len(foto)
+    assert _referencias(socio.foto_carnet_sha256) >= 5
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(f"/api/socios/{socio_ids[-1]}/foto")
+        assert resp.content == foto
+        resp = await client.get(f"/api/documentacion/usuarios/{usuario_id}/rc", headers=headers)
+        assert resp.status_code == 200
+        assert resp.content == pdf
+        assert resp.headers["content-disposition"] == 'attachment; filename="rc.pdf"'
+
+
+def test_un_backend_incompleto_no_se_puede_instanciar(tmp_path):
+    class SoloEscribe(BlobStore):
+        def escribir(self, sha256, datos):
+            pass
+
+    with pytest.raises(TypeError, match="abrir"):
+        SoloEscribe()
+    with pytest.raises(TypeError):
+        BlobStore()
+    assert LocalBlobStore(str(tmp_path)).ruta_local("ab" * 32) is not None
@@ -0,0 +1,121 @@
+import math
+import os
+import re
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.main import app
+from app.config import settings
+from app.database.db import SessionLocal, engine
+from app.models.socio import Socio
+from app.models.documentacion_reglamentaria import DocumentacionReglamentaria
+
+FOTO = os.urandom(3 * settings.blob_stream_chunk_size + 123)
+
+
+def _crear_socios(crear_club, num_socios: int):
+    """Club con N socios con foto y un PDF de seguro RC guardados dentro de la BD
+    (formato anterior al almacén de archivos); devuelve (club_id, socio_id, usuario_id, headers)"""
+    club = crear_club("blobs", nombre="Club Blobs")
+    with SessionLocal() as db:
+        socios = [
+            Socio(
+                club_id=club.id,
+                usuario_id=club.usuario_id,
+                nombre=f"Socio {i}",
+                email=f"socio-{i}-{club.emails[0]}",
+                foto_carnet_blob=FOTO,
+                foto_carnet_tamano=len(FOTO),
+                foto_carnet_mime="image/png",
+                foto_carnet_fecha_subida=datetime.now()
+            )
+            for i in range(num_socios)
+        ]
+        db.add_all(socios)
+        db.add(DocumentacionReglamentaria(
+            usuario_id=club.usuario_id,
+            rc_numero="RC-1",
+            rc_archivo=FOTO,
+            rc_archivo_tamano=len(FOTO),
+            rc_archivo_nombre="rc.pdf",
+            rc_archivo_mime="application/pdf"
+        ))
+        db.commit()
+        return club.id, socios[0].id, club.usuario_id, club.headers
+
+
+class _Sentencias:
+    def __init__(self):
+        self.sql = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.sql.append(statement)
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self)
+
+
+def _lee_blob_entero(sql: str, columna: str) -> bool:
+    """El SELECT trae la columna completa (no solo length()/substr() sobre ella)"""
+    return re.search(rf"(?<!length\()(?<!substr\(){re.escape(columna)}\b", sql) is not None
+
+
+@pytest.mark.anyio
+async def test_listados_y_metadatos_no_leen_los_blobs(crear_club):
+    club_id, socio_id, usuario_id, headers = _crear_socios(crear_club, 5)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        with _Sentencias() as sentencias:
+            resp = await client.get(f"/api/socios/?club_id={club_id}", headers=headers)
+            assert resp.status_code == 200
+            assert len(resp.json()) == 5
+            assert all(s["tiene_foto"] for s in resp.json())
+
+            resp = await client.get(f"/api/socios/{socio_id}", headers=headers)
+            assert resp.json()["tiene_foto"] is True
+
+            resp = await client.get(f"/api/documentacion/usuarios/{usuario_id}", headers=headers)
+            assert resp.status_code == 200
+            assert resp.json()["rc_tiene_archivo"] is True
+            assert resp.json()["carnet_tiene_archivo"] is False
+
+    consultas = [s for s in sentencias.sql if "FROM socios" in s or "FROM documentacion_reglamentaria" in s]
+    assert consultas
+    assert not any(_lee_blob_entero(s, "socios.foto_carnet_blob") for s in consultas)
+    assert not any(_lee_blob_entero(s, "documentacion_reglamentaria.rc_archivo") for s in consultas)
+
+
+@pytest.mark.anyio
+async def test_descargas_se_envian_por_trozos_con_content_length(crear_club):
+    _, socio_id, usuario_id, headers = _crear_socios(crear_club, 1)
+    trozos_esperados = math.ceil(len(FOTO) / settings.blob_stream_chunk_size)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        with _Sentencias() as sentencias:
+            resp = await client.get(f"/api/socios/{socio_id}/foto")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "image/png"
+        assert resp.headers["content-length"] == str(len(FOTO))
+        assert resp.content == FOTO
+
+        # Un substr() por trozo y nunca la columna completa
+        assert sum("substr(" in s for s in sentencias.sql) == trozos_esperados
+        assert not any(_lee_blob_entero(s, "socios.foto_carnet_blob") for s in sentencias.sql)
+
+        resp = await client.get(f"/api/documentacion/usuarios/{usuario_id}/rc", headers=headers)
+        assert resp.status_code == 200
+        assert resp.headers["content-length"] == str(len(FOTO))
+        assert resp.headers["content-disposition"] == 'attachment; filename="rc.pdf"'
+        assert resp.content == FOTO
+
+        resp = await client.get(f"/api/documentacion/usuarios/{usuario_id}/carnet", headers=headers)
+        assert resp.status_code == 404
@@ -0,0 +1,122 @@
+
+import httpx
+import pytest
+
+from app.main import app
+from app.database.db import SessionLocal
+from app.models.noticia import Noticia
+from app.models.comentario import Comentario
+from app.services.busqueda_service import BusquedaService
+from app.utils.security import AuthUtils
+
+
+def _sembrar(crear_club):
+    """Dos clubes con noticias; el usuario solo es miembro del primero"""
+    club = crear_club("busq", rol_creador="miembro", nombre="Club Búsqueda 0")
+    otro_club = crear_club("busq", nombre="Club Búsqueda 1")
+    autor_id = club.usuario_id
+    with SessionLocal() as db:
+        def noticia(club_id, titulo, contenido):
+            n = Noticia(club_id=club_id, titulo=titulo, contenido=contenido, autor_id=autor_id, estado="publicada")
+            db.add(n)
+            return n
+
+        piscina = noticia(club.id, "Entrenamientos de natación en la piscina municipal",
+                          "Los sábados por la mañana hay entrenamiento abierto para todos los socios.")
+        cena = noticia(club.id, "Cena de Navidad",
+                       "Reservad la fecha: la cena será en el restaurante de siempre. <b>Traed</b> postre.")
+        noticia(otro_club.id, "Natación en otro club", "Este club no debe aparecer en los resultados.")
+        db.flush()
+        comentario = Comentario(contenido="¿Después de la cena vamos a la piscina a nadar?",
+                                autor_id=autor_id, noticia_id=cena.id)
+        db.add(comentario)
+        db.commit()
+        return club.id, piscina.id, cena.id, comentario.id, club.headers
+
+
+def test_consulta_fts_no_deja_pasar_sintaxis():
+    assert BusquedaService.consulta_fts('natación "piscina" OR NEAR(a b)') == '"natación"* "piscina"* "or"* "near"*'
+    assert BusquedaService.consulta_fts("de la y el") is None
+    assert BusquedaService.consulta_fts("  *  ") is None
+    assert BusquedaService.consulta_fts("jornada 3 a") == '"jornada"* "3"*'
+
+
+@pytest.mark.anyio
+async def test_busqueda_por_relevancia_sin_acentos_y_con_fragmentos(crear_club):
+    club_id, piscina_id, cena_id, comentario_id, headers = _sembrar(crear_club)
+    url = f"/api/clubes/{club_id}/noticias/buscar"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Sin tilde, en singular y en mayúsculas
+        resp = await client.get(url, params={"q": "NATACION entrenamiento"}, headers=headers)
+        assert resp.status_code == 200
+        resultados = resp.json()
+        assert [r["noticia_id"] for r in resultados] == [piscina_id]
+        assert "<mark>natación</mark>" in resultados[0]["titulo"]
+        assert "<mark>Entrenamientos</mark>" in resultados[0]["titulo"]
+
+        # La noticia y el comentario que la mencionan; el título pesa más
+        resp = await client.get(url, params={"q": "piscina"}, headers=headers)
+        resultados = resp.json()
+        assert [(r["noticia_id"], r["comentario_id"]) for r in resultados] == [
+            (piscina_id, None), (cena_id, comentario_id)
+        ]
+        assert resultados[0]["puntuacion"] > resultados[1]["puntuacion"]
+        assert resultados[1]["titulo"] == "Cena de Navidad"
+        assert "<mark>piscina</mark>" in resultados[1]["fragmento"]
+
+        # El HTML del contenido llega escapado
+        resp = await client.get(url, params={"q": "postre"}, headers=headers)
+        assert "&lt;b&gt;Traed&lt;/b&gt; <mark>postre</mark>" in resp.json()[0]["fragmento"]
+
+        resp = await client.get(url, params={"q": "de la"}, headers=headers)
+        assert resp.status_code == 400
+
+        # Solo miembros del club
+        otro = AuthUtils.create_access_token({"user_id": 10**9, "email": "nadie@example.com"})
+        resp = await client.get(url, params={"q": "piscina"}, headers={"Authorization": f"Bearer {otro}"})
+        assert resp.status_code in (401, 403)
+
+
+@pytest.mark.anyio
+async def test_el_indice_sigue_a_las_escrituras(crear_club):
+    club_id, piscina_id, cena_id, comentario_id, headers = _sembrar(crear_club)
+    url = f"/api/clubes/{club_id}/noticias/buscar"
+
+    with SessionLocal() as db:
+        db.get(Noticia, cena_id).titulo = "Cena de fin de temporada"
+        db.delete(db.get(Comentario, comentario_id))
+        db.add(Comentario(contenido="Yo llevo turrón", autor_id=db.get(Noticia, cena_id).autor_id, noticia_id=cena_id))
+        db.delete(db.get(Noticia, piscina_id))
+        db.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def buscar(q):
+            resp = await client.get(url, params={"q": q}, headers=headers)
+            assert resp.status_code == 200
+            return [(r["noticia_id"], r["comentario_id"] is not None) for r in resp.json()]
+
+        assert await buscar("navidad") == []
+        assert await buscar("temporada") == [(cena_id, False)]
+        assert await buscar("piscina") == []
+        assert await buscar("turron") == [(cena_id, True)]
+
+
+@pytest.mark.anyio
+async def test_el_id_del_club_no_cuenta_como_palabra(crear_club):
+    club_id, piscina_id, _, _, headers = _sembrar(crear_club)
+    with SessionLocal() as db:
+        temporada = Noticia(club_id=club_id, titulo=f"Temporada {club_id}", contenido="Calendario completo.",
+                            autor_id=db.get(Noticia, piscina_id).autor_id, estado="publicada")
+        db.add(temporada)
+        db.commit()
+        temporada_id = temporada.id
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(f"/api/clubes/{club_id}/noticias/buscar", params={"q": str(club_id)}, headers=headers)
+
+    assert resp.status_code == 200
+    assert [(r["noticia_id"], r["comentario_id"]) for r in resp.json()] == [(temporada_id, None)]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.main import app
+from app.services.openclaw_service import openclaw_service
+from tests.openclaw_stub import TOKEN, GatewayOpenClaw
+
+
+@pytest.fixture
+async def gateway(request, monkeypatch):
+    opciones = getattr(request, "param", {})
+    async with GatewayOpenClaw(trozos=5, pausa_trozos=0.1, **opciones) as gateway:
+        monkeypatch.setattr(openclaw_service, "ws_url", gateway.url)
+        monkeypatch.setattr(openclaw_service, "auth_mode", "password")
+        monkeypatch.setattr(openclaw_service, "password", TOKEN)
+        yield gateway
+        await openclaw_service.close()
+
+
+def _eventos(texto: str):
+    """[(evento, datos)] de un cuerpo text/event-stream"""
+    eventos = []
+    for bloque in texto.strip().split("\n\n"):
+        campos = dict(linea.split(": ", 1) for linea in bloque.splitlines())
+        eventos.append((campos["event"], json.loads(campos["data"])))
+    return eventos
+
+
+# Con pausa_final el gateway envía el fin del agente antes del final con los tokens
+@pytest.mark.anyio
+@pytest.mark.parametrize("gateway", [{}, {"pausa_final": 0.05}], indirect=True)
+async def test_stream_envia_cada_trozo_y_el_uso(crear_club, gateway):
+    headers = crear_club("chat").headers
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/api/chat/openclaw/stream", headers=headers,
+            json={"club_id": 3, "messages": [{"role": "user", "content": "hola"}]},
+        )
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    eventos = _eventos(resp.text)
+    deltas = [datos["text"] for evento, datos in eventos if evento == "delta"]
+    assert len(deltas) == 5
+    assert "".join(deltas) == "Eco: hola"
+    assert eventos[-1] == ("done", {
+        "reply": "Eco: hola",
+        "usage": {"prompt_tokens": 4, "completion_tokens": 9, "total_tokens": 13},
+    })
+
+
+@pytest.mark.anyio
+async def test_desconectar_el_cliente_cancela_el_chat_en_el_gateway(crear_club, gateway):
+    club = crear_club("chat")
+    usuario_id, headers = club.usuario_id, club.headers
+    cuerpo = json.dumps({"club_id": 3, "messages": [{"role": "user", "content": "una respuesta larga"}]}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/api/chat/openclaw/stream", "raw_path": b"/api/chat/openclaw/stream", "query_string": b"",
+        "root_path": "", "server": ("test", 80), "client": ("127.0.0.1", 1234),
+        "headers": [
+            (b"host", b"test"), (b"content-type", b"application/json"),
+            (b"content-length", str(len(cuerpo)).encode()),
+            (b"authorization", headers["Authorization"].encode()),
+        ],
+    }
+    primer_trozo = asyncio.Event()
+    enviado = []
+
+    async def receive():
+        if not enviado:
+            enviado.append(True)
+            return {"type": "http.request", "body": cuerpo, "more_body": False}
+        # El navegador se va en cuanto llega el primer trozo
+        await primer_trozo.wait()
+        return {"type": "http.disconnect"}
+
+    recibido = []
+
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.body" and mensaje.get("body"):
+            recibido.append(mensaje["body"].decode())
+            primer_trozo.set()
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    await asyncio.sleep(0.1)
+
+    clave = f"agent:main:club_3_user_{usuario_id}"
+    assert len(recibido) == 1 and recibido[0].startswith("event: delta")
+    assert gateway.abortados == [clave]
+    assert gateway.historial[clave] == []
+
+    # La sesión queda libre para el siguiente mensaje
+    respuesta = await openclaw_service.get_response(
+        [{"role": "user", "content": "otra"}], {"user_id": usuario_id, "club_id": 3}
+    )
+    assert respuesta == "Eco: otra"
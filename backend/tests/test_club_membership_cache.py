@@ -0,0 +1,124 @@
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.main import app
+from app.database.db import SessionLocal, async_engine
+from app.models.usuario import Usuario
+
+PASSWORD = "Password123!"
+
+
+async def _register_and_login(client, superadmin=False):
+    email = f"membresia-{uuid.uuid4().hex[:8]}@example.com"
+    resp = await client.post(
+        "/api/auth/registro",
+        json={"nombre_completo": "Membership User", "email": email, "password": PASSWORD}
+    )
+    assert resp.status_code == 200
+
+    if superadmin:
+        with SessionLocal() as db:
+            db.query(Usuario).filter(Usuario.email == email).update({"es_superadmin": True})
+            db.commit()
+
+    resp = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    assert resp.status_code == 200
+    headers = {"Authorization": f"Bearer {resp.json()['tokens']['access_token']}"}
+    usuario_id = (await client.get("/api/auth/usuarios/me", headers=headers)).json()["id"]
+    return headers, email, usuario_id
+
+
+async def _club_con_miembro(client):
+    """Crea un club con su administrador y un miembro que entra por invitación"""
+    admin_headers, _, _ = await _register_and_login(client, superadmin=True)
+    resp = await client.post(
+        "/api/clubes",
+        json={"nombre": "Club Membresias", "slug": f"membresias-{uuid.uuid4().hex[:8]}"},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200
+    club_id = resp.json()["id"]
+
+    miembro_headers, miembro_email, miembro_id = await _register_and_login(client)
+    resp = await client.post(
+        f"/api/clubes/{club_id}/miembros/invitar",
+        json={"email": miembro_email, "rol": "miembro"},
+        headers=admin_headers
+    )
+    token = resp.json()["invitaciones"][0]["token"]
+    resp = await client.post(f"/api/auth/invitaciones/aceptar/{token}", headers=miembro_headers)
+    assert resp.status_code == 200
+
+    return club_id, admin_headers, miembro_headers, miembro_id
+
+
+class _ContadorMembresias:
+    """Cuenta las consultas contra la tabla miembro_club"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if "FROM miembro_club" in statement:
+            self.total += 1
+
+
+@pytest.mark.anyio
+async def test_rutas_del_club_no_consultan_membresias_cacheadas():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        club_id, _, miembro_headers, _ = await _club_con_miembro(client)
+        assert (await client.get(f"/api/clubes/{club_id}", headers=miembro_headers)).status_code == 200
+
+        contador = _ContadorMembresias()
+        event.listen(async_engine.sync_engine, "before_cursor_execute", contador)
+        try:
+            for path in ("", "/noticias", "/eventos", "/productos"):
+                resp = await client.get(f"/api/clubes/{club_id}{path}", headers=miembro_headers)
+                assert resp.status_code == 200
+            resp = await client.get(f"/api/clubes/mi-rol/{club_id}", headers=miembro_headers)
+            assert resp.json() == {"rol": "miembro"}
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", contador)
+
+    assert contador.total == 0
+
+
+@pytest.mark.anyio
+async def test_cambios_de_membresia_invalidan_la_cache():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        club_id, admin_headers, miembro_headers, miembro_id = await _club_con_miembro(client)
+        noticia = {"titulo": "Noticia del miembro", "contenido": "Contenido de la noticia"}
+
+        resp = await client.post(f"/api/clubes/{club_id}/noticias", json=noticia, headers=miembro_headers)
+        assert resp.status_code == 403
+
+        # Ascenso a administrador: efecto inmediato sin esperar al TTL
+        resp = await client.put(
+            f"/api/clubes/{club_id}/miembros/{miembro_id}/rol",
+            json={"rol": "administrador"},
+            headers=admin_headers
+        )
+        assert resp.status_code == 200
+        resp = await client.post(f"/api/clubes/{club_id}/noticias", json=noticia, headers=miembro_headers)
+        assert resp.status_code == 200
+
+        # Desactivado: pierde el acceso a lo que exige membresía activa
+        resp = await client.put(
+            f"/api/clubes/{club_id}/miembros/{miembro_id}/estado",
+            json={"estado": "inactivo"},
+            headers=admin_headers
+        )
+        assert resp.status_code == 200
+        resp = await client.get(f"/api/clubes/{club_id}/instalacion/password", headers=miembro_headers)
+        assert resp.status_code == 403
+
+        # Expulsado: pierde el acceso al club
+        resp = await client.delete(f"/api/clubes/{club_id}/miembros/{miembro_id}", headers=admin_headers)
+        assert resp.status_code == 200
+        resp = await client.get(f"/api/clubes/{club_id}", headers=miembro_headers)
+        assert resp.status_code == 403
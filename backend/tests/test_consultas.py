@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select
+
+from app.main import app
+from app.database.db import SessionLocal
+from app.middleware.consultas import ConsultasMiddleware, observar_peticiones
+from app.models.usuario import Usuario
+from app.models.noticia import Noticia
+from app.models.comentario import Comentario
+from app.models.evento import Evento
+from app.models.socio import Socio
+
+
+def _sembrar(crear_club, elementos: int):
+    """Club con un administrador y `elementos` miembros, noticias, comentarios, eventos y socios"""
+    club = crear_club("cons", elementos, nombre="Club Consultas")
+    with SessionLocal() as db:
+        noticias = [
+            Noticia(club_id=club.id, titulo=f"Noticia {i}", contenido="...", autor_id=u, estado="publicada")
+            for i, u in enumerate(club.usuarios)
+        ]
+        db.add_all(noticias)
+        db.flush()
+        db.add_all(Comentario(contenido="Bien", autor_id=u, noticia_id=noticias[0].id) for u in club.usuarios)
+        db.add_all(
+            Evento(club_id=club.id, nombre=f"Evento {i}", descripcion="...", fecha_inicio=datetime.now() + timedelta(days=i))
+            for i in range(elementos)
+        )
+        db.add_all(
+            Socio(club_id=club.id, usuario_id=u, nombre=f"Usuario {i}", email=email)
+            for i, (u, email) in enumerate(zip(club.usuarios, club.emails))
+        )
+        db.commit()
+        return club.id, noticias[0].id, club.headers
+
+
+@pytest.mark.anyio
+async def test_server_timing_cuenta_las_consultas_de_la_peticion(crear_club):
+    club_id, _, headers = _sembrar(crear_club, 3)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        with observar_peticiones() as registros:
+            resp = await client.get(f"/api/clubes/{club_id}/noticias", headers=headers)
+
+    assert resp.status_code == 200
+    registro, = registros
+    assert registro.ruta == f"/api/clubes/{club_id}/noticias"
+    assert registro.total > 0
+    db, total = resp.headers.get_list("Server-Timing")
+    assert db.startswith("db;dur=") and db.endswith(f';desc="{registro.describir()}"')
+    assert total.startswith("app;dur=")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("ruta, maximo", [
+    ("/api/clubes", 2),
+    ("/api/clubes/{club_id}/noticias", 3),
+    ("/api/clubes/{club_id}/noticias/{noticia_id}/comentarios", 4),
+    ("/api/clubes/{club_id}/eventos", 2),
+    ("/api/clubes/{club_id}/miembros", 3),
+    ("/api/socios/?club_id={club_id}", 2),
+    ("/api/clubes/{club_id}/contenido-reciente", 5),
+])
+async def test_las_consultas_no_crecen_con_el_listado(crear_club, ruta, maximo, presupuesto_consultas):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for elementos in (2, 12):
+            club_id, noticia_id, headers = _sembrar(crear_club, elementos)
+            url = ruta.format(club_id=club_id, noticia_id=noticia_id)
+            # La primera petición del usuario llena la caché de sesión
+            await client.get("/api/clubes", headers=headers)
+            with presupuesto_consultas(maximo):
+                resp = await client.get(url, headers=headers)
+            assert resp.status_code == 200
+            assert len(resp.json()) >= min(elementos, 1)
+
+
+@pytest.mark.anyio
+async def test_avisa_de_consultas_repetidas_como_posible_n_mas_uno(caplog, presupuesto_consultas):
+    prueba = FastAPI()
+    prueba.add_middleware(ConsultasMiddleware, umbral_repetidas=5)
+
+    @prueba.get("/uno-por-uno")
+    async def uno_por_uno(veces: int):
+        with SessionLocal() as db:
+            for i in range(veces):
+                db.scalar(select(Usuario.id).filter(Usuario.id == i))
+        return {}
+
+    transport = httpx.ASGITransport(app=prueba)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        with caplog.at_level(logging.INFO, logger="app.middleware.consultas"):
+            await client.get("/uno-por-uno", params={"veces": 4})
+            assert not [r for r in caplog.records if r.levelno == logging.WARNING]
+            await client.get("/uno-por-uno", params={"veces": 6})
+
+    avisos = [r.getMessage() for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(avisos) == 1
+    assert avisos[0].startswith("Posible N+1 en GET /uno-por-uno: 6 veces la misma consulta: SELECT usuarios.id")
+    assert any("GET /uno-por-uno 200: 6 consultas SQL" in r.getMessage() for r in caplog.records)
+
+    # El presupuesto de los tests usa el mismo registro
+    with pytest.raises(pytest.fail.Exception, match="Presupuesto de 3 consultas superado"):
+        with presupuesto_consultas(3):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await client.get("/uno-por-uno", params={"veces": 4})
+
+
+def test_umbral_cero_no_toma_el_valor_por_defecto():
+    assert ConsultasMiddleware(FastAPI(), umbral_repetidas=0).umbral_repetidas == 0
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.database.db import SessionLocal
+from app.main import app
+from app.middleware.consultas_lentas import consultas_lentas, forma_parametros, normalizar
+from app.models.evento import Evento
+
+
+def _usuario(crear_club, es_superadmin: bool = False):
+    club = crear_club("lento", superadmin=es_superadmin, nombre="Club Lento")
+    with SessionLocal() as db:
+        db.add(Evento(club_id=club.id, nombre="Vuelo", descripcion="...", fecha_inicio=datetime.now() + timedelta(days=1)))
+        db.commit()
+    return club.id, club.headers
+
+
+def test_huella_y_forma_de_parametros():
+    assert normalizar("SELECT *\n  FROM t WHERE a = 'x''y' AND b IN (1, 2, 3) AND c = ?") == \
+        "SELECT * FROM t WHERE a = ? AND b IN (?, ...) AND c = ?"
+    assert normalizar("SELECT anon_1.id FROM t WHERE id IN (?, ?) LIMIT 10") == \
+        normalizar("SELECT anon_1.id FROM t WHERE id IN (?, ?, ?, ?) LIMIT 20")
+    assert forma_parametros((1, "a", None)) == "(int, str, NoneType)"
+    assert forma_parametros(tuple(range(8))) == "(int x 8)"
+    assert forma_parametros([(1, "a"), (2, "b")], executemany=True) == "2 x (int, str)"
+
+
+@pytest.mark.anyio
+async def test_consultas_lentas_con_plan_y_ruta(crear_club, monkeypatch):
+    club_id, headers = _usuario(crear_club)
+    _, headers_admin = _usuario(crear_club, es_superadmin=True)
+    # Con umbral 0 todas las consultas cuentan como lentas
+    monkeypatch.setattr(settings, "sql_slow_query_ms", 0)
+    consultas_lentas.reiniciar()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.get(f"/api/clubes/{club_id}/eventos", headers=headers)).status_code == 200
+        monkeypatch.setattr(settings, "sql_slow_query_ms", 10_000)
+        prohibido = await client.get("/api/admin/consultas-lentas", headers=headers)
+        resp = await client.get("/api/admin/consultas-lentas", params={"orden": "veces", "limit": 50}, headers=headers_admin)
+
+    assert prohibido.status_code == 403
+    assert resp.status_code == 200
+    cuerpo = resp.json()
+    assert cuerpo["umbral_ms"] == 10_000
+    eventos = [c for c in cuerpo["consultas"] if c["sql"].startswith("SELECT eventos.")]
+    assert eventos, [c["sql"] for c in cuerpo["consultas"]]
+    consulta = eventos[0]
+    assert consulta["llamadores"] == {"GET /api/clubes/{club_id}/eventos": 1}
+    assert consulta["parametros"].startswith("(int")
+    assert any("ix_eventos_club_fecha_inicio" in linea for linea in consulta["plan"])
+    assert [c["veces"] for c in cuerpo["consultas"]] == sorted((c["veces"] for c in cuerpo["consultas"]), reverse=True)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.delete("/api/admin/consultas-lentas", headers=headers_admin)).status_code == 204
+    assert len(consultas_lentas) == 0
@@ -0,0 +1,218 @@
+import io
+import os
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from PIL import Image
+
+from app.main import app
+from app.config import settings
+from app.database.db import SessionLocal
+from app.models.socio import Socio
+from app.utils.blob_store import blob_store
+from app.utils.blobs import RangoNoSatisfacible, parsear_rango
+
+FOTO = os.urandom(150_000)
+
+
+def _jpeg_ruido(lado: int) -> bytes:
+    salida = io.BytesIO()
+    Image.frombytes("RGB", (lado, lado), os.urandom(lado * lado * 3)).save(salida, "JPEG", quality=95)
+    return salida.getvalue()
+
+
+# Una foto real: al subirla se guarda normalizada (unos 115 KB)
+FOTO_JPEG = _jpeg_ruido(400)
+
+
+@pytest.fixture(autouse=True)
+def almacen_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "directorio", tmp_path / "blobs")
+
+
+def _crear_socio(crear_club, foto_en_bd: bytes = None):
+    """Superadmin con un socio; con foto_en_bd, la foto va en la columna antigua de la BD"""
+    club = crear_club("cond", rol_creador=None, superadmin=True, nombre="Club Descargas")
+    with SessionLocal() as db:
+        socio = Socio(
+            club_id=club.id,
+            usuario_id=club.usuario_id,
+            nombre="Socio Descargas",
+            email=club.emails[0],
+            foto_carnet_blob=foto_en_bd,
+            foto_carnet_tamano=len(foto_en_bd) if foto_en_bd else None,
+            foto_carnet_mime="image/jpeg" if foto_en_bd else None,
+            foto_carnet_fecha_subida=datetime.utcnow() - timedelta(days=1) if foto_en_bd else None
+        )
+        db.add(socio)
+        db.commit()
+        return socio.id, club.headers
+
+
+async def _subir_foto(client, socio_id, headers) -> bytes:
+    """Sube FOTO_JPEG y devuelve lo que quedó guardado en el almacén"""
+    resp = await client.post(f"/api/socios/{socio_id}/foto", files={"file": ("f.jpg", FOTO_JPEG, "image/jpeg")}, headers=headers)
+    assert resp.status_code == 200
+    with SessionLocal() as db:
+        sha256 = db.get(Socio, socio_id).foto_carnet_sha256
+    with blob_store.abrir(sha256) as f:
+        return f.read()
+
+
+def test_parsear_rango():
+    assert parsear_rango(None, 100) is None
+    assert parsear_rango("bytes=0-9", 100) == (0, 9)
+    assert parsear_rango("bytes=90-", 100) == (90, 99)
+    assert parsear_rango("bytes=-10", 100) == (90, 99)
+    assert parsear_rango("bytes=50-500", 100) == (50, 99)
+    assert parsear_rango("bytes=-500", 100) == (0, 99)
+    # Varios rangos u otra unidad: se ignora y se sirve completo
+    assert parsear_rango("bytes=0-1,5-6", 100) is None
+    assert parsear_rango("items=0-1", 100) is None
+    assert parsear_rango("bytes=9-0", 100) is None
+    with pytest.raises(RangoNoSatisfacible):
+        parsear_rango("bytes=100-", 100)
+    with pytest.raises(RangoNoSatisfacible):
+        parsear_rango("bytes=-0", 100)
+
+
+@pytest.mark.anyio
+async def test_repetir_descargas_no_mueve_bytes_del_cuerpo(crear_club):
+    socio_id, headers = _crear_socio(crear_club)
+    url = f"/api/socios/{socio_id}/foto"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        foto = await _subir_foto(client, socio_id, headers)
+
+        resp = await client.get(url)
+        assert resp.status_code == 200
+        assert resp.content == foto
+        etag, last_modified = resp.headers["etag"], resp.headers["last-modified"]
+        with SessionLocal() as db:
+            assert etag == f'"{db.get(Socio, socio_id).foto_carnet_sha256}"'
+        assert resp.headers["cache-control"] == settings.cache_control_fotos
+        assert resp.headers["accept-ranges"] == "bytes"
+
+        bytes_cuerpo = 0
+        for condicion in ({"If-None-Match": etag}, {"If-None-Match": f'"otro", W/{etag}'},
+                          {"If-Modified-Since": last_modified}):
+            resp = await client.get(url, headers=condicion)
+            assert resp.status_code == 304
+            assert resp.headers["etag"] == etag
+            bytes_cuerpo += len(resp.content)
+        assert bytes_cuerpo == 0
+
+        # Un ETag distinto (la foto cambió) devuelve el archivo completo
+        resp = await client.get(url, headers={"If-None-Match": '"otro"'})
+        assert resp.status_code == 200
+        assert resp.content == foto
+
+
+@pytest.mark.anyio
+async def test_rangos_y_if_range(crear_club):
+    socio_id, headers = _crear_socio(crear_club)
+    url = f"/api/socios/{socio_id}/foto"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        foto = await _subir_foto(client, socio_id, headers)
+        total = len(foto)
+        etag = (await client.get(url, headers={"Range": "bytes=0-0"})).headers["etag"]
+
+        resp = await client.get(url, headers={"Range": "bytes=100-70099"})
+        assert resp.status_code == 206
+        assert resp.headers["content-range"] == f"bytes 100-70099/{total}"
+        assert resp.headers["content-length"] == "70000"
+        assert resp.content == foto[100:70100]
+
+        resp = await client.get(url, headers={"Range": "bytes=-1000"})
+        assert resp.status_code == 206
+        assert resp.content == foto[-1000:]
+
+        resp = await client.get(url, headers={"Range": f"bytes={total}-"})
+        assert resp.status_code == 416
+        assert resp.headers["content-range"] == f"bytes */{total}"
+
+        # If-Range: el rango solo se respeta si el archivo sigue siendo el mismo
+        resp = await client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+        assert resp.status_code == 206
+        assert resp.content == foto[:10]
+        resp = await client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"otro"'})
+        assert resp.status_code == 200
+        assert resp.content == foto
+
+
+@pytest.mark.anyio
+async def test_documentos_privados_con_etag_y_rangos(crear_club):
+    _, headers = _crear_socio(crear_club)
+    pdf = b"%PDF-1.4 " + os.urandom(20_000)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/api/documentacion/me",
+            files={"rc_archivo": ("rc.pdf", pdf, "application/pdf")},
+            headers=headers
+        )
+        assert resp.status_code == 200
+
+        resp = await client.get("/api/documentacion/me/rc", headers=headers)
+        assert resp.status_code == 200
+        assert resp.headers["cache-control"] == settings.cache_control_documentos
+        assert resp.headers["content-disposition"] == 'attachment; filename="rc.pdf"'
+        etag = resp.headers["etag"]
+
+        resp = await client.get("/api/documentacion/me/rc", headers={**headers, "If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+
+        resp = await client.get("/api/documentacion/me/rc", headers={**headers, "Range": "bytes=0-7"})
+        assert resp.status_code == 206
+        assert resp.content == b"%PDF-1.4"
+
+
+@pytest.mark.anyio
+async def test_fotos_aun_en_la_bd_usan_last_modified_y_rangos(crear_club):
+    socio_id, _ = _crear_socio(crear_club, foto_en_bd=FOTO)
+    url = f"/api/socios/{socio_id}/foto"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(url)
+        assert resp.status_code == 200
+        assert resp.content == FOTO
+        assert "etag" not in resp.headers
+
+        resp = await client.get(url, headers={"If-Modified-Since": resp.headers["last-modified"]})
+        assert resp.status_code == 304
+        assert resp.content == b""
+
+        resp = await client.get(url, headers={"Range": "bytes=70000-140000"})
+        assert resp.status_code == 206
+        assert resp.content == FOTO[70000:140001]
+
+
+@pytest.mark.anyio
+async def test_last_modified_trata_las_fechas_sin_zona_como_utc(crear_club, monkeypatch):
+    monkeypatch.setenv("TZ", "Europe/Madrid")
+    time.tzset()
+    try:
+        socio_id, _ = _crear_socio(crear_club, foto_en_bd=FOTO)
+        with SessionLocal() as db:
+            db.get(Socio, socio_id).foto_carnet_fecha_subida = datetime(2024, 1, 15, 10, 30)
+            db.commit()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            resp = await client.get(f"/api/socios/{socio_id}/foto")
+            assert resp.headers["last-modified"] == "Mon, 15 Jan 2024 10:30:00 GMT"
+
+            resp = await client.get(f"/api/socios/{socio_id}/foto",
+                                    headers={"If-Modified-Since": "Mon, 15 Jan 2024 10:30:00 GMT"})
+            assert resp.status_code == 304
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -0,0 +1,179 @@
+import uuid
+from datetime import timedelta
+
+import anyio
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.database.db import SessionLocal
+from app.main import app
+from app.models.email_outbox import EmailOutbox
+from app.services.email_outbox import ConfigSMTP, EnviadorEmails, Mensaje, PoolSMTP, ahora, enviador_emails
+from app.services.email_service import EmailService
+from tests.smtp_stub import ServidorSMTP
+
+
+@pytest.fixture
+async def enviador():
+    yield enviador_emails
+    await enviador_emails.close()
+
+
+def _estados(destinatarios):
+    with SessionLocal() as db:
+        return dict(db.execute(
+            select(EmailOutbox.destinatario, EmailOutbox.estado).filter(EmailOutbox.destinatario.in_(destinatarios))
+        ).all())
+
+
+@pytest.mark.anyio
+async def test_invitar_solo_encola_y_el_envio_reutiliza_conexiones(crear_club, smtp, enviador):
+    servidor, _ = smtp
+    club = crear_club("outbox", nombre="Club Outbox")
+    club_id, headers = club.id, club.headers
+    sufijo = uuid.uuid4().hex[:8]
+    destinatarios = [f"invitado-{sufijo}-{i}@example.com" for i in range(20)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            f"/api/clubes/{club_id}/miembros/invitar",
+            json={"email": ",".join(destinatarios), "rol": "miembro"},
+            headers=headers
+        )
+    assert resp.status_code == 200
+    assert resp.json()["exitosos"] == 20
+    assert set(_estados(destinatarios)) == set(destinatarios)
+
+    await enviador.vaciar()
+
+    assert set(_estados(destinatarios).values()) == {"enviado"}
+    recibidos = [m for m in servidor.mensajes if m["para"][0] in destinatarios]
+    assert len(recibidos) == 20
+    assert all(m["asunto"] == "Bienvenido a PiarAPP - Invitación a Club Outbox" for m in recibidos)
+    # Una sesión SMTP (conexión + login) por hilo del pool, no una por mensaje
+    assert servidor.conexiones <= settings.email_smtp_connections
+    assert servidor.logins == servidor.conexiones
+
+
+@pytest.mark.anyio
+async def test_reintentos_y_fallidos(crear_club, smtp, enviador, monkeypatch):
+    servidor, _ = smtp
+    monkeypatch.setattr(settings, "email_max_attempts", 3)
+    sufijo = uuid.uuid4().hex[:8]
+    reintento, agotado = f"reintento-{sufijo}@example.com", f"agotado-{sufijo}@example.com"
+
+    # Cada mensaje se envía en su propio lote para controlar los fallos 451
+    with SessionLocal() as db:
+        EmailService.encolar(db, "nadie@example.com", "Rechazado", "<p>5xx</p>")
+        EmailService.encolar(db, reintento, "Reintento", "<p>451 una vez</p>")
+        db.commit()
+    servidor.fallos_temporales = 1
+    await enviador.vaciar()
+    assert _estados([reintento])[reintento] == "enviado"
+
+    with SessionLocal() as db:
+        EmailService.encolar(db, agotado, "Agotado", "<p>451 siempre</p>")
+        db.commit()
+    servidor.fallos_temporales = 10
+    await enviador.vaciar()
+
+    with SessionLocal() as db:
+        fila = db.scalar(select(EmailOutbox).filter(EmailOutbox.destinatario == agotado))
+        assert (fila.estado, fila.intentos) == ("fallido", 3)
+        assert "451" in fila.ultimo_error
+        rechazado = db.scalar(
+            select(EmailOutbox).filter(EmailOutbox.destinatario == "nadie@example.com").order_by(EmailOutbox.id.desc())
+        )
+        assert (rechazado.estado, rechazado.intentos) == ("fallido", 1)
+
+    # Un superadmin lo vuelve a poner en cola
+    headers = crear_club("outbox", rol_creador=None, superadmin=True).headers
+    servidor.fallos_temporales = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/api/admin/emails", headers=headers)
+        assert resp.status_code == 200
+        assert fila.id in [e["id"] for e in resp.json()["emails"]]
+        resp = await client.post(f"/api/admin/emails/{fila.id}/reintentar", headers=headers)
+        assert resp.status_code == 200
+        assert resp.json()["estado"] == "pendiente"
+    await enviador.vaciar()
+    assert _estados([agotado])[agotado] == "enviado"
+
+
+def test_pool_renueva_la_sesion_tras_max_mensajes():
+    with ServidorSMTP() as servidor:
+        config = ConfigSMTP("127.0.0.1", servidor.puerto, "piar", "secreto", "noreply@piarapp.com", False, False)
+        pool = PoolSMTP(max_mensajes=3)
+        mensajes = [Mensaje(i, f"m{i}@example.com", "Hola", "<p>hola</p>", 0) for i in range(7)]
+
+        resultados = pool.enviar(mensajes, config)
+        assert [r.error for r in resultados] == [None] * 7
+        assert servidor.conexiones == 3
+        # La última sesión (1 mensaje) sigue abierta y se reutiliza
+        pool.enviar(mensajes[:2], config)
+        assert servidor.conexiones == 3
+        pool.cerrar()
+        assert len(servidor.mensajes) == 9
+
+
+def test_los_ceros_explicitos_no_toman_el_valor_por_defecto():
+    pool = PoolSMTP(max_mensajes=0, timeout=0)
+    assert (pool.max_mensajes, pool.timeout) == (0, 0)
+    emisor = EnviadorEmails(lote=0, conexiones=0, pool=pool)
+    assert (emisor.lote, emisor.conexiones) == (0, 0)
+    assert emisor.pool is pool
+
+
+@pytest.mark.anyio
+async def test_la_tarea_envia_al_confirmar_la_transaccion(smtp, enviador):
+    servidor, _ = smtp
+    destinatario = f"tarea-{uuid.uuid4().hex[:8]}@example.com"
+    enviador.iniciar()
+
+    with SessionLocal() as db:
+        EmailService.encolar(db, destinatario, "Tarea", "<p>hola</p>")
+        db.commit()
+
+    for _ in range(100):
+        if _estados([destinatario]).get(destinatario) == "enviado":
+            break
+        await anyio.sleep(0.05)
+    assert _estados([destinatario])[destinatario] == "enviado"
+    assert any(m["para"] == [destinatario] for m in servidor.mensajes)
+
+
+@pytest.mark.anyio
+async def test_purga_los_enviados_antiguos(enviador, monkeypatch):
+    monkeypatch.setattr(settings, "email_outbox_retention_days", 30)
+    sufijo = uuid.uuid4().hex[:8]
+    momento = ahora()
+    filas = {
+        f"viejo-{sufijo}@example.com": ("enviado", momento - timedelta(days=31)),
+        f"reciente-{sufijo}@example.com": ("enviado", momento - timedelta(days=29)),
+        f"fallido-{sufijo}@example.com": ("fallido", None),
+        f"pendiente-{sufijo}@example.com": ("pendiente", None),
+    }
+    with SessionLocal() as db:
+        for destinatario, (estado, fecha_envio) in filas.items():
+            db.add(EmailOutbox(
+                destinatario=destinatario, asunto="Viejo", cuerpo_html="<p>hola</p>", estado=estado,
+                proximo_intento=momento + timedelta(days=1), fecha_envio=fecha_envio,
+            ))
+        db.commit()
+
+    assert await enviador.purgar() >= 1
+
+    assert _estados(list(filas)) == {
+        f"reciente-{sufijo}@example.com": "enviado",
+        f"fallido-{sufijo}@example.com": "fallido",
+        f"pendiente-{sufijo}@example.com": "pendiente",
+    }
+
+    # 0 desactiva la purga
+    monkeypatch.setattr(settings, "email_outbox_retention_days", 0)
+    assert await enviador.purgar() == 0
+    assert _estados([f"reciente-{sufijo}@example.com"]) == {f"reciente-{sufijo}@example.com": "enviado"}
@@ -0,0 +1,142 @@
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.main import app
+from app.database.db import SessionLocal, async_engine
+from app.models.usuario import Usuario
+
+PASSWORD = "Password123!"
+
+
+async def _register_and_login(client, superadmin=False):
+    email = f"contadores-{uuid.uuid4().hex[:8]}@example.com"
+    resp = await client.post(
+        "/api/auth/registro",
+        json={"nombre_completo": "Contadores User", "email": email, "password": PASSWORD}
+    )
+    assert resp.status_code == 200
+
+    if superadmin:
+        with SessionLocal() as db:
+            db.query(Usuario).filter(Usuario.email == email).update({"es_superadmin": True})
+            db.commit()
+
+    resp = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    assert resp.status_code == 200
+    return {"Authorization": f"Bearer {resp.json()['tokens']['access_token']}"}, email
+
+
+async def _crear_club(client):
+    headers, _ = await _register_and_login(client, superadmin=True)
+    resp = await client.post(
+        "/api/clubes",
+        json={"nombre": "Club Contadores", "slug": f"contadores-{uuid.uuid4().hex[:8]}"},
+        headers=headers
+    )
+    assert resp.status_code == 200
+    return resp.json()["id"], headers
+
+
+async def _crear_evento(client, club_id, headers, aforo=None, dias=5):
+    inicio = datetime.now() + timedelta(days=dias)
+    resp = await client.post(
+        f"/api/clubes/{club_id}/eventos",
+        json={
+            "nombre": f"Evento {uuid.uuid4().hex[:6]}",
+            "descripcion": "Evento para contadores",
+            "fecha_inicio": inicio.isoformat(),
+            "fecha_fin": (inicio + timedelta(hours=2)).isoformat(),
+            "aforo_maximo": aforo,
+        },
+        headers=headers
+    )
+    assert resp.status_code == 200
+    return resp.json()["id"]
+
+
+async def _nuevo_miembro(client, club_id, admin_headers):
+    headers, email = await _register_and_login(client)
+    resp = await client.post(
+        f"/api/clubes/{club_id}/miembros/invitar",
+        json={"email": email, "rol": "miembro"},
+        headers=admin_headers
+    )
+    token = resp.json()["invitaciones"][0]["token"]
+    resp = await client.post(f"/api/auth/invitaciones/aceptar/{token}", headers=headers)
+    assert resp.status_code == 200
+    return headers
+
+
+class _ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+
+
+async def _consultas_al_listar(client, club_id, headers):
+    contador = _ContadorConsultas()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", contador)
+    try:
+        resp = await client.get(f"/api/clubes/{club_id}/eventos?limit=100", headers=headers)
+        assert resp.status_code == 200
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", contador)
+    return contador.total, resp.json()
+
+
+@pytest.mark.anyio
+async def test_contadores_siguen_las_asistencias():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        club_id, admin_headers = await _crear_club(client)
+        evento_id = await _crear_evento(client, club_id, admin_headers, aforo=1)
+        miembro_headers = await _nuevo_miembro(client, club_id, admin_headers)
+        url = f"/api/clubes/{club_id}/eventos/{evento_id}"
+
+        resp = await client.post(f"{url}/asistencia", json={"estado": "inscrito"}, headers=admin_headers)
+        assert resp.json()["estado"] == "inscrito"
+        # Aforo completo: el segundo pasa a lista de espera
+        resp = await client.post(f"{url}/asistencia", json={"estado": "inscrito"}, headers=miembro_headers)
+        assert resp.json()["estado"] == "lista_espera"
+
+        evento = (await client.get(url, headers=admin_headers)).json()
+        assert (evento["inscritos_count"], evento["lista_espera_count"], evento["cancelados_count"]) == (1, 1, 0)
+
+        resp = await client.post(f"{url}/asistencia", json={"estado": "cancelado"}, headers=admin_headers)
+        assert resp.json()["estado"] == "cancelado"
+        # Repetir el mismo estado no descuadra los contadores
+        await client.post(f"{url}/asistencia", json={"estado": "cancelado"}, headers=admin_headers)
+
+        # La plaza liberada pasa al miembro que estaba en lista de espera
+        evento = (await client.get(url, headers=admin_headers)).json()
+        assert (evento["inscritos_count"], evento["lista_espera_count"], evento["cancelados_count"]) == (1, 0, 1)
+
+
+@pytest.mark.anyio
+async def test_listar_eventos_usa_consultas_constantes():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        club_id, headers = await _crear_club(client)
+        evento_id = await _crear_evento(client, club_id, headers)
+        await client.post(
+            f"/api/clubes/{club_id}/eventos/{evento_id}/asistencia",
+            json={"estado": "inscrito"},
+            headers=headers
+        )
+
+        consultas_pocos, eventos = await _consultas_al_listar(client, club_id, headers)
+        assert len(eventos) == 1
+        assert eventos[0]["inscritos_count"] == 1
+
+        for i in range(30):
+            await _crear_evento(client, club_id, headers, dias=6 + i)
+        consultas_muchos, eventos = await _consultas_al_listar(client, club_id, headers)
+
+    assert len(eventos) == 31
+    assert consultas_muchos == consultas_pocos
@@ -0,0 +1,163 @@
+import io
+import os
+import threading
+
+import httpx
+import pytest
+from PIL import Image
+
+from app.main import app
+from app.config import settings
+from app.database.db import SessionLocal
+from app.models.blob import BlobVariante
+from app.models.socio import Socio
+from app.utils.blob_store import blob_store
+from app.utils.imagenes import LADOS_MINIATURA, imagen_pool
+
+ORIENTACION = 0x0112
+GPS = 0x8825
+
+
+@pytest.fixture(autouse=True)
+def almacen_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "directorio", tmp_path / "blobs")
+
+
+def _crear_socio(crear_club):
+    club = crear_club("mini", rol_creador=None, superadmin=True, nombre="Club Miniaturas")
+    with SessionLocal() as db:
+        socio = Socio(club_id=club.id, usuario_id=club.usuario_id, nombre="Socio Mini", email=club.emails[0])
+        db.add(socio)
+        db.commit()
+        return socio.id, club.headers
+
+
+def _foto_de_movil(ancho: int, alto: int) -> bytes:
+    """JPEG apaisado con EXIF de móvil: girado 90º (orientación 6) y con posición GPS.
+
+    El color es aleatorio para que cada test suba un contenido (hash) distinto.
+    """
+    exif = Image.Exif()
+    exif[ORIENTACION] = 6
+    exif[GPS] = {1: "N", 2: (40.0, 25.0, 0.0)}
+    salida = io.BytesIO()
+    Image.new("RGB", (ancho, alto), tuple(os.urandom(3))).save(salida, "JPEG", quality=95, exif=exif)
+    return salida.getvalue()
+
+
+def _abrir(datos: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(datos))
+
+
+@pytest.mark.anyio
+async def test_la_foto_se_normaliza_y_las_miniaturas_se_sirven_con_size(crear_club, monkeypatch):
+    monkeypatch.setattr(settings, "foto_max_lado", 1000)
+    socio_id, headers = _crear_socio(crear_club)
+    url = f"/api/socios/{socio_id}/foto"
+    original = _foto_de_movil(3000, 2000)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(url, files={"file": ("movil.jpg", original, "image/jpeg")}, headers=headers)
+        assert resp.status_code == 200
+
+        # Original: girado según el EXIF, lado mayor acotado y sin metadatos
+        resp = await client.get(url)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "image/jpeg"
+        foto = _abrir(resp.content)
+        assert foto.size == (667, 1000)
+        assert not foto.getexif()
+        assert len(resp.content) < len(original)
+
+        for lado in (64, 256, 512):
+            resp = await client.get(url, params={"size": lado})
+            assert resp.status_code == 200
+            assert resp.headers["content-type"] == "image/webp"
+            miniatura = _abrir(resp.content)
+            assert miniatura.format == "WEBP"
+            assert max(miniatura.size) == lado
+            assert miniatura.size[0] < miniatura.size[1]
+
+        # ETag propio de la miniatura, con 304 al revalidar
+        resp = await client.get(url, params={"size": 64})
+        resp = await client.get(url, params={"size": 64}, headers={"If-None-Match": resp.headers["etag"]})
+        assert resp.status_code == 304
+
+        for parametros in ({"size": 100}, {"size": 64, "formato": "gif"}):
+            resp = await client.get(url, params=parametros)
+            assert resp.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_miniaturas_jpeg_se_generan_una_vez(crear_club, monkeypatch):
+    socio_id, headers = _crear_socio(crear_club)
+    url = f"/api/socios/{socio_id}/foto"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post(url, files={"file": ("movil.jpg", _foto_de_movil(800, 600), "image/jpeg")}, headers=headers)
+        with SessionLocal() as db:
+            sha256 = db.get(Socio, socio_id).foto_carnet_sha256
+            assert db.get(BlobVariante, (sha256, "256.jpeg")) is None
+
+        primera = await client.get(url, params={"size": 256, "formato": "jpeg"})
+        assert primera.status_code == 200
+        assert primera.headers["content-type"] == "image/jpeg"
+        assert max(_abrir(primera.content).size) == 256
+
+        with SessionLocal() as db:
+            variante = db.get(BlobVariante, (sha256, "256.jpeg"))
+        assert primera.headers["etag"] == f'"{variante.sha256}"'
+
+        # La segunda vez sale de la variante guardada, sin pasar por Pillow
+        async def sin_procesar(*args):
+            raise AssertionError("la miniatura debía estar ya guardada")
+
+        monkeypatch.setattr(imagen_pool, "miniatura", sin_procesar)
+        segunda = await client.get(url, params={"size": 256, "formato": "jpeg"})
+        assert segunda.content == primera.content
+
+
+@pytest.mark.anyio
+async def test_archivos_que_no_son_imagenes_se_rechazan(crear_club):
+    socio_id, headers = _crear_socio(crear_club)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            f"/api/socios/{socio_id}/foto",
+            files={"file": ("foto.jpg", os.urandom(5000), "image/jpeg")},
+            headers=headers
+        )
+        assert resp.status_code == 400
+
+    with SessionLocal() as db:
+        assert db.get(Socio, socio_id).foto_carnet_sha256 is None
+
+
+@pytest.mark.anyio
+async def test_el_almacen_se_escribe_fuera_del_bucle(crear_club, monkeypatch):
+    socio_id, headers = _crear_socio(crear_club)
+    url = f"/api/socios/{socio_id}/foto"
+    hilos = []
+    escribir = blob_store.escribir
+
+    def escribir_anotando(sha256, datos):
+        hilos.append(threading.current_thread())
+        escribir(sha256, datos)
+
+    monkeypatch.setattr(blob_store, "escribir", escribir_anotando)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(url, files={"file": ("movil.jpg", _foto_de_movil(600, 400), "image/jpeg")},
+                                 headers=headers)
+        assert resp.status_code == 200
+        # Miniatura JPEG: no se genera al subir, sino en la primera petición
+        resp = await client.get(url, params={"size": 64, "formato": "jpeg"})
+        assert resp.status_code == 200
+
+    # Original, miniaturas WebP y la JPEG de la petición
+    assert len(hilos) == 1 + len(LADOS_MINIATURA) + 1
+    assert threading.main_thread() not in hilos
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, select
+
+from app.database.db import SessionLocal, engine
+from app.models.asistencia import AsistenciaEvento
+from app.models.blob import Blob
+from app.models.comentario import Comentario
+from app.models.evento import Evento
+from app.models.instalacion import ContrasenaInstalacion
+from app.models.invitacion import Invitacion
+from app.models.miembro_club import MiembroClub
+from app.models.noticia import Noticia
+from app.models.socio import Socio
+from app.routes.eventos import ORDEN_EVENTOS
+from app.routes.noticias import ORDEN_COMENTARIOS, ORDEN_NOTICIAS
+from app.utils.paginacion import codificar_cursor
+from tests.asesor_indices import AsesorIndices, recorridos
+
+
+def _plan(stmt) -> str:
+    """Plan de SQLite para la consulta, con los parámetros con los que se ejecuta"""
+    planes = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        planes.append(AsesorIndices._plan(conn, statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        with engine.connect() as conn:
+            conn.execute(stmt)
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+    return " | ".join(fila[-1] for fila in planes[0])
+
+
+CONSULTAS = {
+    "membresía activa": (
+        select(MiembroClub).filter(MiembroClub.usuario_id == 1, MiembroClub.club_id == 2, MiembroClub.estado == "activo"),
+        "ix_miembro_club_usuario_club_estado",
+    ),
+    "siguiente en lista de espera": (
+        select(AsistenciaEvento).filter(AsistenciaEvento.evento_id == 1, AsistenciaEvento.estado == "lista_espera")
+        .order_by(AsistenciaEvento.fecha_lista_espera, AsistenciaEvento.id).limit(1),
+        "ix_asistencias_eventos_evento_estado",
+    ),
+    "contraseña activa": (
+        select(ContrasenaInstalacion).filter(ContrasenaInstalacion.club_id == 1, ContrasenaInstalacion.activa == True)
+        .order_by(ContrasenaInstalacion.fecha_creacion.desc()).limit(1),
+        "ix_contrasena_instalaciones_club_activa_fecha",
+    ),
+    "invitaciones pendientes del club": (
+        select(Invitacion).filter(Invitacion.club_id == 1, Invitacion.estado == "pendiente"),
+        "ix_invitaciones_club_estado",
+    ),
+    "página de noticias": (
+        ORDEN_NOTICIAS.consulta(select(Noticia).filter(Noticia.club_id == 1), codificar_cursor("2024-05-01 12:00:00", 10), 10),
+        "ix_noticias_club_fecha_creacion",
+    ),
+    "página de eventos": (
+        ORDEN_EVENTOS.consulta(select(Evento).filter(Evento.club_id == 1), None, 20),
+        "ix_eventos_club_fecha_inicio",
+    ),
+    "página de comentarios": (
+        ORDEN_COMENTARIOS.consulta(select(Comentario).filter(Comentario.noticia_id == 1), None, 100),
+        "ix_comentarios_noticia_fecha_creacion",
+    ),
+    "candidatos de la recolección": (
+        select(Blob.sha256).where(Blob.referencias <= 0, Blob.fecha_actualizacion <= datetime.now()),
+        "ix_blobs_sin_referencias",
+    ),
+}
+
+
+@pytest.mark.parametrize("nombre", CONSULTAS)
+def test_consultas_frecuentes_usan_su_indice_sin_ordenar_aparte(nombre):
+    stmt, indice = CONSULTAS[nombre]
+    plan = _plan(stmt)
+    assert indice in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_recorridos_resuelve_alias_y_respeta_los_permitidos():
+    sql = "SELECT socios_1.id FROM socios AS socios_1 JOIN clubes ON clubes.id = socios_1.club_id"
+    plan = [(3, 0, 0, "SCAN socios_1"), (5, 0, 0, "SEARCH clubes USING INTEGER PRIMARY KEY (rowid=?)")]
+    assert [r.tabla for r in recorridos(plan, sql)] == ["socios"]
+
+    # Tablas pequeñas y recorridos declarados no cuentan
+    assert recorridos([(2, 0, 0, "SCAN system_config")], "SELECT * FROM system_config") == []
+    sql = "SELECT count(*) FROM socios WHERE socios.foto_carnet_blob IS NOT NULL"
+    assert recorridos([(2, 0, 0, "SCAN socios USING COVERING INDEX ix_socios_id")], sql) == []
+
+
+def test_el_asesor_detecta_un_recorrido_completo(asesor_indices):
+    with SessionLocal() as db:
+        db.scalars(select(Socio).filter(Socio.nombre == "Nadie")).all()
+
+    assert [r.tabla for r in asesor_indices.encontrados] == ["socios"]
+    asesor_indices.reiniciar()
@@ -0,0 +1,116 @@
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.main import app
+from app.middleware.metricas import MetricasMiddleware
+from app.utils.metricas import HTTP_DURACION, HTTP_PETICIONES, Contador, Histograma, Metrica, RegistroMetricas
+
+
+def _muestras(texto: str) -> dict:
+    """{'nombre{etiquetas}': valor} de un texto de exposición"""
+    return {
+        linea.rsplit(" ", 1)[0]: float(linea.rsplit(" ", 1)[1])
+        for linea in texto.splitlines() if linea and not linea.startswith("#")
+    }
+
+
+def test_formato_de_exposicion():
+    registro = RegistroMetricas()
+    peticiones = registro.registrar(Contador("prueba_total", "Peticiones", ("ruta",)))
+    latencia = registro.registrar(Histograma("prueba_segundos", "Latencia", (), (0.1, 1)))
+    peticiones.inc('/a "b"\\c\n')
+    peticiones.inc('/a "b"\\c\n', valor=2)
+    for valor in (0.05, 0.1, 0.5, 3):
+        latencia.observar(valor)
+
+    texto = registro.exponer()
+
+    assert texto.splitlines() == [
+        "# HELP prueba_total Peticiones",
+        "# TYPE prueba_total counter",
+        'prueba_total{ruta="/a \\"b\\"\\\\c\\n"} 3',
+        "# HELP prueba_segundos Latencia",
+        "# TYPE prueba_segundos histogram",
+        'prueba_segundos_bucket{le="0.1"} 2',
+        'prueba_segundos_bucket{le="1"} 3',
+        'prueba_segundos_bucket{le="+Inf"} 4',
+        "prueba_segundos_sum 3.65",
+        "prueba_segundos_count 4",
+    ]
+    with pytest.raises(ValueError):
+        registro.registrar(Contador("prueba_total", "Otra"))
+    # Un tipo de métrica sin muestras() no llega a registrarse
+    with pytest.raises(TypeError):
+        Metrica("prueba_sin_tipo", "Sin muestras")
+
+
+@pytest.mark.anyio
+async def test_metricas_por_plantilla_de_ruta():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        antes = HTTP_PETICIONES.valor("GET", "/api/clubes/{club_id}/noticias", "403")
+        for club_id in (1, 2, 3):
+            await client.get(f"/api/clubes/{club_id}/noticias")
+        await client.get("/api/no-existe")
+        resp = await client.get("/api/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    muestras = _muestras(resp.text)
+    etiquetas = 'method="GET",route="/api/clubes/{club_id}/noticias",status="403"'
+    assert muestras[f"piar_http_requests_total{{{etiquetas}}}"] == antes + 3
+    assert muestras[f'piar_http_request_duration_seconds_bucket{{{etiquetas},le="+Inf"}}'] == antes + 3
+    assert 'piar_http_requests_total{method="GET",route="unmatched",status="404"}' in muestras
+    assert not [clave for clave in muestras if "/api/clubes/1/" in clave]
+    # La propia petición de métricas está en curso
+    assert muestras["piar_http_requests_in_flight"] >= 1
+    assert muestras['piar_db_pool_connections{engine="sync",state="size"}'] > 0
+    for nombre in ("piar_db_query_duration_seconds_count", "piar_email_queue_depth", "piar_write_queue_depth"):
+        assert nombre in muestras
+
+
+@pytest.mark.anyio
+async def test_token_de_metricas(monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "secreto")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        sin_token = await client.get("/api/metrics")
+        otro_token = await client.get("/api/metrics", headers={"Authorization": "Bearer otro"})
+        con_token = await client.get("/api/metrics", headers={"Authorization": "Bearer secreto"})
+
+    assert sin_token.status_code == 401
+    assert otro_token.status_code == 403
+    assert con_token.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_coste_por_peticion_menor_de_50_microsegundos():
+    async def vacia(scope, receive, send):
+        scope["endpoint"] = vacia
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def recibir():
+        return {"type": "http.request", "body": b""}
+
+    async def enviar(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/coste"}
+    middleware = MetricasMiddleware(vacia)
+    veces = 2000
+
+    async def medir(aplicacion) -> float:
+        inicio = time.perf_counter()
+        for _ in range(veces):
+            await aplicacion(dict(scope), recibir, enviar)
+        return (time.perf_counter() - inicio) / veces
+
+    await medir(middleware)
+    coste = min([await medir(middleware) for _ in range(3)]) - min([await medir(vacia) for _ in range(3)])
+
+    assert HTTP_DURACION.cuenta("GET", "unmatched", "204") >= veces
+    assert coste < 50e-6, f"{coste * 1e6:.1f} µs por petición"
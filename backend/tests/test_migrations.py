@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+
+from app.database.db import Base, _configurar_sqlite
+from app.database.migrations import (
+    aplicar_migraciones,
+    descubrir_migraciones,
+    dividir_sql,
+    ultima_version,
+)
+import app.models  # noqa: F401  (registra los modelos en Base.metadata)
+
+
+def _engine(tmp_path, nombre="migraciones.db"):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / nombre}",
+        connect_args={"check_same_thread": False}
+    )
+    event.listen(engine, "connect", _configurar_sqlite)
+    return engine
+
+
+def _versiones(engine):
+    with engine.connect() as conn:
+        return [fila[0] for fila in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+
+
+def test_bd_nueva_queda_igual_que_los_modelos(tmp_path):
+    engine = _engine(tmp_path)
+    aplicadas = aplicar_migraciones(engine)
+
+    assert aplicadas == [m.version for m in descubrir_migraciones()]
+    inspector = inspect(engine)
+    tablas = set(inspector.get_table_names())
+    for tabla in Base.metadata.sorted_tables:
+        assert tabla.name in tablas, f"Falta la tabla {tabla.name}"
+        columnas = {c["name"] for c in inspector.get_columns(tabla.name)}
+        faltan = {c.name for c in tabla.columns} - columnas
+        assert not faltan, f"Faltan columnas en {tabla.name}: {faltan}"
+
+
+def test_segunda_ejecucion_no_aplica_nada(tmp_path):
+    engine = _engine(tmp_path)
+    aplicar_migraciones(engine)
+
+    assert aplicar_migraciones(engine) == []
+    assert _versiones(engine)[-1] == ultima_version()
+
+
+def test_bd_legado_recibe_columnas_sin_perder_datos(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        # Esquema antiguo, anterior a frontend_url y a las preferencias de usuario
+        conn.execute(text("CREATE TABLE system_config (id INTEGER PRIMARY KEY, smtp_server VARCHAR(255))"))
+        conn.execute(text(
+            "CREATE TABLE usuarios (id INTEGER PRIMARY KEY, email VARCHAR(255) NOT NULL, "
+            "nombre_completo VARCHAR(255) NOT NULL)"
+        ))
+        conn.execute(text("INSERT INTO usuarios (email, nombre_completo) VALUES ('old@example.com', 'Old')"))
+
+    aplicar_migraciones(engine)
+
+    inspector = inspect(engine)
+    assert "frontend_url" in {c["name"] for c in inspector.get_columns("system_config")}
+    assert {"notifications_enabled", "email_digest", "dark_mode", "language"} <= {
+        c["name"] for c in inspector.get_columns("usuarios")
+    }
+    with engine.connect() as conn:
+        fila = conn.execute(text("SELECT email, email_digest FROM usuarios")).one()
+    assert fila == ("old@example.com", "weekly")
+
+
+def test_ejecuciones_concurrentes_aplican_cada_version_una_vez(tmp_path):
+    engines = [_engine(tmp_path) for _ in range(4)]
+    errores = []
+
+    def migrar(engine):
+        try:
+            aplicar_migraciones(engine)
+        except Exception as e:  # pragma: no cover - se reporta en el assert
+            errores.append(e)
+
+    hilos = [threading.Thread(target=migrar, args=(engine,)) for engine in engines]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert not errores
+    assert _versiones(engines[0]) == [m.version for m in descubrir_migraciones()]
+
+
+def test_fallo_en_migracion_deshace_todo(tmp_path):
+    directorio = tmp_path / "migrations"
+    directorio.mkdir()
+    (directorio / "0001_tabla.sql").write_text("CREATE TABLE prueba (id INTEGER PRIMARY KEY);\n")
+    (directorio / "0002_rota.sql").write_text("INSERT INTO no_existe VALUES (1);\n")
+    engine = _engine(tmp_path)
+
+    with pytest.raises(Exception):
+        aplicar_migraciones(engine, directorio)
+
+    inspector = inspect(engine)
+    assert "prueba" not in inspector.get_table_names()
+
+
+def test_dividir_sql_respeta_triggers():
+    script = """
+    -- comentario inicial
+    CREATE TABLE a (id INTEGER);
+    CREATE TRIGGER t AFTER INSERT ON a BEGIN
+        INSERT INTO a VALUES (1);
+        INSERT INTO a VALUES (2);
+    END;
+    -- comentario final
+    """
+    sentencias = dividir_sql(script)
+
+    assert len(sentencias) == 2
+    assert sentencias[1].startswith("CREATE TRIGGER")
+    assert sentencias[1].rstrip().endswith("END;")
@@ -4,7 +4,7 @@ import json
 from unittest.mock import AsyncMock, patch, MagicMock
 from app.services.openclaw_service import OpenClawService
 
-@pytest.mark.asyncio
+@pytest.mark.anyio
 async def test_openclaw_ws_connection_mocked():
     """
     Prueba unitaria con Mock para verificar el flujo completo handshake -> chat.send -> chat events.
@@ -56,10 +56,10 @@ async def test_openclaw_ws_connection_mocked():
 
     mock_ws_protocol.recv.side_effect = side_effect_recv
     
-    # Configurar el __aenter__ para devolver el protocolo
-    mock_ws_connection.__aenter__.return_value = mock_ws_protocol
+    # websockets.connect se espera (conexión persistente) y devuelve el protocolo
+    mock_ws_connection.return_value = mock_ws_protocol
     
-    with patch("websockets.connect", return_value=mock_ws_connection) as mock_connect:
+    with patch("websockets.connect", mock_ws_connection) as mock_connect:
         service = OpenClawService()
         # Forzar configuración para test
         service.ws_url = "ws://test-ws-url:8080"
@@ -69,7 +69,7 @@ async def test_openclaw_ws_connection_mocked():
         response_text = await service.get_response(messages=[{"role":"user", "content":"Hola"}])
 
         # Verificar que se intentó conectar a la URL correcta
-        mock_connect.assert_called_with("ws://test-ws-url:8080")
+        assert mock_connect.call_args[0][0] == "ws://test-ws-url:8080"
 
         # Verificar handshake enviado
         assert mock_ws_protocol.send.call_count >= 2 
@@ -95,7 +95,7 @@ async def test_openclaw_ws_connection_mocked():
 
 
 # @pytest.mark.skip(reason="Habilitar manualmente para probar conexión REAL contra tu servidor OpenClaw")
-@pytest.mark.asyncio
+@pytest.mark.anyio
 async def test_openclaw_history_mocked():
     """
     Prueba unitaria con Mock para verificar el flujo de recuperación de historial.
@@ -149,9 +149,9 @@ async def test_openclaw_history_mocked():
             return json.dumps({"type": "event", "event": "keepalive"})
 
     mock_ws_protocol.recv.side_effect = side_effect_recv
-    mock_ws_connection.__aenter__.return_value = mock_ws_protocol
+    mock_ws_connection.return_value = mock_ws_protocol
 
-    with patch("websockets.connect", return_value=mock_ws_connection):
+    with patch("websockets.connect", mock_ws_connection):
         service = OpenClawService()
         # Forzar configuración
         service.ws_url = "ws://test-mock-url"
@@ -171,7 +171,7 @@ async def test_openclaw_history_mocked():
         assert isinstance(content_block, list)
         assert content_block[0]["text"] == "Hola, ¿en qué puedo ayudarte?"
 
-@pytest.mark.asyncio
+@pytest.mark.anyio
 async def test_openclaw_multisession_routing():
     """
     Verifica que se generen sessionKeys diferentes para distintos usuarios/clubes.
@@ -190,9 +190,9 @@ async def test_openclaw_multisession_routing():
     mock_ws_protocol.recv.side_effect = [
         challenge_msg, success_msg, chat_ack, asyncio.TimeoutError
     ]
-    mock_ws_connection.__aenter__.return_value = mock_ws_protocol
+    mock_ws_connection.return_value = mock_ws_protocol
 
-    with patch("websockets.connect", return_value=mock_ws_connection):
+    with patch("websockets.connect", mock_ws_connection):
         service = OpenClawService()
         service.ws_url = "ws://mock"
         service.auth_mode = "password"
@@ -200,26 +200,21 @@ async def test_openclaw_multisession_routing():
         
         # Caso 1: Usuario 1 en Club 10
         ctx1 = {"user_id": 1, "club_id": 10}
-        # Mock wait_for in service loop to raise TimeoutError immediately after chat ack to finish
-        with patch("asyncio.wait_for", side_effect=[challenge_msg, success_msg, chat_ack, asyncio.TimeoutError]):
-            # Wait, wait_for call signatures might differ or loop structure.
-            # Simplified approach: Inspect call_args of websocket.send
-            try:
-                await service.get_response([{"role": "user", "content": "Hi"}], context=ctx1)
-            except:
-                pass # Expected timeout/error as we don't provide full conversation flow
-            
-            # Verificar el payload de chat.send
-            # Se esperan 2 llamadas a send: 1 handshake, 1 chat.send
-            assert mock_ws_protocol.send.call_count >= 2
-            
-            # Buscar la llamada a chat.send
-            chat_call_args = mock_ws_protocol.send.call_args
-            chat_json = json.loads(chat_call_args[0][0])
-            
-            # Verificar formato de sessionKey para usuario 1
-            assert chat_json["method"] == "chat.send"
-            assert chat_json["params"]["sessionKey"] == "agent:main:club_10_user_1"
+        # El TimeoutError de recv tira la conexión tras el ACK: get_response
+        # devuelve un error, pero el chat.send ya se ha enviado
+        respuesta = await service.get_response([{"role": "user", "content": "Hi"}], context=ctx1)
+        assert respuesta.startswith("Error")
+        
+        # Se esperan 2 llamadas a send: 1 handshake, 1 chat.send
+        assert mock_ws_protocol.send.call_count >= 2
+        
+        # Buscar la llamada a chat.send
+        chat_call_args = mock_ws_protocol.send.call_args
+        chat_json = json.loads(chat_call_args[0][0])
+        
+        # Verificar formato de sessionKey para usuario 1
+        assert chat_json["method"] == "chat.send"
+        assert chat_json["params"]["sessionKey"] == "agent:main:club_10_user_1"
 
         # Reset mock
         mock_ws_protocol.reset_mock()
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.services.openclaw_conexion import ConexionOpenClaw
+from app.services.openclaw_service import OpenClawService
+from tests.openclaw_stub import TOKEN, GatewayOpenClaw
+
+
+@pytest.fixture
+async def gateway():
+    async with GatewayOpenClaw(latencia_respuesta=0.05) as gateway:
+        yield gateway
+
+
+@pytest.fixture
+async def servicio(gateway):
+    servicio = OpenClawService()
+    servicio.ws_url = gateway.url
+    servicio.auth_mode = "password"
+    servicio.password = TOKEN
+    servicio.max_conexiones = 1
+    yield servicio
+    await servicio.close()
+
+
+def _contexto(i: int) -> dict:
+    return {"user_id": i, "club_id": 7}
+
+
+@pytest.mark.anyio
+async def test_sesiones_concurrentes_comparten_una_conexion(servicio, gateway):
+    respuestas = await asyncio.gather(*(
+        servicio.get_response([{"role": "user", "content": f"mensaje {i}"}], context=_contexto(i))
+        for i in range(1, 21)
+    ))
+
+    # Cada respuesta llega a su sesión aunque los eventos se intercalen
+    assert respuestas == [f"Eco: mensaje {i}" for i in range(1, 21)]
+    assert gateway.conexiones == 1
+    assert gateway.handshakes == 1
+
+    historial = await servicio.get_chat_history(context=_contexto(3))
+    assert [m["role"] for m in historial] == ["user", "assistant"]
+    assert historial[0]["content"] == "mensaje 3"
+    assert (await servicio.check_connection_status()) == {"connected": True, "error": None}
+    assert gateway.handshakes == 1
+
+
+@pytest.mark.anyio
+async def test_mensajes_seguidos_en_la_misma_sesion(servicio, gateway):
+    primera, segunda = await asyncio.gather(
+        servicio.get_response([{"role": "user", "content": "uno"}], context=_contexto(1)),
+        servicio.get_response([{"role": "user", "content": "dos"}], context=_contexto(1)),
+    )
+
+    assert {primera, segunda} == {"Eco: uno", "Eco: dos"}
+    assert len(gateway.historial["agent:main:club_7_user_1"]) == 4
+
+
+@pytest.mark.anyio
+async def test_eventos_sin_sesion_van_por_run_id():
+    async with GatewayOpenClaw(trozos=3, pausa_trozos=0.01, clave_en_agent=False) as gateway:
+        conexion = await ConexionOpenClaw.abrir(gateway.url, TOKEN)
+        try:
+            async def chat(i: int):
+                return [delta async for delta in conexion.chat(f"agent:main:club_7_user_{i}", f"mensaje {i}")]
+
+            respuestas = await asyncio.gather(*(chat(i) for i in range(1, 6)))
+        finally:
+            await conexion.cerrar()
+
+    # Cada chat recibe sus trozos, no solo el texto completo del 'chat' final
+    for i, trozos in enumerate(respuestas, start=1):
+        assert len(trozos) == 3
+        assert "".join(trozos) == f"Eco: mensaje {i}"
+    assert conexion._ejecuciones == {}
+
+
+@pytest.mark.anyio
+async def test_el_final_rezagado_no_llega_al_siguiente_turno():
+    # Fin del agente antes que el 'chat' final: el primer turno termina
+    # y su final llega cuando el segundo ya está esperando
+    async with GatewayOpenClaw(latencia_respuesta=0.1, pausa_final=0.05) as gateway:
+        servicio = OpenClawService()
+        servicio.ws_url = gateway.url
+        servicio.auth_mode = "password"
+        servicio.password = TOKEN
+        try:
+            async def turno(mensaje: str):
+                uso = {}
+                texto = "".join([
+                    delta async for delta in
+                    servicio.stream_response([{"role": "user", "content": mensaje}], _contexto(1), uso=uso)
+                ])
+                return texto, uso
+
+            (primero, uso_primero), (segundo, uso_segundo) = await asyncio.gather(turno("primero"), turno("segundo"))
+            await asyncio.sleep(0.1)
+        finally:
+            await servicio.close()
+
+    assert primero == "Eco: primero"
+    assert segundo == "Eco: segundo"
+    # Cada turno espera a su final y se queda con sus tokens
+    assert uso_primero == {"prompt_tokens": 7, "completion_tokens": 12, "total_tokens": 19}
+    assert uso_segundo == {"prompt_tokens": 7, "completion_tokens": 12, "total_tokens": 19}
+    assert gateway.abortados == []
+    assert len(gateway.historial["agent:main:club_7_user_1"]) == 4
+
+@pytest.mark.anyio
+async def test_reconecta_si_se_cae_la_conexion(servicio, gateway):
+    assert await servicio.get_response([{"role": "user", "content": "antes"}]) == "Eco: antes"
+
+    await gateway.cortar()
+    await asyncio.sleep(0.05)
+
+    assert await servicio.get_response([{"role": "user", "content": "después"}]) == "Eco: después"
+    assert gateway.conexiones == 2
+    assert gateway.handshakes == 2
+
+
+@pytest.mark.anyio
+async def test_handshake_rechazado(servicio, gateway):
+    servicio.password = "otra"
+
+    respuesta = await servicio.get_response([{"role": "user", "content": "hola"}])
+    estado = await servicio.check_connection_status()
+
+    assert respuesta.startswith("Fallo en handshake")
+    assert estado["connected"] is False
+    assert gateway.handshakes == 0
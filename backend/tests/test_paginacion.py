@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.main import app
+from app.database.db import SessionLocal
+from app.models.noticia import Noticia
+from app.models.comentario import Comentario
+from app.models.socio import Socio
+from app.utils.paginacion import codificar_cursor, decodificar_cursor
+
+
+def _sembrar(crear_club):
+    """Club con 25 noticias (fechas repetidas, con y sin microsegundos), 12 comentarios y 9 socios"""
+    club = crear_club("pag", nombre="Club Paginación")
+    admin_id = club.usuario_id
+    with SessionLocal() as db:
+        base = datetime(2024, 5, 1, 12, 0, 0)
+        noticias = []
+        for i in range(25):
+            noticia = Noticia(club_id=club.id, titulo=f"Noticia {i}", contenido="...", autor_id=admin_id, estado="publicada")
+            if i % 5:
+                # De cuatro en cuatro comparten fecha; unas con microsegundos y otras no
+                noticia.fecha_creacion = base - timedelta(hours=i // 4, microseconds=(i // 4) % 2 * 250)
+            noticias.append(noticia)
+        db.add_all(noticias)
+        db.flush()
+
+        db.add_all(
+            Comentario(contenido=f"Comentario {i}", autor_id=admin_id, noticia_id=noticias[0].id,
+                       fecha_creacion=base + timedelta(minutes=i // 3))
+            for i in range(12)
+        )
+        db.add_all(
+            Socio(club_id=club.id, usuario_id=admin_id, nombre=f"Socio {i}", email=f"s{i}-{club.emails[0]}")
+            for i in range(9)
+        )
+        db.commit()
+        return club.id, noticias[0].id, club.headers
+
+
+async def _recorrer(client, url, headers, **params):
+    """Todas las páginas siguiendo X-Next-Cursor; devuelve (ids, número de páginas)"""
+    ids, paginas, cursor = [], 0, None
+    while True:
+        resp = await client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert resp.status_code == 200
+        ids += [item["id"] for item in resp.json()]
+        paginas += 1
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            assert "Link" not in resp.headers
+            return ids, paginas
+        assert f"cursor={cursor}" in resp.headers["Link"]
+        assert resp.headers["Link"].endswith('; rel="next"')
+
+
+def test_cursor_es_opaco_y_se_valida():
+    cursor = codificar_cursor("2024-05-01 12:00:00.000250", 42)
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor) == ("2024-05-01 12:00:00.000250", 42)
+    assert decodificar_cursor(codificar_cursor(None, 7)) == (None, 7)
+
+    for malo in ("no-es-base64!", codificar_cursor("x", 1)[:-3], "WzEsMiwzXQ", "WyJ4IiwieSJd"):
+        with pytest.raises(HTTPException) as error:
+            decodificar_cursor(malo)
+        assert error.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_noticias_por_cursor_sin_repetidos_ni_huecos(crear_club):
+    club_id, _, headers = _sembrar(crear_club)
+    url = f"/api/clubes/{club_id}/noticias"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        completa = (await client.get(url, params={"limit": 100}, headers=headers)).json()
+        assert len(completa) == 25
+        orden = [(n["fecha_creacion"], n["id"]) for n in completa]
+        assert orden == sorted(orden, reverse=True)
+
+        ids, paginas = await _recorrer(client, url, headers, limit=7)
+        assert ids == [n["id"] for n in completa]
+        assert paginas == 4
+
+        # skip sigue funcionando para los clientes antiguos
+        resp = await client.get(url, params={"skip": 20, "limit": 10}, headers=headers)
+        assert [n["id"] for n in resp.json()] == ids[20:]
+
+        # Lo que se publica a mitad del recorrido no desplaza las páginas siguientes
+        resp = await client.get(url, params={"limit": 10}, headers=headers)
+        with SessionLocal() as db:
+            autor_id = db.get(Noticia, ids[0]).autor_id
+            db.add(Noticia(club_id=club_id, titulo="Nueva", contenido="...", autor_id=autor_id, estado="publicada"))
+            db.commit()
+        resp = await client.get(url, params={"limit": 10, "cursor": resp.headers["X-Next-Cursor"]}, headers=headers)
+        assert [n["id"] for n in resp.json()] == ids[10:20]
+
+        resp = await client.get(url, params={"cursor": "basura"}, headers=headers)
+        assert resp.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_listados_antes_sin_limite_van_por_paginas(crear_club):
+    club_id, noticia_id, headers = _sembrar(crear_club)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Comentarios: cronológicos, con fechas repetidas
+        url = f"/api/clubes/{club_id}/noticias/{noticia_id}/comentarios"
+        completa = (await client.get(url, headers=headers)).json()
+        assert [c["contenido"] for c in completa] == [f"Comentario {i}" for i in range(12)]
+        ids, paginas = await _recorrer(client, url, headers, limit=5)
+        assert ids == [c["id"] for c in completa]
+        assert paginas == 3
+
+        # Socios: por id
+        url = "/api/socios/"
+        ids, paginas = await _recorrer(client, url, headers, club_id=club_id, limit=4)
+        assert len(ids) == 9 and ids == sorted(ids)
+        assert paginas == 3
+
+        # Miembros: la última página exacta no deja cursor colgando
+        url = f"/api/clubes/{club_id}/miembros"
+        resp = await client.get(url, params={"limit": 1}, headers=headers)
+        assert len(resp.json()) == 1
+        assert "X-Next-Cursor" not in resp.headers
@@ -0,0 +1,95 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+
+from app.main import app
+from app.utils.password_hashing import PasswordHashingPool, PasswordPoolSaturado, password_pool
+
+PASSWORD = "Password123!"
+
+
+async def _register(client):
+    email = f"bcrypt-{uuid.uuid4().hex[:8]}@example.com"
+    resp = await client.post(
+        "/api/auth/registro",
+        json={"nombre_completo": "Bcrypt User", "email": email, "password": PASSWORD}
+    )
+    assert resp.status_code == 200
+    return email
+
+
+@pytest.mark.anyio
+async def test_pool_rechaza_por_encima_del_limite():
+    pool = PasswordHashingPool(workers=1, max_pendientes=1, retry_after=7)
+    try:
+        hashed = await pool.hash(PASSWORD)
+        en_curso = asyncio.ensure_future(pool.verify(PASSWORD, hashed))
+        await asyncio.sleep(0)  # deja que la primera verificación ocupe el pool
+
+        with pytest.raises(PasswordPoolSaturado) as exc:
+            await pool.verify(PASSWORD, hashed)
+        assert exc.value.retry_after == 7
+        assert pool.rechazadas == 1
+
+        assert await en_curso is True
+        assert pool.pendientes == 0
+    finally:
+        pool.close()
+
+
+@pytest.mark.anyio
+async def test_limites_a_cero_no_toman_el_valor_por_defecto():
+    pool = PasswordHashingPool(workers=1, max_pendientes=0, retry_after=0)
+    try:
+        assert pool.max_pendientes == 0
+        with pytest.raises(PasswordPoolSaturado) as exc:
+            await pool.hash(PASSWORD)
+        assert exc.value.retry_after == 0
+        assert pool.rechazadas == 1
+    finally:
+        pool.close()
+
+
+@pytest.mark.anyio
+async def test_logins_no_bloquean_el_event_loop():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = await _register(client)
+
+        max_hueco = 0.0
+        terminado = False
+
+        async def medir_latencia_loop():
+            nonlocal max_hueco
+            while not terminado:
+                t0 = time.perf_counter()
+                await asyncio.sleep(0.005)
+                max_hueco = max(max_hueco, time.perf_counter() - t0)
+
+        medidor = asyncio.ensure_future(medir_latencia_loop())
+        respuestas = await asyncio.gather(*(
+            client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+            for _ in range(4)
+        ))
+        terminado = True
+        await medidor
+
+    assert all(r.status_code == 200 for r in respuestas)
+    # Un bcrypt inline congelaría el loop ~200 ms por login
+    assert max_hueco < 0.15
+
+
+@pytest.mark.anyio
+async def test_login_saturado_devuelve_503_con_retry_after(monkeypatch):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        email = await _register(client)
+        monkeypatch.setattr(password_pool, "max_pendientes", 0)
+
+        resp = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == str(password_pool.retry_after)
@@ -0,0 +1,100 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.database.db import SessionLocal
+from app.models.club import Club
+from app.models.usuario import Usuario
+from app.services import plantillas_email
+from app.services.email_outbox import enviador_emails
+from app.services.email_service import EmailService, frontend_url_cache
+from app.services.invitacion_service import InvitacionService
+from app.services.plantillas_email import Marca, Plantilla, plantilla_email
+
+
+def _club(**campos):
+    valores = {"nombre": "Club <Alas>", "color_primario": "#12ab34", "logo_url": "https://cdn.example.com/logo.png"}
+    valores.update(campos)
+    return SimpleNamespace(**valores)
+
+
+def test_plantilla_compilada_rellena_y_escapa():
+    plantilla = Plantilla.compilar("<p>{{ a }} y {{b}} y {{ a }}</p>", escapar=True)
+    assert plantilla.campos == ("a", "b", "a")
+
+    parcial = plantilla.rellenar({"a": "<x>"})
+    assert parcial.campos == ("b",)
+    assert parcial.renderizar({"b": "&"}) == "<p>&lt;x&gt; y &amp; y &lt;x&gt;</p>"
+    with pytest.raises(ValueError):
+        parcial.renderizar({})
+
+
+def test_marca_del_club_en_html_y_texto():
+    marca = Marca.de_club(_club(), "https://piar.example.com")
+    email = plantilla_email("invitacion_club", marca).renderizar(url="https://piar.example.com/i?token=a&b")
+
+    assert email.asunto == "Invitación a Club <Alas> - PiarAPP"
+    assert "background-color: #12ab34" in email.cuerpo_html
+    assert '<img src="https://cdn.example.com/logo.png" alt="Club &lt;Alas&gt;"' in email.cuerpo_html
+    assert "<strong>Club &lt;Alas&gt;</strong>" in email.cuerpo_html
+    assert 'href="https://piar.example.com/i?token=a&amp;b"' in email.cuerpo_html
+    assert "{{" not in email.cuerpo_html
+    # El texto plano no lleva HTML ni escapes
+    assert "¡Bienvenido a Club <Alas>!" in email.cuerpo_texto and "<p>" not in email.cuerpo_texto
+    assert "https://piar.example.com/i?token=a&b" in email.cuerpo_texto
+    assert email.cuerpo_texto.rstrip().endswith("https://piar.example.com")
+
+    # Colores y logos que no son seguros se ignoran
+    marca = Marca.de_club(_club(color_primario="red;x", logo_url="javascript:alert(1)"), "https://piar.example.com")
+    email = plantilla_email("invitacion_club", marca).renderizar(url="https://piar.example.com/i")
+    assert "background-color: #007bff" in email.cuerpo_html
+    assert "<img" not in email.cuerpo_html
+
+
+def test_renderizar_diez_mil_invitaciones():
+    plantillas_email.compilar.cache_clear()
+    marca = Marca.de_club(_club(), "https://piar.example.com")
+
+    t0 = time.perf_counter()
+    plantilla = plantilla_email("bienvenida", marca)
+    emails = list(plantilla.renderizar_lote(
+        {"url": f"https://piar.example.com/r?token={i}", "nombre": f"Socio {i}"} for i in range(10_000)
+    ))
+    segundos = time.perf_counter() - t0
+
+    assert len(emails) == 10_000
+    assert "Socio 9999" in emails[-1].cuerpo_html and "token=9999" in emails[-1].cuerpo_texto
+    assert plantillas_email.compilar.cache_info().misses == 1
+    assert plantilla_email("bienvenida", marca) is plantilla
+    assert segundos < 2, segundos
+
+
+@pytest.mark.anyio
+async def test_invitacion_multipart_con_marca(smtp):
+    servidor, _ = smtp
+    sufijo = uuid.uuid4().hex[:8]
+    destinatario = f"marca-{sufijo}@example.com"
+    frontend_url_cache.clear()
+    with SessionLocal() as db:
+        admin = Usuario(email=f"marca-admin-{sufijo}@example.com", nombre_completo="Admin")
+        db.add(admin)
+        db.flush()
+        club = Club(nombre="Club Marca", slug=f"marca-{sufijo}", creador_id=admin.id, color_primario="#336699")
+        db.add(club)
+        db.commit()
+        InvitacionService.crear_invitacion(db, club.id, destinatario, creado_por_id=admin.id, nombre_completo="Ana")
+        base_url = EmailService._get_frontend_url(db)
+
+    try:
+        await enviador_emails.vaciar()
+    finally:
+        await enviador_emails.close()
+
+    mensaje = next(m for m in servidor.mensajes if m["para"] == [destinatario])
+    assert mensaje["asunto"] == "Bienvenido a PiarAPP - Invitación a Club Marca"
+    assert set(mensaje["partes"]) == {"text/plain", "text/html"}
+    assert "¡Bienvenido a PiarAPP, Ana!" in mensaje["partes"]["text/plain"]
+    assert f"{base_url}/auth/registrarse-desde-invitacion?token=" in mensaje["partes"]["text/plain"]
+    assert "background-color: #336699" in mensaje["partes"]["text/html"]
@@ -0,0 +1,96 @@
+import time
+import uuid
+
+import httpx
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import event
+
+from app.main import app
+from app.database.db import async_engine
+from app.schemas.auth import Principal
+from app.services.auth_service import principal_cache
+from app.utils.cache import TTLCache
+
+
+async def _register_and_login(client):
+    email = f"principal-{uuid.uuid4().hex[:8]}@example.com"
+    resp = await client.post(
+        "/api/auth/registro",
+        json={"nombre_completo": "Principal User", "email": email, "password": "Password123!"}
+    )
+    assert resp.status_code == 200
+    resp = await client.post("/api/auth/login", json={"email": email, "password": "Password123!"})
+    assert resp.status_code == 200
+    return {"Authorization": f"Bearer {resp.json()['tokens']['access_token']}"}
+
+
+class _ContadorUsuarios:
+    """Cuenta las consultas contra la tabla usuarios"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if "FROM usuarios" in statement:
+            self.total += 1
+
+
+def test_ttl_cache_expira_y_expulsa_lru():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser la más reciente
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+
+
+def test_principal_es_inmutable():
+    principal = Principal(id=1, email="a@example.com", nombre_completo="A")
+    with pytest.raises(ValidationError):
+        principal.es_superadmin = True
+    assert not hasattr(principal, "contraseña_hash")
+
+
+@pytest.mark.anyio
+async def test_peticiones_autenticadas_no_consultan_usuarios():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = await _register_and_login(client)
+        assert (await client.get("/api/auth/usuarios/me", headers=headers)).status_code == 200
+
+        contador = _ContadorUsuarios()
+        event.listen(async_engine.sync_engine, "before_cursor_execute", contador)
+        try:
+            for _ in range(5):
+                resp = await client.get("/api/clubes", headers=headers)
+                assert resp.status_code == 200
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", contador)
+
+    assert contador.total == 0
+
+
+@pytest.mark.anyio
+async def test_actualizar_usuario_invalida_principal():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = await _register_and_login(client)
+        me = (await client.get("/api/auth/usuarios/me", headers=headers)).json()
+        assert principal_cache.get(me["id"]) is not None
+
+        resp = await client.put(
+            "/api/auth/usuarios/me",
+            json={"nombre_completo": "Nombre Nuevo", "dark_mode": True},
+            headers=headers
+        )
+        assert resp.status_code == 200
+
+        me = (await client.get("/api/auth/usuarios/me", headers=headers)).json()
+        assert me["nombre_completo"] == "Nombre Nuevo"
+        assert me["dark_mode"] is True
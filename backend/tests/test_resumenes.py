@@ -0,0 +1,167 @@
+import time
+import uuid
+from datetime import timedelta
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.database.db import SessionLocal
+from app.main import app
+from app.models.club import Club
+from app.models.comentario import Comentario
+from app.models.email_outbox import EmailOutbox
+from app.models.evento import Evento
+from app.models.miembro_club import MiembroClub
+from app.models.noticia import Noticia
+from app.models.usuario import Usuario
+from app.services.email_outbox import ahora
+from app.services.resumen_service import ResumenService
+
+
+def _sembrar():
+    """Dos clubes con novedades y usuarios con distintas preferencias de resumen"""
+    sufijo = uuid.uuid4().hex[:8]
+    with SessionLocal() as db:
+        def usuario(nombre, digest="daily", notificaciones=True):
+            u = Usuario(
+                email=f"resumen-{nombre}-{sufijo}@example.com", nombre_completo=nombre,
+                email_digest=digest, notifications_enabled=notificaciones
+            )
+            db.add(u)
+            return u
+
+        u = {n: usuario(n) for n in ("ana", "bea", "carla", "dani", "sin-club")}
+        u["callado"] = usuario("callado", notificaciones=False)
+        u["semanal"] = usuario("semanal", digest="weekly")
+        db.flush()
+
+        club_a = Club(nombre="Club Alfa", slug=f"alfa-{sufijo}", creador_id=u["ana"].id, color_primario="#aa0000")
+        club_b = Club(nombre="Club Beta", slug=f"beta-{sufijo}", creador_id=u["ana"].id)
+        db.add_all([club_a, club_b])
+        db.flush()
+        for nombre in ("ana", "bea", "carla", "dani", "callado", "semanal"):
+            db.add(MiembroClub(usuario_id=u[nombre].id, club_id=club_a.id, rol="miembro", estado="activo"))
+        db.add(MiembroClub(usuario_id=u["dani"].id, club_id=club_b.id, rol="miembro", estado="activo"))
+
+        hace_un_rato = ahora() - timedelta(hours=2)
+        db.add(Noticia(
+            club_id=club_a.id, autor_id=u["ana"].id, titulo=f"Concurso {sufijo}", contenido="...",
+            estado="publicada", fecha_publicacion=hace_un_rato
+        ))
+        borrador = Noticia(club_id=club_a.id, autor_id=u["ana"].id, titulo=f"Borrador {sufijo}", contenido="...")
+        db.add(borrador)
+        db.add(Evento(
+            club_id=club_a.id, nombre=f"Vuelo nocturno {sufijo}", fecha_inicio=ahora() + timedelta(days=3),
+            fecha_creacion=hace_un_rato
+        ))
+        antigua = Noticia(
+            club_id=club_b.id, autor_id=u["ana"].id, titulo=f"Hangar {sufijo}", contenido="...",
+            estado="publicada", fecha_publicacion=ahora() - timedelta(days=30)
+        )
+        db.add(antigua)
+        db.flush()
+        db.add_all([Comentario(noticia_id=antigua.id, autor_id=u["ana"].id, contenido="!") for _ in range(2)])
+        # Los comentarios en noticias no publicadas no sacan su título en el resumen
+        db.add(Comentario(noticia_id=borrador.id, autor_id=u["ana"].id, contenido="?"))
+        db.commit()
+        return {nombre: (usuario.id, usuario.email) for nombre, usuario in u.items()}, club_a.id, sufijo
+
+
+def _emails(destinatarios):
+    with SessionLocal() as db:
+        return {
+            e.destinatario: e for e in db.scalars(
+                select(EmailOutbox).filter(EmailOutbox.destinatario.in_(destinatarios)).order_by(EmailOutbox.id)
+            )
+        }
+
+
+def test_resumen_agrupa_por_contenido_y_es_incremental():
+    usuarios, club_a, sufijo = _sembrar()
+    correos = [email for _, email in usuarios.values()]
+    hasta = ahora()
+
+    with SessionLocal() as db:
+        estadisticas = ResumenService.generar(db, "daily", hasta=hasta, pagina=2)
+    assert estadisticas.paginas >= 3
+
+    emails = _emails(correos)
+    assert set(emails) == {usuarios[n][1] for n in ("ana", "bea", "carla", "dani")}
+    ana = emails[usuarios["ana"][1]]
+    assert ana.asunto == "Tu resumen diario de PiarAPP"
+    assert f"Concurso {sufijo}" in ana.cuerpo_html and f"Vuelo nocturno {sufijo}" in ana.cuerpo_texto
+    assert f"Borrador {sufijo}" not in ana.cuerpo_html
+    assert "color: #aa0000" in ana.cuerpo_html and "Club Beta" not in ana.cuerpo_html
+    # Mismo contenido, mismo cuerpo
+    assert emails[usuarios["bea"][1]].cuerpo_html == ana.cuerpo_html
+    dani = emails[usuarios["dani"][1]]
+    assert "Club Beta" in dani.cuerpo_html and f"Hangar {sufijo}" in dani.cuerpo_texto
+    assert "(2 comentarios nuevos)" in dani.cuerpo_texto
+
+    with SessionLocal() as db:
+        marcas = dict(db.execute(
+            select(Usuario.email, Usuario.ultimo_resumen).filter(Usuario.email.in_(correos))
+        ).all())
+    assert marcas[usuarios["sin-club"][1]] == hasta
+    assert marcas[usuarios["callado"][1]] is None and marcas[usuarios["semanal"][1]] is None
+
+    # Repetir la misma ejecución no duplica nada
+    with SessionLocal() as db:
+        ResumenService.generar(db, "daily", hasta=hasta)
+    assert len(_emails(correos)) == 4
+
+    # Al día siguiente solo entra lo nuevo
+    with SessionLocal() as db:
+        db.add(Noticia(
+            club_id=club_a, autor_id=usuarios["ana"][0], titulo=f"Resultados {sufijo}", contenido="...",
+            estado="publicada", fecha_publicacion=hasta + timedelta(hours=1)
+        ))
+        db.commit()
+        ResumenService.generar(db, "daily", hasta=hasta + timedelta(days=1))
+    with SessionLocal() as db:
+        cuerpos = {
+            nombre: db.scalars(
+                select(EmailOutbox.cuerpo_html).filter(EmailOutbox.destinatario == usuarios[nombre][1])
+                .order_by(EmailOutbox.id)
+            ).all()
+            for nombre in ("ana", "dani")
+        }
+    assert len(cuerpos["ana"]) == 2
+    assert f"Resultados {sufijo}" in cuerpos["ana"][1] and f"Concurso {sufijo}" not in cuerpos["ana"][1]
+    # Beta no tiene nada nuevo: Dani recibe lo mismo que Ana
+    assert cuerpos["dani"][1] == cuerpos["ana"][1]
+
+
+@pytest.fixture
+def servidor_en_madrid(monkeypatch):
+    """Hora local del proceso en Europe/Madrid (UTC+1/+2)"""
+    monkeypatch.setenv("TZ", "Europe/Madrid")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.anyio
+async def test_noticia_recien_publicada_entra_aunque_el_servidor_no_este_en_utc(crear_club, servidor_en_madrid):
+    sufijo = uuid.uuid4().hex[:8]
+    club = crear_club("husos", nombre="Club Husos")
+    email = club.emails[0]
+    with SessionLocal() as db:
+        db.get(Usuario, club.usuario_id).email_digest = "daily"
+        db.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            f"/api/clubes/{club.id}/noticias",
+            json={"titulo": f"Recién publicada {sufijo}", "contenido": "Publicada justo antes del resumen."},
+            headers=club.headers,
+        )
+    assert resp.status_code == 200
+
+    with SessionLocal() as db:
+        ResumenService.generar(db, "daily", hasta=ahora() + timedelta(seconds=1))
+    emails = _emails([email])
+    assert f"Recién publicada {sufijo}" in emails[email].cuerpo_html
@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.main import app
+from app.database.db import AsyncSessionLocal, SessionLocal
+from app.models.miembro_club import MiembroClub
+from app.models.evento import Evento
+from app.models.asistencia import AsistenciaEvento
+from app.services.asistencia_service import AsistenciaService
+from app.services.membresia_service import MembresiaService
+
+RSVPS = 1000
+AFORO = 50
+
+
+def _crear_escenario(crear_club, num_usuarios: int, aforo: int):
+    """Club con N socios activos (con su token) y un evento con aforo"""
+    club = crear_club("rsvp", num_usuarios, rol_creador="miembro", nombre="Club RSVP")
+    with SessionLocal() as db:
+        evento = Evento(
+            club_id=club.id,
+            nombre="Evento con aforo",
+            descripcion="Evento para la prueba de aforo",
+            fecha_inicio=datetime.now() + timedelta(days=3),
+            aforo_maximo=aforo
+        )
+        db.add(evento)
+        db.commit()
+        return club.id, evento.id, club.usuarios, club.tokens
+
+
+def _estado_evento(evento_id: int):
+    """(contadores del evento, nº real de asistencias por estado)"""
+    db = SessionLocal()
+    try:
+        evento = db.get(Evento, evento_id)
+        asistencias = db.query(AsistenciaEvento).filter(AsistenciaEvento.evento_id == evento_id).all()
+        reales = {
+            estado: sum(1 for a in asistencias if a.estado == estado)
+            for estado in ("inscrito", "lista_espera", "cancelado")
+        }
+        contadores = {
+            "inscrito": evento.inscritos_count,
+            "lista_espera": evento.lista_espera_count,
+            "cancelado": evento.cancelados_count,
+        }
+        return contadores, reales
+    finally:
+        db.close()
+
+
+async def _rsvp(client, club_id, evento_id, token, estado="inscrito"):
+    return await client.post(
+        f"/api/clubes/{club_id}/eventos/{evento_id}/asistencia",
+        json={"estado": estado},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+
+@pytest.mark.anyio
+async def test_mil_rsvp_concurrentes_admiten_exactamente_el_aforo(crear_club):
+    club_id, evento_id, _, tokens = _crear_escenario(crear_club, RSVPS, aforo=AFORO)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        respuestas = await asyncio.gather(*[_rsvp(client, club_id, evento_id, t) for t in tokens])
+
+    assert all(r.status_code == 200 for r in respuestas)
+    estados = [r.json()["estado"] for r in respuestas]
+    assert estados.count("inscrito") == AFORO
+    assert estados.count("lista_espera") == RSVPS - AFORO
+
+    contadores, reales = _estado_evento(evento_id)
+    assert reales == {"inscrito": AFORO, "lista_espera": RSVPS - AFORO, "cancelado": 0}
+    assert contadores == reales
+
+
+@pytest.mark.anyio
+async def test_reserva_atomica_sin_cola_de_escritura(crear_club):
+    """Sesiones independientes (como varios procesos) tampoco superan el aforo"""
+    aforo = 5
+    _, evento_id, usuario_ids, _ = _crear_escenario(crear_club, 60, aforo=aforo)
+
+    async def inscribir(usuario_id):
+        async with AsyncSessionLocal() as db:
+            asistencia = await AsistenciaService.registrar(db, evento_id, usuario_id, "inscrito")
+            await db.commit()
+            return asistencia.estado
+
+    estados = await asyncio.gather(*[inscribir(u) for u in usuario_ids])
+
+    assert estados.count("inscrito") == aforo
+    contadores, reales = _estado_evento(evento_id)
+    assert reales["inscrito"] == aforo
+    assert contadores == reales
+
+
+@pytest.mark.anyio
+async def test_cancelar_promueve_lista_de_espera_en_orden(crear_club):
+    club_id, evento_id, usuario_ids, tokens = _crear_escenario(crear_club, 5, aforo=2)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Llegada secuencial: 0 y 1 obtienen plaza, 2, 3 y 4 esperan en ese orden
+        for token in tokens:
+            await _rsvp(client, club_id, evento_id, token)
+
+        # 2 se borra de la espera y vuelve: pasa al final de la cola
+        await _rsvp(client, club_id, evento_id, tokens[2], "cancelado")
+        resp = await _rsvp(client, club_id, evento_id, tokens[2])
+        assert resp.json()["estado"] == "lista_espera"
+
+        # Se libera una plaza: entra 3 (el primero en la cola), no 2
+        resp = await _rsvp(client, club_id, evento_id, tokens[0], "cancelado")
+        assert resp.json()["estado"] == "cancelado"
+        resp = await client.get(
+            f"/api/clubes/{club_id}/eventos/{evento_id}/mi-asistencia",
+            headers={"Authorization": f"Bearer {tokens[3]}"}
+        )
+        assert resp.json()["estado"] == "inscrito"
+
+        # Ampliar el aforo da las plazas nuevas a la lista de espera
+        with SessionLocal() as db:
+            db.query(MiembroClub).filter(
+                MiembroClub.usuario_id == usuario_ids[1],
+                MiembroClub.club_id == club_id
+            ).update({"rol": "administrador"})
+            db.commit()
+        MembresiaService.invalidar(usuario_ids[1])
+        resp = await client.put(
+            f"/api/clubes/{club_id}/eventos/{evento_id}",
+            json={"aforo_maximo": 4},
+            headers={"Authorization": f"Bearer {tokens[1]}"}
+        )
+        assert resp.status_code == 200
+        assert resp.json()["inscritos_count"] == 4
+
+    contadores, reales = _estado_evento(evento_id)
+    assert reales == {"inscrito": 4, "lista_espera": 0, "cancelado": 1}
+    assert contadores == reales
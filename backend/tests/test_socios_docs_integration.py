@@ -1,3 +1,4 @@
+import io
 import os
 # Set env var BEFORE importing app
 os.environ["DATABASE_URL"] = "sqlite:///./test_temp_integration.db"
@@ -5,11 +6,13 @@ os.environ["DATABASE_URL"] = "sqlite:///./test_temp_integration.db"
 import pytest
 from fastapi import status
 from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from fastapi.testclient import TestClient
+from PIL import Image
 
-from app.database.db import Base, get_db
+from app.database.db import Base, get_db, get_async_db
 from app.main import app
 from app.models.socio import Socio
 from app.models.documentacion_reglamentaria import DocumentacionReglamentaria
@@ -17,14 +20,19 @@ from app.models.usuario import Usuario
 from app.models.club import Club
 from app.models.miembro_club import MiembroClub
 
-# Use in-memory SQLite for tests
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Use in-memory SQLite for tests (shared cache so the async engine sees the same DB)
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:socios_docs_integration?mode=memory&cache=shared&uri=true"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
     connect_args={"check_same_thread": False},
     poolclass=StaticPool
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///file:socios_docs_integration?mode=memory&cache=shared&uri=true",
+    poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 def override_get_db():
     try:
@@ -33,7 +41,12 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture(scope="module")
 def client():
@@ -178,14 +191,18 @@ def test_socio_flow(client, auth_headers, admin_headers):
     socio_id = response.json()["id"]
 
     # 4. Upload Photo
-    files = {'file': ('photo.jpg', b'photoblob', 'image/jpeg')}
+    foto = io.BytesIO()
+    Image.new("RGB", (40, 30), (200, 30, 30)).save(foto, "PNG")
+    files = {'file': ('photo.png', foto.getvalue(), 'image/png')}
     response = client.post(f"/api/socios/{socio_id}/foto", files=files, headers=admin_headers)
     assert response.status_code == 200
 
     # 5. Get Photo
     response = client.get(f"/api/socios/{socio_id}/foto")
     assert response.status_code == 200
-    assert response.content == b'photoblob'
+    # Se guarda normalizada: una PNG sin transparencia pasa a JPEG
+    assert response.content.startswith(b"\xff\xd8")
+    assert Image.open(io.BytesIO(response.content)).size == (40, 30)
     assert response.headers["content-type"] == "image/jpeg"
 
     # 6. Delete Socio
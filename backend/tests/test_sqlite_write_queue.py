@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import func, text
+
+from app.main import app
+from app.database.db import SessionLocal, engine
+from app.config import settings
+from app.models.evento import Evento
+from app.models.asistencia import AsistenciaEvento
+
+WRITERS = 200
+
+
+def _crear_escenario(crear_club, num_usuarios: int, aforo: int):
+    """Club con N socios activos (con su token) y un evento con aforo"""
+    club = crear_club("wq", num_usuarios, rol_creador="miembro", nombre="Club Write Queue")
+    with SessionLocal() as db:
+        evento = Evento(
+            club_id=club.id,
+            nombre="Evento concurrido",
+            fecha_inicio=datetime.now() + timedelta(days=3),
+            aforo_maximo=aforo
+        )
+        db.add(evento)
+        db.commit()
+        return club.id, evento.id, club.tokens
+
+
+def _contar(evento_id: int, estado: str) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(func.count(AsistenciaEvento.id)).filter(
+            AsistenciaEvento.evento_id == evento_id,
+            AsistenciaEvento.estado == estado
+        ).scalar()
+    finally:
+        db.close()
+
+
+def test_sqlite_pragmas_aplicados():
+    if engine.dialect.name != "sqlite":
+        pytest.skip("Solo aplica a SQLite")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == settings.sqlite_busy_timeout_ms
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -settings.sqlite_cache_size_kb
+        if ":memory:" not in settings.database_url:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+
+@pytest.mark.anyio
+async def test_rsvp_concurrentes_sin_bloqueos(crear_club):
+    club_id, evento_id, tokens = _crear_escenario(crear_club, WRITERS, aforo=WRITERS * 2)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        respuestas = await asyncio.gather(*[
+            client.post(
+                f"/api/clubes/{club_id}/eventos/{evento_id}/asistencia",
+                json={"estado": "inscrito"},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            for token in tokens
+        ])
+
+    errores = [r.text for r in respuestas if r.status_code != 200]
+    assert not errores, errores[:3]
+    assert _contar(evento_id, "inscrito") == WRITERS
+
+
+@pytest.mark.anyio
+async def test_rsvp_concurrentes_respetan_aforo(crear_club):
+    aforo = WRITERS // 4
+    club_id, evento_id, tokens = _crear_escenario(crear_club, WRITERS, aforo=aforo)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        respuestas = await asyncio.gather(*[
+            client.post(
+                f"/api/clubes/{club_id}/eventos/{evento_id}/asistencia",
+                json={"estado": "inscrito"},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            for token in tokens
+        ])
+
+    assert all(r.status_code == 200 for r in respuestas)
+    estados = [r.json()["estado"] for r in respuestas]
+    assert estados.count("inscrito") == aforo
+    assert estados.count("lista_espera") == WRITERS - aforo
+    assert _contar(evento_id, "inscrito") == aforo
@@ -0,0 +1,168 @@
+import hashlib
+import io
+import os
+
+import httpx
+import pytest
+from starlette.datastructures import UploadFile
+from PIL import Image
+
+from app.main import app
+from app.config import settings
+from app.database.db import SessionLocal
+from app.models.blob import Blob
+from app.models.documentacion_reglamentaria import DocumentacionReglamentaria
+from app.models.socio import Socio
+from app.utils.blob_store import blob_store
+
+
+@pytest.fixture(autouse=True)
+def almacen_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "directorio", tmp_path / "blobs")
+
+
+@pytest.fixture
+def lecturas(monkeypatch):
+    """Tamaños pedidos en cada UploadFile.read() de la petición"""
+    pedidas = []
+    leer = UploadFile.read
+
+    async def read(self, size: int = -1):
+        pedidas.append(size)
+        return await leer(self, size)
+
+    monkeypatch.setattr(UploadFile, "read", read)
+    return pedidas
+
+
+def _crear_usuario(crear_club):
+    """Superadmin con un socio; devuelve (usuario_id, socio_id, headers)"""
+    club = crear_club("subida", rol_creador=None, superadmin=True, nombre="Club Subidas")
+    with SessionLocal() as db:
+        socio = Socio(club_id=club.id, usuario_id=club.usuario_id, nombre="Socio Subidas", email=club.emails[0])
+        db.add(socio)
+        db.commit()
+        return club.usuario_id, socio.id, club.headers
+
+
+def _temporales():
+    directorio = blob_store.directorio / ".tmp"
+    return list(directorio.iterdir()) if directorio.is_dir() else []
+
+
+@pytest.mark.anyio
+async def test_documentos_se_reciben_por_trozos_con_hash_al_vuelo(crear_club, lecturas):
+    usuario_id, _, headers = _crear_usuario(crear_club)
+    pdf = b"%PDF-1.4 " + os.urandom(1_000_000)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/api/documentacion/me",
+            files={"rc_archivo": ("rc.pdf", pdf, "application/pdf")},
+            headers=headers
+        )
+    assert resp.status_code == 200
+    assert resp.json()["rc_tiene_archivo"] is True
+
+    # Nunca se lee la subida entera: solo trozos del tamaño configurado
+    assert lecturas
+    assert set(lecturas) == {settings.blob_stream_chunk_size}
+
+    sha256 = hashlib.sha256(pdf).hexdigest()
+    with SessionLocal() as db:
+        doc = db.query(DocumentacionReglamentaria).filter_by(usuario_id=usuario_id).one()
+        assert (doc.rc_archivo_sha256, doc.rc_archivo_tamano) == (sha256, len(pdf))
+        assert doc.rc_archivo_nombre == "rc.pdf"
+    with blob_store.abrir(sha256) as f:
+        assert f.read() == pdf
+    assert _temporales() == []
+
+
+@pytest.mark.anyio
+async def test_subidas_que_superan_el_limite_se_cortan_con_413(crear_club, monkeypatch, lecturas):
+    monkeypatch.setattr(settings, "max_upload_size", 200_000)
+    usuario_id, _, headers = _crear_usuario(crear_club)
+    pdf = b"%PDF-1.4 " + os.urandom(1_000_000)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/api/documentacion/me",
+            data={"rc_numero": "RC-1"},
+            files={
+                "rc_archivo": ("rc.pdf", b"%PDF-1.4 corto", "application/pdf"),
+                "carnet_archivo": ("carnet.pdf", pdf, "application/pdf")
+            },
+            headers=headers
+        )
+    assert resp.status_code == 413
+
+    # Se deja de leer en cuanto se pasa el límite
+    assert len(lecturas) <= 200_000 // settings.blob_stream_chunk_size + 3
+
+    # Ni fila, ni referencias, ni archivos en el almacén, ni temporales
+    with SessionLocal() as db:
+        assert db.query(DocumentacionReglamentaria).filter_by(usuario_id=usuario_id).first() is None
+        assert db.get(Blob, hashlib.sha256(pdf).hexdigest()) is None
+    assert list(blob_store.listar()) == []
+    assert _temporales() == []
+
+
+@pytest.mark.anyio
+async def test_cuerpos_demasiado_grandes_no_se_llegan_a_recibir(crear_club, monkeypatch, lecturas):
+    monkeypatch.setattr(settings, "max_upload_size", 100_000)
+    _, _, headers = _crear_usuario(crear_club)
+    url = "/api/documentacion/me"
+    limite = 2 * settings.max_upload_size
+    pdf = b"%PDF-1.4 " + os.urandom(2_000_000)
+    frontera = "piar-frontera"
+    cuerpo = (
+        f'--{frontera}\r\nContent-Disposition: form-data; name="rc_archivo"; filename="rc.pdf"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + pdf + f"\r\n--{frontera}--\r\n".encode()
+    cabeceras = {**headers, "Content-Type": f"multipart/form-data; boundary={frontera}"}
+    enviados = []
+
+    async def por_trozos():
+        for inicio in range(0, len(cuerpo), 64 * 1024):
+            enviados.append(inicio)
+            yield cuerpo[inicio:inicio + 64 * 1024]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Con Content-Length: 413 sin leer el cuerpo
+        resp = await client.post(url, content=cuerpo, headers=cabeceras)
+        assert resp.status_code == 413
+
+        # Sin Content-Length (chunked): se corta en cuanto se pasa del límite
+        resp = await client.post(url, content=por_trozos(), headers=cabeceras)
+        assert resp.status_code == 413
+
+    assert lecturas == []
+    assert len(enviados) * 64 * 1024 <= limite + 2 * 64 * 1024 + 64 * 1024
+    assert len(enviados) < len(cuerpo) // (64 * 1024)
+    assert _temporales() == []
+
+
+@pytest.mark.anyio
+async def test_fotos_tienen_su_propio_limite(crear_club, monkeypatch):
+    monkeypatch.setattr(settings, "max_foto_upload_size", 50_000)
+    _, socio_id, headers = _crear_usuario(crear_club)
+
+    grande, pequena = io.BytesIO(), io.BytesIO()
+    Image.frombytes("RGB", (300, 300), os.urandom(300 * 300 * 3)).save(grande, "PNG")
+    Image.new("RGB", (300, 300), tuple(os.urandom(3))).save(pequena, "PNG")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        url = f"/api/socios/{socio_id}/foto"
+        resp = await client.post(url, files={"file": ("g.png", grande.getvalue(), "image/png")}, headers=headers)
+        assert resp.status_code == 413
+
+        resp = await client.post(url, files={"file": ("p.png", pequena.getvalue(), "image/png")}, headers=headers)
+        assert resp.status_code == 200
+
+    with SessionLocal() as db:
+        assert db.get(Socio, socio_id).foto_carnet_sha256 is not None
+    assert _temporales() == []
@@ -39,7 +39,7 @@ export default function FacilityManager({ clubId }: { clubId: number }) {
       }
 
       // Cargar historial
-      const hist = await APIService.get<FacilityHistory[]>(`/clubes/${clubId}/instalacion/history`)
+      const hist = await APIService.getAll<FacilityHistory>(`/clubes/${clubId}/instalacion/history`)
       setHistory(hist)
     } catch (err) {
       console.error("Error loading facility data", err)
@@ -30,6 +30,10 @@ export default function OpenClawChat({ clubId, clubName }: OpenClawChatProps) {
   const [isDebugging, setIsDebugging] = useState(false);
   const [connectionStatus, setConnectionStatus] = useState<'checking' | 'online' | 'offline'>('checking');
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  // Respuesta en curso: se cancela al desmontar para que el backend pare el chat
+  const streamRef = useRef<AbortController | null>(null);
+
+  useEffect(() => () => streamRef.current?.abort(), []);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -173,17 +177,37 @@ export default function OpenClawChat({ clubId, clubName }: OpenClawChatProps) {
         ]
       };
 
-      const res = await APIService.post<{reply: string}>('/chat/openclaw', chatPayload);
-      const botReply = extractText(res.reply);
+      // La respuesta se muestra según llega (text/event-stream)
+      const botId = (Date.now() + 1).toString();
+      let botText = '';
+      let failed = false;
+      const controller = new AbortController();
+      streamRef.current = controller;
 
-      const botMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        sender: 'bot',
-        text: botReply,
-        timestamp: new Date()
-      };
-      setMessages(prev => [...prev, botMessage]);
+      await APIService.postStream('/chat/openclaw/stream', chatPayload, (event, data) => {
+        if (event === 'delta') {
+          botText += data.text;
+        } else if (event === 'done') {
+          botText = data.reply;
+        } else if (event === 'error') {
+          failed = true;
+          console.error('Error en el chat de OpenClaw:', data.detail);
+          return;
+        } else {
+          return;
+        }
+        const text = extractText(botText);
+        setIsLoading(false);
+        setMessages(prev => prev.some(m => m.id === botId)
+          ? prev.map(m => m.id === botId ? { ...m, text } : m)
+          : [...prev, { id: botId, sender: 'bot', text, timestamp: new Date() }]);
+      }, controller.signal);
+
+      if (failed && !botText) {
+        throw new Error('OpenClaw no respondió');
+      }
     } catch (error) {
+      if ((error as Error).name === 'AbortError') return;
       console.error('Error sending message:', error);
       const errorMessage: Message = {
         id: (Date.now() + 1).toString(),
@@ -193,6 +217,7 @@ export default function OpenClawChat({ clubId, clubName }: OpenClawChatProps) {
       };
       setMessages(prev => [...prev, errorMessage]);
     } finally {
+      streamRef.current = null;
       setIsLoading(false);
     }
   };
@@ -108,7 +108,7 @@ export default function ClubDetail() {
         // Cargar todo en paralelo
         const [clubData, miembrosData, sociosList, noticiasData, eventosData, contenidoRecienteData] = await Promise.all([
           APIService.get<Club>(`/clubes/${id}`),
-          APIService.get<Miembro[]>(`/clubes/${id}/miembros`),
+          APIService.getAll<Miembro>(`/clubes/${id}/miembros`),
           SocioService.getSociosByClub(id).catch(() => []) as Promise<Socio[]>,
           NewsService.getAll(id, 0, 5),    // Traer últimos 5
           EventService.getAll(id, 0, 5),    // Traer últimos 5
@@ -176,7 +176,7 @@ export default function ClubDetail() {
       const results = await Promise.all(
         sociosWithPhoto.map(async (socio) => [
           socio.usuario_id,
-          await SocioService.fetchFotoBlob(socio.id)
+          await SocioService.fetchFotoBlob(socio.id, 64)
         ] as const)
       )
 
@@ -86,7 +86,7 @@ export default function ClubMembers() {
       const results = await Promise.all(
         sociosWithPhoto.map(async (socio) => [
           socio.usuario_id,
-          await SocioService.fetchFotoBlob(socio.id)
+          await SocioService.fetchFotoBlob(socio.id, 64)
         ] as const)
       )
 
@@ -122,7 +122,7 @@ export default function ClubMembers() {
       setError(null)
       const [clubData, miembrosData, sociosList] = await Promise.all([
         APIService.get<Club>(`/clubes/${clubId}`),
-        APIService.get<Miembro[]>(`/clubes/${clubId}/miembros?include_inactivos=true`),
+        APIService.getAll<Miembro>(`/clubes/${clubId}/miembros?include_inactivos=true`),
         SocioService.getSociosByClub(Number(clubId)).catch(() => []) as Promise<Socio[]>
       ])
       
@@ -66,6 +66,33 @@ export class APIService {
     return response.json() as Promise<T>
   }
 
+  /**
+   * GET de un listado paginado por cursor: sigue la cabecera X-Next-Cursor
+   * hasta la última página y devuelve todos los elementos
+   */
+  static async getAll<T>(endpoint: string, options?: FetchOptions): Promise<T[]> {
+    const items: T[] = []
+    let cursor: string | null = null
+
+    do {
+      const separator = endpoint.includes('?') ? '&' : '?'
+      const url: string = cursor ? `${endpoint}${separator}cursor=${encodeURIComponent(cursor)}` : endpoint
+      const response = await this.request(url, {
+        ...options,
+        method: 'GET'
+      })
+
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`)
+      }
+
+      items.push(...((await response.json()) as T[]))
+      cursor = response.headers.get('X-Next-Cursor')
+    } while (cursor)
+
+    return items
+  }
+
   /**
    * Realiza un POST request
    */
@@ -132,6 +159,53 @@ export class APIService {
     return response.json() as Promise<T>
   }
 
+  /**
+   * Realiza un POST cuya respuesta es text/event-stream y llama a onEvent
+   * con cada evento según llega. Abortar signal cierra la conexión.
+   */
+  static async postStream(
+    endpoint: string,
+    data: any,
+    onEvent: (event: string, data: any) => void,
+    signal?: AbortSignal
+  ): Promise<void> {
+    const response = await this.request(endpoint, {
+      method: 'POST',
+      body: JSON.stringify(data),
+      headers: { Accept: 'text/event-stream' },
+      signal
+    })
+
+    if (!response.ok || !response.body) {
+      const error = await response.json().catch(() => ({}))
+      throw new Error(error.detail || `HTTP ${response.status}`)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    for (;;) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+
+      // Los eventos terminan en una línea vacía
+      let end = buffer.indexOf('\n\n')
+      while (end !== -1) {
+        const block = buffer.slice(0, end)
+        buffer = buffer.slice(end + 2)
+        let event = 'message'
+        let payload = ''
+        for (const line of block.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7)
+          else if (line.startsWith('data: ')) payload += line.slice(6)
+        }
+        onEvent(event, payload ? JSON.parse(payload) : null)
+        end = buffer.indexOf('\n\n')
+      }
+    }
+  }
+
   /**
    * Usa el refresh token para obtener un nuevo access token
    */
@@ -23,7 +23,7 @@ export const NewsService = {
   },
 
   getComments: async (clubId: number, noticiaId: number): Promise<Comentario[]> => {
-    return APIService.get<Comentario[]>(`/clubes/${clubId}/noticias/${noticiaId}/comentarios`);
+    return APIService.getAll<Comentario>(`/clubes/${clubId}/noticias/${noticiaId}/comentarios`);
   },
 
   postComment: async (clubId: number, noticiaId: number, contenido: string): Promise<Comentario> => {
@@ -41,7 +41,7 @@ export interface SocioUpdate {
 
 const SocioService = {
   getSociosByClub: async (clubId: number): Promise<Socio[]> => {
-    return APIService.get<Socio[]>(`/socios/?club_id=${clubId}`);
+    return APIService.getAll<Socio>(`/socios/?club_id=${clubId}`);
   },
 
   getSocioById: async (socioId: number): Promise<Socio> => {
@@ -77,10 +77,12 @@ const SocioService = {
     }
   },
   
-  fetchFotoBlob: async (socioId: number): Promise<string> => {
+  // size: miniatura WebP de 64, 256 o 512 px (los listados solo cargan miniaturas)
+  fetchFotoBlob: async (socioId: number, size?: 64 | 256 | 512): Promise<string> => {
       const token = localStorage.getItem('access_token');
+      const query = size ? `?size=${size}` : '';
       try {
-        const response = await fetch(`${API_BASE_URL}/socios/${socioId}/foto`, {
+        const response = await fetch(`${API_BASE_URL}/socios/${socioId}/foto${query}`, {
             headers: { 'Authorization': `Bearer ${token}` }
         });
         